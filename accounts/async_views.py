@@ -0,0 +1,88 @@
+"""
+Async versions of the DRF views, for the read endpoints served natively
+under ASGI (see gunicorn.conf.py).
+
+DRF's dispatch is synchronous, so AsyncAPIView replaces it: authentication,
+permissions and throttling still run through APIView.initial(), in a thread
+because the token lookup may hit the database, and the handler is awaited on
+the event loop. Handlers use Django's async ORM interface (aget, async for);
+code shared with sync callers is run with sync_to_async.
+
+Django requires every handler of a view to be either sync or async, so an
+async view that also writes has async put/patch/delete that run the usual
+sync implementation in a thread. Under WSGI the same views still work: Django
+runs them with async_to_sync.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
+from rest_framework import generics
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """An APIView whose handlers are coroutines."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            # options() and http_method_not_allowed() are DRF's sync ones
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncRetrieveUpdateDestroyAPIView(AsyncAPIView, generics.RetrieveUpdateDestroyAPIView):
+    """
+    Reads the object with the async ORM. Writes keep the sync
+    UpdateModelMixin / DestroyModelMixin code, run in a thread.
+    """
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = await aget_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def get(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        # Serializer fields may still read relations that weren't prefetched
+        data = await sync_to_async(lambda: serializer.data)()
+        return Response(data)
+
+    async def put(self, request, *args, **kwargs):
+        return await sync_to_async(self.update)(request, *args, **kwargs)
+
+    async def patch(self, request, *args, **kwargs):
+        return await sync_to_async(self.partial_update)(request, *args, **kwargs)
+
+    async def delete(self, request, *args, **kwargs):
+        return await sync_to_async(self.destroy)(request, *args, **kwargs)
@@ -0,0 +1,227 @@
+"""
+Token authentication with the token -> user lookup cached.
+
+DRF's TokenAuthentication joins authtoken_token to accounts_user on every
+request. CachedTokenAuthentication keeps, per token key, a snapshot of the
+user's id, member number and permission flags (SNAPSHOT_FIELDS):
+
+- in process, for AUTH_TOKEN_CACHE_TTL seconds (0 turns caching off), up to
+  AUTH_TOKEN_CACHE_MAX_ENTRIES tokens, least recently used dropped first;
+- optionally in the Django cache too, for AUTH_TOKEN_SHARED_CACHE_TTL seconds
+  (0, the default, leaves it out), so workers sharing a Redis/Memcached cache
+  share lookups. Keys are stored hashed.
+
+request.user is a User built from the snapshot with its other fields
+deferred: reading one of those (e.g. email) loads it from the database, and
+saving it writes only the loaded fields.
+
+Saving or deleting a user and deleting a token (logout) invalidate the
+user's entries (see accounts.signals), here and in the shared cache, so a
+password change, AdminResetPasswordView or a flag update takes effect on
+the next request. Other workers' in-process entries can't be reached and
+expire within AUTH_TOKEN_CACHE_TTL. Updates through QuerySet.update() send
+no signals and also wait for the TTL.
+
+Hits, misses and invalidations are counted per process and reported by the
+metrics endpoints.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+SNAPSHOT_FIELDS = tuple(
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname
+    in {
+        "id",
+        "member_no",
+        "is_approved",
+        "is_staff",
+        "is_superuser",
+        "is_member",
+        "is_system_admin",
+        "is_active",
+    }
+)
+USER_ID = SNAPSHOT_FIELDS.index("id")
+KEY_PREFIX = "authtoken"
+
+TTL = 30
+SHARED_TTL = 0
+MAX_ENTRIES = 10000
+
+
+def shared_key(key):
+    return f"{KEY_PREFIX}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def user_key(user_id):
+    return f"{KEY_PREFIX}:user:{user_id}"
+
+
+class TokenCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # token key -> (expires, snapshot)
+        self._keys = {}  # user id -> token keys
+        # Bumped by every invalidation, so a lookup that raced one isn't stored
+        self._generation = 0
+        self.reset_stats()
+
+    @property
+    def ttl(self):
+        return getattr(settings, "AUTH_TOKEN_CACHE_TTL", TTL)
+
+    @property
+    def shared_ttl(self):
+        return getattr(settings, "AUTH_TOKEN_SHARED_CACHE_TTL", SHARED_TTL)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats_counts = {
+                "local_hits": 0,
+                "shared_hits": 0,
+                "misses": 0,
+                "invalidations": 0,
+            }
+
+    def _count(self, name):
+        with self._lock:
+            self.stats_counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.stats_counts)
+            size = len(self._entries)
+        lookups = counts["local_hits"] + counts["shared_hits"] + counts["misses"]
+        hits = counts["local_hits"] + counts["shared_hits"]
+        return {
+            **counts,
+            "lookups": lookups,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._generation += 1
+
+    # ------------------------------------------------------------------
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, snapshot = entry
+            if expires <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return snapshot
+
+    def _drop(self, key):
+        expires, snapshot = self._entries.pop(key)
+        keys = self._keys.get(snapshot[USER_ID])
+        if keys:
+            keys.discard(key)
+            if not keys:
+                del self._keys[snapshot[USER_ID]]
+
+    def _set_local(self, key, snapshot, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, snapshot)
+            self._keys.setdefault(snapshot[USER_ID], set()).add(key)
+            limit = getattr(settings, "AUTH_TOKEN_CACHE_MAX_ENTRIES", MAX_ENTRIES)
+            while len(self._entries) > limit:
+                self._drop(next(iter(self._entries)))
+
+    def load(self, key):
+        return (
+            Token.objects.filter(key=key)
+            .values_list(*(f"user__{name}" for name in SNAPSHOT_FIELDS))
+            .first()
+        )
+
+    def get(self, key):
+        """The user snapshot for the token `key`, or None if there's no such token."""
+        if self.ttl <= 0:
+            self._count("misses")
+            return self.load(key)
+
+        snapshot = self._get_local(key)
+        if snapshot is not None:
+            self._count("local_hits")
+            return snapshot
+
+        generation = self._generation
+        if self.shared_ttl > 0:
+            snapshot = cache.get(shared_key(key))
+            if snapshot is not None:
+                self._count("shared_hits")
+                self._set_local(key, snapshot, generation)
+                return snapshot
+
+        self._count("misses")
+        snapshot = self.load(key)
+        if snapshot is None:
+            return None
+        self._set_local(key, snapshot, generation)
+        if self.shared_ttl > 0:
+            cache.set(shared_key(key), snapshot, self.shared_ttl)
+            cache.set(user_key(snapshot[USER_ID]), key, self.shared_ttl)
+        return snapshot
+
+    # ------------------------------------------------------------------
+    def invalidate_user(self, user_id):
+        """Drop the user's tokens now and, inside a transaction, again on commit."""
+        self._count("invalidations")
+        self._invalidate(user_id)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self._invalidate(user_id))
+
+    def _invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            for key in list(self._keys.get(user_id, ())):
+                self._drop(key)
+        if self.shared_ttl > 0:
+            key = cache.get(user_key(user_id))
+            if key is not None:
+                cache.delete_many([shared_key(key), user_key(user_id)])
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, answered from token_cache where possible."""
+
+    def authenticate_credentials(self, key):
+        snapshot = token_cache.get(key)
+        if snapshot is None:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        user = User.from_db(User.objects.db, SNAPSHOT_FIELDS, snapshot)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        return (user, Token(key=key, user=user))
@@ -107,6 +107,9 @@ class User(
         verbose_name = "User"
         verbose_name_plural = "Users"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.member_no} - {self.first_name} {self.last_name}"
@@ -0,0 +1,200 @@
+"""
+Pagination for the large, append-only lists (transactions and members).
+
+Page-number pagination stays the default so existing clients keep working, but
+`?page=500` makes the database walk and throw away 49,900 rows and every page
+pays for a full COUNT(*). Two opt-ins avoid that:
+
+- `?cursor=...` (or `?pagination=cursor` for the first page) switches to keyset
+  pagination on `(created_at, id)`. Each page is an index range scan that
+  starts where the previous one stopped, so page 500 costs the same as page 1.
+- `?count=estimate` replaces COUNT(*) with the planner's row estimate on
+  PostgreSQL. Small results are still counted exactly, since estimates are
+  only worth trusting on big tables. Other backends always count exactly.
+"""
+
+import base64
+import json
+from collections import OrderedDict
+from uuid import UUID
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+EXACT_COUNT_BELOW = 10000
+
+
+def estimated_count(queryset, exact_below=EXACT_COUNT_BELOW):
+    """
+    Planner row estimate for `queryset` on PostgreSQL, falling back to an
+    exact count on other backends or when the estimate is small.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        rows = int(plan[0]["Plan"]["Plan Rows"])
+        if rows >= exact_below:
+            return rows
+    return queryset.count()
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+
+class KeysetPagination:
+    """
+    Keyset pagination on `(created_at, id)`, newest first.
+
+    The cursor holds the boundary row's `created_at` and `id` plus the
+    direction, so rows created between requests never shift a page.
+    """
+
+    ordering = ("created_at", "id")
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, page_size, count_mode=None):
+        self.page_size = page_size
+        self.count_mode = count_mode
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            direction, created_at, pk = raw.split("|")
+            created_at = parse_datetime(created_at)
+            if direction not in ("n", "p") or created_at is None:
+                raise ValueError
+            return direction == "p", created_at, UUID(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def make_cursor(row, reverse=False):
+        raw = f"{'p' if reverse else 'n'}|{row.created_at.isoformat()}|{row.pk}"
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def encode_cursor(self, row, reverse):
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.make_cursor(row, reverse)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.count = None
+        if self.count_mode == "estimate":
+            self.count = estimated_count(queryset)
+        elif self.count_mode == "exact":
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor[0])
+        created, pk = self.ordering
+        if reverse:
+            queryset = queryset.order_by(created, pk)
+        else:
+            queryset = queryset.order_by(f"-{created}", f"-{pk}")
+
+        if cursor:
+            # (created_at, id) < (ts, pk), spelled with a plain range on
+            # created_at first so the planner can use it as the index bound.
+            _, created_at, boundary = cursor
+            op = "gt" if reverse else "lt"
+            queryset = queryset.filter(
+                Q(**{f"{created}__{op}e": created_at}),
+                Q(**{f"{created}__{op}": created_at})
+                | Q(**{f"{pk}__{op}": boundary}),
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Coming back from a later page means there is always a next page,
+        # and the same goes for previous pages when walking forwards.
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = has_more if reverse else cursor is not None
+        self.rows = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self.encode_cursor(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.rows:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+
+class LargeTablePagination(PageNumberPagination):
+    """
+    Page numbers by default, keyset pagination on request. See the module
+    docstring for the query parameters.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    mode_query_param = "pagination"
+    count_query_param = "count"
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param)
+        return mode if mode in ("estimate", "exact") else None
+
+    def use_keyset(self, request):
+        return (
+            KeysetPagination.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == "cursor"
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = KeysetPagination(
+                self.get_page_size(request), self.get_count_mode(request)
+            )
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        self.django_paginator_class = (
+            EstimatedCountPaginator
+            if self.get_count_mode(request) == "estimate"
+            else Paginator
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -28,3 +28,16 @@ class IsSystemAdminOrReadOnly(BasePermission):
             and request.user.is_system_admin
             or request.user.is_superuser
         )
+
+
+class IsSystemAdminOrOwnRecord(BasePermission):
+    """System admins, or the member whose member_no is in the URL."""
+
+    def has_permission(self, request, view):
+        if not request.user.is_authenticated:
+            return False
+        return (
+            request.user.is_system_admin
+            or request.user.is_superuser
+            or request.user.member_no == view.kwargs.get("member_no")
+        )
@@ -0,0 +1,293 @@
+"""
+The member profile returned by UserDetailView and MemberDetailView.
+
+By default a profile carries the member's details and a summary of each
+account (balances, no history), so its size and query count don't grow with
+the member's history. Two query parameters shape it on GET:
+
+- `?fields=first_name,savings_accounts` keeps only the listed top-level
+  fields, and only the accounts listed are fetched;
+- `?expand=savings_deposits,loan_repayments` adds the listed collections
+  from EXPANSIONS, newest first, a page each: `?page_size=` (default
+  PAGE_SIZE, up to MAX_PAGE_SIZE) and `?<name>_page=` pick the page.
+
+Each expansion costs a count and a page query, with the related rows its
+serializer reads fetched by select_related/prefetch_related.
+"""
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from feespayments.models import FeePayment
+from feespayments.serializers import FeePaymentSerializer
+from guaranteerequests.models import GuaranteeRequest
+from guaranteerequests.serializers import GuaranteeRequestSerializer
+from guarantorprofile.models import GuarantorProfile
+from loanapplications.models import LoanApplication
+from loanapplications.serializers import LoanApplicationSerializer
+from loandisbursements.models import LoanDisbursement
+from loandisbursements.serializers import LoanDisbursementSerializer
+from loanrepayments.models import LoanRepayment
+from loanrepayments.serializers import LoanRepaymentSerializer
+from loans.models import LoanAccount
+from memberfees.models import MemberFee
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+from savingsdeposits.serializers import SavingsDepositSerializer
+from savingswithdrawals.models import SavingsWithdrawal
+from savingswithdrawals.serializers import SavingsWithdrawalSerializer
+from venturedeposits.models import VentureDeposit
+from venturedeposits.serializers import VentureDepositSerializer
+from venturepayments.models import VenturePayment
+from venturepayments.serializers import VenturePaymentSerializer
+from ventures.models import VentureAccount
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+"""
+Account summaries
+"""
+
+
+class ProfileSavingsAccountSerializer(serializers.ModelSerializer):
+    account_type = serializers.CharField(source="account_type.name", read_only=True)
+
+    class Meta:
+        model = SavingsAccount
+        fields = (
+            "account_type",
+            "account_number",
+            "balance",
+            "monthly_contribution",
+            "is_active",
+            "identity",
+        )
+
+
+class ProfileLoanAccountSerializer(serializers.ModelSerializer):
+    loan_type = serializers.CharField(source="loan_type.name", read_only=True)
+
+    class Meta:
+        model = LoanAccount
+        fields = (
+            "loan_type",
+            "account_number",
+            "outstanding_balance",
+            "interest_accrued",
+            "is_active",
+            "identity",
+        )
+
+
+class ProfileVentureAccountSerializer(serializers.ModelSerializer):
+    venture_type = serializers.CharField(source="venture_type.name", read_only=True)
+
+    class Meta:
+        model = VentureAccount
+        fields = (
+            "venture_type",
+            "account_number",
+            "balance",
+            "is_active",
+            "identity",
+        )
+
+
+class ProfileMemberFeeSerializer(serializers.ModelSerializer):
+    fee_type = serializers.CharField(source="fee_type.name", read_only=True)
+
+    class Meta:
+        model = MemberFee
+        fields = (
+            "fee_type",
+            "account_number",
+            "amount",
+            "remaining_balance",
+            "is_paid",
+        )
+
+
+class ProfileGuarantorSerializer(serializers.ModelSerializer):
+    available_amount = serializers.DecimalField(
+        source="available_capacity", max_digits=15, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = GuarantorProfile
+        fields = (
+            "is_eligible",
+            "max_active_guarantees",
+            "max_guarantee_amount",
+            "committed_guarantee_amount",
+            "available_amount",
+        )
+
+
+# The accounts each summary field reads, fetched only when the field is shown
+PREFETCHES = {
+    "savings_accounts": Prefetch(
+        "savings_accounts",
+        queryset=SavingsAccount.objects.select_related("account_type"),
+    ),
+    "loans": Prefetch("loans", queryset=LoanAccount.objects.select_related("loan_type")),
+    "venture_accounts": Prefetch(
+        "venture_accounts",
+        queryset=VentureAccount.objects.select_related("venture_type"),
+    ),
+    "fees": Prefetch("fees", queryset=MemberFee.objects.select_related("fee_type")),
+    "next_of_kin": "next_of_kin",
+}
+
+
+"""
+Expansions
+"""
+
+
+class Expansion:
+    """A collection of the member's history, a page at a time."""
+
+    def __init__(self, serializer_class, queryset, member_field, prefetch=()):
+        self.serializer_class = serializer_class
+        self.queryset = queryset
+        self.member_field = member_field
+        self.prefetch = prefetch
+
+    def get_queryset(self, member):
+        return (
+            self.queryset.filter(**{self.member_field: member})
+            .prefetch_related(*self.prefetch)
+            .order_by("-created_at", "-id")
+        )
+
+    def page(self, member, number, page_size, context):
+        queryset = self.get_queryset(member)
+        count = queryset.count()
+        start = (number - 1) * page_size
+        rows = list(queryset[start : start + page_size]) if start < count else []
+        return {
+            "count": count,
+            "page": number,
+            "page_size": page_size,
+            "next_page": number + 1 if start + page_size < count else None,
+            "results": self.serializer_class(rows, many=True, context=context).data,
+        }
+
+
+EXPANSIONS = {
+    "savings_deposits": Expansion(
+        SavingsDepositSerializer,
+        SavingsDeposit.objects.select_related("savings_account", "deposited_by"),
+        "savings_account__member",
+    ),
+    "savings_withdrawals": Expansion(
+        SavingsWithdrawalSerializer,
+        SavingsWithdrawal.objects.select_related(
+            "savings_account__account_type", "savings_account__member", "withdrawn_by"
+        ),
+        "savings_account__member",
+    ),
+    "loan_repayments": Expansion(
+        LoanRepaymentSerializer,
+        LoanRepayment.objects.select_related("loan_account", "paid_by"),
+        "loan_account__member",
+    ),
+    "loan_disbursements": Expansion(
+        LoanDisbursementSerializer,
+        LoanDisbursement.objects.select_related("loan_account", "disbursed_by"),
+        "loan_account__member",
+    ),
+    # LoanApplicationSerializer still works out each application's coverage
+    # with its own queries, so these pages cost a few queries per row
+    "loan_applications": Expansion(
+        LoanApplicationSerializer,
+        LoanApplication.objects.select_related(
+            "member", "product", "loan_account__member"
+        ),
+        "member",
+        prefetch=("guarantors__member", "guarantors__guarantor__member"),
+    ),
+    "venture_deposits": Expansion(
+        VentureDepositSerializer,
+        VentureDeposit.objects.select_related("venture_account", "deposited_by"),
+        "venture_account__member",
+    ),
+    "venture_payments": Expansion(
+        VenturePaymentSerializer,
+        VenturePayment.objects.select_related("venture_account", "paid_by"),
+        "venture_account__member",
+    ),
+    "fee_payments": Expansion(
+        FeePaymentSerializer,
+        FeePayment.objects.select_related("member_fee", "paid_by"),
+        "member_fee__member",
+    ),
+    "guarantees": Expansion(
+        GuaranteeRequestSerializer,
+        GuaranteeRequest.objects.select_related(
+            "member", "guarantor__member", "loan_application"
+        ),
+        "guarantor__member",
+    ),
+}
+
+
+def parse_list(request, name, allowed):
+    """The comma separated names in ?<name>=, checked against `allowed`."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    names = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise ValidationError(
+            {name: f"Unknown {name}: {', '.join(unknown)}. Choose from: {', '.join(allowed)}"}
+        )
+    return list(dict.fromkeys(names))
+
+
+def parse_positive_int(request, name, default, maximum=None):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise ValidationError({name: "Must be a positive integer."})
+    return min(number, maximum) if maximum else number
+
+
+def profile_options(request, field_names):
+    """
+    The `fields` and `expand` a profile request asks for, plus each
+    expansion's page, as serializer context.
+    """
+    expand = parse_list(request, "expand", list(EXPANSIONS)) or []
+    page_size = parse_positive_int(request, "page_size", PAGE_SIZE, MAX_PAGE_SIZE)
+    return {
+        "fields": parse_list(request, "fields", field_names),
+        "expand": {
+            name: (parse_positive_int(request, f"{name}_page", 1), page_size)
+            for name in expand
+        },
+    }
+
+
+def profile_prefetches(fields):
+    return [
+        prefetch
+        for name, prefetch in PREFETCHES.items()
+        if fields is None or name in fields
+    ]
+
+
+def expand(member, expansions, context):
+    return {
+        name: EXPANSIONS[name].page(member, number, page_size, context)
+        for name, (number, page_size) in expansions.items()
+    }
@@ -20,12 +20,15 @@ from accounts.utils import (
     send_account_created_by_admin_email,
 )
 from saccoapi.settings import DOMAIN
-from savings.serializers import SavingsAccountSerializer
-from loans.serializers import LoanAccountSerializer
-from ventures.serializers import VentureAccountSerializer
 from nextofkin.serializers import NextOfKinSerializer
-from guarantorprofile.serializers import GuarantorProfileSerializer
-from memberfees.serializers import MemberFeeSerializer
+from accounts.profile import (
+    ProfileSavingsAccountSerializer,
+    ProfileLoanAccountSerializer,
+    ProfileVentureAccountSerializer,
+    ProfileGuarantorSerializer,
+    ProfileMemberFeeSerializer,
+    expand,
+)
 
 User = get_user_model()
 
@@ -46,12 +49,13 @@ class BaseUserSerializer(serializers.ModelSerializer):
         ],
     )
     avatar = serializers.ImageField(use_url=True, required=False)
-    savings_accounts = SavingsAccountSerializer(many=True, read_only=True)
-    loans = LoanAccountSerializer(many=True, read_only=True)
-    venture_accounts = VentureAccountSerializer(many=True, read_only=True)
+    # Account summaries only: the history is opt-in, see accounts/profile.py
+    savings_accounts = ProfileSavingsAccountSerializer(many=True, read_only=True)
+    loans = ProfileLoanAccountSerializer(many=True, read_only=True)
+    venture_accounts = ProfileVentureAccountSerializer(many=True, read_only=True)
     next_of_kin = NextOfKinSerializer(many=True, read_only=True)
-    guarantor_profile = GuarantorProfileSerializer(read_only=True)
-    fees = MemberFeeSerializer(many=True, read_only=True)
+    guarantor_profile = ProfileGuarantorSerializer(read_only=True)
+    fees = ProfileMemberFeeSerializer(many=True, read_only=True)
 
     class Meta:
         model = User
@@ -92,6 +96,20 @@ class BaseUserSerializer(serializers.ModelSerializer):
             "fees",
         )
 
+    def get_fields(self):
+        fields = super().get_fields()
+        only = self.context.get("fields")
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        return fields
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        expansions = self.context.get("expand")
+        if expansions:
+            representation.update(expand(instance, expansions, self.context))
+        return representation
+
     def create_user(self, validated_data, role_field):
         user = User.objects.create_user(**validated_data)
         setattr(user, role_field, True)
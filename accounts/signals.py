@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
 
+from accounts.authentication import token_cache
 from guarantorprofile.models import GuarantorProfile
 
 User = get_user_model()
@@ -10,4 +12,16 @@ User = get_user_model()
 @receiver(post_save, sender=User)
 def create_guarantor_profile(sender, instance, created, **kwargs):
     if created:
-        GuarantorProfile.objects.create(member=instance, is_eligible=True)
\ No newline at end of file
+        GuarantorProfile.objects.create(member=instance, is_eligible=True)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    # Password changes, resets and flag updates all save the user
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.user_id)
@@ -1,3 +1,265 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.authentication import token_cache
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+from savingstypes.models import SavingsType
+
+User = get_user_model()
+
+
+class LargeTablePaginationTests(APITestCase):
+    url = "/api/v1/auth/members/all/"
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            member_no="ADM001", password="pass1234", is_system_admin=True
+        )
+        base = timezone.now() - timedelta(days=1)
+        for i in range(7):
+            user = User.objects.create_user(
+                member_no=f"MEM{i:03d}", password="pass1234", is_member=True
+            )
+            # Pairs of members share a timestamp so the id tie-break matters
+            User.objects.filter(pk=user.pk).update(
+                created_at=base + timedelta(minutes=i // 2)
+            )
+        self.client.force_authenticate(self.admin)
+        self.expected = list(
+            User.objects.filter(Q(is_member=True) | Q(is_system_admin=True))
+            .order_by("-created_at", "-id")
+            .values_list("member_no", flat=True)
+        )
+
+    def walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            url = response.data["next"]
+        return pages
+
+    def test_page_numbers_remain_the_default(self):
+        response = self.client.get(self.url, {"page_size": 3})
+        self.assertEqual(response.data["count"], 8)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertIn("page=2", response.data["next"])
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        pages = self.walk(f"{self.url}?pagination=cursor&page_size=3")
+        seen = [row["member_no"] for page in pages for row in page["results"]]
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(page["results"]) for page in pages], [3, 3, 2])
+        self.assertNotIn("count", pages[0])
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_cursor_previous_link_returns_the_earlier_page(self):
+        pages = self.walk(f"{self.url}?pagination=cursor&page_size=3")
+        response = self.client.get(pages[-1]["previous"])
+        self.assertEqual(
+            [row["member_no"] for row in response.data["results"]],
+            self.expected[3:6],
+        )
+        self.assertIsNotNone(response.data["next"])
+
+    def test_cursor_is_stable_when_rows_are_added(self):
+        first = self.client.get(self.url, {"pagination": "cursor", "page_size": 3})
+        User.objects.create_user(member_no="MEM999", password="pass1234", is_member=True)
+        second = self.client.get(first.data["next"])
+        self.assertEqual(
+            [row["member_no"] for row in second.data["results"]],
+            self.expected[3:6],
+        )
+
+    def test_count_estimate_falls_back_to_exact_for_small_tables(self):
+        response = self.client.get(
+            self.url, {"pagination": "cursor", "count": "estimate"}
+        )
+        self.assertEqual(response.data["count"], 8)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class MemberProfileTests(APITestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            member_no="MEM001", password="pass1234", is_member=True
+        )
+        self.account = SavingsAccount.objects.create(
+            member=self.member,
+            account_type=SavingsType.objects.create(name="Regular"),
+            balance=Decimal("0"),
+        )
+        self.url = f"/api/v1/auth/{self.member.id}/"
+        self.client.force_authenticate(self.member)
+
+    def deposit(self, count):
+        for _ in range(count):
+            SavingsDeposit.objects.create(
+                savings_account=self.account,
+                amount=Decimal("100"),
+                transaction_status="Completed",
+            )
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        return response, len(queries)
+
+    def test_default_profile_stays_flat_as_history_grows(self):
+        self.deposit(2)
+        first, first_queries = self.get()
+        self.deposit(30)
+        second, second_queries = self.get()
+
+        self.assertEqual(first_queries, second_queries)
+        self.assertAlmostEqual(len(first.content), len(second.content), delta=10)
+        (account,) = second.data["savings_accounts"]
+        self.assertEqual(account["account_type"], "Regular")
+        self.assertEqual(account["balance"], "3200.00")
+        self.assertNotIn("deposits", account)
+
+    def test_expansion_pages(self):
+        self.deposit(7)
+        response, _ = self.get(expand="savings_deposits", page_size=3)
+        page = response.data["savings_deposits"]
+        self.assertEqual(
+            (page["count"], page["page"], page["next_page"], len(page["results"])),
+            (7, 1, 2, 3),
+        )
+
+        response, queries = self.get(
+            expand="savings_deposits", page_size=3, savings_deposits_page=3
+        )
+        page = response.data["savings_deposits"]
+        self.assertEqual((page["next_page"], len(page["results"])), (None, 1))
+        self.deposit(10)
+        self.assertEqual(
+            self.get(expand="savings_deposits", page_size=3, savings_deposits_page=3)[1],
+            queries,
+        )
+
+    def test_fields_limit_the_profile(self):
+        response, queries = self.get(fields="member_no,savings_accounts")
+        self.assertEqual(set(response.data), {"member_no", "savings_accounts"})
+        # The user, with the savings accounts the only prefetch
+        self.assertEqual(queries, 2)
+
+    def test_unknown_fields_and_expansions_are_rejected(self):
+        self.assertEqual(self.get(expand="deposits")[0].status_code, 400)
+        self.assertEqual(self.get(fields="balance")[0].status_code, 400)
+        self.assertEqual(self.get(expand="guarantees", page_size=0)[0].status_code, 400)
+
+    async def test_profile_over_asgi(self):
+        token = await Token.objects.acreate(user=self.member)
+        headers = {"Authorization": f"Token {token.key}"}
+        response = await self.async_client.get(
+            self.url, {"fields": "member_no,savings_accounts"}, headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["member_no"], "MEM001")
+
+        # Writes on the async view run the usual update code
+        response = await self.async_client.patch(
+            self.url, {"first_name": "Jane"}, content_type="application/json", headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        await self.member.arefresh_from_db()
+        self.assertEqual(self.member.first_name, "Jane")
+
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(AUTH_TOKEN_CACHE_TTL=60)
+class CachedTokenAuthenticationTests(APITestCase):
+    url = "/api/v1/auth/members/all/"
+
+    def setUp(self):
+        token_cache.clear()
+        token_cache.reset_stats()
+        self.admin = User.objects.create_user(
+            member_no="ADM001", password="pass1234", is_system_admin=True
+        )
+        self.token = Token.objects.create(user=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get(self, url=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or self.url, {"page_size": 1})
+        return response, [q["sql"] for q in queries]
+
+    def token_queries(self, queries):
+        return [sql for sql in queries if "authtoken_token" in sql]
+
+    def test_lookups_are_cached(self):
+        first, queries = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(self.token_queries(queries)), 1)
+
+        second, queries = self.get()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(self.token_queries(queries), [])
+        stats = token_cache.stats()
+        self.assertEqual((stats["local_hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_password_change_through_the_cached_user(self):
+        self.get()
+        response = self.client.patch(
+            "/api/v1/auth/password/change/",
+            {"old_password": "pass1234", "password": "Other#1234"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.admin.refresh_from_db()
+        self.assertTrue(self.admin.check_password("Other#1234"))
+        self.assertEqual(self.admin.member_no, "ADM001")
+        self.assertEqual(token_cache.stats()["entries"], 0)
+
+    def test_flag_updates_take_effect_immediately(self):
+        url = "/api/v1/auth/member/ADM001/"
+        self.assertEqual(self.get(url)[0].status_code, 200)
+        self.admin.is_system_admin = False
+        self.admin.save()
+        self.assertEqual(self.get(url)[0].status_code, 403)
+
+    def test_admin_password_reset_and_deactivation_invalidate(self):
+        self.get()
+        self.admin.set_password("Other#1234")
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertEqual(self.get()[0].status_code, 401)
+
+    def test_logout_revokes_the_token(self):
+        self.get()
+        response = self.client.post("/api/v1/auth/logout/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+        self.assertEqual(self.get()[0].status_code, 401)
+
+    def test_shared_cache_serves_other_processes(self):
+        with override_settings(AUTH_TOKEN_SHARED_CACHE_TTL=60):
+            self.get()
+            token_cache.clear()  # as a fresh worker would start
+            _, queries = self.get()
+            self.assertEqual(self.token_queries(queries), [])
+            self.assertEqual(token_cache.stats()["shared_hits"], 1)
+
+            self.admin.save()
+            token_cache.clear()
+            _, queries = self.get()
+            self.assertEqual(len(self.token_queries(queries)), 1)
@@ -1,12 +1,9 @@
 import logging
 
+from catalogs.registry import get_catalog
 from savings.models import SavingsAccount
-from savingstypes.models import SavingsType
-from venturetypes.models import VentureType
 from ventures.models import VentureAccount
 from loans.models import LoanAccount
-from loantypes.models import LoanType
-from feetypes.models import FeeType
 from memberfees.models import MemberFee
 
 
@@ -16,8 +13,10 @@ def create_member_accounts(user):
     """
     Creates default Savings, Venture, and Loan accounts for a new member.
     """
+    catalog = get_catalog()
+
     # Savings account creation
-    savings_types = SavingsType.objects.all()
+    savings_types = catalog.savings_types.values()
     created_savings = []
     for savings_type in savings_types:
         if not SavingsAccount.objects.filter(
@@ -32,7 +31,7 @@ def create_member_accounts(user):
     )
 
     # Venture account creation
-    venture_types = VentureType.objects.all()
+    venture_types = catalog.venture_types.values()
     created_ventures = []
     for venture_type in venture_types:
         if not VentureAccount.objects.filter(
@@ -47,7 +46,7 @@ def create_member_accounts(user):
     )
 
     # Loan account creation
-    loan_types = LoanType.objects.all()
+    loan_types = catalog.loan_types.values()
     created_loans = []
     for loan_type in loan_types:
         if not LoanAccount.objects.filter(
@@ -62,7 +61,7 @@ def create_member_accounts(user):
     )
 
     # Fee account creation
-    fee_types = FeeType.objects.all()
+    fee_types = catalog.fee_types.values()
     created_fees = []
     for fee_type in fee_types:
         if not MemberFee.objects.filter(
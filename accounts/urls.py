@@ -2,6 +2,7 @@ from django.urls import path
 
 from accounts.views import (
     TokenView,
+    LogoutView,
     UserDetailView,
     RequestPasswordResetView,
     PasswordResetView,
@@ -19,6 +20,7 @@ app_name = "accounts"
 
 urlpatterns = [
     path("token/", TokenView.as_view(), name="token"),
+    path("logout/", LogoutView.as_view(), name="logout"),
     path("<str:id>/", UserDetailView.as_view(), name="user-detail"),
     # System admin activities
     path("members/all/", MemberListView.as_view(), name="members"),
@@ -1,10 +1,10 @@
 import logging
-import csv
-import io
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model, authenticate
+from django.db.models import Q
+from django.utils.functional import cached_property
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from django.utils.http import urlsafe_base64_decode
@@ -27,6 +27,10 @@ from accounts.serializers import (
     BulkMemberCreatedByAdminUploadCSVSerializer,
     AdminResetPasswordSerializer
 )
+from accounts.async_views import AsyncRetrieveUpdateDestroyAPIView
+from accounts.pagination import LargeTablePagination
+from accounts.profile import profile_options, profile_prefetches
+from transactions.utils.uploads import CSVImport, CSVUploadMixin
 from accounts.permissions import IsSystemAdmin, IsSystemAdminOrReadOnly
 from accounts.utils import (
     send_password_reset_email,
@@ -101,26 +105,56 @@ class TokenView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class LogoutView(APIView):
+    """
+    Delete the user's token, which also drops it from the token cache.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, format=None):
+        Token.objects.filter(user=request.user).delete()
+        return Response(
+            {"detail": "Logged out successfully"}, status=status.HTTP_200_OK
+        )
+
+
 """
 Create and Detail Views
 """
 
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MemberProfileMixin:
+    """
+    A compact profile, shaped on GET by ?fields= and ?expand= (see
+    accounts/profile.py), with only the accounts shown prefetched.
+    """
+
+    @cached_property
+    def profile_options(self):
+        if self.request.method != "GET":
+            return {"fields": None, "expand": {}}
+        return profile_options(self.request, list(BaseUserSerializer.Meta.fields))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.profile_options["fields"]
+        if fields is None or "guarantor_profile" in fields:
+            queryset = queryset.select_related("guarantor_profile")
+        return queryset.prefetch_related(*profile_prefetches(fields))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), **self.profile_options}
+
+
+class UserDetailView(MemberProfileMixin, AsyncRetrieveUpdateDestroyAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = BaseUserSerializer
     queryset = User.objects.all()
     lookup_field = "id"
 
     def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .filter(id=self.request.user.id)
-            .prefetch_related(
-                "savings_accounts", "loans", "venture_accounts", "next_of_kin"
-            )
-        )
+        return super().get_queryset().filter(id=self.request.user.id)
 
 
 """
@@ -245,17 +279,18 @@ class MemberListView(generics.ListAPIView):
 
     permission_classes = (IsSystemAdminOrReadOnly,)
     serializer_class = MinimalMemberSerializer
-    queryset = User.objects.all()
+    pagination_class = LargeTablePagination
+    queryset = User.objects.only(*MinimalMemberSerializer.Meta.fields, "created_at")
 
     def get_queryset(self):
         """
         Fetch is_member and is_system_admin field
         Users with is_system_admin are also members
         """
-        return self.queryset.filter(is_member=True) | self.queryset.filter(is_system_admin=True)
+        return self.queryset.filter(Q(is_member=True) | Q(is_system_admin=True))
 
 
-class MemberDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MemberDetailView(MemberProfileMixin, AsyncRetrieveUpdateDestroyAPIView):
     """
     View, update and delete a member
     """
@@ -265,15 +300,6 @@ class MemberDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     lookup_field = "member_no"
 
-    def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .prefetch_related(
-                "savings_accounts", "loans", "venture_accounts", "next_of_kin"
-            )
-        )
-
 
 class AdminResetPasswordView(generics.UpdateAPIView):
     """
@@ -328,44 +354,62 @@ class BulkMemberCreatedByAdminView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class BulkMemberCreatedByAdminUploadCSVView(APIView):
+class MemberImport(CSVImport):
+    first_row = 2  # Row 1 = headers
+
+    def start_pass(self):
+        self.seen = set()
+        self.created = []
+
+    def plan_row(self, plan):
+        if plan.collecting:
+            return
+        # Clean data: remove empty strings so optional fields are handled correctly
+        data = {k: v.strip() for k, v in plan.row.items() if k and v and v.strip()}
+
+        # Identify the row for better error reporting
+        identifier = plan.row.get("email") or plan.row.get("member_no") or f"Row {plan.index}"
+        label = f"Row {plan.index} ({identifier})"
+
+        error_details = []
+        for field in ("email", "member_no"):
+            value = data.get(field, "").lower()
+            if value and (field, value) in self.seen:
+                error_details.append(f"{field}: duplicated earlier in the file")
+            self.seen.add((field, value))
+
+        member_serializer = MemberCreatedByAdminSerializer(data=data)
+        if not member_serializer.is_valid():
+            # Make validation errors more readable
+            for field, msgs in member_serializer.errors.items():
+                error_details.append(f"{field}: {', '.join([str(m) for m in msgs])}")
+        if error_details:
+            plan.error(f"{label}: Validation error - {'; '.join(error_details)}")
+            return
+        plan.add(self.create, member_serializer, label)
+
+    def create(self, member_serializer, label):
+        try:
+            user = member_serializer.save()
+            create_member_accounts(user)
+        except Exception as e:
+            raise ValueError(f"{label}: Error creating user - {str(e)}") from e
+        self.created.append(user)
+
+
+class BulkMemberCreatedByAdminUploadCSVView(CSVUploadMixin, APIView):
     permission_classes = (IsSystemAdmin,)
     serializer_class = BulkMemberCreatedByAdminUploadCSVSerializer
+    import_class = MemberImport
 
-    def post(self, request):
+    def get_upload_file(self, request):
         serializer = self.serializer_class(data=request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["file"]
 
-        file = serializer.validated_data["file"]
-        decoded_file = file.read().decode("utf-8")
-        io_string = io.StringIO(decoded_file)
-        reader = csv.DictReader(io_string)
-
-        created_users = []
-        errors = []
-
-        for row_number, row in enumerate(reader, start=2):  # Row 1 = headers
-            # Clean data: remove empty strings so optional fields are handled correctly
-            data = {k: v.strip() for k, v in row.items() if v and v.strip()}
-
-            # Identify the row for better error reporting
-            identifier = row.get("email") or row.get("member_no") or f"Row {row_number}"
-
-            member_serializer = MemberCreatedByAdminSerializer(data=data)
-            if member_serializer.is_valid():
-                try:
-                    user = member_serializer.save()
-                    create_member_accounts(user)
-                    created_users.append(user)
-                except Exception as e:
-                    errors.append(f"Row {row_number} ({identifier}): Error creating user - {str(e)}")
-            else:
-                # Make validation errors more readable
-                error_details = []
-                for field, msgs in member_serializer.errors.items():
-                    error_details.append(f"{field}: {', '.join([str(m) for m in msgs])}")
-                errors.append(f"Row {row_number} ({identifier}): Validation error - {'; '.join(error_details)}")
+    def upload_response(self, upload):
+        created_users = upload.created
+        errors = [error["error"] for error in upload.errors]
 
         # Prepare response data
         total_rows = len(created_users) + len(errors)
@@ -391,5 +435,3 @@ class BulkMemberCreatedByAdminUploadCSVView(APIView):
             status_code = status.HTTP_400_BAD_REQUEST
 
         return Response(response_data, status=status_code)
-
-
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CatalogsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "catalogs"
+
+    def ready(self):
+        import catalogs.signals
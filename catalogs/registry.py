@@ -0,0 +1,164 @@
+"""
+Process-local registry of the product catalogs and GL chart of accounts.
+
+Savings, venture, loan and fee types and the GL accounts change a few times a
+year but are read on almost every request, often several times. The registry
+loads them once per process and keeps the snapshot until the catalog version
+changes.
+
+The version stamp lives in the Django cache and is bumped by post_save /
+post_delete on the catalog models (see catalogs.signals), so every worker
+sharing that cache reloads on its next read. With a per-process cache such as
+the default LocMemCache, other workers only notice after CATALOG_CACHE_TTL
+seconds.
+
+Writes inside an open transaction are not published until it commits. Until
+then, the writing thread reads the catalogs straight from the database so it
+sees its own changes and never caches rows that may still be rolled back.
+
+Snapshots hold model instances shared across threads. Treat them as read-only.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from feetypes.models import FeeType
+from finances.models import GLAccount
+from loantypes.models import LoanType
+from savingstypes.models import SavingsType
+from venturetypes.models import VentureType
+
+VERSION_KEY = "catalogs:version"
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """
+    One consistent snapshot of the catalogs. Type maps are keyed by name and
+    keep the models' default ordering.
+    """
+
+    version: int
+    savings_types: dict[str, SavingsType]
+    venture_types: dict[str, VentureType]
+    loan_types: dict[str, LoanType]
+    fee_types: dict[str, FeeType]
+    gl_accounts: dict[str, GLAccount]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def savings_type_names(self) -> list[str]:
+        return list(self.savings_types)
+
+    @property
+    def venture_type_names(self) -> list[str]:
+        return list(self.venture_types)
+
+    @property
+    def loan_type_names(self) -> list[str]:
+        return list(self.loan_types)
+
+    @property
+    def fee_type_names(self) -> list[str]:
+        return list(self.fee_types)
+
+    def fee_type_by_id(self, pk) -> FeeType | None:
+        for fee_type in self.fee_types.values():
+            if fee_type.pk == pk:
+                return fee_type
+        return None
+
+    def gl_account(self, code: str) -> GLAccount:
+        try:
+            return self.gl_accounts[code]
+        except KeyError:
+            raise GLAccount.DoesNotExist(f"GL account {code} does not exist")
+
+
+class CatalogRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._pending = threading.local()
+
+    def current_version(self) -> int:
+        return cache.get(VERSION_KEY) or 0
+
+    def bump(self):
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, timeout=None)
+
+    def clear(self):
+        with self._lock:
+            self._catalog = None
+
+    def load(self, version=0) -> Catalog:
+        return Catalog(
+            version=version,
+            savings_types={t.name: t for t in SavingsType.objects.all()},
+            venture_types={t.name: t for t in VentureType.objects.all()},
+            loan_types={t.name: t for t in LoanType.objects.all()},
+            fee_types={t.name: t for t in FeeType.objects.all()},
+            gl_accounts={a.code: a for a in GLAccount.objects.all()},
+        )
+
+    # ------------------------------------------------------------------
+    def changed(self):
+        """Called by the catalog model signals."""
+        if transaction.get_connection().in_atomic_block:
+            self._pending.dirty = True
+            transaction.on_commit(self._committed)
+        else:
+            self.clear()
+            self.bump()
+
+    def _committed(self):
+        self._pending.dirty = False
+        self.clear()
+        self.bump()
+
+    def _has_pending_writes(self):
+        if not getattr(self._pending, "dirty", False):
+            return False
+        if transaction.get_connection().in_atomic_block:
+            return True
+        # The transaction that touched the catalogs rolled back
+        self._pending.dirty = False
+        return False
+
+    def get(self) -> Catalog:
+        if self._has_pending_writes():
+            return self.load()
+
+        version = self.current_version()
+        catalog = self._catalog
+        ttl = getattr(settings, "CATALOG_CACHE_TTL", 300)
+        if (
+            catalog is not None
+            and catalog.version == version
+            and time.monotonic() - catalog.loaded_at < ttl
+        ):
+            return catalog
+
+        catalog = self.load(version)
+        with self._lock:
+            self._catalog = catalog
+        return catalog
+
+
+registry = CatalogRegistry()
+
+
+def get_catalog() -> Catalog:
+    return registry.get()
+
+
+def gl_account(code: str) -> GLAccount:
+    return registry.get().gl_account(code)
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+
+from catalogs.registry import registry
+from feetypes.models import FeeType
+from finances.models import GLAccount
+from loantypes.models import LoanType
+from savingstypes.models import SavingsType
+from venturetypes.models import VentureType
+
+CATALOG_MODELS = (SavingsType, VentureType, LoanType, FeeType, GLAccount)
+
+
+def catalog_changed(sender, **kwargs):
+    """Publish a new catalog version whenever a catalog row changes."""
+    registry.changed()
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(
+        catalog_changed, sender=model, dispatch_uid=f"catalogs.save.{model.__name__}"
+    )
+    post_delete.connect(
+        catalog_changed, sender=model, dispatch_uid=f"catalogs.delete.{model.__name__}"
+    )
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from catalogs.registry import get_catalog, gl_account, registry
+from finances.models import GLAccount
+from savingstypes.models import SavingsType
+
+
+class CatalogRegistryTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        SavingsType.objects.create(name="Regular")
+        GLAccount.objects.create(code="1010", name="Cash at Bank", account_type="Asset")
+
+    def test_snapshot_is_reused_until_a_catalog_change(self):
+        first = get_catalog()
+        with self.assertNumQueries(0):
+            self.assertIs(get_catalog(), first)
+            self.assertEqual(gl_account("1010").name, "Cash at Bank")
+
+        SavingsType.objects.create(name="Holiday")
+        self.assertEqual(
+            sorted(get_catalog().savings_type_names), ["Holiday", "Regular"]
+        )
+
+    def test_delete_invalidates(self):
+        get_catalog()
+        SavingsType.objects.filter(name="Regular").first().delete()
+        self.assertEqual(get_catalog().savings_type_names, [])
+
+    def test_version_bump_from_another_worker(self):
+        first = get_catalog()
+        registry.bump()
+        self.assertIsNot(get_catalog(), first)
+
+    def test_rolled_back_writes_never_reach_the_cache(self):
+        get_catalog()
+        try:
+            with transaction.atomic():
+                SavingsType.objects.create(name="Ghost")
+                # The writer sees its own change inside the transaction
+                self.assertIn("Ghost", get_catalog().savings_types)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertNotIn("Ghost", get_catalog().savings_types)
+
+    def test_committed_writes_are_published(self):
+        get_catalog()
+        with transaction.atomic():
+            SavingsType.objects.create(name="Holiday")
+        self.assertIn("Holiday", get_catalog().savings_types)
+
+    def test_missing_gl_account(self):
+        with self.assertRaises(GLAccount.DoesNotExist):
+            gl_account("9999")
+
+
+class CatalogRegistryTestCaseIsolationTests(TestCase):
+    """TestCase rolls back between tests, so the registry must not leak rows."""
+
+    def test_first(self):
+        SavingsType.objects.create(name="Only In First")
+        self.assertIn("Only In First", get_catalog().savings_types)
+
+    def test_second(self):
+        self.assertNotIn("Only In First", get_catalog().savings_types)
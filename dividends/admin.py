@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from dividends.models import DividendRun
+
+
+class DividendRunAdmin(admin.ModelAdmin):
+    list_display = ("year", "status", "account_count", "total_gross", "total_net", "posted_at", "created_at")
+    list_filter = ("status", "year")
+    ordering = ("-created_at",)
+
+admin.site.register(DividendRun, DividendRunAdmin)
@@ -0,0 +1,60 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dividends.utils import DividendError, compute_run, post_run
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute a year's dividends on savings from average monthly balances "
+        "into a Draft run, and optionally post it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, required=True)
+        parser.add_argument(
+            "--rate",
+            action="append",
+            default=[],
+            metavar="TYPE=PERCENT",
+            help="Annual rate for a savings type, e.g. --rate \"Share Capital=12\" "
+            "(default: the type's interest_rate)",
+        )
+        parser.add_argument("--withholding-tax", type=str, default=None)
+        parser.add_argument(
+            "--post", action="store_true", help="Post the run once computed"
+        )
+
+    def handle(self, *args, **options):
+        rates = {}
+        for item in options["rate"]:
+            name, _, rate = item.rpartition("=")
+            try:
+                rates[name.strip()] = Decimal(rate)
+            except InvalidOperation:
+                raise CommandError(f"Invalid rate '{item}'")
+
+        withholding_tax = options["withholding_tax"]
+        if withholding_tax is not None:
+            try:
+                withholding_tax = Decimal(withholding_tax)
+            except InvalidOperation:
+                raise CommandError(f"Invalid withholding tax '{withholding_tax}'")
+
+        try:
+            run = compute_run(
+                options["year"],
+                rates=rates,
+                withholding_tax_rate=withholding_tax,
+            )
+            self.stdout.write(
+                f"Run {run.reference}: {run.account_count} accounts, gross "
+                f"{run.total_gross}, withholding tax {run.total_withholding_tax}, "
+                f"net {run.total_net}"
+            )
+            if options["post"]:
+                post_run(run)
+                self.stdout.write(self.style.SUCCESS(f"Posted run {run.reference}"))
+        except DividendError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:31
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('savings', '0002_rename_user_savingsaccount_member'),
+        ('savingsdeposits', '0006_savingsdeposit_savingsdepo_created_8832e4_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DividendRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reference', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('year', models.PositiveIntegerField()),
+                ('rates', models.JSONField(default=dict)),
+                ('withholding_tax_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('status', models.CharField(choices=[('Draft', 'Draft'), ('Posted', 'Posted')], default='Draft', max_length=20)),
+                ('account_count', models.PositiveIntegerField(default=0)),
+                ('total_average_balance', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_gross', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_withholding_tax', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_net', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('posted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('posted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Dividend Run',
+                'verbose_name_plural': 'Dividend Runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DividendLine',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('average_balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('gross', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('withholding_tax', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('net', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('deposit', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dividend_line', to='savingsdeposits.savingsdeposit')),
+                ('savings_account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='dividend_lines', to='savings.savingsaccount')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='dividends.dividendrun')),
+            ],
+            options={
+                'ordering': ['savings_account__member__member_no'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dividendrun',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'Posted')), fields=('year',), name='unique_posted_dividend_run'),
+        ),
+        migrations.AddConstraint(
+            model_name='dividendline',
+            constraint=models.UniqueConstraint(fields=('run', 'savings_account'), name='unique_dividend_line'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+from accounts.abstracts import TimeStampedModel, UniversalIdModel, ReferenceModel
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+
+User = get_user_model()
+
+
+class DividendRun(UniversalIdModel, TimeStampedModel, ReferenceModel):
+    """
+    Dividends (or interest) on savings for a year, computed as a Draft for
+    review and then posted as Dividend Deposits. Only one run per year can
+    be posted.
+    """
+
+    STATUS_CHOICES = [
+        ("Draft", "Draft"),
+        ("Posted", "Posted"),
+    ]
+
+    year = models.PositiveIntegerField()
+    # {savings type name: annual rate in percent}
+    rates = models.JSONField(default=dict)
+    withholding_tax_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Draft")
+    account_count = models.PositiveIntegerField(default=0)
+    total_average_balance = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_gross = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_withholding_tax = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_net = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    posted_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    posted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Dividend Run"
+        verbose_name_plural = "Dividend Runs"
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year"],
+                condition=models.Q(status="Posted"),
+                name="unique_posted_dividend_run",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.year} dividends ({self.status}) - {self.reference}"
+
+
+class DividendLine(UniversalIdModel):
+    """One savings account's dividend in a run. Amounts are in KES."""
+
+    run = models.ForeignKey(DividendRun, on_delete=models.CASCADE, related_name="lines")
+    savings_account = models.ForeignKey(
+        SavingsAccount, on_delete=models.PROTECT, related_name="dividend_lines"
+    )
+    average_balance = models.DecimalField(max_digits=15, decimal_places=2)
+    rate = models.DecimalField(max_digits=5, decimal_places=2)
+    gross = models.DecimalField(max_digits=12, decimal_places=2)
+    withholding_tax = models.DecimalField(max_digits=12, decimal_places=2)
+    net = models.DecimalField(max_digits=12, decimal_places=2)
+    deposit = models.OneToOneField(
+        SavingsDeposit,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="dividend_line",
+    )
+
+    class Meta:
+        ordering = ["savings_account__member__member_no"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["run", "savings_account"], name="unique_dividend_line"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.savings_account} - {self.net}"
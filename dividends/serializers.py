@@ -0,0 +1,83 @@
+from datetime import date
+from decimal import Decimal
+
+from rest_framework import serializers
+
+from catalogs.registry import get_catalog
+from dividends.models import DividendLine, DividendRun
+
+
+class DividendRunSerializer(serializers.ModelSerializer):
+    created_by = serializers.CharField(source="created_by.member_no", read_only=True, default=None)
+    posted_by = serializers.CharField(source="posted_by.member_no", read_only=True, default=None)
+
+    class Meta:
+        model = DividendRun
+        fields = (
+            "reference",
+            "year",
+            "rates",
+            "withholding_tax_rate",
+            "status",
+            "account_count",
+            "total_average_balance",
+            "total_gross",
+            "total_withholding_tax",
+            "total_net",
+            "created_by",
+            "posted_by",
+            "posted_at",
+            "created_at",
+        )
+
+
+class DividendRunCreateSerializer(serializers.Serializer):
+    year = serializers.IntegerField(min_value=2000)
+    # {savings type name: annual rate in percent}; unlisted types use their interest_rate
+    rates = serializers.DictField(
+        child=serializers.DecimalField(
+            max_digits=5, decimal_places=2, min_value=Decimal("0")
+        ),
+        required=False,
+    )
+    withholding_tax_rate = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=Decimal("0"),
+        max_value=Decimal("100"),
+        required=False,
+    )
+
+    def validate_year(self, value):
+        if value >= date.today().year:
+            raise serializers.ValidationError("Dividends can only be computed for a past year")
+        return value
+
+    def validate_rates(self, value):
+        unknown = set(value) - set(get_catalog().savings_types)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown savings types: {', '.join(sorted(unknown))}"
+            )
+        return value
+
+
+class DividendLineSerializer(serializers.ModelSerializer):
+    member_no = serializers.CharField(source="savings_account.member.member_no", read_only=True)
+    account_number = serializers.CharField(source="savings_account.account_number", read_only=True)
+    savings_type = serializers.CharField(source="savings_account.account_type.name", read_only=True)
+    deposit = serializers.CharField(source="deposit.reference", read_only=True, default=None)
+
+    class Meta:
+        model = DividendLine
+        fields = (
+            "member_no",
+            "account_number",
+            "savings_type",
+            "average_balance",
+            "rate",
+            "gross",
+            "withholding_tax",
+            "net",
+            "deposit",
+        )
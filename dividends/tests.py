@@ -0,0 +1,203 @@
+import io
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from dividends.models import DividendRun
+from dividends.utils import DividendError, compute_run, post_run
+from finances.models import JournalEntry
+from guarantorprofile.models import GuarantorProfile
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+from savingstypes.models import SavingsType
+from savingswithdrawals.models import SavingsWithdrawal
+
+User = get_user_model()
+
+
+def at(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def backdate(obj, day):
+    type(obj).objects.filter(pk=obj.pk).update(created_at=at(day))
+
+
+class DividendComputationTests(TestCase):
+    def setUp(self):
+        self.member = member = User.objects.create_user(
+            member_no="MEM001", password="pass1234", is_member=True
+        )
+        self.savings_type = SavingsType.objects.create(
+            name="Regular", interest_rate=Decimal("12.50")
+        )
+        self.account = SavingsAccount.objects.create(
+            member=member, account_type=self.savings_type, balance=Decimal("0")
+        )
+
+    def deposit(self, amount, day):
+        deposit = SavingsDeposit.objects.create(
+            savings_account=self.account,
+            amount=Decimal(amount),
+            transaction_status="Completed",
+        )
+        backdate(deposit, day)
+
+    def test_average_of_month_end_balances(self):
+        self.deposit("1000", date(2024, 1, 15))
+        self.deposit("1200", date(2024, 7, 10))
+        self.deposit("999", date(2025, 1, 2))  # next year, not counted
+
+        run = compute_run(2024)
+        line = run.lines.get()
+        # Jan-Jun 1000, Jul-Dec 2200
+        self.assertEqual(line.average_balance, Decimal("1600.00"))
+        self.assertEqual(line.rate, Decimal("12.50"))
+        self.assertEqual(line.gross, Decimal("200.00"))
+        self.assertEqual(line.withholding_tax, Decimal("10.00"))
+        self.assertEqual(line.net, Decimal("190.00"))
+        self.assertEqual(run.status, "Draft")
+        self.assertEqual(run.total_net, Decimal("190.00"))
+
+    def test_opening_balance_withdrawals_and_rounding(self):
+        self.deposit("1000", date(2023, 6, 1))
+        withdrawal = SavingsWithdrawal.objects.create(
+            savings_account=self.account,
+            withdrawn_by=self.member,
+            amount=Decimal("400"),
+            transaction_status="Completed",
+        )
+        backdate(withdrawal, date(2024, 10, 5))
+        # Not completed, so not in the balance
+        pending = SavingsDeposit.objects.create(
+            savings_account=self.account, amount=Decimal("5000")
+        )
+        backdate(pending, date(2024, 3, 1))
+
+        run = compute_run(2024, rates={"Regular": "3.33"}, withholding_tax_rate="15")
+        line = run.lines.get()
+        # Jan-Sep 1000, Oct-Dec 600
+        self.assertEqual(line.average_balance, Decimal("900.00"))
+        self.assertEqual(line.gross, Decimal("29.97"))
+        self.assertEqual(
+            line.withholding_tax,
+            (Decimal("29.97") * Decimal("0.15")).quantize(Decimal("0.01"), ROUND_HALF_UP),
+        )
+        self.assertEqual(line.net, line.gross - line.withholding_tax)
+        self.assertEqual(run.rates, {"Regular": "3.33"})
+
+    def test_unknown_savings_type_is_rejected(self):
+        with self.assertRaises(DividendError):
+            compute_run(2024, rates={"Fixed": "5"})
+
+
+class DividendRunTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "3", "--years", "2", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        self.admin = User.objects.get(member_no="SYNADMIN")
+        self.client.force_authenticate(self.admin)
+        self.rates = {name: "10" for name in SavingsType.objects.values_list("name", flat=True)}
+
+    def replay(self, account, year):
+        """The account's average month-end balance, one row at a time."""
+        events = [
+            (timezone.localtime(d.created_at), d.amount)
+            for d in account.deposits.filter(transaction_status="Completed", is_active=True)
+        ] + [
+            (timezone.localtime(w.created_at), -w.amount)
+            for w in SavingsWithdrawal.objects.filter(
+                savings_account=account, transaction_status__in=["Completed", "Approved"]
+            )
+        ]
+        month_ends = []
+        for month in range(1, 13):
+            end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+            balance = sum(amount for created, amount in events if created.date() < end)
+            month_ends.append(max(balance, Decimal("0")))
+        return (sum(month_ends) / 12).quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+    def test_averages_match_a_row_by_row_replay(self):
+        run = compute_run(2025, rates=self.rates)
+        lines = run.lines.select_related("savings_account")
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertEqual(line.average_balance, self.replay(line.savings_account, 2025))
+        self.assertEqual(
+            run.total_net, lines.aggregate(total=Sum("net"))["total"]
+        )
+
+    def test_posting_credits_savings_and_balances_the_gl(self):
+        run = compute_run(2025, rates=self.rates)
+        before = dict(SavingsAccount.objects.values_list("pk", "balance"))
+
+        post_run(run, self.admin)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, "Posted")
+        for line in run.lines.select_related("savings_account", "deposit"):
+            self.assertEqual(
+                line.savings_account.balance, before[line.savings_account_id] + line.net
+            )
+            self.assertEqual(line.deposit.amount, line.net)
+            self.assertEqual(line.deposit.deposit_type, "Dividend Deposit")
+        entries = JournalEntry.objects.filter(
+            reference_id__in=[str(pk) for pk in run.lines.values_list("deposit", flat=True)]
+        ).aggregate(debit=Sum("debit"), credit=Sum("credit"))
+        self.assertEqual(entries["debit"], run.total_gross)
+        self.assertEqual(entries["credit"], run.total_gross)
+        self.assertEqual(
+            JournalEntry.objects.filter(gl_account__code="2040").aggregate(
+                total=Sum("credit")
+            )["total"],
+            run.total_withholding_tax,
+        )
+        for profile in GuarantorProfile.objects.filter(is_eligible=True):
+            self.assertEqual(
+                profile.max_guarantee_amount,
+                SavingsAccount.objects.filter(
+                    member=profile.member, account_type__is_guaranteed=True
+                ).aggregate(total=Sum("balance"))["total"] or 0,
+            )
+
+    def test_api_computes_reviews_and_posts_once(self):
+        response = self.client.post(
+            "/api/v1/dividends/",
+            {"year": 2025, "withholding_tax_rate": "10"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        reference = response.data["reference"]
+        self.assertEqual(response.data["status"], "Draft")
+
+        lines = self.client.get(f"/api/v1/dividends/{reference}/lines/")
+        self.assertEqual(lines.status_code, 200)
+
+        second = self.client.post(
+            "/api/v1/dividends/", {"year": 2025}, format="json"
+        ).data["reference"]
+        self.assertEqual(
+            self.client.post(f"/api/v1/dividends/{reference}/post/").status_code, 200
+        )
+        self.assertEqual(
+            self.client.post(f"/api/v1/dividends/{reference}/post/").status_code, 400
+        )
+        self.assertEqual(
+            self.client.post(f"/api/v1/dividends/{second}/post/").status_code, 409
+        )
+        self.assertEqual(
+            self.client.delete(f"/api/v1/dividends/{reference}/").status_code, 400
+        )
+        self.assertEqual(
+            self.client.delete(f"/api/v1/dividends/{second}/").status_code, 204
+        )
+        self.assertEqual(DividendRun.objects.get().status, "Posted")
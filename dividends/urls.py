@@ -0,0 +1,17 @@
+from django.urls import path
+
+from dividends.views import (
+    DividendLineListView,
+    DividendRunListCreateView,
+    DividendRunPostView,
+    DividendRunView,
+)
+
+app_name = "dividends"
+
+urlpatterns = [
+    path("", DividendRunListCreateView.as_view(), name="list-create"),
+    path("<str:reference>/", DividendRunView.as_view(), name="detail"),
+    path("<str:reference>/lines/", DividendLineListView.as_view(), name="lines"),
+    path("<str:reference>/post/", DividendRunPostView.as_view(), name="post"),
+]
@@ -0,0 +1,318 @@
+"""
+The dividend engine: average monthly savings balances for a year, the
+dividend and withholding tax on them, and the bulk posting of the resulting
+Dividend Deposits.
+
+1. average_balances() loads each account's opening balance and net flow per
+   month with grouped queries (per account, for deposits and withdrawals),
+   then computes every account's twelve month-end balances and their
+   average in one NumPy pass, in integer cents.
+2. compute_run() applies the annual rate for the account's savings type
+   (SavingsType.interest_rate unless overridden) and the withholding tax,
+   and saves a Draft DividendRun with one DividendLine per account, for
+   review.
+3. post_run() credits the net amounts as Dividend Deposits, with their GL
+   entries (DR DIVIDEND_GL_ACCOUNT gross, CR 2010 net, CR
+   WITHHOLDING_TAX_GL_ACCOUNT tax), in one transaction: bulk inserts a chunk
+   of lines at a time, then single UPDATEs for the balances. The deposits
+   are bulk-created, so their save() and signals don't run; post_run() does
+   their work itself.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.utils import generate_reference
+from catalogs.registry import get_catalog
+from dividends.models import DividendLine, DividendRun
+from finances.models import JournalEntry
+from guarantorprofile.models import GuarantorProfile
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+from savingswithdrawals.models import SavingsWithdrawal
+from transactions.utils.periods import before_year, in_month
+
+CHUNK_SIZE = 2000
+WITHHOLDING_TAX_RATE = "5"
+DIVIDEND_GL_ACCOUNT = "3010"
+WITHHOLDING_TAX_GL_ACCOUNT = "2040"
+
+# The rows that moved an account's balance (see their models' save())
+COUNTED_DEPOSITS = Q(transaction_status="Completed", is_active=True)
+COUNTED_WITHDRAWALS = Q(transaction_status__in=["Completed", "Approved"])
+
+
+class DividendError(Exception):
+    """The run can't be computed or posted as asked."""
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def from_cents(cents):
+    return Decimal(int(cents)) / 100
+
+
+def percent_hundredths(rate):
+    """12.5 (%) -> 1250"""
+    return to_cents(rate)
+
+
+def rounded_share(cents, hundredths):
+    """cents * rate% rounded half up, for arrays of non-negative cents."""
+    return (cents * hundredths + 5000) // 10000
+
+
+def average_balances(year):
+    """
+    (account ids, savings type names, average month-end balance in cents)
+    for every savings account, as arrays. Negative balances count as zero.
+    """
+    accounts = list(
+        SavingsAccount.objects.order_by().values_list("pk", "account_type__name")
+    )
+    index = {pk: i for i, (pk, _) in enumerate(accounts)}
+    opening = np.zeros(len(accounts), dtype=np.int64)
+    flows = np.zeros((len(accounts), 12), dtype=np.int64)
+
+    for model, q, sign in (
+        (SavingsDeposit, COUNTED_DEPOSITS, 1),
+        (SavingsWithdrawal, COUNTED_WITHDRAWALS, -1),
+    ):
+        prior = (
+            model.objects.filter(q, before_year(year))
+            .order_by()
+            .values_list("savings_account")
+            .annotate(total=Sum("amount"))
+        )
+        rows = [(index[pk], to_cents(total)) for pk, total in prior if pk in index]
+        if rows:
+            at, cents = np.array(rows, dtype=np.int64).T
+            np.add.at(opening, at, sign * cents)
+
+        # One range query per month rather than a TruncMonth grouping, so the
+        # (savings_account, created_at) index serves it
+        for month in range(1, 13):
+            totals = (
+                model.objects.filter(q, in_month(year, month))
+                .order_by()
+                .values_list("savings_account")
+                .annotate(total=Sum("amount"))
+            )
+            rows = [(index[pk], to_cents(total)) for pk, total in totals if pk in index]
+            if rows:
+                at, cents = np.array(rows, dtype=np.int64).T
+                np.add.at(flows[:, month - 1], at, sign * cents)
+
+    month_end = np.maximum(opening[:, None] + np.cumsum(flows, axis=1), 0)
+    average = (month_end.sum(axis=1) + 6) // 12
+    return (
+        [pk for pk, _ in accounts],
+        [type_name for _, type_name in accounts],
+        average,
+    )
+
+
+def default_rates():
+    return {
+        name: str(savings_type.interest_rate)
+        for name, savings_type in get_catalog().savings_types.items()
+    }
+
+
+def compute_run(year, rates=None, withholding_tax_rate=None, user=None):
+    """
+    Compute the year's dividends into a new Draft run. `rates` overrides the
+    savings types' interest_rate per type name.
+    """
+    rates = {**default_rates(), **{k: str(v) for k, v in (rates or {}).items()}}
+    unknown = set(rates) - set(get_catalog().savings_types)
+    if unknown:
+        raise DividendError(f"Unknown savings types: {', '.join(sorted(unknown))}")
+    if withholding_tax_rate is None:
+        withholding_tax_rate = getattr(
+            settings, "DIVIDEND_WITHHOLDING_TAX_RATE", WITHHOLDING_TAX_RATE
+        )
+    withholding_tax_rate = Decimal(str(withholding_tax_rate))
+
+    account_ids, type_names, average = average_balances(year)
+    hundredths = np.array(
+        [percent_hundredths(Decimal(rates[name])) for name in type_names], dtype=np.int64
+    )
+    gross = rounded_share(average, hundredths)
+    tax = rounded_share(gross, percent_hundredths(withholding_tax_rate))
+    net = gross - tax
+    paid = np.flatnonzero(gross > 0)
+
+    with transaction.atomic():
+        run = DividendRun.objects.create(
+            year=year,
+            rates=rates,
+            withholding_tax_rate=withholding_tax_rate,
+            account_count=len(paid),
+            total_average_balance=from_cents(average[paid].sum()),
+            total_gross=from_cents(gross[paid].sum()),
+            total_withholding_tax=from_cents(tax[paid].sum()),
+            total_net=from_cents(net[paid].sum()),
+            created_by=user,
+        )
+        DividendLine.objects.bulk_create(
+            (
+                DividendLine(
+                    run=run,
+                    savings_account_id=account_ids[i],
+                    average_balance=from_cents(average[i]),
+                    rate=Decimal(rates[type_names[i]]),
+                    gross=from_cents(gross[i]),
+                    withholding_tax=from_cents(tax[i]),
+                    net=from_cents(net[i]),
+                )
+                for i in paid
+            ),
+            batch_size=CHUNK_SIZE,
+        )
+    return run
+
+
+def post_run(run, user=None):
+    """Credit a Draft run's dividends to the savings accounts."""
+    catalog = get_catalog()
+    gl_accounts = (
+        catalog.gl_account(getattr(settings, "DIVIDEND_GL_ACCOUNT", DIVIDEND_GL_ACCOUNT)),
+        catalog.gl_account("2010"),
+        catalog.gl_account(
+            getattr(settings, "WITHHOLDING_TAX_GL_ACCOUNT", WITHHOLDING_TAX_GL_ACCOUNT)
+        ),
+    )
+    posted_at = timezone.now()
+    transaction_date = timezone.localtime(posted_at).date()
+
+    try:
+        with transaction.atomic():
+            run = DividendRun.objects.select_for_update().get(pk=run.pk)
+            if run.status != "Draft":
+                raise DividendError(f"Run {run.reference} is already {run.status}")
+            run.status = "Posted"
+            run.posted_by = user
+            run.posted_at = posted_at
+            run.save(update_fields=["status", "posted_by", "posted_at", "updated_at"])
+
+            paid = run.lines.filter(net__gt=0)
+            lines = list(paid.order_by("savings_account_id").values_list(
+                "id",
+                "savings_account_id",
+                "savings_account__member__member_no",
+                "savings_account__account_type__name",
+                "average_balance",
+                "rate",
+                "gross",
+                "withholding_tax",
+                "net",
+            ))
+            for start in range(0, len(lines), CHUNK_SIZE):
+                create_deposits(
+                    run,
+                    lines[start:start + CHUNK_SIZE],
+                    start,
+                    user,
+                    transaction_date,
+                    gl_accounts,
+                )
+
+            # Each deposit has its line's id (see create_deposits), so the
+            # balances, links and guarantee limits are one UPDATE each
+            SavingsAccount.objects.filter(
+                dividend_lines__run=run, dividend_lines__net__gt=0
+            ).update(
+                balance=F("balance")
+                + Subquery(
+                    paid.filter(savings_account=OuterRef("pk")).values("net")[:1]
+                ),
+                updated_at=posted_at,
+            )
+            paid.update(deposit_id=F("id"))
+            update_guarantee_limits(run)
+    except IntegrityError:
+        raise DividendError(f"Dividends for {run.year} have already been posted")
+    return run
+
+
+def create_deposits(run, lines, offset, user, transaction_date, gl_accounts):
+    """Dividend Deposits and their journal entries for a chunk of lines."""
+    dividend_gl, savings_gl, tax_gl = gl_accounts
+    deposits = []
+    entries = []
+    for n, (
+        line_id, account_id, member_no, type_name,
+        average_balance, rate, gross, withholding_tax, net,
+    ) in enumerate(lines, start=offset + 1):
+        deposits.append(
+            SavingsDeposit(
+                id=line_id,
+                savings_account_id=account_id,
+                deposited_by=user,
+                amount=net,
+                description=(
+                    f"{run.year} dividend at {rate}% on an average balance of "
+                    f"{average_balance} (gross {gross}, withholding tax "
+                    f"{withholding_tax})"
+                ),
+                deposit_type="Dividend Deposit",
+                transaction_status="Completed",
+                reference=generate_reference(),
+                identity=f"DIV-{run.reference}-{n:06d}",
+            )
+        )
+        # What finances.utils.post_to_gl records for a deposit, with the
+        # gross split between the member's savings and the tax withheld
+        postings = [(dividend_gl, gross, 0), (savings_gl, 0, net)]
+        if withholding_tax:
+            postings.append((tax_gl, 0, withholding_tax))
+        for gl_account, debit, credit in postings:
+            entries.append(
+                JournalEntry(
+                    transaction_date=transaction_date,
+                    description=f"Dividend {run.year}: {member_no} - {type_name}",
+                    gl_account=gl_account,
+                    debit=debit,
+                    credit=credit,
+                    reference_id=str(line_id),
+                    source_model="SavingsDeposit",
+                    posted_by=user,
+                )
+            )
+    SavingsDeposit.objects.bulk_create(deposits)
+    JournalEntry.objects.bulk_create(entries)
+
+
+def update_guarantee_limits(run):
+    """
+    What the SavingsAccount post_save signal does for the run's members: an
+    eligible guarantor's limit is the balance of their guaranteed savings.
+    """
+    guaranteed = SavingsAccount.objects.filter(
+        member=OuterRef("member"), account_type__is_guaranteed=True
+    )
+    GuarantorProfile.objects.filter(
+        is_eligible=True,
+        member__savings_accounts__dividend_lines__run=run,
+        member__savings_accounts__dividend_lines__net__gt=0,
+        member__savings_accounts__account_type__is_guaranteed=True,
+    ).update(
+        max_guarantee_amount=Coalesce(
+            Subquery(
+                guaranteed.order_by()
+                .values("member")
+                .annotate(total=Sum("balance"))
+                .values("total")
+            ),
+            Decimal("0"),
+        )
+    )
@@ -0,0 +1,96 @@
+import logging
+
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.pagination import LargeTablePagination
+from accounts.permissions import IsSystemAdmin
+from dividends.models import DividendLine, DividendRun
+from dividends.serializers import (
+    DividendLineSerializer,
+    DividendRunCreateSerializer,
+    DividendRunSerializer,
+)
+from dividends.utils import DividendError, compute_run, post_run
+
+logger = logging.getLogger(__name__)
+
+
+class DividendRunListCreateView(generics.ListCreateAPIView):
+    """
+    GET lists dividend runs. POST computes a year's dividends into a Draft run
+    for review; nothing is credited until the run is posted.
+    """
+    queryset = DividendRun.objects.select_related("created_by", "posted_by")
+    serializer_class = DividendRunSerializer
+    permission_classes = [IsSystemAdmin]
+
+    def create(self, request, *args, **kwargs):
+        serializer = DividendRunCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            run = compute_run(user=request.user, **serializer.validated_data)
+        except DividendError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(DividendRunSerializer(run).data, status=status.HTTP_201_CREATED)
+
+
+class DividendRunView(generics.RetrieveDestroyAPIView):
+    """A run's totals. Draft runs can be deleted; posted ones are kept."""
+    queryset = DividendRun.objects.select_related("created_by", "posted_by")
+    serializer_class = DividendRunSerializer
+    permission_classes = [IsSystemAdmin]
+    lookup_field = "reference"
+
+    def destroy(self, request, *args, **kwargs):
+        run = self.get_object()
+        if run.status != "Draft":
+            return Response(
+                {"error": "Only Draft runs can be deleted"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        run.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class DividendLineListView(generics.ListAPIView):
+    """A run's per-account lines."""
+    serializer_class = DividendLineSerializer
+    permission_classes = [IsSystemAdmin]
+    pagination_class = LargeTablePagination
+
+    def get_queryset(self):
+        return DividendLine.objects.filter(
+            run__reference=self.kwargs["reference"]
+        ).select_related(
+            "savings_account__member", "savings_account__account_type", "deposit"
+        )
+
+
+class DividendRunPostView(APIView):
+    """Credit a reviewed Draft run's dividends to the members' savings."""
+    permission_classes = [IsSystemAdmin]
+
+    def post(self, request, reference):
+        try:
+            run = DividendRun.objects.get(reference=reference)
+        except DividendRun.DoesNotExist:
+            return Response({"error": "Dividend run not found"}, status=status.HTTP_404_NOT_FOUND)
+        if run.status != "Draft":
+            return Response(
+                {"error": f"Run is already {run.status}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if DividendRun.objects.filter(year=run.year, status="Posted").exists():
+            return Response(
+                {"error": f"Dividends for {run.year} have already been posted"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            run = post_run(run, request.user)
+        except DividendError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        logger.info(f"Posted {run.year} dividends {run.reference}: {run.total_net}")
+        return Response(DividendRunSerializer(run).data)
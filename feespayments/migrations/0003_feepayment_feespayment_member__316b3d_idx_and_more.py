@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feespayments', '0002_feepayment_receipt_number'),
+        ('memberfees', '0003_memberfee_remaining_balance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feepayment',
+            index=models.Index(fields=['member_fee', 'created_at'], name='feespayment_member__316b3d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feepayment',
+            index=models.Index(fields=['paid_by', 'created_at'], name='feespayment_paid_by_dd34bb_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feespayments', '0003_feepayment_feespayment_member__316b3d_idx_and_more'),
+        ('memberfees', '0003_memberfee_remaining_balance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feepayment',
+            index=models.Index(fields=['created_at', 'id'], name='feespayment_created_513e74_idx'),
+        ),
+    ]
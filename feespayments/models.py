@@ -36,6 +36,11 @@ class FeePayment(TimeStampedModel, UniversalIdModel, ReferenceModel):
         verbose_name = "Fee Payment"
         verbose_name_plural = "Fee Payments"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["member_fee", "created_at"]),
+            models.Index(fields=["paid_by", "created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.member_fee.member.member_no} - {self.amount}"
\ No newline at end of file
@@ -10,7 +10,12 @@ class Command(BaseCommand):
                 "code": "2030",
                 "name": "Member Contributions",
                 "account_type": "Liability"
-            }
+            },
+            {
+                "code": "2040",
+                "name": "Withholding Tax Payable",
+                "account_type": "Liability"
+            },
             # Add other accounts here if needed in the future
         ]
 
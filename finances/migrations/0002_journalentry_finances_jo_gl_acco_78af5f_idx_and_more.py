@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['gl_account', 'transaction_date'], name='finances_jo_gl_acco_78af5f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['source_model', 'reference_id'], name='finances_jo_source__b480d6_idx'),
+        ),
+    ]
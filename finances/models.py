@@ -46,6 +46,10 @@ class JournalEntry(UniversalIdModel, TimeStampedModel):
         verbose_name = "Journal Entry"
         verbose_name_plural = "Journal Entries"
         ordering = ['-transaction_date', '-created_at']
+        indexes = [
+            models.Index(fields=['gl_account', 'transaction_date']),
+            models.Index(fields=['source_model', 'reference_id']),
+        ]
 
     def __str__(self):
         return f"{self.transaction_date} - {self.gl_account.name} ({'DR' if self.debit > 0 else 'CR'})"
@@ -3,6 +3,7 @@ from decimal import Decimal
 from datetime import date
 import logging
 from finances.models import GLAccount, JournalEntry
+from catalogs.registry import get_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -42,14 +43,16 @@ def post_to_gl(instance, transaction_type):
     cr_code = mappings[transaction_type]['cr']
 
     # Dynamic mapping for fee_payment based on is_income
+    catalog = get_catalog()
     if transaction_type == 'fee_payment' and hasattr(instance, 'member_fee'):
-        if not instance.member_fee.fee_type.is_income:
+        fee_type = catalog.fee_type_by_id(instance.member_fee.fee_type_id) or instance.member_fee.fee_type
+        if not fee_type.is_income:
             cr_code = '2030'  # Member Contributions (Liability)
     
     try:
         with transaction.atomic():
-            dr_acc = GLAccount.objects.get(code=dr_code)
-            cr_acc = GLAccount.objects.get(code=cr_code)
+            dr_acc = catalog.gl_account(dr_code)
+            cr_acc = catalog.gl_account(cr_code)
             
             # Use created_at if available, otherwise today
             trans_date = getattr(instance, 'created_at', None)
@@ -0,0 +1,29 @@
+"""
+Gunicorn settings, read from the working directory by `gunicorn` (Procfile).
+
+SERVER_MODE picks how Django is served:
+
+- "wsgi" (default): saccoapi.wsgi on Gunicorn's sync workers, one request at
+  a time per worker.
+- "asgi": saccoapi.asgi on Uvicorn workers. The statement, summary, cashbook,
+  PDF and member profile views are async, so one worker keeps serving other
+  requests while they wait on the database or Chromium. The remaining views
+  are sync and run in a thread per request.
+
+WEB_CONCURRENCY sets the number of workers either way. Compare the modes with
+`manage.py load_test_server_modes`.
+"""
+
+import os
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi").lower()
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "saccoapi.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+elif SERVER_MODE == "wsgi":
+    wsgi_app = "saccoapi.wsgi:application"
+else:
+    raise RuntimeError(f"SERVER_MODE must be wsgi or asgi, not {SERVER_MODE!r}")
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from loanapplications.models import LoanApplication
+from loanapplications.models import LoanApplication, LoanReprojection
 
 
 class LoanApplicationAdmin(admin.ModelAdmin):
@@ -17,3 +17,11 @@ class LoanApplicationAdmin(admin.ModelAdmin):
 
 
 admin.site.register(LoanApplication, LoanApplicationAdmin)
+
+
+class LoanReprojectionAdmin(admin.ModelAdmin):
+    list_display = ("loan_type", "interest_rate", "as_of", "status", "loan_count", "created_at")
+    list_filter = ("status", "loan_type")
+
+
+admin.site.register(LoanReprojection, LoanReprojectionAdmin)
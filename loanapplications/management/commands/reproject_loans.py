@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loanapplications.reprojection import reproject
+from loantypes.models import LoanType
+from transactions.utils.periods import parse_date_param
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-project a loan type's disbursed loans from their outstanding "
+        "balances at its current interest rate"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loan-type", type=str, required=True)
+        parser.add_argument("--as-of", type=str, default=None, help="YYYY-MM-DD (default: today)")
+        parser.add_argument(
+            "--preview", action="store_true", help="Report the changes without saving them"
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Also re-project loans already projected at the current rate",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            loan_type = LoanType.objects.get(name=options["loan_type"])
+            as_of = parse_date_param(options["as_of"], "--as-of")
+        except LoanType.DoesNotExist:
+            raise CommandError(f"Unknown loan type '{options['loan_type']}'")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        run = reproject(
+            loan_type, as_of=as_of, preview=options["preview"], force=options["force"]
+        )
+        self.stdout.write(json.dumps(run.summary, indent=2))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{run.status}: {run.loan_count} {loan_type.name} loans at "
+                f"{run.interest_rate}% ({run.reference})"
+            )
+        )
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:46
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loanapplications', '0006_loanapplication_amendment_notes'),
+        ('loantypes', '0004_remove_loantype_system_calculates_interest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanReprojection',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reference', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('interest_rate', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('as_of', models.DateField()),
+                ('status', models.CharField(choices=[('Preview', 'Preview'), ('Completed', 'Completed')], default='Preview', max_length=20)),
+                ('loan_count', models.PositiveIntegerField(default=0)),
+                ('summary', models.JSONField(default=dict)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('loan_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reprojections', to='loantypes.loantype')),
+            ],
+            options={
+                'verbose_name': 'Loan Re-projection',
+                'verbose_name_plural': 'Loan Re-projections',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LoanReprojectionItem',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('outstanding_balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('remaining_installments', models.PositiveIntegerField()),
+                ('previous_snapshot', models.JSONField(default=dict)),
+                ('previous_monthly_payment', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('previous_total_interest', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('previous_repayment_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('monthly_payment', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('total_interest', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('repayment_amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reprojections', to='loanapplications.loanapplication')),
+                ('reprojection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='loanapplications.loanreprojection')),
+            ],
+            options={
+                'ordering': ['application__member__member_no'],
+            },
+        ),
+    ]
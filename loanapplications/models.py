@@ -84,3 +84,69 @@ class LoanApplication(UniversalIdModel, TimeStampedModel, ReferenceModel):
 
     def __str__(self):
         return f"{self.member.member_no} - {self.requested_amount}"
+
+
+class LoanReprojection(UniversalIdModel, TimeStampedModel, ReferenceModel):
+    """
+    A batch re-projection of a loan type's disbursed loans at its current
+    interest_rate (loanapplications.reprojection). A Preview computes the
+    changes without saving them.
+    """
+
+    STATUS_CHOICES = [
+        ("Preview", "Preview"),
+        ("Completed", "Completed"),
+    ]
+
+    loan_type = models.ForeignKey(
+        LoanType, on_delete=models.PROTECT, related_name="reprojections"
+    )
+    interest_rate = models.DecimalField(max_digits=12, decimal_places=2)
+    as_of = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Preview")
+    loan_count = models.PositiveIntegerField(default=0)
+    # Totals before and after, and the loans left alone by reason
+    summary = models.JSONField(default=dict)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        verbose_name = "Loan Re-projection"
+        verbose_name_plural = "Loan Re-projections"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.loan_type.name} at {self.interest_rate}% ({self.status}) - {self.reference}"
+
+
+class LoanReprojectionItem(UniversalIdModel):
+    """One application's projection before and after a re-projection."""
+
+    reprojection = models.ForeignKey(
+        LoanReprojection, on_delete=models.CASCADE, related_name="items"
+    )
+    application = models.ForeignKey(
+        LoanApplication, on_delete=models.CASCADE, related_name="reprojections"
+    )
+    outstanding_balance = models.DecimalField(max_digits=15, decimal_places=2)
+    remaining_installments = models.PositiveIntegerField()
+    previous_snapshot = models.JSONField(default=dict)
+    previous_monthly_payment = models.DecimalField(
+        max_digits=15, decimal_places=2, null=True, blank=True
+    )
+    previous_total_interest = models.DecimalField(
+        max_digits=15, decimal_places=2, null=True, blank=True
+    )
+    previous_repayment_amount = models.DecimalField(
+        max_digits=15, decimal_places=2, null=True, blank=True
+    )
+    monthly_payment = models.DecimalField(max_digits=15, decimal_places=2)
+    total_interest = models.DecimalField(max_digits=15, decimal_places=2)
+    repayment_amount = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        ordering = ["application__member__member_no"]
+
+    def __str__(self):
+        return f"{self.application} - {self.previous_monthly_payment} -> {self.monthly_payment}"
@@ -0,0 +1,330 @@
+"""
+Batch re-projection of disbursed loans when their loan type's interest rate
+changes.
+
+Each affected loan is re-amortised from its current outstanding balance at
+the loan type's interest_rate over its remaining schedule:
+
+- the instalments already due (on or before the as-of date) are kept as they
+  were, so arrears keep being measured against what was actually scheduled;
+- fixed-term loans keep their remaining number of instalments and get a new
+  payment; fixed-payment loans keep their payment and get a new term.
+
+The schedules are built for all loans at once: amortize() steps through the
+instalments month by month with NumPy arrays over the loans, in integer
+cents, with the same results as calculators.py. The applications are then written
+back with bulk_update, and each one's previous projection is kept on a
+LoanReprojectionItem.
+"""
+
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from loanapplications.calculators import DELTA
+from loanapplications.models import (
+    LoanApplication,
+    LoanReprojection,
+    LoanReprojectionItem,
+)
+from loantypes.models import LoanType
+
+BATCH_SIZE = 500
+MAX_MONTHS = 360  # as reducing_fixed_payment
+
+
+def to_cents(amount):
+    return int((Decimal(str(amount)) * 100).to_integral_value())
+
+
+def from_cents(cents):
+    return Decimal(int(cents)) / 100
+
+
+def annuity_payment(principal, annual_rate, terms):
+    """Fixed-term payment in cents, computed as reducing_fixed_term does."""
+    monthly_rate = (Decimal(annual_rate) / 100) / 12
+    principal = from_cents(principal)
+    if monthly_rate == 0:
+        payment = principal / Decimal(terms)
+    else:
+        growth = (1 + monthly_rate) ** Decimal(terms)
+        payment = principal * (monthly_rate * growth) / (growth - 1)
+    return to_cents(payment.quantize(Decimal("0.01"), ROUND_HALF_UP))
+
+
+def decimal_interest(balance, annual_rate):
+    """Interest in cents exactly as calculators.py computes it."""
+    monthly_rate = (Decimal(int(annual_rate)) / 10000) / 12
+    return to_cents((from_cents(balance) * monthly_rate).quantize(Decimal("0.01"), ROUND_HALF_UP))
+
+
+def amortize(principal, annual_rate, payment, terms, fixed_term):
+    """
+    Schedules for many loans at once. Returns the instalments of every loan
+    as flat arrays in cents, loan by loan and in order (principal_due,
+    interest_due, total_due, balance_after), with each loan's payment and
+    number of instalments.
+
+    `principal` and `payment` are in cents and `annual_rate` in hundredths
+    of a percent (12.5% -> 1250), so the monthly interest, balance * rate /
+    120000 rounded, is integer arithmetic. For fixed-term
+    loans `payment` is ignored and computed from `terms`; fixed-payment
+    loans run until paid off, up to MAX_MONTHS.
+    """
+    principal = principal.astype(np.int64)
+    annual_rate = annual_rate.astype(np.int64)
+    payment = np.array(
+        [
+            annuity_payment(p, Decimal(int(r)) / 100, int(n)) if fixed else int(pay)
+            for p, r, pay, n, fixed in zip(principal, annual_rate, payment, terms, fixed_term)
+        ],
+        dtype=np.int64,
+    )
+    limit = np.where(fixed_term, terms, MAX_MONTHS).astype(np.int64)
+
+    # Each step keeps only the loans still running, so memory follows the
+    # number of instalments rather than loans x the longest term
+    steps = []
+    balance = principal.copy()
+    for k in range(int(limit.max()) if len(limit) else 0):
+        active = np.flatnonzero((k < limit) & (fixed_term | (balance > 1)))
+        if not len(active):
+            break
+        current = balance[active]
+        whole, rest = np.divmod(current * annual_rate[active], 120000)
+        interest = whole + (2 * rest > 120000)
+        # calculators.py multiplies by a 28-digit Decimal monthly rate, so an
+        # exact half cent can go either way there: work those out its way
+        for j in np.flatnonzero(2 * rest == 120000):
+            interest[j] = decimal_interest(current[j], annual_rate[active[j]])
+        paid = payment[active] - interest
+        last = current < paid
+        paid = np.where(last, current, paid)
+        total = np.where(last, paid + interest, payment[active])
+        balance[active] = current - paid
+        steps.append((active, paid, interest, total, balance[active]))
+
+    if not steps:
+        empty = np.zeros(0, dtype=np.int64)
+        return (empty, empty, empty, empty), payment, np.zeros(len(principal), dtype=np.int64)
+    loans = np.concatenate([step[0] for step in steps])
+    order = np.argsort(loans, kind="stable")
+    columns = tuple(np.concatenate([step[i] for step in steps])[order] for i in range(1, 5))
+    return columns, payment, np.bincount(loans, minlength=len(principal))
+
+
+class DueDates:
+    """Due dates stepped from an anchor as calculators.py steps them, cached."""
+
+    def __init__(self):
+        self.cache = {}
+
+    def __call__(self, anchor, frequency, count):
+        dates = self.cache.setdefault((anchor, frequency), [])
+        current = dates[-1] if dates else anchor
+        while len(dates) < count:
+            current += DELTA[frequency]
+            dates.append(current)
+        return dates[:count]
+
+
+def affected(loan_type, force=False):
+    """
+    The loan type's disbursed applications on active loans with a balance
+    left, and the reasons the others are left alone.
+    """
+    applications = (
+        LoanApplication.objects.filter(
+            product=loan_type,
+            status="Disbursed",
+            loan_account__isnull=False,
+            loan_account__is_active=True,
+        )
+        .select_related("loan_account")
+        .order_by("pk")
+    )
+    # A loan account's balance can't be split between several applications
+    shared = set(
+        LoanApplication.objects.filter(status="Disbursed", loan_account__isnull=False)
+        .values("loan_account")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values_list("loan_account", flat=True)
+    )
+    rate = str(loan_type.interest_rate)
+    selected, skipped = [], {}
+    for application in applications:
+        snapshot = application.projection_snapshot or {}
+        if application.loan_account.outstanding_balance <= 0:
+            reason = "paid_off"
+        elif application.loan_account_id in shared:
+            reason = "shared_loan_account"
+        elif not force and snapshot.get("interest_rate") == rate:
+            reason = "up_to_date"
+        else:
+            selected.append(application)
+            continue
+        skipped[reason] = skipped.get(reason, 0) + 1
+    return selected, skipped
+
+
+def split_schedule(application, as_of):
+    """(instalments due by as_of, the rest, the date the new schedule runs from)."""
+    schedule = (application.projection_snapshot or {}).get("schedule") or []
+    elapsed = [row for row in schedule if date.fromisoformat(row["due_date"]) <= as_of]
+    remaining = schedule[len(elapsed):]
+    anchor = (
+        date.fromisoformat(elapsed[-1]["due_date"]) if elapsed else application.start_date
+    )
+    return elapsed, remaining, anchor
+
+
+def reproject(loan_type, as_of=None, user=None, preview=False, force=False):
+    """
+    Re-project the loan type's affected loans. Returns the LoanReprojection;
+    with preview=True nothing but the run's summary is saved.
+    """
+    as_of = as_of or timezone.localdate()
+    with transaction.atomic():
+        # One re-projection of a loan type at a time
+        loan_type = LoanType.objects.select_for_update().get(pk=loan_type.pk)
+        applications, skipped = affected(loan_type, force)
+
+        plans = []
+        for application in applications:
+            elapsed, remaining, anchor = split_schedule(application, as_of)
+            if not remaining:
+                skipped["past_term"] = skipped.get("past_term", 0) + 1
+                continue
+            plans.append((application, elapsed, remaining, anchor))
+
+        n = len(plans)
+        schedules, payments, counts = amortize(
+            principal=np.array(
+                [to_cents(a.loan_account.outstanding_balance) for a, *_ in plans],
+                dtype=np.int64,
+            ),
+            annual_rate=np.full(n, to_cents(loan_type.interest_rate), dtype=np.int64),
+            payment=np.array(
+                [to_cents(a.monthly_payment or 0) for a, *_ in plans], dtype=np.int64
+            ),
+            terms=np.array([len(remaining) for _, _, remaining, _ in plans], dtype=np.int64),
+            fixed_term=np.array(
+                [a.calculation_mode != "fixed_payment" for a, *_ in plans], dtype=bool
+            ),
+        )
+        principal_due, interest_due, total_due, balance_after = schedules
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        run = LoanReprojection(
+            loan_type=loan_type,
+            interest_rate=loan_type.interest_rate,
+            as_of=as_of,
+            status="Preview" if preview else "Completed",
+            loan_count=n,
+            created_by=user,
+        )
+        due_dates = DueDates()
+        now = timezone.now()
+        items = []
+        before = {"monthly_payment": 0, "remaining_interest": 0, "repayment_amount": 0}
+        after = dict(before)
+        changes = []
+        for i, (application, elapsed, remaining, anchor) in enumerate(plans):
+            count = int(counts[i])
+            rows = slice(offsets[i], offsets[i + 1])
+            dates = due_dates(anchor, application.repayment_frequency, count)
+            new_rows = [
+                {
+                    "due_date": due.isoformat(),
+                    "principal_due": float(from_cents(principal)),
+                    "interest_due": float(from_cents(interest)),
+                    "total_due": float(from_cents(total)),
+                    "balance_after": float(from_cents(balance)),
+                }
+                for due, principal, interest, total, balance in zip(
+                    dates,
+                    principal_due[rows],
+                    interest_due[rows],
+                    total_due[rows],
+                    balance_after[rows],
+                )
+            ]
+            elapsed_interest = sum(to_cents(row["interest_due"]) for row in elapsed)
+            remaining_interest = int(interest_due[rows].sum())
+            total_interest = elapsed_interest + remaining_interest
+            repayment_amount = to_cents(application.requested_amount) + total_interest
+
+            before["monthly_payment"] += to_cents(application.monthly_payment or 0)
+            before["remaining_interest"] += sum(
+                to_cents(row["interest_due"]) for row in remaining
+            )
+            before["repayment_amount"] += to_cents(application.repayment_amount or 0)
+            after["monthly_payment"] += int(payments[i])
+            after["remaining_interest"] += remaining_interest
+            after["repayment_amount"] += repayment_amount
+            changes.append(int(payments[i]) - to_cents(application.monthly_payment or 0))
+
+            items.append(
+                LoanReprojectionItem(
+                    reprojection=run,
+                    application=application,
+                    outstanding_balance=application.loan_account.outstanding_balance,
+                    remaining_installments=count,
+                    previous_snapshot=application.projection_snapshot,
+                    previous_monthly_payment=application.monthly_payment,
+                    previous_total_interest=application.total_interest,
+                    previous_repayment_amount=application.repayment_amount,
+                    monthly_payment=from_cents(payments[i]),
+                    total_interest=from_cents(total_interest),
+                    repayment_amount=from_cents(repayment_amount),
+                )
+            )
+            application.projection_snapshot = {
+                "term_months": len(elapsed) + count,
+                "monthly_payment": float(from_cents(payments[i])),
+                "total_interest": float(from_cents(total_interest)),
+                "total_repayment": float(from_cents(repayment_amount)),
+                "schedule": elapsed + new_rows,
+                "interest_rate": str(loan_type.interest_rate),
+                "reprojected_at": as_of.isoformat(),
+                "reprojected_from_balance": float(application.loan_account.outstanding_balance),
+            }
+            application.monthly_payment = from_cents(payments[i])
+            application.term_months = len(elapsed) + count
+            application.total_interest = from_cents(total_interest)
+            application.repayment_amount = from_cents(repayment_amount)
+            application.updated_at = now
+
+        run.summary = {
+            "skipped": skipped,
+            "before": {key: str(from_cents(value)) for key, value in before.items()},
+            "after": {key: str(from_cents(value)) for key, value in after.items()},
+            "payments_up": sum(1 for change in changes if change > 0),
+            "payments_down": sum(1 for change in changes if change < 0),
+            "largest_payment_increase": str(from_cents(max(0, max(changes, default=0)))),
+            "largest_payment_decrease": str(from_cents(max(0, -min(changes, default=0)))),
+        }
+        run.save()
+        if preview:
+            return run
+
+        LoanApplication.objects.bulk_update(
+            [application for application, *_ in plans],
+            [
+                "projection_snapshot",
+                "monthly_payment",
+                "term_months",
+                "total_interest",
+                "repayment_amount",
+                "updated_at",
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        LoanReprojectionItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+    return run
@@ -5,7 +5,7 @@ from dateutil.relativedelta import relativedelta
 from django.utils import timezone
 from django.db import models
 
-from loanapplications.models import LoanApplication
+from loanapplications.models import LoanApplication, LoanReprojection, LoanReprojectionItem
 from loans.models import LoanAccount
 from savings.models import SavingsAccount
 from loantypes.models import LoanType
@@ -342,3 +342,56 @@ class LoanStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = LoanApplication
         fields = ("status",)
+
+
+class LoanReprojectionSerializer(serializers.ModelSerializer):
+    loan_type = serializers.CharField(source="loan_type.name", read_only=True)
+    created_by = serializers.CharField(source="created_by.member_no", read_only=True, default=None)
+
+    class Meta:
+        model = LoanReprojection
+        fields = (
+            "reference",
+            "loan_type",
+            "interest_rate",
+            "as_of",
+            "status",
+            "loan_count",
+            "summary",
+            "created_by",
+            "created_at",
+        )
+
+
+class LoanReprojectionRequestSerializer(serializers.Serializer):
+    loan_type = serializers.SlugRelatedField(slug_field="name", queryset=LoanType.objects.all())
+    as_of = serializers.DateField(required=False)
+    # Compute the summary without changing any loan
+    preview = serializers.BooleanField(default=False)
+    # Also re-project loans already projected at the current rate
+    force = serializers.BooleanField(default=False)
+
+
+class LoanReprojectionItemSerializer(serializers.ModelSerializer):
+    application = serializers.CharField(source="application.reference", read_only=True)
+    member = serializers.CharField(source="application.member.member_no", read_only=True)
+    account_number = serializers.CharField(
+        source="application.loan_account.account_number", read_only=True, default=None
+    )
+
+    class Meta:
+        model = LoanReprojectionItem
+        fields = (
+            "application",
+            "member",
+            "account_number",
+            "outstanding_balance",
+            "remaining_installments",
+            "previous_monthly_payment",
+            "monthly_payment",
+            "previous_total_interest",
+            "total_interest",
+            "previous_repayment_amount",
+            "repayment_amount",
+            "previous_snapshot",
+        )
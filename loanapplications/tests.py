@@ -1,3 +1,145 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from loanapplications.calculators import reducing_fixed_payment, reducing_fixed_term
+from loanapplications.models import LoanApplication, LoanReprojection
+from loanapplications.reprojection import amortize, reproject, to_cents
+from loans.models import LoanAccount
+from loantypes.models import LoanType
+
+User = get_user_model()
+
+
+def cents(schedule, key):
+    return [to_cents(row[key]) for row in schedule]
+
+
+class LoanReprojectionTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            member_no="ADM001", password="pass1234", is_system_admin=True
+        )
+        self.member = User.objects.create_user(
+            member_no="MEM001", password="pass1234", is_member=True
+        )
+        self.loan_type = LoanType.objects.create(
+            name="Development", description="Development loan", interest_rate=Decimal("12.00")
+        )
+
+    def disbursed(self, principal="120000.00", term=12, outstanding="100000.00"):
+        projection = reducing_fixed_term(
+            Decimal(principal), self.loan_type.interest_rate, term, date(2025, 1, 1)
+        )
+        account = LoanAccount.objects.create(
+            member=self.member,
+            loan_type=self.loan_type,
+            outstanding_balance=Decimal(outstanding),
+        )
+        return LoanApplication.objects.create(
+            member=self.member,
+            product=self.loan_type,
+            requested_amount=Decimal(principal),
+            repayment_amount=Decimal(str(projection["total_repayment"])),
+            total_interest=Decimal(str(projection["total_interest"])),
+            calculation_mode="fixed_term",
+            term_months=term,
+            monthly_payment=Decimal(str(projection["monthly_payment"])),
+            start_date=date(2025, 1, 1),
+            projection_snapshot=projection,
+            status="Disbursed",
+            loan_account=account,
+        )
+
+    def test_amortize_matches_the_calculators(self):
+        # The last two round an exact half cent of interest the calculators' way
+        cases = [
+            (Decimal("120000.00"), Decimal("12.00"), 12, True, None),
+            (Decimal("1679642.34"), Decimal("13.75"), 71, True, None),
+            (Decimal("3333940.34"), Decimal("8.5"), 0, False, Decimal("338354.03")),
+            (Decimal("50000.00"), Decimal("0"), 0, False, Decimal("7000.00")),
+        ]
+        expected = [
+            reducing_fixed_term(p, r, n, date(2025, 1, 1))
+            if fixed
+            else reducing_fixed_payment(p, r, pmt, date(2025, 1, 1))
+            for p, r, n, fixed, pmt in cases
+        ]
+        columns, payments, counts = amortize(
+            principal=np.array([to_cents(p) for p, *_ in cases]),
+            annual_rate=np.array([to_cents(r) for _, r, *_ in cases]),
+            payment=np.array([to_cents(pmt or 0) for *_, pmt in cases]),
+            terms=np.array([n for _, _, n, _, _ in cases]),
+            fixed_term=np.array([fixed for *_, fixed, _ in cases]),
+        )
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        for i, projection in enumerate(expected):
+            rows = slice(offsets[i], offsets[i + 1])
+            self.assertEqual(payments[i], to_cents(projection["monthly_payment"]))
+            for column, key in zip(
+                columns, ("principal_due", "interest_due", "total_due", "balance_after")
+            ):
+                self.assertEqual(list(column[rows]), cents(projection["schedule"], key))
+
+    def test_reprojects_the_remaining_schedule_from_the_balance(self):
+        application = self.disbursed()
+        previous = application.projection_snapshot
+        self.loan_type.interest_rate = Decimal("18.00")
+        self.loan_type.save()
+
+        run = reproject(self.loan_type, as_of=date(2025, 4, 15), user=self.admin)
+
+        application.refresh_from_db()
+        snapshot = application.projection_snapshot
+        self.assertEqual(run.status, "Completed")
+        self.assertEqual(run.loan_count, 1)
+        # Three instalments were due by the as-of date and stay as they were
+        self.assertEqual(snapshot["schedule"][:3], previous["schedule"][:3])
+        remaining = reducing_fixed_term(
+            Decimal("100000.00"), Decimal("18.00"), 9, date(2025, 4, 1)
+        )
+        self.assertEqual(snapshot["schedule"][3:], remaining["schedule"])
+        self.assertEqual(application.monthly_payment, Decimal(str(remaining["monthly_payment"])))
+        self.assertEqual(application.term_months, 12)
+        self.assertEqual(
+            application.total_interest,
+            Decimal(str(sum(row["interest_due"] for row in snapshot["schedule"]))).quantize(
+                Decimal("0.01")
+            ),
+        )
+        self.assertEqual(
+            application.repayment_amount, Decimal("120000.00") + application.total_interest
+        )
+
+        item = run.items.get()
+        self.assertEqual(item.previous_snapshot, previous)
+        self.assertEqual(item.previous_monthly_payment, Decimal(str(previous["monthly_payment"])))
+        self.assertEqual(run.summary["payments_up"], 1)
+
+        # Already at the current rate
+        again = reproject(self.loan_type, as_of=date(2025, 4, 15))
+        self.assertEqual(again.loan_count, 0)
+        self.assertEqual(again.summary["skipped"], {"up_to_date": 1})
+
+    def test_preview_changes_nothing(self):
+        application = self.disbursed(outstanding="90000.00")
+        self.loan_type.interest_rate = Decimal("6.00")
+        self.loan_type.save()
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.post(
+            "/api/v1/loanapplications/reprojections/",
+            {"loan_type": "Development", "as_of": "2025-04-15", "preview": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["status"], "Preview")
+        self.assertEqual(response.data["summary"]["payments_down"], 1)
+        self.assertEqual(
+            LoanApplication.objects.get(pk=application.pk).projection_snapshot,
+            application.projection_snapshot,
+        )
+        self.assertFalse(LoanReprojection.objects.get().items.exists())
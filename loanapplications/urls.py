@@ -10,7 +10,10 @@ from loanapplications.views import (
     AdminAmendView,
     MemberAcceptAmendmentView,
     MemberCancelAmendmentView,
-    DisburseLoanApplicationView
+    DisburseLoanApplicationView,
+    LoanReprojectionListCreateView,
+    LoanReprojectionDetailView,
+    LoanReprojectionItemListView,
 )
 
 app_name = "loanapplications"
@@ -18,6 +21,21 @@ app_name = "loanapplications"
 urlpatterns = [
     path("", LoanApplicationListView.as_view(), name="loanapplications-list"),
     path("list/", LoanApplicationListCreateView.as_view(), name="loanapplications"),
+    path(
+        "reprojections/",
+        LoanReprojectionListCreateView.as_view(),
+        name="loan-reprojections",
+    ),
+    path(
+        "reprojections/<str:reference>/",
+        LoanReprojectionDetailView.as_view(),
+        name="loan-reprojection-detail",
+    ),
+    path(
+        "reprojections/<str:reference>/items/",
+        LoanReprojectionItemListView.as_view(),
+        name="loan-reprojection-items",
+    ),
     path(
         "<str:reference>/",
         LoanApplicationDetailView.as_view(),
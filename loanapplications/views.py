@@ -5,9 +5,17 @@ from django.db import transaction
 from django.db.models import F
 from decimal import Decimal
 
-from .models import LoanApplication
-from .serializers import LoanApplicationSerializer, LoanStatusUpdateSerializer
-from accounts.permissions import IsSystemAdminOrReadOnly
+from .models import LoanApplication, LoanReprojection, LoanReprojectionItem
+from .serializers import (
+    LoanApplicationSerializer,
+    LoanReprojectionItemSerializer,
+    LoanReprojectionRequestSerializer,
+    LoanReprojectionSerializer,
+    LoanStatusUpdateSerializer,
+)
+from accounts.pagination import LargeTablePagination
+from accounts.permissions import IsSystemAdmin, IsSystemAdminOrReadOnly
+from loanapplications.reprojection import reproject
 from guaranteerequests.models import GuaranteeRequest
 from guarantorprofile.models import GuarantorProfile
 from loans.models import LoanAccount
@@ -485,3 +493,43 @@ class DisburseLoanApplicationView(generics.GenericAPIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+# =================================================================================================
+# RE-PROJECTION AFTER AN INTEREST RATE CHANGE
+# =================================================================================================
+
+class LoanReprojectionListCreateView(generics.ListCreateAPIView):
+    """
+    GET lists re-projections. POST re-projects a loan type's disbursed loans
+    at its current interest_rate (as `manage.py reproject_loans`); send
+    `preview: true` to see the summary without changing any loan.
+    """
+    queryset = LoanReprojection.objects.select_related("loan_type", "created_by")
+    serializer_class = LoanReprojectionSerializer
+    permission_classes = [IsSystemAdmin]
+
+    def create(self, request, *args, **kwargs):
+        serializer = LoanReprojectionRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        run = reproject(user=request.user, **serializer.validated_data)
+        return Response(LoanReprojectionSerializer(run).data, status=status.HTTP_201_CREATED)
+
+
+class LoanReprojectionDetailView(generics.RetrieveAPIView):
+    queryset = LoanReprojection.objects.select_related("loan_type", "created_by")
+    serializer_class = LoanReprojectionSerializer
+    permission_classes = [IsSystemAdmin]
+    lookup_field = "reference"
+
+
+class LoanReprojectionItemListView(generics.ListAPIView):
+    """Each re-projected loan's figures before and after, with its previous snapshot."""
+    serializer_class = LoanReprojectionItemSerializer
+    permission_classes = [IsSystemAdmin]
+    pagination_class = LargeTablePagination
+
+    def get_queryset(self):
+        return LoanReprojectionItem.objects.filter(
+            reprojection__reference=self.kwargs["reference"]
+        ).select_related("application__member", "application__loan_account")
@@ -49,6 +49,10 @@ class LoanDisbursement(TimeStampedModel, UniversalIdModel, ReferenceModel):
         verbose_name = "Loan Disbursement"
         verbose_name_plural = "Loan Disbursements"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["loan_account", "created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.loan_account} {self.disbursement_type} Disbursement"
@@ -1,15 +1,14 @@
-import csv
-import io
-import cloudinary.uploader
 import logging
 from datetime import date
 from django.db import transaction
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 from rest_framework.response import Response
+from accounts.pagination import LargeTablePagination
 from accounts.permissions import IsSystemAdminOrReadOnly
 from rest_framework import generics, status
 
 from transactions.models import BulkTransactionLog
+from transactions.utils.uploads import CSVImport, CSVUploadMixin
 from loandisbursements.models import LoanDisbursement
 from loandisbursements.serializers import (
     LoanDisbursementSerializer,
@@ -23,7 +22,8 @@ logger = logging.getLogger(__name__)
 
 
 class LoanDisbursementListCreateView(generics.ListCreateAPIView):
-    queryset = LoanDisbursement.objects.all()
+    queryset = LoanDisbursement.objects.select_related("loan_account", "disbursed_by")
+    pagination_class = LargeTablePagination
     serializer_class = LoanDisbursementSerializer
     permission_classes = [IsSystemAdminOrReadOnly]
 
@@ -115,193 +115,61 @@ class BulkLoanDisbursementView(generics.CreateAPIView):
         )
 
 
-class LoanDisbursementCSVUploadView(generics.CreateAPIView):
-    """Upload CSV file for bulk loan disbursements — mirrors BulkSavingsDepositUploadView."""
-
-    permission_classes = [IsSystemAdminOrReadOnly]
-    serializer_class = LoanDisbursementSerializer
-
-    def post(self, request, *args, **kwargs):
-        file = request.FILES.get("file")
-        if not file:
-            return Response(
-                {"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Read CSV
-        try:
-            csv_content = file.read().decode("utf-8")
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-        except Exception as e:
-            logger.error(f"Failed to read CSV: {str(e)}")
-            return Response(
-                {"error": f"Invalid CSV file: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Required columns
-        required_fields = {
-            "loan_account_number",
-            "amount",
-            "currency",
+class LoanDisbursementImport(CSVImport):
+    transaction_type = "Loan Disbursements"
+    reference_prefix = "LOAN-BULK"
+    storage_folder = "bulk_loan_disbursements"
+    references = {"loan": (LoanAccount, "account_number")}
+    required_fields = {
+        "loan_account_number",
+        "amount",
+        "currency",
+        "transaction_status",
+        "disbursement_type",
+    }
+
+    def check_header(self, fieldnames):
+        missing = self.required_fields - set(fieldnames)
+        if missing:
+            return f"Missing columns: {', '.join(sorted(missing))}"
+
+    def plan_row(self, plan):
+        account = plan.value("loan_account_number")
+        if not account:
+            plan.error("loan_account_number is required")
+            return
+        amount = plan.amount("amount", account)
+        status_val = plan.choice(
             "transaction_status",
+            LoanDisbursement.TRANSACTION_STATUS_CHOICES,
+            "Completed",
+            account,
+        )
+        disb_type = plan.choice(
             "disbursement_type",
-        }
-        if not required_fields.issubset(reader.fieldnames):
-            missing = required_fields - set(reader.fieldnames)
-            return Response(
-                {"error": f"Missing columns: {', '.join(missing)}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        admin = request.user
-        today = date.today()
-        date_str = today.strftime("%Y%m%d")
-        prefix = f"LOAN-BULK-{date_str}"
-
-        # Initialize log
-        try:
-            log = BulkTransactionLog.objects.create(
-                admin=admin,
-                transaction_type="Loan Disbursements",
-                reference_prefix=prefix,
-                success_count=0,
-                error_count=0,
-                file_name=file.name,
-            )
-        except Exception as e:
-            logger.error(f"Failed to create BulkTransactionLog: {str(e)}")
-            return Response(
-                {"error": "Failed to initialize transaction log"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-        # Upload to Cloudinary
-        try:
-            buffer = io.StringIO(csv_content)
-            upload_result = cloudinary.uploader.upload(
-                buffer,
-                resource_type="raw",
-                public_id=f"bulk_loan_disbursements/{prefix}_{file.name}",
-                format="csv",
-            )
-            log.cloudinary_url = upload_result["secure_url"]
-            log.save()
-        except Exception as e:
-            logger.error(f"Cloudinary upload failed: {str(e)}")
-            return Response(
-                {"error": "Failed to upload file to storage"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-        success_count = 0
-        error_count = 0
-        errors = []
-
-        with transaction.atomic():
-            for index, row in enumerate(reader, start=1):
-                try:
-                    # Clean data
-                    loan_account_number = row["loan_account_number"].strip()
-                    amount_str = row["amount"].strip()
-                    currency = row["currency"].strip().upper()
-                    status_val = row["transaction_status"].strip().title()
-                    disb_type = row["disbursement_type"].strip().title()
-
-                    # Validate amount
-                    try:
-                        amount = Decimal(amount_str).quantize(Decimal("0.00"))
-                        if amount <= 0:
-                            raise ValueError("Amount must be > 0")
-                    except (InvalidOperation, ValueError):
-                        raise ValueError(f"Invalid amount: {amount_str}")
-
-                    # Validate LoanAccount
-                    try:
-                        loan_account = LoanAccount.objects.get(
-                            account_number=loan_account_number
-                        )
-                    except LoanAccount.DoesNotExist:
-                        raise ValueError(
-                            f"Loan account {loan_account_number} not found"
-                        )
-
-                    # Prepare disbursement data
-                    disbursement_data = {
-                        "loan_account": loan_account.id,
-                        "amount": str(amount),
-                        "currency": currency,
-                        "transaction_status": status_val,
-                        "disbursement_type": disb_type,
-                        "disbursed_by": admin.id,
-                        "reference": f"{prefix}-{index:04d}",
-                        "created_at": today.isoformat(),
-                        "updated_at": today.isoformat(),
-                        "is_active": True,
-                    }
-
-                    # Validate & save
-                    serializer = LoanDisbursementSerializer(data=disbursement_data)
-                    if serializer.is_valid():
-                        disbursement = serializer.save()
-                        # Balance update is in model.save(), but we double-ensure
-                        loan_account.outstanding_balance += amount
-                        loan_account.save(update_fields=["outstanding_balance"])
-                        success_count += 1
-                    else:
-                        error_count += 1
-                        errors.append(
-                            {
-                                "row": index,
-                                "account": loan_account_number,
-                                "error": serializer.errors,
-                            }
-                        )
-
-                except Exception as e:
-                    error_count += 1
-                    errors.append(
-                        {
-                            "row": index,
-                            "account": row.get("loan_account_number", "Unknown"),
-                            "error": str(e),
-                        }
-                    )
+            LoanDisbursement.DISBURSEMENT_TYPE_CHOICES,
+            "Principal",
+            account,
+        )
+        currency = plan.value("currency").upper() or "KES"
+        if plan.reference("loan", account, "Loan account") and amount:
+            plan.add(self.disburse, account, amount, currency, status_val, disb_type)
+
+    def disburse(self, account, amount, currency, status_val, disb_type):
+        # LoanDisbursement.save() updates the outstanding balance
+        LoanDisbursement.objects.create(
+            loan_account=self.instance("loan", account),
+            amount=amount,
+            currency=currency,
+            transaction_status=status_val,
+            disbursement_type=disb_type,
+            disbursed_by=self.user,
+        )
 
-            # Update log
-            try:
-                log.success_count = success_count
-                log.error_count = error_count
-                log.save()
-            except Exception as e:
-                logger.error(f"Failed to update BulkTransactionLog: {str(e)}")
-                return Response(
-                    {"error": "Failed to update transaction log"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
 
-        # Return response
-        response_data = {
-            "success_count": success_count,
-            "error_count": error_count,
-            "errors": errors,
-            "log_reference": log.reference_prefix,
-            "cloudinary_url": log.cloudinary_url,
-        }
+class LoanDisbursementCSVUploadView(CSVUploadMixin, generics.CreateAPIView):
+    """Upload CSV file for bulk loan disbursements — mirrors BulkSavingsDepositUploadView."""
 
-        try:
-            return Response(
-                response_data,
-                status=(
-                    status.HTTP_201_CREATED
-                    if success_count > 0
-                    else status.HTTP_400_BAD_REQUEST
-                ),
-            )
-        except Exception as e:
-            logger.error(f"Failed to return response: {str(e)}")
-            return Response(
-                {"error": "Internal server error"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+    permission_classes = [IsSystemAdminOrReadOnly]
+    serializer_class = LoanDisbursementSerializer
+    import_class = LoanDisbursementImport
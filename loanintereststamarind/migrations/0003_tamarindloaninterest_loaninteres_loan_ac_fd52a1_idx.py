@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loanintereststamarind', '0002_alter_tamarindloaninterest_loan_account'),
+        ('loans', '0004_remove_loanaccount_approval_date_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tamarindloaninterest',
+            index=models.Index(fields=['loan_account', 'created_at'], name='loaninteres_loan_ac_fd52a1_idx'),
+        ),
+    ]
@@ -20,6 +20,9 @@ class TamarindLoanInterest(TimeStampedModel, UniversalIdModel, ReferenceModel):
         verbose_name = "Tamarind Loan Interest"
         verbose_name_plural = "Tamarind Loan Interests"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["loan_account", "created_at"]),
+        ]
 
     def __str__(self):
         return f"Tamarind Loan Interest for Loan {self.loan_account.account_number} - Amount: {self.amount}"
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loanrepayments', '0002_alter_loanrepayment_payment_method'),
+        ('loans', '0004_remove_loanaccount_approval_date_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loanrepayment',
+            index=models.Index(fields=['created_at', 'id'], name='loanrepayme_created_15ca61_idx'),
+        ),
+    ]
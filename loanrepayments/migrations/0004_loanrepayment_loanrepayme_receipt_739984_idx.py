@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loanrepayments', '0003_loanrepayment_loanrepayme_created_15ca61_idx'),
+        ('loans', '0005_loanarrears'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loanrepayment',
+            index=models.Index(fields=['receipt_number'], name='loanrepayme_receipt_739984_idx'),
+        ),
+    ]
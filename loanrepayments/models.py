@@ -68,9 +68,11 @@ class LoanRepayment(TimeStampedModel, UniversalIdModel, ReferenceModel):
         verbose_name_plural = "Loan Repayments"
         ordering = ["-created_at"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["loan_account", "created_at"]),
             models.Index(fields=["paid_by", "created_at"]),
             models.Index(fields=["transaction_status"]),
+            models.Index(fields=["receipt_number"]),
         ]
 
     def __str__(self):
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from loans.models import LoanAccount
+from loans.models import LoanAccount, LoanArrears
 
 
 class LoanAccountAdmin(admin.ModelAdmin):
@@ -16,3 +16,19 @@ class LoanAccountAdmin(admin.ModelAdmin):
 
 
 admin.site.register(LoanAccount, LoanAccountAdmin)
+
+
+class LoanArrearsAdmin(admin.ModelAdmin):
+    list_display = (
+        "loan_account",
+        "as_of",
+        "days_past_due",
+        "bucket",
+        "arrears_amount",
+        "outstanding_balance",
+    )
+    search_fields = ("loan_account__account_number", "loan_account__member__member_no")
+    list_filter = ("bucket",)
+
+
+admin.site.register(LoanArrears, LoanArrearsAdmin)
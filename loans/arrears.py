@@ -0,0 +1,237 @@
+"""
+Arrears and portfolio at risk.
+
+refresh_arrears() rebuilds the LoanArrears table for every disbursed loan in
+one pass:
+
+1. The schedules of the loans' disbursed applications (projection_snapshot)
+   are expanded into one (loan, due date, amount due) row per instalment.
+   A loan account with several disbursed applications has their schedules
+   merged.
+2. Each loan's completed repayments up to the as-of date are totalled with
+   one grouped query, and applied to its instalments oldest first. This
+   uses cumulative sums over the sorted instalments in NumPy, in integer
+   cents.
+3. The first instalment the repayments don't cover gives the days past
+   due. What is due but unpaid is the arrears amount.
+
+aging_report() then summarises the table by aging bucket, with PAR30/60/90:
+the share of the outstanding portfolio held by loans more than 30, 60 or 90
+days past due.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from loanapplications.models import LoanApplication
+from loanrepayments.models import LoanRepayment
+from loans.models import LoanAccount, LoanArrears
+from transactions.utils.periods import date_bounds
+
+BATCH_SIZE = 2000
+
+# (bucket, lowest days past due in it)
+BUCKETS = (("Current", 0), ("1-30", 1), ("31-60", 31), ("61-90", 61), ("90+", 91))
+PAR_DAYS = (30, 60, 90)
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def from_cents(cents):
+    return Decimal(int(cents)) / 100
+
+
+def money(amount):
+    return Decimal(amount or 0).quantize(Decimal("0.01"))
+
+
+def bucket_for(days_past_due):
+    name = BUCKETS[0][0]
+    for bucket, lowest in BUCKETS:
+        if days_past_due >= lowest:
+            name = bucket
+    return name
+
+
+def load_schedules():
+    """
+    (loan account ids, per-instalment loan index, due dates, amounts due in
+    cents) for every disbursed loan.
+    """
+    loans = {}
+    indexes, due_dates, amounts = [], [], []
+    for loan_id, schedule in (
+        LoanApplication.objects.filter(status="Disbursed", loan_account__isnull=False)
+        .order_by()
+        .values_list("loan_account_id", "projection_snapshot__schedule")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        i = loans.setdefault(loan_id, len(loans))
+        for instalment in schedule or ():
+            indexes.append(i)
+            due_dates.append(instalment["due_date"])
+            amounts.append(instalment["total_due"])
+    return (
+        list(loans),
+        np.array(indexes, dtype=np.int64),
+        np.array(due_dates, dtype="datetime64[D]"),
+        np.rint(np.array(amounts, dtype=np.float64) * 100).astype(np.int64),
+    )
+
+
+def paid_to_date(loan_ids, as_of):
+    """Completed repayments per loan up to the end of as_of, in cents."""
+    index = {pk: i for i, pk in enumerate(loan_ids)}
+    paid = np.zeros(len(loan_ids), dtype=np.int64)
+    _, end = date_bounds(end_date=as_of)
+    for loan_id, total in (
+        LoanRepayment.objects.filter(
+            transaction_status="Completed", created_at__lt=end
+        )
+        .order_by()
+        .values_list("loan_account_id")
+        .annotate(total=Sum("amount"))
+    ):
+        if loan_id in index:
+            paid[index[loan_id]] = to_cents(total)
+    return paid
+
+
+def compute_arrears(loan_index, due_dates, amounts, paid, as_of):
+    """
+    Per-loan arrays of (expected to date, arrears, instalments in arrears,
+    oldest unpaid due date, days past due) from the expanded schedules.
+    """
+    n = len(paid)
+    as_of = np.datetime64(as_of, "D")
+
+    due = due_dates <= as_of
+    loan_index, due_dates, amounts = loan_index[due], due_dates[due], amounts[due]
+    order = np.lexsort((due_dates, loan_index))
+    loan_index, due_dates, amounts = loan_index[order], due_dates[order], amounts[order]
+
+    # Cumulative amount due per loan: the running total, less the running
+    # total before the loan's first instalment
+    running = np.cumsum(amounts)
+    before = np.zeros(n, dtype=np.int64)
+    expected = np.zeros(n, dtype=np.int64)
+    loans, first = np.unique(loan_index, return_index=True)
+    before[loans] = running[first] - amounts[first]
+    cumulative = running - before[loan_index]
+    if len(loans):
+        last = np.r_[first[1:], len(loan_index)] - 1
+        expected[loans] = cumulative[last]
+
+    # Instalments the repayments don't cover, oldest first
+    unpaid = np.flatnonzero(cumulative > paid[loan_index])
+    in_arrears = np.bincount(loan_index[unpaid], minlength=n)
+    oldest = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+    late, first_unpaid = np.unique(loan_index[unpaid], return_index=True)
+    oldest[late] = due_dates[unpaid[first_unpaid]]
+    days_past_due = np.zeros(n, dtype=np.int64)
+    days_past_due[late] = (as_of - oldest[late]).astype(np.int64)
+
+    arrears = np.maximum(expected - paid, 0)
+    return expected, arrears, in_arrears, oldest, days_past_due
+
+
+def refresh_arrears(as_of=None):
+    """Rebuild LoanArrears as of a date (default today). Returns the row count."""
+    as_of = as_of or timezone.localdate()
+    loan_ids, loan_index, due_dates, amounts = load_schedules()
+    paid = paid_to_date(loan_ids, as_of)
+    expected, arrears, in_arrears, oldest, days_past_due = compute_arrears(
+        loan_index, due_dates, amounts, paid, as_of
+    )
+    outstanding = dict(
+        LoanAccount.objects.filter(pk__in=loan_ids).values_list("pk", "outstanding_balance")
+    )
+
+    rows = []
+    for i, loan_id in enumerate(loan_ids):
+        rows.append(
+            LoanArrears(
+                loan_account_id=loan_id,
+                as_of=as_of,
+                expected_to_date=from_cents(expected[i]),
+                paid_to_date=from_cents(paid[i]),
+                arrears_amount=from_cents(arrears[i]),
+                installments_in_arrears=int(in_arrears[i]),
+                oldest_unpaid_due_date=(
+                    None if np.isnat(oldest[i]) else oldest[i].astype(object)
+                ),
+                days_past_due=int(days_past_due[i]),
+                bucket=bucket_for(days_past_due[i]),
+                outstanding_balance=outstanding.get(loan_id) or Decimal("0"),
+            )
+        )
+    with transaction.atomic():
+        LoanArrears.objects.all().delete()
+        LoanArrears.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def aging_report(loan_type=None):
+    """Loans, outstanding balance and arrears per aging bucket, with PAR."""
+    rows = LoanArrears.objects.all()
+    if loan_type:
+        rows = rows.filter(loan_account__loan_type__name=loan_type)
+
+    by_bucket = {
+        item["bucket"]: item
+        for item in rows.order_by()
+        .values("bucket")
+        .annotate(
+            loans=Count("id"),
+            outstanding=Sum("outstanding_balance"),
+            arrears=Sum("arrears_amount"),
+        )
+    }
+    totals = rows.aggregate(
+        loans=Count("id"),
+        outstanding=Sum("outstanding_balance"),
+        arrears=Sum("arrears_amount"),
+        **{
+            f"par{days}": Sum("outstanding_balance", filter=Q(days_past_due__gt=days))
+            for days in PAR_DAYS
+        },
+    )
+    portfolio = money(totals["outstanding"])
+
+    def percent(amount):
+        if not portfolio:
+            return Decimal("0.00")
+        return (money(amount) * 100 / portfolio).quantize(Decimal("0.01"))
+
+    def bucket_total(bucket, key):
+        return money(by_bucket.get(bucket, {}).get(key))
+
+    return {
+        "as_of": rows.values_list("as_of", flat=True).first(),
+        "loan_type": loan_type,
+        "buckets": [
+            {
+                "bucket": bucket,
+                "loans": by_bucket.get(bucket, {}).get("loans", 0),
+                "outstanding_balance": bucket_total(bucket, "outstanding"),
+                "arrears_amount": bucket_total(bucket, "arrears"),
+            }
+            for bucket, _ in BUCKETS
+        ],
+        "total_loans": totals["loans"],
+        "total_outstanding_balance": portfolio,
+        "total_arrears_amount": money(totals["arrears"]),
+        "portfolio_at_risk": {
+            f"par{days}": {
+                "outstanding_balance": money(totals[f"par{days}"]),
+                "percent": percent(totals[f"par{days}"]),
+            }
+            for days in PAR_DAYS
+        },
+    }
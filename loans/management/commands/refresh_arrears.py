@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from loans.arrears import aging_report, refresh_arrears
+from transactions.utils.periods import parse_date_param
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every disbursed loan's arrears and days past due against "
+        "its repayment schedule"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", type=str, default=None, help="YYYY-MM-DD (default: today)")
+
+    def handle(self, *args, **options):
+        try:
+            as_of = parse_date_param(options["as_of"], "--as-of")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        count = refresh_arrears(as_of)
+        report = aging_report()
+        for bucket in report["buckets"]:
+            self.stdout.write(
+                f"{bucket['bucket']:>8}: {bucket['loans']} loans, "
+                f"{bucket['outstanding_balance']} outstanding, "
+                f"{bucket['arrears_amount']} in arrears"
+            )
+        par = ", ".join(
+            f"{name.upper()} {value['percent']}%"
+            for name, value in report["portfolio_at_risk"].items()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} loans as of {report['as_of']}: {par}"))
@@ -0,0 +1,78 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loans.stress import run_stress_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Monte Carlo stress test of the loan book: losses, guarantor calls and "
+        "savings shortfalls if members default, with correlated shocks per employer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenarios", type=int, default=None)
+        parser.add_argument(
+            "--default-rate", type=float, default=5, help="Percent of members defaulting"
+        )
+        parser.add_argument(
+            "--shock",
+            action="append",
+            default=[],
+            metavar="EMPLOYER=PERCENT",
+            help="Default rate for an employer's members, e.g. --shock \"Kenya Power=30\"",
+        )
+        parser.add_argument("--correlation", type=float, default=None)
+        parser.add_argument("--seed", type=int, default=None, help="Default: random")
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Simulation processes (default: STRESS_TEST_WORKERS)",
+        )
+        parser.add_argument("--output", type=str, default=None, help="Write the full report as JSON")
+
+    def handle(self, *args, **options):
+        shocks = {}
+        for item in options["shock"]:
+            name, _, rate = item.rpartition("=")
+            try:
+                shocks[name.strip()] = float(rate)
+            except ValueError:
+                raise CommandError(f"Invalid shock '{item}'")
+
+        try:
+            report = run_stress_test(
+                scenarios=options["scenarios"],
+                default_rate=options["default_rate"],
+                employer_rates=shocks,
+                correlation=options["correlation"],
+                seed=options["seed"],
+                workers=options["workers"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        portfolio = report["portfolio"]
+        self.stdout.write(
+            f"{portfolio['loans']} loans, {portfolio['outstanding_balance']} outstanding, "
+            f"{portfolio['guarantors']} guarantors"
+        )
+        for key in (
+            "exposure_at_default",
+            "guarantor_calls",
+            "guarantor_savings_shortfall",
+            "loss",
+        ):
+            values = report[key]
+            self.stdout.write(
+                f"{key.replace('_', ' ').capitalize():>28}: mean {values['mean']}, "
+                f"p95 {values['p95']}, p99 {values['p99']}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2, default=str)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Simulated {report['scenarios']} scenarios (seed {report['seed']})"
+            )
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:42
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0004_remove_loanaccount_approval_date_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanArrears',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('as_of', models.DateField()),
+                ('expected_to_date', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('paid_to_date', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('arrears_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('installments_in_arrears', models.PositiveIntegerField(default=0)),
+                ('oldest_unpaid_due_date', models.DateField(blank=True, null=True)),
+                ('days_past_due', models.PositiveIntegerField(default=0)),
+                ('bucket', models.CharField(choices=[('Current', 'Current'), ('1-30', '1-30 days'), ('31-60', '31-60 days'), ('61-90', '61-90 days'), ('90+', 'Over 90 days')], default='Current', max_length=10)),
+                ('outstanding_balance', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('loan_account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='arrears', to='loans.loanaccount')),
+            ],
+            options={
+                'verbose_name': 'Loan Arrears',
+                'verbose_name_plural': 'Loan Arrears',
+                'ordering': ['-days_past_due'],
+                'indexes': [models.Index(fields=['days_past_due'], name='loans_loana_days_pa_079d0f_idx')],
+            },
+        ),
+    ]
@@ -53,3 +53,44 @@ class LoanAccount(TimeStampedModel, UniversalIdModel, ReferenceModel):
         if not self.identity:
             self.identity = slugify(f"{self.member.member_no}-{self.account_number}")
         super().save(*args, **kwargs)
+
+
+class LoanArrears(UniversalIdModel, TimeStampedModel):
+    """
+    A loan's position against its repayment schedule as of the last arrears
+    refresh (loans.arrears.refresh_arrears). Rebuilt for the whole portfolio
+    on every refresh.
+    """
+
+    BUCKET_CHOICES = [
+        ("Current", "Current"),
+        ("1-30", "1-30 days"),
+        ("31-60", "31-60 days"),
+        ("61-90", "61-90 days"),
+        ("90+", "Over 90 days"),
+    ]
+
+    loan_account = models.OneToOneField(
+        LoanAccount, on_delete=models.CASCADE, related_name="arrears"
+    )
+    as_of = models.DateField()
+    # Scheduled instalments (principal + interest) due on or before as_of
+    expected_to_date = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    paid_to_date = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    arrears_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    installments_in_arrears = models.PositiveIntegerField(default=0)
+    oldest_unpaid_due_date = models.DateField(null=True, blank=True)
+    days_past_due = models.PositiveIntegerField(default=0)
+    bucket = models.CharField(max_length=10, choices=BUCKET_CHOICES, default="Current")
+    outstanding_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Loan Arrears"
+        verbose_name_plural = "Loan Arrears"
+        ordering = ["-days_past_due"]
+        indexes = [
+            models.Index(fields=["days_past_due"]),
+        ]
+
+    def __str__(self):
+        return f"{self.loan_account.account_number} - {self.days_past_due} days past due"
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
-from loans.models import LoanAccount
+from loans.models import LoanAccount, LoanArrears
 from loantypes.models import LoanType
 from loanrepayments.serializers import LoanRepaymentSerializer
 from loandisbursements.serializers import LoanDisbursementSerializer
@@ -51,3 +51,53 @@ class LoanAccountSerializer(serializers.ModelSerializer):
             )
         validated_data["member"] = user
         return super().create(validated_data)
+
+
+class LoanArrearsSerializer(serializers.ModelSerializer):
+    account_number = serializers.CharField(source="loan_account.account_number", read_only=True)
+    member = serializers.CharField(source="loan_account.member.member_no", read_only=True)
+    loan_type = serializers.CharField(source="loan_account.loan_type.name", read_only=True)
+
+    class Meta:
+        model = LoanArrears
+        fields = (
+            "account_number",
+            "member",
+            "loan_type",
+            "as_of",
+            "expected_to_date",
+            "paid_to_date",
+            "arrears_amount",
+            "installments_in_arrears",
+            "oldest_unpaid_due_date",
+            "days_past_due",
+            "bucket",
+            "outstanding_balance",
+        )
+
+
+class LoanStressTestSerializer(serializers.Serializer):
+    """Query parameters of the stress test report."""
+
+    scenarios = serializers.IntegerField(min_value=1, max_value=100000, required=False)
+    default_rate = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100, default=5
+    )
+    # "Employer=percent", e.g. ?shock=Kenya Power=30
+    shock = serializers.ListField(child=serializers.CharField(), required=False)
+    correlation = serializers.FloatField(min_value=0, max_value=0.99, required=False)
+    seed = serializers.IntegerField(min_value=0, default=0)
+    refresh = serializers.BooleanField(default=False)
+
+    def validate_shock(self, value):
+        rates = {}
+        for item in value:
+            name, _, rate = item.rpartition("=")
+            try:
+                rate = float(rate)
+            except ValueError:
+                rate = None
+            if not name.strip() or rate is None or not 0 <= rate <= 100:
+                raise serializers.ValidationError(f"Invalid shock '{item}'")
+            rates[name.strip()] = rate
+        return rates
@@ -0,0 +1,384 @@
+"""
+Monte Carlo stress test of the loan book and the guarantor exposure behind it.
+
+load_portfolio() reads the book once into arrays indexed by member, sorted
+by employer:
+
+- each member's outstanding loans and guaranteed savings (the deposits that
+  secure loans, as GuarantorProfile.max_guarantee_amount counts them);
+- every accepted guarantee on an active loan (borrower, guarantor, and the
+  GuaranteeRequest.current_balance the guarantor stands behind).
+
+A defaulting borrower's own guaranteed savings are set off against their
+loans first. What is left of each loan is then called from its guarantors
+pro rata to their current balances, up to those balances. None of that
+depends on the scenario, so it is worked out once at load time.
+
+Defaults are drawn with a one-factor model per employer: a member defaults
+when sqrt(rho) * Z[employer] + sqrt(1 - rho) * e[member] falls below the
+quantile of their employer's default rate, with Z and e standard normal. The
+rate of default is the same on average, but members of one employer tend to
+default together (more so as `correlation` rises). A guarantor covers their
+calls from their guaranteed savings, less whatever was set off against their
+own loans if they defaulted too. The rest is the savings coverage
+shortfall, which is lost with the unguaranteed part of the defaulted loans.
+
+Scenarios run in blocks of BLOCK_SIZE, each with its own seed spawned from
+the run's seed. The results therefore do not depend on the number of
+worker processes.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from decimal import Decimal
+from statistics import NormalDist
+
+import django
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from guaranteerequests.models import GuaranteeRequest
+from guarantorprofile.models import GuarantorProfile
+from loans.models import LoanAccount
+from savings.models import SavingsAccount
+
+User = get_user_model()
+
+BLOCK_SIZE = 200
+SCENARIOS = 10000
+CORRELATION = 0.2
+CACHE_TTL = 3600
+PERCENTILES = (50, 90, 95, 99)
+UNASSIGNED = "Unassigned"
+
+
+@dataclass
+class Portfolio:
+    employers: list  # employer names; members are sorted by employer
+    employer_starts: np.ndarray  # first member index of each employer
+    member_employer: np.ndarray
+    debt: np.ndarray  # outstanding loans per member
+    offset: np.ndarray  # own savings set off against them on default
+    residual: np.ndarray  # debt - offset
+    savings: np.ndarray  # guaranteed savings per member
+    guarantors: np.ndarray  # member index of each guarantor
+    guarantor_starts: np.ndarray  # first edge of each guarantor
+    edge_borrower: np.ndarray  # edges sorted by guarantor
+    edge_claim: np.ndarray  # called from the guarantor if the borrower defaults
+    loans: int
+    guaranteed_amount: float
+    committed_guarantee_amount: float
+
+    @property
+    def borrowers(self):
+        return int((self.debt > 0).sum())
+
+
+def load_portfolio():
+    """The active loan book and its guarantees, as a Portfolio."""
+    loans = list(
+        LoanAccount.objects.filter(is_active=True, outstanding_balance__gt=0)
+        .order_by()
+        .values_list("pk", "member_id", "outstanding_balance")
+    )
+    edges = list(
+        GuaranteeRequest.objects.filter(
+            status="Accepted",
+            loan_application__status="Disbursed",
+            loan_application__loan_account__is_active=True,
+            loan_application__loan_account__outstanding_balance__gt=0,
+            current_balance__gt=0,
+        )
+        .order_by()
+        .values_list(
+            "loan_application__loan_account_id", "guarantor__member_id", "current_balance"
+        )
+    )
+
+    member_ids = {member for _, member, _ in loans} | {member for _, member, _ in edges}
+    employer_of = {
+        pk: employer or UNASSIGNED
+        for pk, employer in User.objects.order_by().values_list("pk", "employer")
+        if pk in member_ids
+    }
+    members = sorted(member_ids, key=lambda pk: (employer_of[pk], str(pk)))
+    index = {pk: i for i, pk in enumerate(members)}
+    employers = sorted(set(employer_of.values()))
+    member_employer = np.array(
+        [employers.index(employer_of[pk]) for pk in members], dtype=np.int64
+    )
+    employer_starts = np.searchsorted(member_employer, np.arange(len(employers)))
+
+    n = len(members)
+    debt = np.zeros(n)
+    loan_member = {}
+    loan_balance = {}
+    for loan_id, member, balance in loans:
+        debt[index[member]] += float(balance)
+        loan_member[loan_id] = index[member]
+        loan_balance[loan_id] = float(balance)
+
+    savings = np.zeros(n)
+    for member, total in (
+        SavingsAccount.objects.filter(account_type__is_guaranteed=True)
+        .order_by()
+        .values_list("member_id")
+        .annotate(total=Sum("balance"))
+    ):
+        if member in index:
+            savings[index[member]] = float(total or 0)
+    offset = np.minimum(debt, np.maximum(savings, 0))
+    residual = debt - offset
+
+    # What is left of each loan after the offset (shared pro rata between a
+    # member's loans), called from its guarantors pro rata to their balances
+    backed = {}
+    for loan_id, _, balance in edges:
+        backed[loan_id] = backed.get(loan_id, 0.0) + float(balance)
+    rows = []
+    for loan_id, guarantor, balance in edges:
+        borrower = loan_member[loan_id]
+        left = loan_balance[loan_id] * residual[borrower] / debt[borrower]
+        claim = float(balance) * min(1.0, left / backed[loan_id])
+        rows.append((index[guarantor], borrower, claim))
+    rows.sort()
+    edge_guarantor = np.array([row[0] for row in rows], dtype=np.int64)
+    guarantors, guarantor_starts = np.unique(edge_guarantor, return_index=True)
+
+    committed = GuarantorProfile.objects.filter(
+        member_id__in=[members[i] for i in guarantors]
+    ).aggregate(total=Sum("committed_guarantee_amount"))["total"]
+    return Portfolio(
+        employers=employers,
+        employer_starts=employer_starts,
+        member_employer=member_employer,
+        debt=debt,
+        offset=offset,
+        residual=residual,
+        savings=savings,
+        guarantors=guarantors,
+        guarantor_starts=guarantor_starts,
+        edge_borrower=np.array([row[1] for row in rows], dtype=np.int64),
+        edge_claim=np.array([row[2] for row in rows]),
+        loans=len(loans),
+        guaranteed_amount=sum(float(balance) for _, _, balance in edges),
+        committed_guarantee_amount=float(committed or 0),
+    )
+
+
+def thresholds(default_rate, employer_rates, employers):
+    """Per employer, the latent value below which a member defaults."""
+    normal = NormalDist()
+
+    def quantile(rate):
+        p = float(rate) / 100
+        if p <= 0:
+            return -np.inf
+        if p >= 1:
+            return np.inf
+        return normal.inv_cdf(p)
+
+    return np.array(
+        [quantile(employer_rates.get(name, default_rate)) for name in employers]
+    )
+
+
+def simulate_block(task):
+    """Pool entry point: one block of scenarios. Returns per-scenario arrays."""
+    portfolio, cutoffs, correlation, seed, count = task
+    p = portfolio
+    rng = np.random.default_rng(seed)
+    factor = rng.standard_normal((count, len(p.employers)))
+    latent = np.sqrt(correlation) * factor[:, p.member_employer]
+    latent += np.sqrt(1 - correlation) * rng.standard_normal((count, len(p.debt)))
+    defaulted = latent < cutoffs[p.member_employer]
+    weights = defaulted.astype(np.float64)
+
+    if len(p.edge_claim):
+        calls = np.add.reduceat(
+            weights[:, p.edge_borrower] * p.edge_claim, p.guarantor_starts, axis=1
+        )
+        available = np.maximum(
+            p.savings[p.guarantors] - weights[:, p.guarantors] * p.offset[p.guarantors], 0
+        )
+        covered = np.minimum(calls, available)
+    else:
+        calls = covered = np.zeros((count, 0))
+
+    by_employer = (
+        np.add.reduceat(weights * p.debt, p.employer_starts, axis=1)
+        if len(p.debt)
+        else np.zeros((count, 0))
+    )
+    return {
+        "defaulted_borrowers": (defaulted & (p.debt > 0)).sum(axis=1),
+        "exposure_at_default": weights @ p.debt,
+        "borrower_savings_offset": weights @ p.offset,
+        "guarantor_calls": calls.sum(axis=1),
+        "guarantors_called": (calls > 0).sum(axis=1),
+        "guarantor_savings_shortfall": (calls - covered).sum(axis=1),
+        "loss": weights @ p.residual - covered.sum(axis=1),
+        "employer_exposure": by_employer,
+    }
+
+
+def worker_count():
+    return getattr(settings, "STRESS_TEST_WORKERS", 0) or os.cpu_count() or 1
+
+
+def simulate(portfolio, scenarios, default_rate, employer_rates, correlation, seed, workers):
+    """Every scenario's results, concatenated block by block."""
+    cutoffs = thresholds(default_rate, employer_rates, portfolio.employers)
+    counts = [
+        min(BLOCK_SIZE, scenarios - start) for start in range(0, scenarios, BLOCK_SIZE)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    tasks = [
+        (portfolio, cutoffs, correlation, block_seed, count)
+        for block_seed, count in zip(seeds, counts)
+    ]
+    workers = min(workers, len(tasks))
+    if workers < 2:
+        blocks = [simulate_block(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            blocks = list(pool.map(simulate_block, tasks))
+    return {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+
+
+def money(amount):
+    return Decimal(str(round(float(amount), 2))).quantize(Decimal("0.01"))
+
+
+def distribution(values, as_money=True):
+    """Mean, spread, percentiles and the mean of the worst 1% of scenarios."""
+    convert = money if as_money else (lambda value: round(float(value), 2))
+    tail = values[values >= np.percentile(values, 99)]
+    return {
+        "mean": convert(values.mean()),
+        "std": convert(values.std()),
+        **{f"p{q}": convert(np.percentile(values, q)) for q in PERCENTILES},
+        "max": convert(values.max()),
+        "expected_shortfall_99": convert(tail.mean()),
+    }
+
+
+def run_stress_test(
+    scenarios=None,
+    default_rate=5,
+    employer_rates=None,
+    correlation=None,
+    seed=None,
+    workers=None,
+    portfolio=None,
+):
+    """
+    Simulate `scenarios` default scenarios and summarise them. Rates are in
+    percent; `employer_rates` overrides `default_rate` per employer name
+    (members with no employer are under "Unassigned"). Raises ValueError for
+    invalid parameters.
+    """
+    scenarios = scenarios or getattr(settings, "STRESS_TEST_SCENARIOS", SCENARIOS)
+    employer_rates = {name: float(rate) for name, rate in (employer_rates or {}).items()}
+    correlation = float(CORRELATION if correlation is None else correlation)
+    if scenarios < 1:
+        raise ValueError("scenarios must be at least 1")
+    if not 0 <= correlation < 1:
+        raise ValueError("correlation must be at least 0 and less than 1")
+    for rate in [float(default_rate), *employer_rates.values()]:
+        if not 0 <= rate <= 100:
+            raise ValueError("Default rates must be between 0 and 100")
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2**32)
+
+    portfolio = portfolio or load_portfolio()
+    unknown = set(employer_rates) - set(portfolio.employers)
+    if unknown:
+        raise ValueError(f"No borrowers or guarantors at: {', '.join(sorted(unknown))}")
+
+    results = simulate(
+        portfolio,
+        scenarios,
+        float(default_rate),
+        employer_rates,
+        correlation,
+        seed,
+        workers or worker_count(),
+    )
+
+    outstanding = portfolio.debt.sum()
+    loss = results["loss"]
+    employer_exposure = results["employer_exposure"]
+    ends = np.r_[portfolio.employer_starts[1:], len(portfolio.debt)]
+    return {
+        "generated_at": timezone.now().isoformat(),
+        "scenarios": scenarios,
+        "seed": seed,
+        "default_rate": float(default_rate),
+        "employer_rates": employer_rates,
+        "correlation": correlation,
+        "portfolio": {
+            "loans": portfolio.loans,
+            "borrowers": portfolio.borrowers,
+            "guarantors": len(portfolio.guarantors),
+            "outstanding_balance": money(outstanding),
+            "borrower_guaranteed_savings": money(
+                portfolio.savings[portfolio.debt > 0].sum()
+            ),
+            "guaranteed_amount": money(portfolio.guaranteed_amount),
+            "committed_guarantee_amount": money(portfolio.committed_guarantee_amount),
+        },
+        "defaulted_borrowers": distribution(results["defaulted_borrowers"], as_money=False),
+        "exposure_at_default": distribution(results["exposure_at_default"]),
+        "borrower_savings_offset": distribution(results["borrower_savings_offset"]),
+        "guarantor_calls": distribution(results["guarantor_calls"]),
+        "guarantors_called": distribution(results["guarantors_called"], as_money=False),
+        "guarantor_savings_shortfall": distribution(results["guarantor_savings_shortfall"]),
+        "loss": distribution(loss),
+        "loss_percent_of_portfolio": (
+            distribution(loss * 100 / outstanding, as_money=False) if outstanding else None
+        ),
+        "employers": [
+            {
+                "employer": name,
+                "members": int(end - start),
+                "borrowers": int((portfolio.debt[start:end] > 0).sum()),
+                "outstanding_balance": money(portfolio.debt[start:end].sum()),
+                "default_rate": employer_rates.get(name, float(default_rate)),
+                "exposure_at_default": {
+                    "mean": money(employer_exposure[:, i].mean()),
+                    "p99": money(np.percentile(employer_exposure[:, i], 99)),
+                },
+            }
+            for i, (name, start, end) in enumerate(
+                zip(portfolio.employers, portfolio.employer_starts, ends)
+            )
+        ],
+    }
+
+
+def cached_stress_test(refresh=False, **params):
+    """
+    run_stress_test(**params), cached for STRESS_TEST_CACHE_TTL seconds per
+    set of parameters. A seed is needed for the result to be repeatable.
+    """
+    key = "loans:stress:" + hashlib.sha256(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = run_stress_test(**params)
+        cache.set(key, report, getattr(settings, "STRESS_TEST_CACHE_TTL", CACHE_TTL))
+    return report
@@ -1,3 +1,251 @@
-from django.test import TestCase
+from datetime import date, datetime
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from guaranteerequests.models import GuaranteeRequest
+from guarantorprofile.models import GuarantorProfile
+from loanapplications.models import LoanApplication
+from loanrepayments.models import LoanRepayment
+from loans.arrears import aging_report, refresh_arrears
+from loans.models import LoanAccount, LoanArrears
+from loans.stress import load_portfolio, run_stress_test
+from loantypes.models import LoanType
+from savings.models import SavingsAccount
+from savingstypes.models import SavingsType
+
+User = get_user_model()
+
+
+class LoanArrearsTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            member_no="ADM001", password="pass1234", is_system_admin=True
+        )
+        self.member = User.objects.create_user(
+            member_no="MEM001", password="pass1234", is_member=True
+        )
+        self.loan_type = LoanType.objects.create(name="Normal", description="Normal loan")
+
+    def loan(self, due_dates, total_due="1000.00", outstanding="3000.00"):
+        account = LoanAccount.objects.create(
+            member=self.member,
+            loan_type=self.loan_type,
+            outstanding_balance=Decimal(outstanding),
+        )
+        LoanApplication.objects.create(
+            member=self.member,
+            product=self.loan_type,
+            requested_amount=Decimal(outstanding),
+            calculation_mode="fixed_term",
+            start_date=date(2025, 1, 1),
+            projection_snapshot={
+                "schedule": [
+                    {"due_date": due.isoformat(), "total_due": float(total_due)}
+                    for due in due_dates
+                ]
+            },
+            status="Disbursed",
+            loan_account=account,
+        )
+        return account
+
+    def repay(self, account, amount, day):
+        # Completed with update(), so the fixture's outstanding balances stay put
+        repayment = LoanRepayment.objects.create(loan_account=account, amount=Decimal(amount))
+        LoanRepayment.objects.filter(pk=repayment.pk).update(
+            transaction_status="Completed",
+            created_at=timezone.make_aware(datetime.combine(day, datetime.min.time())),
+        )
+
+    def test_repayments_clear_the_oldest_instalments_first(self):
+        dues = [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)]
+        late = self.loan(dues)
+        current = self.loan(dues)
+        self.loan([date(2025, 6, 30)])  # nothing due yet
+        # Half of February's instalment is unpaid
+        self.repay(late, "1500.00", date(2025, 2, 1))
+        self.repay(current, "3000.00", date(2025, 3, 30))
+        # After the as-of date, so not counted
+        self.repay(late, "5000.00", date(2025, 4, 20))
+
+        self.assertEqual(refresh_arrears(date(2025, 4, 15)), 3)
+
+        arrears = LoanArrears.objects.get(loan_account=late)
+        self.assertEqual(arrears.expected_to_date, Decimal("3000.00"))
+        self.assertEqual(arrears.paid_to_date, Decimal("1500.00"))
+        self.assertEqual(arrears.arrears_amount, Decimal("1500.00"))
+        self.assertEqual(arrears.installments_in_arrears, 2)
+        self.assertEqual(arrears.oldest_unpaid_due_date, date(2025, 2, 28))
+        self.assertEqual(arrears.days_past_due, 46)
+        self.assertEqual(arrears.bucket, "31-60")
+
+        arrears = LoanArrears.objects.get(loan_account=current)
+        self.assertEqual(arrears.arrears_amount, Decimal("0.00"))
+        self.assertEqual(arrears.days_past_due, 0)
+        self.assertIsNone(arrears.oldest_unpaid_due_date)
+        self.assertEqual(arrears.bucket, "Current")
+
+        report = aging_report()
+        self.assertEqual(report["total_loans"], 3)
+        self.assertEqual(report["total_outstanding_balance"], Decimal("9000.00"))
+        self.assertEqual(report["total_arrears_amount"], Decimal("1500.00"))
+        self.assertEqual(
+            report["portfolio_at_risk"]["par30"],
+            {"outstanding_balance": Decimal("3000.00"), "percent": Decimal("33.33")},
+        )
+        self.assertEqual(report["portfolio_at_risk"]["par60"]["percent"], Decimal("0.00"))
+
+    def test_refresh_replaces_the_table(self):
+        account = self.loan([date(2025, 1, 31)])
+        refresh_arrears(date(2025, 6, 30))
+        self.assertEqual(LoanArrears.objects.get().bucket, "90+")
+        self.repay(account, "1000.00", date(2025, 2, 1))
+        refresh_arrears(date(2025, 6, 30))
+        self.assertEqual(LoanArrears.objects.get().days_past_due, 0)
+
+    def test_endpoints_are_for_admins(self):
+        account = self.loan([date(2025, 1, 31)])
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get("/api/v1/loans/arrears/aging/").status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            "/api/v1/loans/arrears/refresh/", {"as_of": "2025-03-15"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["buckets"][2]["loans"], 1)
+
+        response = self.client.get("/api/v1/loans/arrears/", {"min_days": 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["account_number"] for row in response.data["results"]],
+            [account.account_number],
+        )
+        self.assertEqual(
+            self.client.post(
+                "/api/v1/loans/arrears/refresh/", {"as_of": "2025-13-01"}, format="json"
+            ).status_code,
+            400,
+        )
+
+
+class LoanStressTestTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            member_no="ADM001", password="pass1234", is_system_admin=True
+        )
+        self.deposits = SavingsType.objects.create(name="Member Deposits", is_guaranteed=True)
+        self.loan_type = LoanType.objects.create(name="Normal", description="Normal loan")
+        self.borrower = self.member("MEM001", "Acme", savings="200.00")
+        self.guarantor = self.member("MEM002", "Acme", savings="300.00")
+        self.backer = self.member("MEM003", "Other", savings="1000.00")
+        application = self.loan(self.borrower, "1000.00")
+        self.guarantee(application, self.guarantor, "600.00")
+        self.guarantee(application, self.backer, "200.00")
+        self.loan(self.member("MEM004", "Other"), "500.00")
+
+    def member(self, member_no, employer, savings="0"):
+        member = User.objects.create_user(
+            member_no=member_no, password="pass1234", is_member=True, employer=employer
+        )
+        SavingsAccount.objects.create(
+            member=member, account_type=self.deposits, balance=Decimal(savings)
+        )
+        return member
+
+    def loan(self, member, outstanding):
+        account = LoanAccount.objects.create(
+            member=member, loan_type=self.loan_type, outstanding_balance=Decimal(outstanding)
+        )
+        return LoanApplication.objects.create(
+            member=member,
+            product=self.loan_type,
+            requested_amount=Decimal(outstanding),
+            calculation_mode="fixed_term",
+            start_date=date(2025, 1, 1),
+            status="Disbursed",
+            loan_account=account,
+        )
+
+    def guarantee(self, application, guarantor, amount):
+        profile, _ = GuarantorProfile.objects.get_or_create(
+            member=guarantor, defaults={"is_eligible": True}
+        )
+        GuaranteeRequest.objects.create(
+            member=application.member,
+            loan_application=application,
+            guarantor=profile,
+            guaranteed_amount=Decimal(amount),
+            current_balance=Decimal(amount),
+            status="Accepted",
+        )
+
+    def test_guarantors_cover_what_the_borrowers_savings_do_not(self):
+        portfolio = load_portfolio()
+        self.assertEqual(portfolio.employers, ["Acme", "Other"])
+
+        # Everyone at Acme defaults, nobody elsewhere
+        report = run_stress_test(
+            scenarios=50, default_rate=0, employer_rates={"Acme": 100}, seed=1,
+            workers=1, portfolio=portfolio,
+        )
+        self.assertEqual(report["defaulted_borrowers"]["max"], 1)
+        self.assertEqual(report["exposure_at_default"]["mean"], Decimal("1000.00"))
+        self.assertEqual(report["borrower_savings_offset"]["mean"], Decimal("200.00"))
+        # 800 left, called 600 / 200; the first guarantor only has 300 saved
+        self.assertEqual(report["guarantor_calls"]["mean"], Decimal("800.00"))
+        self.assertEqual(report["guarantor_savings_shortfall"]["mean"], Decimal("300.00"))
+        self.assertEqual(report["loss"]["p99"], Decimal("300.00"))
+        self.assertEqual(report["loss_percent_of_portfolio"]["mean"], 20.0)
+        self.assertEqual(
+            [employer["exposure_at_default"]["mean"] for employer in report["employers"]],
+            [Decimal("1000.00"), Decimal("0.00")],
+        )
+
+        quiet = run_stress_test(scenarios=50, default_rate=0, seed=1, portfolio=portfolio)
+        self.assertEqual(quiet["loss"]["max"], Decimal("0.00"))
+
+        with self.assertRaises(ValueError):
+            run_stress_test(employer_rates={"Nowhere": 10}, portfolio=portfolio)
+
+    def test_results_follow_the_seed(self):
+        portfolio = load_portfolio()
+        runs = [
+            run_stress_test(
+                scenarios=500, default_rate=20, correlation=0.5, seed=seed,
+                workers=1, portfolio=portfolio,
+            )
+            for seed in (3, 3, 4)
+        ]
+        for run in runs:
+            run.pop("generated_at")
+        self.assertEqual(runs[0], runs[1])
+        self.assertNotEqual(runs[0]["loss"], runs[2]["loss"])
+        self.assertTrue(0 < runs[0]["defaulted_borrowers"]["mean"] < 2)
+
+    def test_report_is_cached_for_admins(self):
+        member = User.objects.get(member_no="MEM004")
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.get("/api/v1/loans/stress-test/").status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        url = "/api/v1/loans/stress-test/?scenarios=200&shock=Acme=100&default_rate=0"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200, first.data)
+        self.assertEqual(first.data["loss"]["mean"], Decimal("300.00"))
+        self.assertEqual(self.client.get(url).data["generated_at"], first.data["generated_at"])
+        self.assertNotEqual(
+            self.client.get(url + "&refresh=true").data["generated_at"],
+            first.data["generated_at"],
+        )
+        self.assertEqual(
+            self.client.get("/api/v1/loans/stress-test/?shock=Acme").status_code, 400
+        )
+        self.assertEqual(
+            self.client.get("/api/v1/loans/stress-test/?shock=Nowhere=5").status_code, 400
+        )
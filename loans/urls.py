@@ -3,12 +3,20 @@ from django.urls import path
 from loans.views import (
     LoanAccountListCreateView,
     LoanAccountDetailView,
+    LoanArrearsAgingView,
+    LoanArrearsListView,
+    LoanArrearsRefreshView,
+    LoanStressTestView,
 )
 
 app_name = "loans"
 
 urlpatterns = [
     path("", LoanAccountListCreateView.as_view(), name="loan-account-list-create"),
+    path("arrears/", LoanArrearsListView.as_view(), name="loan-arrears"),
+    path("arrears/aging/", LoanArrearsAgingView.as_view(), name="loan-arrears-aging"),
+    path("arrears/refresh/", LoanArrearsRefreshView.as_view(), name="loan-arrears-refresh"),
+    path("stress-test/", LoanStressTestView.as_view(), name="loan-stress-test"),
     path(
         "<str:identity>/",
         LoanAccountDetailView.as_view(),
@@ -1,9 +1,23 @@
-from rest_framework import generics
+import logging
+
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from loans.arrears import aging_report, refresh_arrears
+from loans.models import LoanAccount, LoanArrears
+from loans.serializers import (
+    LoanAccountSerializer,
+    LoanArrearsSerializer,
+    LoanStressTestSerializer,
+)
+from loans.stress import cached_stress_test
+from accounts.pagination import LargeTablePagination
+from accounts.permissions import IsSystemAdmin, IsSystemAdminOrReadOnly
+from transactions.utils.periods import parse_date_param
 
-from loans.models import LoanAccount
-from loans.serializers import LoanAccountSerializer
-from accounts.permissions import IsSystemAdminOrReadOnly
+logger = logging.getLogger(__name__)
 
 
 # Members can view and create their own loan accounts
@@ -35,3 +49,79 @@ class LoanAccountDetailView(generics.RetrieveAPIView):
         return self.queryset.filter(member=self.request.user).prefetch_related(
             "repayments", "loan_interests", "applications"
         )
+
+
+class LoanArrearsListView(generics.ListAPIView):
+    """
+    Loans as of the last arrears refresh, most overdue first. Filter with
+    ?bucket=31-60, ?min_days=30 or ?loan_type=.
+    """
+    serializer_class = LoanArrearsSerializer
+    permission_classes = [IsSystemAdmin]
+    pagination_class = LargeTablePagination
+
+    def get_queryset(self):
+        rows = LoanArrears.objects.select_related(
+            "loan_account__member", "loan_account__loan_type"
+        )
+        params = self.request.query_params
+        if params.get("bucket"):
+            rows = rows.filter(bucket=params["bucket"])
+        if params.get("min_days", "").isdigit():
+            rows = rows.filter(days_past_due__gte=int(params["min_days"]))
+        if params.get("loan_type"):
+            rows = rows.filter(loan_account__loan_type__name=params["loan_type"])
+        return rows
+
+
+class LoanArrearsAgingView(APIView):
+    """Aging buckets and PAR30/60/90 from the last refresh. ?loan_type= to narrow."""
+    permission_classes = [IsSystemAdmin]
+
+    def get(self, request):
+        return Response(aging_report(request.query_params.get("loan_type")))
+
+
+class LoanArrearsRefreshView(APIView):
+    """
+    Recompute every disbursed loan's arrears (as `manage.py refresh_arrears`
+    does nightly). Send `as_of` (YYYY-MM-DD) for a past date.
+    """
+    permission_classes = [IsSystemAdmin]
+
+    def post(self, request):
+        try:
+            as_of = parse_date_param(request.data.get("as_of"), "as_of")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        count = refresh_arrears(as_of)
+        logger.info(f"Refreshed arrears for {count} loans")
+        return Response(aging_report(), status=status.HTTP_200_OK)
+
+
+class LoanStressTestView(APIView):
+    """
+    Monte Carlo stress test of the loan book: loss, guarantor call and
+    savings shortfall distributions if members default at ?default_rate=
+    percent, with ?shock=Employer=percent (repeatable) for harder-hit
+    employers. Also ?scenarios=, ?correlation= and ?seed=. Reports are
+    cached per set of parameters; ?refresh=true recomputes.
+    """
+    permission_classes = [IsSystemAdmin]
+
+    def get(self, request):
+        serializer = LoanStressTestSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        try:
+            report = cached_stress_test(
+                refresh=params["refresh"],
+                scenarios=params.get("scenarios"),
+                default_rate=params["default_rate"],
+                employer_rates=params.get("shock"),
+                correlation=params.get("correlation"),
+                seed=params["seed"],
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
@@ -1,7 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from feetypes.models import FeeType
+from catalogs.registry import get_catalog
 from memberfees.models import MemberFee
 import logging
 
@@ -14,7 +14,7 @@ def auto_create_member_fees(sender, instance, created, **kwargs):
     Automatically create MemberFee records for a new member based on all active FeeTypes.
     """
     if created and instance.is_member:
-        fee_types = FeeType.objects.filter(is_active=True)
+        fee_types = [t for t in get_catalog().fee_types.values() if t.is_active]
         created_fees = []
         for fee_type in fee_types:
             if not MemberFee.objects.filter(member=instance, fee_type=fee_type).exists():
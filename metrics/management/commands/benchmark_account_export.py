@@ -0,0 +1,108 @@
+import json
+import multiprocessing
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.utils.account_export import WRITERS, AccountExport
+
+User = get_user_model()
+
+MODES = {"template": False, "interest": True}
+
+
+def measure_export(file_format, interest_only, chunk_size):
+    """
+    Runs in a fresh process per format so peak RSS belongs to that export
+    alone. The export runs twice: once timed, once under tracemalloc (which
+    slows it down) for the Python heap high-water mark, the number that would
+    grow with the member count if rows were held in memory.
+    """
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    export = AccountExport(interest_only=interest_only, chunk_size=chunk_size)
+    with tempfile.TemporaryFile() as output:
+        start = time.perf_counter()
+        WRITERS[file_format](export, output)
+        elapsed = time.perf_counter() - start
+        size = output.tell()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with tempfile.TemporaryFile() as output:
+        tracemalloc.start()
+        WRITERS[file_format](export, output)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "seconds": round(elapsed, 3),
+        "file_bytes": size,
+        "peak_heap_kb": peak // 1024,
+        "baseline_rss_kb": baseline_rss,
+        "peak_rss_kb": peak_rss,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the bulk upload template and the interest export as CSV and as "
+        "XLSX and compare time, file size and peak memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--formats", nargs="*", default=list(WRITERS), choices=list(WRITERS)
+        )
+        parser.add_argument(
+            "--modes", nargs="*", default=list(MODES), choices=list(MODES)
+        )
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument(
+            "--output", type=str, default="account_export_benchmark_results.json"
+        )
+
+    def handle(self, *args, **options):
+        members = User.objects.filter(is_member=True).count()
+        if not members:
+            raise CommandError(
+                "No members found. Run `manage.py generate_synthetic_sacco` first."
+            )
+
+        results = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "members": members,
+            "exports": {},
+        }
+        self.stdout.write(f"Exporting {members} members...")
+        context = multiprocessing.get_context("spawn")
+        for mode in options["modes"]:
+            for file_format in options["formats"]:
+                name = f"{mode}.{file_format}"
+                with context.Pool(1, initializer=django.setup) as pool:
+                    try:
+                        row = pool.apply(
+                            measure_export,
+                            (file_format, MODES[mode], options["chunk_size"]),
+                        )
+                    except Exception as e:
+                        row = {"error": f"{type(e).__name__}: {e}"}
+                results["exports"][name] = row
+
+                if "error" in row:
+                    self.stdout.write(self.style.ERROR(f"  {name}: {row['error']}"))
+                    continue
+                self.stdout.write(
+                    f"  {name}: {row['seconds']:.2f}s  {row['file_bytes'] // 1024}KB  "
+                    f"peak heap {row['peak_heap_kb'] / 1024:.1f}MB  "
+                    f"peak RSS {row['peak_rss_kb'] / 1024:.0f}MB "
+                    f"(+{(row['peak_rss_kb'] - row['baseline_rss_kb']) / 1024:.0f}MB)"
+                )
+
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,340 @@
+import csv
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from accounts.pagination import KeysetPagination
+from loantypes.models import LoanType
+from savingsdeposits.models import SavingsDeposit
+from savingstypes.models import SavingsType
+from metrics.utils import RequestCollector
+from venturetypes.models import VentureType
+
+User = get_user_model()
+
+SYNTHETIC_ADMIN = "SYNADMIN"
+SYNTHETIC_PREFIX = "SYN"
+
+
+class _Rollback(Exception):
+    pass
+
+
+def fake_upload(file, **options):
+    """Stand-in for cloudinary.uploader.upload so runs stay offline and repeatable."""
+    return {"secure_url": f"https://example.invalid/{options.get('public_id', 'file')}"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot endpoints against the synthetic SACCO and compare "
+        "p50/p95 latency, query counts and peak memory with a JSON baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--warmup", type=int, default=1)
+        parser.add_argument("--member", type=str, default=f"{SYNTHETIC_PREFIX}000001")
+        parser.add_argument("--year", type=int, default=datetime.now().year)
+        parser.add_argument(
+            "--upload-rows",
+            type=int,
+            default=100,
+            help="Rows in the generated combined bulk upload file",
+        )
+        parser.add_argument(
+            "--only", nargs="*", default=None, help="Benchmark only these endpoints"
+        )
+        parser.add_argument(
+            "--deep-page",
+            type=int,
+            default=500,
+            help="Page compared against page 1 for the savings deposit list",
+        )
+        parser.add_argument("--output", type=str, default="benchmark_results.json")
+        parser.add_argument("--baseline", type=str, default=None)
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write the results to --baseline instead of comparing",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed relative regression (0.2 = 20%%)",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=5.0,
+            help="Ignore latency regressions smaller than this (timer noise)",
+        )
+        parser.add_argument(
+            "--allow-external",
+            action="store_true",
+            help="Really upload to Cloudinary instead of using a local stub",
+        )
+
+    def handle(self, *args, **options):
+        admin = User.objects.filter(member_no=SYNTHETIC_ADMIN).first()
+        if admin is None:
+            raise CommandError(
+                "No synthetic data found. Run `manage.py generate_synthetic_sacco` first."
+            )
+        if not User.objects.filter(member_no=options["member"]).exists():
+            raise CommandError(f"Member {options['member']} does not exist")
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline")
+
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.options = options
+
+        endpoints = self.endpoints(options)
+        if options["only"]:
+            unknown = set(options["only"]) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            endpoints = {k: v for k, v in endpoints.items() if k in options["only"]}
+
+        results = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "database": connection.vendor,
+            "members": User.objects.filter(is_member=True).count(),
+            "iterations": options["iterations"],
+            "endpoints": {},
+        }
+
+        patcher = (
+            mock.patch("cloudinary.uploader.upload", fake_upload)
+            if not options["allow_external"]
+            else nullcontext()
+        )
+        hosts = list(settings.ALLOWED_HOSTS) + ["testserver"]
+        with patcher, override_settings(ALLOWED_HOSTS=hosts):
+            for name, call in endpoints.items():
+                self.stdout.write(f"Benchmarking {name}...")
+                results["endpoints"][name] = self.measure(call, options)
+                row = results["endpoints"][name]
+                self.stdout.write(
+                    f"  p50 {row['p50_ms']:.1f}ms  p95 {row['p95_ms']:.1f}ms  "
+                    f"queries {row['queries']}  peak {row['peak_memory_kb']:.0f}KB"
+                )
+
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options["baseline"] and options["save_baseline"]:
+            Path(options["baseline"]).write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+            return
+
+        failures = [
+            f"{name}: {row['error']}"
+            for name, row in results["endpoints"].items()
+            if row.get("error")
+        ]
+        if options["baseline"]:
+            failures += self.compare(results, options)
+
+        if failures:
+            raise CommandError("Benchmark failed:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Benchmark passed"))
+
+    # ------------------------------------------------------------------
+    def endpoints(self, options):
+        member_no = options["member"]
+        year = options["year"]
+        get = self.client.get
+        upload = self.upload_content(options["upload_rows"])
+        return {
+            "combined_bulk_upload": lambda: self.client.post(
+                reverse("transactions:combined-bulk-upload"),
+                {
+                    "file": SimpleUploadedFile(
+                        "benchmark_upload.csv", upload, "text/csv"
+                    )
+                },
+                format="multipart",
+            ),
+            "account_list_download": lambda: get(
+                reverse("transactions:transaction-list-download")
+            ),
+            "member_yearly_summary": lambda: get(
+                reverse("transactions:summary", args=[member_no]), {"year": year}
+            ),
+            "sacco_yearly_summary": lambda: get(
+                reverse("transactions:sacco-summary"), {"year": year}
+            ),
+            "member_statement": lambda: get(
+                reverse("transactions:member-statement", args=[member_no])
+            ),
+            "balance_sheet": lambda: get("/api/v1/finances/balance-sheet/"),
+            "trial_balance": lambda: get("/api/v1/finances/trial-balance/"),
+            "cashbook": lambda: get(reverse("transactions:sacco-cashbook")),
+            **self.list_endpoints(options["deep_page"]),
+        }
+
+    def list_endpoints(self, deep_page):
+        """
+        Page 1 against `deep_page` (clamped to the last page) of the savings
+        deposit list, with page numbers and with the keyset cursor that points
+        at the same rows.
+        """
+        url = reverse("savingsdeposits:list-create")
+        page_size = api_settings.PAGE_SIZE
+        total = SavingsDeposit.objects.count()
+        deep_page = max(1, min(deep_page, -(-total // page_size)))
+        boundary = (
+            SavingsDeposit.objects.order_by("-created_at", "-id")
+            .only("created_at")[(deep_page - 1) * page_size - 1]
+            if deep_page > 1
+            else None
+        )
+        deep_cursor = {"pagination": "cursor"}
+        if boundary is not None:
+            deep_cursor["cursor"] = KeysetPagination.make_cursor(boundary)
+        get = self.client.get
+        return {
+            "savings_deposits_page_1": lambda: get(url),
+            "savings_deposits_page_deep": lambda: get(url, {"page": deep_page}),
+            "savings_deposits_cursor_1": lambda: get(url, {"pagination": "cursor"}),
+            "savings_deposits_cursor_deep": lambda: get(url, deep_cursor),
+        }
+
+    def upload_content(self, rows):
+        """
+        A combined upload touching savings, venture and loan columns for the
+        first `rows` synthetic members.
+        """
+        savings_types = list(SavingsType.objects.values_list("name", flat=True))
+        venture_types = list(VentureType.objects.values_list("name", flat=True))
+        loan_types = list(LoanType.objects.values_list("name", flat=True))
+
+        headers = ["Member Number"]
+        for st in savings_types:
+            headers += [f"{st} Account", f"{st} Amount"]
+        for vt in venture_types:
+            headers += [f"{vt} Account", f"{vt} Amount"]
+        for lt in loan_types:
+            headers += [f"{lt} Account", f"{lt} Interest Amount"]
+        headers += ["Payment Method"]
+
+        members = (
+            User.objects.filter(member_no__startswith=SYNTHETIC_PREFIX, is_member=True)
+            .order_by("member_no")
+            .prefetch_related(
+                "savings_accounts__account_type",
+                "venture_accounts__venture_type",
+                "loans__loan_type",
+            )[:rows]
+        )
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=headers, lineterminator="\n")
+        writer.writeheader()
+        for member in members:
+            row = {"Member Number": member.member_no, "Payment Method": "Cash"}
+            for acc in member.savings_accounts.all():
+                row[f"{acc.account_type.name} Account"] = acc.account_number
+                row[f"{acc.account_type.name} Amount"] = "1000.00"
+            for acc in member.venture_accounts.all():
+                row[f"{acc.venture_type.name} Account"] = acc.account_number
+                row[f"{acc.venture_type.name} Amount"] = "500.00"
+            for acc in member.loans.all():
+                row[f"{acc.loan_type.name} Account"] = acc.account_number
+                row[f"{acc.loan_type.name} Interest Amount"] = "100.00"
+            writer.writerow(row)
+        return buffer.getvalue().encode("utf-8")
+
+    def run_once(self, call):
+        """
+        One request inside a rolled-back transaction, so uploads leave no trace
+        and every iteration sees the same data.
+        """
+        outcome = {}
+        try:
+            collector = RequestCollector()
+            with transaction.atomic(), connection.execute_wrapper(collector):
+                tracemalloc.start()
+                start = time.perf_counter()
+                response = call()
+                if getattr(response, "streaming", False):
+                    for _ in response.streaming_content:
+                        pass
+                outcome["elapsed"] = time.perf_counter() - start
+                outcome["peak"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                outcome["queries"] = collector.query_count
+                outcome["status"] = response.status_code
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+        return outcome
+
+    def measure(self, call, options):
+        for _ in range(options["warmup"]):
+            self.run_once(call)
+
+        samples = [self.run_once(call) for _ in range(options["iterations"])]
+        timings = sorted(s["elapsed"] * 1000 for s in samples)
+        statuses = sorted({s["status"] for s in samples})
+        row = {
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 2),
+            "queries": max(s["queries"] for s in samples),
+            "peak_memory_kb": round(max(s["peak"] for s in samples) / 1024, 1),
+            "status": statuses,
+        }
+        if any(code >= 400 for code in statuses):
+            row["error"] = f"HTTP {statuses}"
+        return row
+
+    def compare(self, results, options):
+        path = Path(options["baseline"])
+        if not path.exists():
+            raise CommandError(f"Baseline {path} not found. Create it with --save-baseline.")
+        baseline = json.loads(path.read_text())["endpoints"]
+        limit = 1 + options["threshold"]
+        failures = []
+
+        for name, row in results["endpoints"].items():
+            base = baseline.get(name)
+            if not base:
+                self.stdout.write(self.style.WARNING(f"{name}: not in baseline, skipped"))
+                continue
+            if (
+                row["p95_ms"] > base["p95_ms"] * limit
+                and row["p95_ms"] - base["p95_ms"] > options["min_delta_ms"]
+            ):
+                failures.append(
+                    f"{name}: p95 {row['p95_ms']}ms vs baseline {base['p95_ms']}ms"
+                )
+            if row["queries"] > base["queries"] * limit:
+                failures.append(
+                    f"{name}: {row['queries']} queries vs baseline {base['queries']}"
+                )
+            if row["peak_memory_kb"] > base["peak_memory_kb"] * limit:
+                failures.append(
+                    f"{name}: peak {row['peak_memory_kb']}KB vs baseline {base['peak_memory_kb']}KB"
+                )
+        return failures
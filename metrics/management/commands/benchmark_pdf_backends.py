@@ -0,0 +1,139 @@
+import json
+import multiprocessing
+import resource
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from metrics.management.commands.benchmark_endpoints import (
+    SYNTHETIC_ADMIN,
+    SYNTHETIC_PREFIX,
+)
+from transactions.utils.pdf import BACKENDS
+
+User = get_user_model()
+
+
+def build_reports(member_no, year):
+    """HTML for each PDF report, built the way the download views build it."""
+    from transactions.views import MemberYearlySummaryPDFView, SACCOSummaryPDFView
+
+    admin = User.objects.get(member_no=SYNTHETIC_ADMIN)
+    factory = APIRequestFactory()
+
+    def prepare(view, url):
+        request = factory.get(url, {"year": year})
+        force_authenticate(request, admin)
+        request = view.initialize_request(request)
+        view.request = request
+        return request
+
+    member_view = MemberYearlySummaryPDFView()
+    sacco_view = SACCOSummaryPDFView()
+    return {
+        member_view.pdf_report: member_view.get_html(
+            prepare(member_view, reverse("transactions:summary-pdf", args=[member_no])),
+            member_no,
+        ),
+        sacco_view.pdf_report: sacco_view.get_html(
+            prepare(sacco_view, reverse("transactions:sacco-summary-pdf"))
+        ),
+    }
+
+
+def measure_backend(name, member_no, year, iterations):
+    """
+    Runs in a fresh process per backend so peak RSS belongs to that backend
+    alone. Chromium renders in child processes, counted separately.
+    """
+    reports = build_reports(member_no, year)
+    backend = BACKENDS[name]()
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    results = {}
+    for report, html in reports.items():
+        timings = []
+        size = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            size = len(backend.render(html, landscape=True))
+            timings.append((time.perf_counter() - start) * 1000)
+        results[report] = {
+            "first_ms": round(timings[0], 2),
+            "p50_ms": round(statistics.median(timings), 2),
+            "max_ms": round(max(timings), 2),
+            "pdf_bytes": size,
+        }
+
+    return {
+        "reports": results,
+        "baseline_rss_kb": baseline_rss,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_child_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the member and SACCO yearly summary PDFs with each PDF backend "
+        "and compare render time and peak RSS"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backends", nargs="*", default=list(BACKENDS), choices=list(BACKENDS)
+        )
+        parser.add_argument("--iterations", type=int, default=3)
+        parser.add_argument("--member", type=str, default=f"{SYNTHETIC_PREFIX}000001")
+        parser.add_argument("--year", type=int, default=datetime.now().year)
+        parser.add_argument("--output", type=str, default="pdf_benchmark_results.json")
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(member_no=SYNTHETIC_ADMIN).exists():
+            raise CommandError(
+                "No synthetic data found. Run `manage.py generate_synthetic_sacco` first."
+            )
+        if not User.objects.filter(member_no=options["member"]).exists():
+            raise CommandError(f"Member {options['member']} does not exist")
+
+        results = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "iterations": options["iterations"],
+            "backends": {},
+        }
+        context = multiprocessing.get_context("spawn")
+        for name in options["backends"]:
+            self.stdout.write(f"Benchmarking {name}...")
+            with context.Pool(1, initializer=django.setup) as pool:
+                try:
+                    row = pool.apply(
+                        measure_backend,
+                        (name, options["member"], options["year"], options["iterations"]),
+                    )
+                except Exception as e:
+                    row = {"error": f"{type(e).__name__}: {e}"}
+            results["backends"][name] = row
+
+            if "error" in row:
+                self.stdout.write(self.style.ERROR(f"  {row['error']}"))
+                continue
+            for report, timing in row["reports"].items():
+                self.stdout.write(
+                    f"  {report}: first {timing['first_ms']:.0f}ms  "
+                    f"p50 {timing['p50_ms']:.0f}ms  {timing['pdf_bytes'] // 1024}KB"
+                )
+            self.stdout.write(
+                f"  peak RSS {row['peak_rss_kb'] / 1024:.0f}MB "
+                f"(+{(row['peak_rss_kb'] - row['baseline_rss_kb']) / 1024:.0f}MB rendering), "
+                f"child processes {row['peak_child_rss_kb'] / 1024:.0f}MB"
+            )
+
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
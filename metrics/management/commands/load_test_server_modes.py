@@ -0,0 +1,285 @@
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from metrics.management.commands.benchmark_endpoints import (
+    SYNTHETIC_ADMIN,
+    SYNTHETIC_PREFIX,
+)
+
+User = get_user_model()
+
+MODES = ("wsgi", "asgi")
+
+# The cashbook lists every Cash at Bank entry ever posted; ask for it by name
+DEFAULT_ENDPOINTS = [
+    "member_statement",
+    "member_profile",
+    "member_yearly_summary",
+    "sacco_yearly_summary",
+    "member_summary_pdf",
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the async read endpoints with Gunicorn in WSGI and in ASGI "
+        "mode (gunicorn.conf.py), at several numbers of concurrent clients per "
+        "worker, against the synthetic SACCO"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients",
+            type=int,
+            nargs="+",
+            default=[1, 4, 16],
+            help="Numbers of concurrent clients to run, one round each",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=10.0, help="Seconds per round"
+        )
+        parser.add_argument(
+            "--server-workers",
+            type=int,
+            default=1,
+            help="Gunicorn workers (WEB_CONCURRENCY) in both modes",
+        )
+        parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+        parser.add_argument("--member", type=str, default=f"{SYNTHETIC_PREFIX}000001")
+        parser.add_argument("--year", type=int, default=datetime.now().year)
+        parser.add_argument(
+            "--only",
+            nargs="*",
+            default=DEFAULT_ENDPOINTS,
+            help="Endpoints to request (also: cashbook)",
+        )
+        parser.add_argument("--output", type=str, default="load_test_results.json")
+        parser.add_argument(
+            "--startup-timeout",
+            type=float,
+            default=30.0,
+            help="Seconds to wait for the server to accept requests",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import requests  # noqa: F401
+        except ImportError:
+            raise CommandError("The load test needs the requests package")
+        if "asgi" in options["modes"]:
+            try:
+                import uvicorn_worker  # noqa: F401
+            except ImportError:
+                raise CommandError("ASGI mode needs uvicorn and uvicorn-worker installed")
+
+        admin = User.objects.filter(member_no=SYNTHETIC_ADMIN).first()
+        if admin is None:
+            raise CommandError(
+                "No synthetic data found. Run `manage.py generate_synthetic_sacco` first."
+            )
+        if not User.objects.filter(member_no=options["member"]).exists():
+            raise CommandError(f"Member {options['member']} does not exist")
+        token, _ = Token.objects.get_or_create(user=admin)
+
+        endpoints = self.endpoints(options["member"], options["year"])
+        if options["only"]:
+            unknown = set(options["only"]) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            endpoints = {k: v for k, v in endpoints.items() if k in options["only"]}
+
+        results = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "database": connection.vendor,
+            "cpus": os.cpu_count(),
+            "server_workers": options["server_workers"],
+            "duration_s": options["duration"],
+            "endpoints": list(endpoints),
+            "modes": {},
+        }
+        for mode in options["modes"]:
+            self.stdout.write(f"Starting Gunicorn in {mode.upper()} mode...")
+            with self.server(mode, options) as base_url:
+                rounds = results["modes"][mode] = {}
+                for clients in options["clients"]:
+                    row = self.run_round(
+                        base_url, endpoints, token.key, clients, options["duration"]
+                    )
+                    rounds[str(clients)] = row
+                    self.stdout.write(
+                        f"  {clients:>3} clients  {row['requests_per_s']:8.1f} req/s  "
+                        f"p50 {row['p50_ms']:.0f}ms  p95 {row['p95_ms']:.0f}ms  "
+                        f"errors {row['errors']}"
+                    )
+
+        self.write_comparison(results)
+        Path(options["output"]).write_text(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    # ------------------------------------------------------------------
+    def endpoints(self, member_no, year):
+        return {
+            "member_statement": reverse("transactions:member-statement", args=[member_no]),
+            "member_profile": reverse("accounts:member-detail", args=[member_no]),
+            "member_yearly_summary": (
+                reverse("transactions:summary", args=[member_no]) + f"?year={year}"
+            ),
+            "sacco_yearly_summary": (
+                reverse("transactions:sacco-summary") + f"?year={year}"
+            ),
+            "member_summary_pdf": (
+                reverse("transactions:summary-pdf", args=[member_no]) + f"?year={year}"
+            ),
+            "cashbook": reverse("transactions:sacco-cashbook"),
+        }
+
+    @contextmanager
+    def server(self, mode, options):
+        """Gunicorn on a free port with gunicorn.conf.py in `mode`; yields its URL."""
+        port = free_port()
+        env = {
+            **os.environ,
+            "SERVER_MODE": mode,
+            "WEB_CONCURRENCY": str(options["server_workers"]),
+            "ALLOWED_HOSTS": ",".join(list(settings.ALLOWED_HOSTS) + ["127.0.0.1"]),
+            # Slow rounds at high concurrency shouldn't get workers killed
+            "GUNICORN_TIMEOUT": "300",
+        }
+        process = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn",
+                "--config", str(Path(settings.BASE_DIR) / "gunicorn.conf.py"),
+                "--bind", f"127.0.0.1:{port}",
+                "--log-level", "warning",
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            self.wait_until_up(process, base_url, options["startup_timeout"])
+            yield base_url
+        finally:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def wait_until_up(self, process, base_url, timeout):
+        import requests
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"Gunicorn exited with status {process.returncode}")
+            try:
+                requests.get(base_url + "/", timeout=1)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        raise CommandError(f"Gunicorn did not start within {timeout:.0f}s")
+
+    def run_round(self, base_url, endpoints, token, clients, duration):
+        """
+        `clients` threads, each requesting the endpoints in turn for
+        `duration` seconds and timing every response.
+        """
+        import requests
+
+        names = list(endpoints)
+        deadline = time.monotonic() + duration
+        lock = threading.Lock()
+        timings = {name: [] for name in names}
+        errors = []
+
+        def client(offset):
+            session = requests.Session()
+            session.headers["Authorization"] = f"Token {token}"
+            sent = offset
+            while time.monotonic() < deadline:
+                name = names[sent % len(names)]
+                sent += 1
+                start = time.perf_counter()
+                try:
+                    response = session.get(base_url + endpoints[name], timeout=300)
+                    failed = response.status_code >= 400
+                    outcome = f"{name}: HTTP {response.status_code}"
+                except requests.RequestException as e:
+                    failed = True
+                    outcome = f"{name}: {e.__class__.__name__}"
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    if failed:
+                        errors.append(outcome)
+                    else:
+                        timings[name].append(elapsed)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(client, range(clients)))
+        wall = time.perf_counter() - started
+
+        every = sorted(t for values in timings.values() for t in values)
+        row = {
+            "requests": len(every),
+            "requests_per_s": round(len(every) / wall, 2),
+            "p50_ms": round(statistics.median(every), 1) if every else None,
+            "p95_ms": round(percentile(every, 0.95), 1) if every else None,
+            "errors": len(errors),
+            "endpoints": {
+                name: {
+                    "requests": len(values),
+                    "p50_ms": round(statistics.median(values), 1),
+                    "p95_ms": round(percentile(sorted(values), 0.95), 1),
+                }
+                for name, values in timings.items()
+                if values
+            },
+        }
+        if errors:
+            row["first_errors"] = sorted(set(errors))[:5]
+        return row
+
+    def write_comparison(self, results):
+        modes = results["modes"]
+        if set(modes) != set(MODES):
+            return
+        self.stdout.write("ASGI against WSGI, per number of clients:")
+        for clients, wsgi in modes["wsgi"].items():
+            asgi = modes["asgi"].get(clients)
+            if not asgi or not wsgi["requests_per_s"] or not wsgi["p95_ms"]:
+                continue
+            self.stdout.write(
+                f"  {clients:>3} clients  throughput x{asgi['requests_per_s'] / wsgi['requests_per_s']:.2f}  "
+                f"p95 x{(asgi['p95_ms'] or 0) / wsgi['p95_ms']:.2f}"
+            )
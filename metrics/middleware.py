@@ -0,0 +1,82 @@
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from metrics.store import store
+from metrics.utils import RequestCollector, collecting
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, SQL time, duplicate queries and external-call
+    latency for every request, keyed by the resolved view name.
+
+    Under ASGI the database connections belong to the request's sync thread,
+    not the event loop, so the execute wrappers are installed and removed
+    there.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, "METRICS_ENABLED", True):
+            return self.get_response(request)
+
+        collector = RequestCollector()
+        start = time.perf_counter()
+        with collecting(collector), ExitStack() as stack:
+            self.wrap_connections(stack, collector)
+            response = self.get_response(request)
+        return self.finish(request, response, collector, start)
+
+    async def __acall__(self, request):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            return await self.get_response(request)
+
+        collector = RequestCollector()
+        start = time.perf_counter()
+        with collecting(collector), ExitStack() as stack:
+            await sync_to_async(self.wrap_connections)(stack, collector)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        return self.finish(request, response, collector, start)
+
+    @staticmethod
+    def wrap_connections(stack, collector):
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(collector))
+
+    def finish(self, request, response, collector, start):
+        duration = time.perf_counter() - start
+
+        view = self.view_name(request)
+        if view is not None:
+            store.record_request(view, collector, duration)
+
+        if getattr(settings, "METRICS_DEBUG_HEADERS", False):
+            response["X-Request-Time"] = f"{duration * 1000:.1f}ms"
+            response["X-SQL-Queries"] = str(collector.query_count)
+            response["X-SQL-Time"] = f"{collector.sql_time * 1000:.1f}ms"
+            response["X-SQL-Duplicates"] = str(sum(collector.duplicates().values()))
+            response["X-External-Time"] = f"{collector.external_time * 1000:.1f}ms"
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return None
+        return match.view_name or match.route
@@ -0,0 +1,175 @@
+import threading
+from collections import defaultdict, deque
+
+# Latency buckets (seconds) shared by request and external-call histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Query-count buckets for the per-view SQL histogram
+QUERY_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Histogram:
+    """
+    Cumulative bucket counts (for Prometheus) plus a rolling window of
+    recent samples (for percentiles on the admin endpoint).
+    """
+
+    def __init__(self, buckets, window=500):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def percentile(self, pct):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "p50": round(self.percentile(50), 6),
+            "p95": round(self.percentile(95), 6),
+            "max": round(max(self.recent), 6) if self.recent else 0.0,
+        }
+
+
+class MetricsStore:
+    """
+    Process-local store of per-view request metrics and external-call latency.
+    Each gunicorn worker keeps its own copy.
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+            self.external = defaultdict(
+                lambda: Histogram(LATENCY_BUCKETS, self.window)
+            )
+            self.duplicates = defaultdict(lambda: defaultdict(int))
+
+    def _view(self, view):
+        if view not in self.views:
+            self.views[view] = {
+                "latency": Histogram(LATENCY_BUCKETS, self.window),
+                "sql_time": Histogram(LATENCY_BUCKETS, self.window),
+                "queries": Histogram(QUERY_BUCKETS, self.window),
+                "duplicate_queries": 0,
+            }
+        return self.views[view]
+
+    def record_request(self, view, collector, duration):
+        with self.lock:
+            entry = self._view(view)
+            entry["latency"].observe(duration)
+            entry["sql_time"].observe(collector.sql_time)
+            entry["queries"].observe(collector.query_count)
+            duplicates = collector.duplicates()
+            entry["duplicate_queries"] += sum(duplicates.values())
+            for fingerprint, repeats in duplicates.items():
+                self.duplicates[view][fingerprint] += repeats
+            for name, elapsed in collector.external_calls:
+                self.external[(view, name)].observe(elapsed)
+
+    def record_external(self, view, name, duration):
+        with self.lock:
+            self.external[(view, name)].observe(duration)
+
+    def snapshot(self, top=5):
+        with self.lock:
+            views = {}
+            for view, entry in self.views.items():
+                worst = sorted(
+                    self.duplicates[view].items(), key=lambda kv: kv[1], reverse=True
+                )[:top]
+                views[view] = {
+                    "latency": entry["latency"].snapshot(),
+                    "sql_time": entry["sql_time"].snapshot(),
+                    "queries": entry["queries"].snapshot(),
+                    "duplicate_queries": entry["duplicate_queries"],
+                    "top_duplicates": [
+                        {"sql": sql, "repeats": repeats} for sql, repeats in worst
+                    ],
+                    "external": {
+                        name: hist.snapshot()
+                        for (v, name), hist in self.external.items()
+                        if v == view
+                    },
+                }
+            return views
+
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            series = [
+                ("sacco_request_duration_seconds", "Request latency per view", "latency"),
+                ("sacco_request_sql_seconds", "SQL time per request per view", "sql_time"),
+                ("sacco_request_queries", "SQL queries per request per view", "queries"),
+            ]
+            for metric, help_text, key in series:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for view, entry in sorted(self.views.items()):
+                    lines.extend(_histogram_lines(metric, {"view": view}, entry[key]))
+
+            lines.append(
+                "# HELP sacco_request_duplicate_queries_total Repeated identical SQL per view"
+            )
+            lines.append("# TYPE sacco_request_duplicate_queries_total counter")
+            for view, entry in sorted(self.views.items()):
+                lines.append(
+                    f'sacco_request_duplicate_queries_total{{view="{_escape(view)}"}} '
+                    f'{entry["duplicate_queries"]}'
+                )
+
+            metric = "sacco_external_call_duration_seconds"
+            lines.append(f"# HELP {metric} External call latency per view")
+            lines.append(f"# TYPE {metric} histogram")
+            for (view, name), hist in sorted(self.external.items()):
+                lines.extend(
+                    _histogram_lines(metric, {"view": view, "service": name}, hist)
+                )
+        return "\n".join(lines) + "\n"
+
+
+def counter_lines(metric, help_text, values):
+    """Prometheus lines for a counter per `values` key, labelled with it as `label`."""
+    lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+    for label, value in values.items():
+        lines.append(f'{metric}{{result="{_escape(label)}"}} {value}')
+    return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(metric, labels, hist):
+    label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    lines = []
+    for bound, count in zip(hist.buckets, hist.counts):
+        lines.append(f'{metric}_bucket{{{label_str},le="{bound}"}} {count}')
+    lines.append(f'{metric}_bucket{{{label_str},le="+Inf"}} {hist.count}')
+    lines.append(f"{metric}_sum{{{label_str}}} {round(hist.total, 6)}")
+    lines.append(f"{metric}_count{{{label_str}}} {hist.count}")
+    return lines
+
+
+store = MetricsStore()
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from metrics.store import store
+from metrics.utils import fingerprint_sql, track_external
+
+User = get_user_model()
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_DEBUG_HEADERS=True)
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        store.reset()
+        self.admin = User.objects.create_user(
+            member_no="ADM001",
+            email="admin@example.com",
+            password="pass1234",
+            is_system_admin=True,
+        )
+        self.member = User.objects.create_user(
+            member_no="MEM001", email="member@example.com", password="pass1234"
+        )
+
+    def test_debug_headers_and_store(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/v1/auth/members/all/")
+        self.assertIn("X-SQL-Queries", response)
+        self.assertIn("X-SQL-Time", response)
+
+        snapshot = self.client.get("/api/v1/metrics/").data["views"]
+        self.assertTrue(any(v["queries"]["count"] >= 1 for v in snapshot.values()))
+
+    def test_prometheus_exposition(self):
+        self.client.force_authenticate(self.admin)
+        self.client.get("/api/v1/metrics/")
+        response = self.client.get("/api/v1/metrics/prometheus/")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn("# TYPE sacco_request_duration_seconds histogram", body)
+        self.assertIn('view="metrics:metrics"', body)
+
+    async def test_async_views_are_measured_over_asgi(self):
+        response = await self.async_client.get("/api/v1/transactions/sacco/reports/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(int(response["X-SQL-Queries"]), 2)
+        self.assertIn("transactions:sacco-summary", store.snapshot())
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get("/api/v1/metrics/").status_code, 403)
+
+    def test_fingerprint_collapses_literals(self):
+        self.assertEqual(
+            fingerprint_sql("SELECT * FROM t WHERE id = 5 AND x IN (%s, %s, %s)"),
+            "SELECT * FROM t WHERE id = ? AND x IN (...)",
+        )
+
+    def test_external_call_outside_request(self):
+        with track_external("cloudinary"):
+            pass
+        self.assertEqual(store.external[("(background)", "cloudinary")].count, 1)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from metrics.views import MetricsView, PrometheusMetricsView
+
+app_name = "metrics"
+
+urlpatterns = [
+    path("", MetricsView.as_view(), name="metrics"),
+    path("prometheus/", PrometheusMetricsView.as_view(), name="prometheus"),
+]
@@ -0,0 +1,145 @@
+import functools
+import inspect
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+_current_collector = ContextVar("metrics_collector", default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+
+
+def fingerprint_sql(sql):
+    """
+    Collapse literals and IN-lists so the same query with different
+    parameters maps to one fingerprint.
+    """
+    sql = _LITERALS.sub("?", sql)
+    sql = _IN_LISTS.sub("(...)", sql)
+    return " ".join(sql.split())
+
+
+class RequestCollector:
+    """
+    Per-request counters filled in by the SQL execute wrapper and
+    track_external(); read by the middleware once the view returns.
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.statements = []
+        self.external_calls = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.sql_time += time.perf_counter() - start
+            # Identical SQL *and* params is the N+1 signature we care about
+            self.statements.append((sql, repr(params)))
+
+    def duplicates(self):
+        """Fingerprint -> number of repeated executions beyond the first."""
+        counts = Counter(self.statements)
+        repeated = Counter()
+        for (sql, _), seen in counts.items():
+            if seen > 1:
+                repeated[fingerprint_sql(sql)] += seen - 1
+        return dict(repeated)
+
+    @property
+    def external_time(self):
+        return sum(elapsed for _, elapsed in self.external_calls)
+
+
+def current_collector():
+    return _current_collector.get()
+
+
+@contextmanager
+def collecting(collector):
+    token = _current_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_collector.reset(token)
+
+
+@contextmanager
+def track_external(name):
+    """
+    Time a blocking call to an external service (Cloudinary, Resend,
+    Playwright) against the request currently being served.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        collector = _current_collector.get()
+        if collector is not None:
+            collector.external_calls.append((name, elapsed))
+        else:
+            from metrics.store import store
+
+            store.record_external("(background)", name, elapsed)
+
+
+def timed_external(name):
+    """Decorator form of track_external(); supports sync and async callables."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track_external(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_external(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_external_clients():
+    """
+    Wrap the third-party client entry points used across the apps so every
+    call site is timed without touching it.
+    """
+    try:
+        import cloudinary.uploader
+
+        if not getattr(cloudinary.uploader.upload, "_metrics_wrapped", False):
+            cloudinary.uploader.upload = timed_external("cloudinary")(
+                cloudinary.uploader.upload
+            )
+            cloudinary.uploader.upload._metrics_wrapped = True
+    except ImportError:
+        logger.warning("cloudinary not installed; uploads will not be timed")
+
+    try:
+        import resend
+
+        send = resend.Emails.send
+        if not getattr(send, "_metrics_wrapped", False):
+            wrapped = timed_external("resend")(send)
+            wrapped._metrics_wrapped = True
+            resend.Emails.send = staticmethod(wrapped)
+    except ImportError:
+        logger.warning("resend not installed; emails will not be timed")
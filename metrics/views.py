@@ -0,0 +1,59 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.authentication import token_cache
+from accounts.permissions import IsSystemAdmin
+from metrics.store import counter_lines, store
+
+
+class MetricsView(APIView):
+    """
+    Per-view request metrics for this worker process: latency, SQL time,
+    query counts, duplicate-query fingerprints and external-call latency,
+    plus the token authentication cache's hit rate. DELETE clears them.
+    """
+
+    permission_classes = [IsSystemAdmin]
+
+    def get(self, request):
+        try:
+            top = int(request.query_params.get("top", 5))
+        except ValueError:
+            return Response(
+                {"error": "top must be an integer"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(
+            {"views": store.snapshot(top=top), "auth_token_cache": token_cache.stats()},
+            status=status.HTTP_200_OK,
+        )
+
+    def delete(self, request):
+        store.reset()
+        token_cache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PrometheusMetricsView(APIView):
+    """
+    Same figures in the Prometheus text exposition format.
+    """
+
+    permission_classes = [IsSystemAdmin]
+
+    def get(self, request):
+        stats = token_cache.stats()
+        lines = counter_lines(
+            "sacco_auth_token_cache_lookups_total",
+            "Token authentication lookups by where they were answered",
+            {
+                "local_hit": stats["local_hits"],
+                "shared_hit": stats["shared_hits"],
+                "miss": stats["misses"],
+            },
+        )
+        return HttpResponse(
+            store.prometheus() + "\n".join(lines) + "\n",
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
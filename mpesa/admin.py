@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from mpesa.models import MpesaCallback, MpesaSTKRequest
+
+
+class MpesaCallbackAdmin(admin.ModelAdmin):
+    list_display = ("receipt_number", "kind", "bill_ref_number", "amount", "status", "account_number", "created_at")
+    list_filter = ("status", "kind", "account_kind")
+    search_fields = ("receipt_number", "bill_ref_number", "account_number", "phone_number")
+    ordering = ("-created_at",)
+
+
+class MpesaSTKRequestAdmin(admin.ModelAdmin):
+    list_display = ("checkout_request_id", "account_number", "amount", "phone_number", "requested_by", "created_at")
+    search_fields = ("checkout_request_id", "account_number", "phone_number")
+    ordering = ("-created_at",)
+
+admin.site.register(MpesaCallback, MpesaCallbackAdmin)
+admin.site.register(MpesaSTKRequest, MpesaSTKRequestAdmin)
@@ -0,0 +1,119 @@
+"""
+Daraja callback payloads into MpesaCallback rows.
+
+The callback views only parse and insert, so Safaricom gets its
+acknowledgement within a single INSERT. The insert ignores conflicts on the
+receipt number, which makes a retried callback a no-op rather than an error.
+Matching and posting happen later, in batches (mpesa.posting).
+"""
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+
+from mpesa.models import MpesaCallback, MpesaSTKRequest
+
+TIME_FORMAT = "%Y%m%d%H%M%S"
+
+
+class InvalidCallback(ValueError):
+    pass
+
+
+def parse_amount(value):
+    try:
+        amount = Decimal(str(value)).quantize(Decimal("0.01"))
+    except (InvalidOperation, TypeError):
+        raise InvalidCallback(f"Invalid amount: {value}")
+    if amount <= 0:
+        raise InvalidCallback("Amount must be greater than 0")
+    return amount
+
+
+def parse_time(value):
+    """Daraja's YYYYMMDDHHMMSS, in East Africa Time."""
+    if not value:
+        return None
+    try:
+        return timezone.make_aware(datetime.strptime(str(value), TIME_FORMAT))
+    except ValueError:
+        raise InvalidCallback(f"Invalid transaction time: {value}")
+
+
+def parse_c2b(payload):
+    """Fields of a C2B confirmation (TransID, TransAmount, BillRefNumber, ...)."""
+    if not isinstance(payload, dict) or not payload.get("TransID"):
+        raise InvalidCallback("TransID is required")
+    names = (payload.get(key) or "" for key in ("FirstName", "MiddleName", "LastName"))
+    return {
+        "kind": "C2B",
+        "receipt_number": str(payload["TransID"]).strip(),
+        "bill_ref_number": str(payload.get("BillRefNumber") or "").strip(),
+        "amount": parse_amount(payload.get("TransAmount")),
+        "phone_number": str(payload.get("MSISDN") or "") or None,
+        "payer_name": " ".join(name for name in names if name),
+        "transaction_time": parse_time(payload.get("TransTime")),
+    }
+
+
+def parse_stk(payload):
+    """
+    Fields of an STK push result. Its callback doesn't carry the account
+    reference, so the account is the one recorded when the push was sent
+    (MpesaSTKRequest), found by CheckoutRequestID; results for pushes not
+    sent from here are rejected. Unsuccessful pushes are kept as Ignored,
+    with no receipt number; a push has at most one successful result.
+    """
+    try:
+        result = payload["Body"]["stkCallback"]
+    except (KeyError, TypeError):
+        raise InvalidCallback("Body.stkCallback is required")
+    checkout_request_id = str(result.get("CheckoutRequestID") or "").strip()
+    stk_request = None
+    if checkout_request_id:
+        stk_request = MpesaSTKRequest.objects.filter(
+            checkout_request_id=checkout_request_id
+        ).first()
+    if stk_request is None:
+        raise InvalidCallback(f"Unknown CheckoutRequestID: {checkout_request_id}")
+    fields = {
+        "kind": "STK",
+        "bill_ref_number": stk_request.account_number,
+        "stk_request": stk_request,
+    }
+    if str(result.get("ResultCode")) != "0":
+        return {
+            **fields,
+            "status": "Ignored",
+            "error": str(result.get("ResultDesc") or "")[:500],
+        }
+
+    items = {
+        item.get("Name"): item.get("Value")
+        for item in (result.get("CallbackMetadata") or {}).get("Item", [])
+    }
+    if not items.get("MpesaReceiptNumber"):
+        raise InvalidCallback("MpesaReceiptNumber is required")
+    amount = parse_amount(items.get("Amount"))
+    if amount != stk_request.amount:
+        raise InvalidCallback(
+            f"Amount {amount} does not match the {stk_request.amount} requested"
+        )
+    return {
+        **fields,
+        "receipt_number": str(items["MpesaReceiptNumber"]).strip(),
+        "amount": amount,
+        "phone_number": str(items.get("PhoneNumber") or "") or None,
+        "transaction_time": parse_time(items.get("TransactionDate")),
+    }
+
+
+def record(payload, fields):
+    """
+    Insert the callback unless its receipt number, or a successful result for
+    the same STK push, is already in the inbox.
+    """
+    MpesaCallback.objects.bulk_create(
+        [MpesaCallback(payload=payload, **fields)], ignore_conflicts=True
+    )
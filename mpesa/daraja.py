@@ -0,0 +1,98 @@
+"""
+Calls to Safaricom's Daraja API (MPESA_API_URL, e.g.
+https://sandbox.safaricom.co.ke): the OAuth token and STK push.
+
+STK push results come back to MPESA_CALLBACK_URL, the STK callback endpoint
+of this app, with MPESA_CALLBACK_TOKEN added as ?token=.
+"""
+
+import base64
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from metrics.utils import timed_external
+
+TOKEN_KEY = "mpesa:daraja-token"
+TIMEOUT = 30
+
+
+class DarajaError(Exception):
+    pass
+
+
+def api_url(path):
+    return settings.MPESA_API_URL.rstrip("/") + path
+
+
+@timed_external("daraja")
+def access_token():
+    """The OAuth access token, cached until shortly before it expires."""
+    import requests
+
+    token = cache.get(TOKEN_KEY)
+    if token:
+        return token
+    try:
+        response = requests.get(
+            api_url("/oauth/v1/generate"),
+            params={"grant_type": "client_credentials"},
+            auth=(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET),
+            timeout=TIMEOUT,
+        )
+        response.raise_for_status()
+        body = response.json()
+    except (requests.RequestException, ValueError) as e:
+        raise DarajaError(f"Could not get a Daraja access token: {e}")
+    cache.set(TOKEN_KEY, body["access_token"], max(int(body.get("expires_in", 3599)) - 60, 60))
+    return body["access_token"]
+
+
+def callback_url():
+    separator = "&" if "?" in settings.MPESA_CALLBACK_URL else "?"
+    return settings.MPESA_CALLBACK_URL + separator + urlencode(
+        {"token": settings.MPESA_CALLBACK_TOKEN}
+    )
+
+
+@timed_external("daraja")
+def stk_push(phone_number, amount, account_reference, description="SACCO payment"):
+    """
+    Ask Safaricom to prompt `phone_number` to pay `amount` (whole shillings)
+    to the paybill. Returns Daraja's reply, with the CheckoutRequestID its
+    callback will carry.
+    """
+    import requests
+
+    timestamp = timezone.localtime().strftime("%Y%m%d%H%M%S")
+    password = base64.b64encode(
+        f"{settings.MPESA_SHORTCODE}{settings.MPESA_PASSKEY}{timestamp}".encode()
+    ).decode()
+    payload = {
+        "BusinessShortCode": settings.MPESA_SHORTCODE,
+        "Password": password,
+        "Timestamp": timestamp,
+        "TransactionType": "CustomerPayBillOnline",
+        "Amount": int(amount),
+        "PartyA": phone_number,
+        "PartyB": settings.MPESA_SHORTCODE,
+        "PhoneNumber": phone_number,
+        "CallBackURL": callback_url(),
+        "AccountReference": account_reference,
+        "TransactionDesc": description,
+    }
+    try:
+        response = requests.post(
+            api_url("/mpesa/stkpush/v1/processrequest"),
+            json=payload,
+            headers={"Authorization": f"Bearer {access_token()}"},
+            timeout=TIMEOUT,
+        )
+        body = response.json()
+    except (requests.RequestException, ValueError) as e:
+        raise DarajaError(f"STK push failed: {e}")
+    if str(body.get("ResponseCode")) != "0" or not body.get("CheckoutRequestID"):
+        raise DarajaError(body.get("errorMessage") or body.get("ResponseDescription") or "STK push refused")
+    return body
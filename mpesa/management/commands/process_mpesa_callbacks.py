@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mpesa.posting import AccountIndex, posting_user, process_batch, retry_unmatched
+
+
+class Command(BaseCommand):
+    help = (
+        "Match M-Pesa callbacks in the inbox to accounts and post them in "
+        "batches through the bulk upload path"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Stop once the inbox is empty"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait when the inbox is empty (default: 5)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Callbacks per batch (default: MPESA_POSTING_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--retry-unmatched",
+            action="store_true",
+            help="Queue the Unmatched and Failed callbacks again first",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = posting_user()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options["retry_unmatched"]:
+            self.stdout.write(f"Queued {retry_unmatched()} callbacks again")
+
+        index = AccountIndex()
+        totals = {"posted": 0, "failed": 0, "unmatched": 0}
+        while True:
+            summary = process_batch(index, user, options["batch_size"])
+            if summary is None:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+            for key in totals:
+                totals[key] += summary[key]
+            self.stdout.write(
+                f"Batch {summary['batch']}: {summary['posted']} posted, "
+                f"{summary['failed']} failed, {summary['unmatched']} unmatched"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{totals['posted']} posted, {totals['failed']} failed, "
+                f"{totals['unmatched']} unmatched"
+            )
+        )
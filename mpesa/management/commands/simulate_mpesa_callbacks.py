@@ -0,0 +1,91 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from loans.models import LoanAccount
+from memberfees.models import MemberFee
+from mpesa.simulator import burst, send
+from savings.models import SavingsAccount
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a burst of simulated C2B confirmations paying real account "
+        "numbers and report the acknowledgement latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument(
+            "--url",
+            type=str,
+            default=None,
+            help="Confirmation URL of a running server (default: in process)",
+        )
+        parser.add_argument(
+            "--token",
+            type=str,
+            default=None,
+            help="The server's MPESA_CALLBACK_TOKEN (default: this one's)",
+        )
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--duplicates",
+            type=float,
+            default=0.05,
+            help="Share of callbacks resent (default: 0.05)",
+        )
+        parser.add_argument(
+            "--unknown",
+            type=float,
+            default=0.02,
+            help="Share paying an account number that doesn't exist (default: 0.02)",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        accounts = (
+            list(
+                SavingsAccount.objects.filter(is_active=True).values_list(
+                    "account_number", flat=True
+                )[:5000]
+            )
+            + list(
+                LoanAccount.objects.filter(is_active=True).values_list(
+                    "account_number", flat=True
+                )[:5000]
+            )
+            + list(
+                MemberFee.objects.filter(is_paid=False).values_list(
+                    "account_number", flat=True
+                )[:5000]
+            )
+        )
+        if not accounts:
+            raise CommandError("No open accounts to pay")
+
+        payloads = burst(
+            accounts,
+            options["count"],
+            duplicate_rate=options["duplicates"],
+            unknown_rate=options["unknown"],
+            seed=options["seed"],
+        )
+        start = time.perf_counter()
+        token = options["token"] or getattr(settings, "MPESA_CALLBACK_TOKEN", "")
+        codes, timings = send(
+            payloads, url=options["url"], workers=options["workers"], token=token
+        )
+        elapsed = time.perf_counter() - start
+
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1000
+        p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))] * 1000
+        statuses = ", ".join(f"{code}: {n}" for code, n in sorted(Counter(codes).items()))
+        self.stdout.write(
+            f"{len(payloads)} callbacks in {elapsed:.1f}s "
+            f"({len(payloads) / elapsed:.0f}/s), p50 {p50:.1f}ms, p95 {p95:.1f}ms"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Responses {statuses}"))
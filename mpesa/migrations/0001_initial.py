@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:14
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('transactions', '0005_analyticsexport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MpesaCallback',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('C2B', 'C2B'), ('STK', 'STK Push')], max_length=10)),
+                ('receipt_number', models.CharField(blank=True, max_length=50, null=True, unique=True)),
+                ('bill_ref_number', models.CharField(blank=True, default='', max_length=100)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('phone_number', models.CharField(blank=True, max_length=64, null=True)),
+                ('payer_name', models.CharField(blank=True, default='', max_length=255)),
+                ('transaction_time', models.DateTimeField(blank=True, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('Received', 'Received'), ('Processing', 'Processing'), ('Posted', 'Posted'), ('Unmatched', 'Unmatched'), ('Failed', 'Failed'), ('Ignored', 'Ignored')], default='Received', max_length=20)),
+                ('batch', models.UUIDField(blank=True, null=True)),
+                ('account_kind', models.CharField(blank=True, choices=[('savings', 'Savings'), ('loan', 'Loan'), ('fee', 'Fee')], max_length=10, null=True)),
+                ('account_type', models.CharField(blank=True, max_length=255, null=True)),
+                ('account_number', models.CharField(blank=True, max_length=20, null=True)),
+                ('posted_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('bulk_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mpesa_callbacks', to='transactions.bulktransactionlog')),
+            ],
+            options={
+                'verbose_name': 'M-Pesa Callback',
+                'verbose_name_plural': 'M-Pesa Callbacks',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='mpesa_mpesa_status_8178ca_idx'), models.Index(fields=['batch'], name='mpesa_mpesa_batch_5ef29c_idx')],
+            },
+        ),
+    ]
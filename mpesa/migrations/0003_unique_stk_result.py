@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mpesa', '0002_stk_requests'),
+        ('transactions', '0005_analyticsexport'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='mpesacallback',
+            constraint=models.UniqueConstraint(condition=models.Q(('receipt_number__isnull', False)), fields=('stk_request',), name='unique_mpesa_stk_result'),
+        ),
+    ]
@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.db import models
+
+from accounts.abstracts import TimeStampedModel, UniversalIdModel
+from transactions.models import BulkTransactionLog
+
+
+class MpesaSTKRequest(UniversalIdModel, TimeStampedModel):
+    """
+    An STK push sent from here. Its callback carries only the
+    CheckoutRequestID, so the account paid is taken from this record.
+    """
+
+    checkout_request_id = models.CharField(max_length=100, unique=True)
+    merchant_request_id = models.CharField(max_length=100, blank=True, default="")
+    account_number = models.CharField(max_length=20)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    phone_number = models.CharField(max_length=20)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="mpesa_stk_requests",
+    )
+
+    class Meta:
+        verbose_name = "M-Pesa STK Request"
+        verbose_name_plural = "M-Pesa STK Requests"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.checkout_request_id} - {self.account_number} {self.amount}"
+
+
+class MpesaCallback(UniversalIdModel, TimeStampedModel):
+    """
+    One M-Pesa payment notification (C2B confirmation or STK push result),
+    stored as received. The receipt number is unique, so Safaricom's retries
+    of a callback are dropped on insert. The payment fields are never
+    changed afterwards; the worker only fills in the matching and posting
+    fields (see mpesa.posting).
+    """
+
+    KIND_CHOICES = [
+        ("C2B", "C2B"),
+        ("STK", "STK Push"),
+    ]
+    STATUS_CHOICES = [
+        ("Received", "Received"),
+        ("Processing", "Processing"),
+        ("Posted", "Posted"),
+        ("Unmatched", "Unmatched"),
+        ("Failed", "Failed"),
+        ("Ignored", "Ignored"),  # unsuccessful STK pushes
+    ]
+    ACCOUNT_KIND_CHOICES = [
+        ("savings", "Savings"),
+        ("loan", "Loan"),
+        ("fee", "Fee"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    receipt_number = models.CharField(max_length=50, unique=True, null=True, blank=True)
+    bill_ref_number = models.CharField(max_length=100, blank=True, default="")
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    # Daraja may send the MSISDN hashed (SHA-256 hex)
+    phone_number = models.CharField(max_length=64, blank=True, null=True)
+    payer_name = models.CharField(max_length=255, blank=True, default="")
+    transaction_time = models.DateTimeField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    stk_request = models.ForeignKey(
+        MpesaSTKRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="callbacks",
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Received")
+
+    # Filled in by the posting worker
+    batch = models.UUIDField(null=True, blank=True)
+    account_kind = models.CharField(
+        max_length=10, choices=ACCOUNT_KIND_CHOICES, blank=True, null=True
+    )
+    account_type = models.CharField(max_length=255, blank=True, null=True)
+    account_number = models.CharField(max_length=20, blank=True, null=True)
+    bulk_log = models.ForeignKey(
+        BulkTransactionLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="mpesa_callbacks",
+    )
+    posted_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "M-Pesa Callback"
+        verbose_name_plural = "M-Pesa Callbacks"
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["batch"]),
+        ]
+        constraints = [
+            # One successful result per STK push, whatever its receipt number
+            models.UniqueConstraint(
+                fields=["stk_request"],
+                condition=models.Q(receipt_number__isnull=False),
+                name="unique_mpesa_stk_result",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.receipt_number or '-'} - {self.amount} ({self.status})"
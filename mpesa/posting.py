@@ -0,0 +1,331 @@
+"""
+Posting the M-Pesa inbox in batches through the bulk transaction path.
+
+A worker (process_mpesa_callbacks) repeatedly:
+
+1. claims up to MPESA_POSTING_BATCH_SIZE Received callbacks, oldest first,
+   by tagging them with a batch id (an UPDATE guarded on the status, so
+   workers never claim the same callback);
+2. matches each BillRefNumber to a savings, loan or fee account number with
+   AccountIndex, an in-memory map of every open account, and stores the
+   match on the callback. Callbacks with no single match are Unmatched;
+3. writes the matched callbacks as a combined bulk upload file, one row per
+   payment with "Mpesa" as the payment method and the M-Pesa receipt as the
+   receipt number, and imports it with MpesaImport (CombinedImport, logged
+   as "Mpesa Callbacks"). Rows are validated and committed in chunks, with
+   the account balances kept in step by the models' save();
+4. marks each callback Posted or, with the row's error, Failed.
+
+A batch left in Processing by a crashed worker is picked up again once it has
+gone BULK_IMPORT_STALE_AFTER seconds without progress. Its rows are rebuilt
+from the stored matches, so the file and its hash are the same and the bulk
+import resumes from its last checkpoint instead of posting rows twice.
+"""
+
+import csv
+import io
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from catalogs.registry import get_catalog
+from loans.models import LoanAccount
+from memberfees.models import MemberFee
+from mpesa.models import MpesaCallback
+from savings.models import SavingsAccount
+from transactions.utils.uploads import STALE_AFTER, ImportInProgress
+from transactions.views import CombinedImport
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+INDEX_TTL = 300
+PAYMENT_METHOD = "Mpesa"
+
+# Amount column of each account kind in the combined upload layout
+AMOUNT_COLUMNS = {
+    "savings": "{} Amount",
+    "loan": "{} Repayment Amount",
+    "fee": "{} Amount",
+}
+
+
+def normalise(reference):
+    """Bill references are typed by hand: ignore case, spaces and dashes."""
+    return "".join(reference.split()).replace("-", "").upper()
+
+
+class AccountIndex:
+    """
+    Every active savings and loan account and unpaid member fee, by
+    normalised account number, as (kind, type name, account number).
+
+    Savings and fee account numbers share a format, so a number found in
+    more than one table is kept as ambiguous rather than guessed. The index
+    is reloaded after INDEX_TTL seconds, and at most once a batch when a
+    reference isn't found, to pick up accounts opened since.
+    """
+
+    def __init__(self):
+        self.accounts = {}
+        self.loaded_at = None
+
+    def load(self):
+        accounts = {}
+        for kind, rows in (
+            (
+                "savings",
+                SavingsAccount.objects.filter(is_active=True).values_list(
+                    "account_number", "account_type__name"
+                ),
+            ),
+            (
+                "loan",
+                LoanAccount.objects.filter(is_active=True).values_list(
+                    "account_number", "loan_type__name"
+                ),
+            ),
+            (
+                "fee",
+                MemberFee.objects.filter(is_paid=False).values_list(
+                    "account_number", "fee_type__name"
+                ),
+            ),
+        ):
+            for account_number, type_name in rows.order_by().iterator(chunk_size=5000):
+                key = normalise(account_number)
+                accounts[key] = None if key in accounts else (kind, type_name, account_number)
+        self.accounts = accounts
+        self.loaded_at = time.monotonic()
+
+    def is_stale(self):
+        ttl = getattr(settings, "MPESA_INDEX_TTL", INDEX_TTL)
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > ttl
+
+    def match(self, reference, reload=True):
+        """(kind, type name, account number), or raise LookupError with the reason."""
+        if self.is_stale():
+            self.load()
+            reload = False
+        key = normalise(reference or "")
+        if not key:
+            raise LookupError("No account number in BillRefNumber")
+        if key not in self.accounts and reload:
+            self.load()
+        if key not in self.accounts:
+            raise LookupError(f"No open account {reference}")
+        if self.accounts[key] is None:
+            raise LookupError(f"Account number {reference} is ambiguous")
+        return self.accounts[key]
+
+
+class MpesaImport(CombinedImport):
+    transaction_type = "Mpesa Callbacks"
+    reference_prefix = "MPESA"
+    storage_folder = None
+
+
+def posting_user():
+    """The user the deposits and repayments are recorded as entered by."""
+    member_no = getattr(settings, "MPESA_POSTING_USER", "")
+    users = User.objects.filter(is_active=True)
+    if member_no:
+        user = users.filter(member_no=member_no).first()
+    else:
+        user = users.filter(is_superuser=True).order_by("created_at").first()
+    if user is None:
+        raise ValueError(
+            "No user to post M-Pesa payments as: set MPESA_POSTING_USER "
+            "to an active user's member number"
+        )
+    return user
+
+
+def claim(batch_size):
+    """
+    The id of the batch to post next: a stale batch if there is one, else a
+    new batch of up to `batch_size` Received callbacks. None when there's
+    nothing to post.
+    """
+    stale_after = getattr(settings, "BULK_IMPORT_STALE_AFTER", STALE_AFTER)
+    stale = MpesaCallback.objects.filter(
+        status="Processing",
+        updated_at__lt=timezone.now() - timedelta(seconds=stale_after),
+    )
+    batch = stale.values_list("batch", flat=True).first()
+    if batch is not None and stale.filter(batch=batch).update(updated_at=timezone.now()):
+        return batch
+
+    batch = uuid.uuid4()
+    ids = list(
+        MpesaCallback.objects.filter(status="Received")
+        .order_by("created_at", "id")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    claimed = MpesaCallback.objects.filter(pk__in=ids, status="Received").update(
+        status="Processing", batch=batch, updated_at=timezone.now()
+    )
+    return batch if claimed else None
+
+
+def match_batch(batch, index):
+    """
+    Store the account of each claimed callback not matched yet, or mark it
+    Unmatched. A stale batch keeps the matches it was first posted with.
+    """
+    callbacks = list(
+        MpesaCallback.objects.filter(
+            batch=batch, status="Processing", account_kind__isnull=True
+        )
+    )
+    unmatched = []
+    for callback in callbacks:
+        try:
+            kind, type_name, account_number = index.match(
+                callback.bill_ref_number, reload=not unmatched
+            )
+        except LookupError as e:
+            callback.status = "Unmatched"
+            callback.error = str(e)
+            unmatched.append(callback)
+            continue
+        callback.account_kind = kind
+        callback.account_type = type_name
+        callback.account_number = account_number
+    now = timezone.now()
+    for callback in callbacks:
+        callback.updated_at = now
+    MpesaCallback.objects.bulk_update(
+        callbacks,
+        ["status", "error", "account_kind", "account_type", "account_number", "updated_at"],
+        batch_size=BATCH_SIZE,
+    )
+    return len(unmatched)
+
+
+def batch_file(batch, callbacks):
+    """The matched callbacks as a combined bulk upload file, one row each."""
+    columns = []
+    for callback in callbacks:
+        for column in (
+            f"{callback.account_type} Account",
+            AMOUNT_COLUMNS[callback.account_kind].format(callback.account_type),
+        ):
+            if column not in columns:
+                columns.append(column)
+    # The batch id makes every batch's file, and so its import, distinct
+    header = columns + ["Payment Method", "Receipt Number", "Batch"]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for callback in callbacks:
+        row = dict.fromkeys(header, "")
+        row[f"{callback.account_type} Account"] = callback.account_number
+        row[AMOUNT_COLUMNS[callback.account_kind].format(callback.account_type)] = (
+            f"{callback.amount:.2f}"
+        )
+        row["Payment Method"] = PAYMENT_METHOD
+        row["Receipt Number"] = callback.receipt_number
+        row["Batch"] = str(batch)
+        writer.writerow(row.values())
+    return SimpleUploadedFile(
+        f"mpesa_{batch}.csv", buffer.getvalue().encode(), content_type="text/csv"
+    )
+
+
+def post_batch(batch, user):
+    """Import the batch's matched callbacks and record each one's outcome."""
+    callbacks = list(
+        MpesaCallback.objects.filter(
+            batch=batch, status="Processing", account_kind__isnull=False
+        ).order_by("created_at", "id")
+    )
+    if not callbacks:
+        return 0, 0
+
+    # Types renamed or removed since matching can't be written
+    catalog = get_catalog()
+    known = {
+        "savings": catalog.savings_types,
+        "loan": catalog.loan_types,
+        "fee": catalog.fee_types,
+    }
+    errors = {}
+    for callback in callbacks:
+        if callback.account_type not in known[callback.account_kind]:
+            errors[callback.pk] = f"Unknown type {callback.account_type}"
+    postable = [c for c in callbacks if c.pk not in errors]
+
+    upload = MpesaImport(batch_file(batch, postable), user) if postable else None
+    if upload is not None:
+        upload.prepare()
+        if not upload.already_imported:
+            if not upload.validate():
+                raise ValueError(upload.header_error)
+            upload.save()
+        # Row n of the file is postable[n - 1]
+        for error in upload.errors + [
+            e for row_errors in upload.rejected.values() for e in row_errors
+        ]:
+            callback = postable[error["row"] - upload.first_row]
+            errors.setdefault(callback.pk, error["error"])
+
+    now = timezone.now()
+    for callback in callbacks:
+        callback.updated_at = now
+        if callback.pk in errors:
+            callback.status = "Failed"
+            callback.error = errors[callback.pk]
+        else:
+            callback.status = "Posted"
+            callback.posted_at = now
+        if upload is not None:
+            callback.bulk_log = upload.log
+    MpesaCallback.objects.bulk_update(
+        callbacks,
+        ["status", "error", "posted_at", "bulk_log", "updated_at"],
+        batch_size=BATCH_SIZE,
+    )
+    return len(callbacks) - len(errors), len(errors)
+
+
+def process_batch(index, user, batch_size=None):
+    """
+    Claim, match and post one batch. Returns its summary, or None when
+    there was nothing to do.
+    """
+    batch_size = batch_size or getattr(settings, "MPESA_POSTING_BATCH_SIZE", BATCH_SIZE)
+    batch = claim(batch_size)
+    if batch is None:
+        return None
+
+    unmatched = match_batch(batch, index)
+    try:
+        posted, failed = post_batch(batch, user)
+    except ImportInProgress:
+        # Another worker is still importing this batch's file
+        return {"batch": str(batch), "posted": 0, "failed": 0, "unmatched": unmatched}
+    logger.info(f"M-Pesa batch {batch}: {posted} posted, {failed} failed, {unmatched} unmatched")
+    return {"batch": str(batch), "posted": posted, "failed": failed, "unmatched": unmatched}
+
+
+def retry_unmatched():
+    """Queue the Unmatched and Failed callbacks again, e.g. once accounts are fixed."""
+    return MpesaCallback.objects.filter(status__in=["Unmatched", "Failed"]).update(
+        status="Received",
+        batch=None,
+        account_kind=None,
+        account_type=None,
+        account_number=None,
+        error=None,
+        updated_at=timezone.now(),
+    )
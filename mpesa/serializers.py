@@ -0,0 +1,55 @@
+from rest_framework import serializers
+
+from loans.models import LoanAccount
+from memberfees.models import MemberFee
+from mpesa.models import MpesaCallback
+from savings.models import SavingsAccount
+
+
+class MpesaCallbackSerializer(serializers.ModelSerializer):
+    bulk_log = serializers.CharField(source="bulk_log.reference_prefix", read_only=True, default=None)
+
+    class Meta:
+        model = MpesaCallback
+        fields = (
+            "id",
+            "kind",
+            "receipt_number",
+            "bill_ref_number",
+            "amount",
+            "phone_number",
+            "payer_name",
+            "transaction_time",
+            "status",
+            "account_kind",
+            "account_type",
+            "account_number",
+            "bulk_log",
+            "posted_at",
+            "error",
+            "created_at",
+        )
+
+
+class STKPushSerializer(serializers.Serializer):
+    account_number = serializers.CharField(max_length=20)
+    # STK pushes are in whole shillings
+    amount = serializers.IntegerField(min_value=1, max_value=250000)
+    phone_number = serializers.RegexField(
+        r"^2547\d{8}$|^2541\d{8}$",
+        error_messages={"invalid": "Use the 2547XXXXXXXX format"},
+    )
+
+    def validate_account_number(self, account_number):
+        """An open account or unpaid fee; a member's own unless an admin asks."""
+        user = self.context["request"].user
+        for accounts in (
+            SavingsAccount.objects.filter(is_active=True),
+            LoanAccount.objects.filter(is_active=True),
+            MemberFee.objects.filter(is_paid=False),
+        ):
+            if not (user.is_system_admin or user.is_superuser):
+                accounts = accounts.filter(member=user)
+            if accounts.filter(account_number=account_number).exists():
+                return account_number
+        raise serializers.ValidationError("No such open account")
@@ -0,0 +1,141 @@
+"""
+A local stand-in for Safaricom's side of the C2B and STK callbacks, for
+tests and load runs (simulate_mpesa_callbacks).
+
+burst() builds a month-end style burst of C2B confirmations paying real
+account numbers, with some callbacks resent (as Daraja does when an
+acknowledgement is slow) and some to account numbers that don't exist.
+send() posts them to a running server, or in process through Django's test
+client, and times each acknowledgement. A running server only accepts them
+with its MPESA_CALLBACK_TOKEN and from an address in its MPESA_CALLBACK_IPS.
+"""
+
+import random
+import string
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import override_settings
+from django.utils import timezone
+
+from mpesa.callbacks import TIME_FORMAT
+
+SHORTCODE = "600000"
+C2B_PATH = "/api/v1/mpesa/c2b/confirmation/"
+
+
+def receipt_number(rng):
+    return "".join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(10))
+
+
+def c2b_payload(receipt, amount, bill_ref, phone="254700000000", when=None, name="JANE"):
+    return {
+        "TransactionType": "Pay Bill",
+        "TransID": receipt,
+        "TransTime": (when or timezone.localtime()).strftime(TIME_FORMAT),
+        "TransAmount": f"{amount:.2f}",
+        "BusinessShortCode": SHORTCODE,
+        "BillRefNumber": bill_ref,
+        "InvoiceNumber": "",
+        "OrgAccountBalance": "",
+        "ThirdPartyTransID": "",
+        "MSISDN": phone,
+        "FirstName": name,
+        "MiddleName": "",
+        "LastName": "",
+    }
+
+
+def stk_payload(
+    receipt, amount, phone="254700000000", when=None, result_code=0, checkout_request_id=None
+):
+    result = {
+        "MerchantRequestID": f"{random.randint(10000, 99999)}-1",
+        "CheckoutRequestID": checkout_request_id or f"ws_CO_{receipt}",
+        "ResultCode": result_code,
+        "ResultDesc": (
+            "The service request is processed successfully."
+            if result_code == 0
+            else "Request cancelled by user"
+        ),
+    }
+    if result_code == 0:
+        result["CallbackMetadata"] = {
+            "Item": [
+                {"Name": "Amount", "Value": float(amount)},
+                {"Name": "MpesaReceiptNumber", "Value": receipt},
+                {
+                    "Name": "TransactionDate",
+                    "Value": int((when or timezone.localtime()).strftime(TIME_FORMAT)),
+                },
+                {"Name": "PhoneNumber", "Value": int(phone)},
+            ]
+        }
+    return {"Body": {"stkCallback": result}}
+
+
+def burst(account_numbers, count, duplicate_rate=0.05, unknown_rate=0.02, seed=None):
+    """
+    `count` C2B confirmations paying the given accounts, whole shillings from
+    100 to 20,000. About `duplicate_rate` of them are resends of an earlier
+    callback and `unknown_rate` pay an account number that doesn't exist.
+    """
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        if payloads and rng.random() < duplicate_rate:
+            payloads.append(rng.choice(payloads))
+            continue
+        if rng.random() < unknown_rate or not account_numbers:
+            bill_ref = "X" + "".join(rng.choice(string.digits) for _ in range(9))
+        else:
+            bill_ref = rng.choice(account_numbers)
+        payloads.append(
+            c2b_payload(
+                receipt_number(rng),
+                rng.randint(1, 200) * 100,
+                bill_ref,
+                phone=f"2547{rng.randint(0, 99999999):08d}",
+            )
+        )
+    return payloads
+
+
+def send(payloads, url=None, workers=8, path=C2B_PATH, token=""):
+    """
+    POST every payload with ?token=`token`, `workers` at a time. With no
+    `url` they go through Django's test client, in this process, with the
+    callback checks set to admit them. Returns (status codes, seconds per
+    acknowledgement).
+    """
+    if url:
+        import requests
+
+        session = requests.Session()
+
+        def post(payload):
+            start = time.perf_counter()
+            response = session.post(url, json=payload, params={"token": token}, timeout=30)
+            return response.status_code, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(post, payloads))
+
+    else:
+        from django.test import Client
+
+        client = Client()
+        token = token or "simulator"
+
+        def post(payload):
+            start = time.perf_counter()
+            response = client.post(
+                f"{path}?token={token}", payload, content_type="application/json"
+            )
+            return response.status_code, time.perf_counter() - start
+
+        # The test client shares one database connection, so one at a time
+        with override_settings(MPESA_CALLBACK_TOKEN=token, MPESA_CALLBACK_IPS=["127.0.0.1"]):
+            results = [post(payload) for payload in payloads]
+
+    return [code for code, _ in results], [elapsed for _, elapsed in results]
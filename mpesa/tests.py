@@ -0,0 +1,195 @@
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from feespayments.models import FeePayment
+from loanrepayments.models import LoanRepayment
+from memberfees.models import MemberFee
+from loans.models import LoanAccount
+from mpesa.models import MpesaCallback, MpesaSTKRequest
+from mpesa.posting import AccountIndex, posting_user, process_batch
+from mpesa.simulator import c2b_payload, stk_payload
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+
+User = get_user_model()
+
+C2B_URL = "/api/v1/mpesa/c2b/confirmation/"
+STK_URL = "/api/v1/mpesa/stk/callback/"
+
+
+@override_settings(
+    MPESA_POSTING_USER="SYNADMIN",
+    MPESA_CALLBACK_TOKEN="s3cret",
+    MPESA_CALLBACK_IPS=["127.0.0.1"],
+    MPESA_CALLBACK_PROXIES=0,
+)
+class MpesaCallbackTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "8", "--years", "1", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        self.savings = SavingsAccount.objects.filter(is_active=True).first()
+        self.loan = LoanAccount.objects.filter(
+            is_active=True, outstanding_balance__gt=1000
+        ).first()
+        self.fee = MemberFee.objects.filter(
+            is_paid=False, remaining_balance__gt=100
+        ).first()
+
+    def post(self, payload, url=C2B_URL, token="s3cret", **extra):
+        separator = "&" if "?" in url else "?"
+        return self.client.post(f"{url}{separator}token={token}", payload, format="json", **extra)
+
+    def stk_request(self, receipt, account_number, amount):
+        """The record of an STK push whose simulated callback uses `receipt`."""
+        return MpesaSTKRequest.objects.create(
+            checkout_request_id=f"ws_CO_{receipt}",
+            account_number=account_number,
+            amount=amount,
+            phone_number="254700000000",
+        )
+
+    def test_retried_callback_is_stored_once(self):
+        payload = c2b_payload("RKT0000001", 500, self.savings.account_number)
+        for _ in range(3):
+            response = self.post(payload)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["ResultCode"], 0)
+        callback = MpesaCallback.objects.get()
+        self.assertEqual(callback.amount, Decimal("500.00"))
+        self.assertEqual(callback.status, "Received")
+
+        self.assertEqual(self.post({"TransAmount": "10"}).status_code, 400)
+        self.stk_request("RKT0000002", self.savings.account_number, 100)
+        failed = self.post(stk_payload("RKT0000002", 100, result_code=1032), url=STK_URL)
+        self.assertEqual(failed.status_code, 200)
+        self.assertEqual(
+            MpesaCallback.objects.get(kind="STK").status, "Ignored"
+        )
+
+    def test_callback_token_is_checked(self):
+        payload = c2b_payload("RKT0000003", 500, self.savings.account_number)
+        self.assertEqual(self.client.post(C2B_URL, payload, format="json").status_code, 403)
+        self.assertEqual(self.post(payload, token="guess").status_code, 403)
+        self.assertEqual(self.post(payload).status_code, 200)
+        self.assertEqual(MpesaCallback.objects.count(), 1)
+
+    @override_settings(MPESA_CALLBACK_TOKEN="")
+    def test_unconfigured_deploy_rejects_callbacks(self):
+        payload = c2b_payload("RKT0000004", 500, self.savings.account_number)
+        for token in ("", "anything"):
+            response = self.post(payload, token=token)
+            self.assertEqual(response.status_code, 403)
+            self.assertEqual(response.data["ResultCode"], 1)
+        self.assertEqual(self.post({}, url="/api/v1/mpesa/c2b/validation/").status_code, 403)
+        self.assertFalse(MpesaCallback.objects.exists())
+
+    @override_settings(MPESA_CALLBACK_IPS=["196.201.214.0/24"], MPESA_CALLBACK_PROXIES=1)
+    def test_callbacks_only_from_the_allowed_addresses(self):
+        payload = c2b_payload("RKT0000005", 500, self.savings.account_number)
+        # A forwarded-for entry added by the client itself doesn't count
+        spoofed = {"HTTP_X_FORWARDED_FOR": "196.201.214.200, 10.0.0.9"}
+        self.assertEqual(self.post(payload, **spoofed).status_code, 403)
+        self.assertEqual(self.post(payload).status_code, 403)
+        proxied = {"HTTP_X_FORWARDED_FOR": "10.0.0.9, 196.201.214.200"}
+        self.assertEqual(self.post(payload, **proxied).status_code, 200)
+        self.assertEqual(MpesaCallback.objects.count(), 1)
+
+    def test_stk_account_comes_from_the_recorded_push(self):
+        other = SavingsAccount.objects.exclude(member=self.savings.member).first()
+        self.stk_request("RKT2000001", self.savings.account_number, 300)
+
+        # The URL can't choose the account, and unknown pushes are refused
+        response = self.post(
+            stk_payload("RKT2000001", 300), url=f"{STK_URL}?account={other.account_number}"
+        )
+        self.assertEqual(response.status_code, 200)
+        callback = MpesaCallback.objects.get(receipt_number="RKT2000001")
+        self.assertEqual(callback.bill_ref_number, self.savings.account_number)
+        self.assertEqual(callback.stk_request.checkout_request_id, "ws_CO_RKT2000001")
+
+        self.assertEqual(self.post(stk_payload("RKT2000002", 300), url=STK_URL).status_code, 400)
+        self.stk_request("RKT2000003", self.savings.account_number, 300)
+        self.assertEqual(self.post(stk_payload("RKT2000003", 900), url=STK_URL).status_code, 400)
+        self.assertEqual(MpesaCallback.objects.count(), 1)
+
+    def test_replayed_stk_result_is_not_credited_twice(self):
+        savings_balance = self.savings.balance
+        push = self.stk_request("RKT3000001", self.savings.account_number, 400)
+        for receipt in ("RKT3000001", "RKT3000002"):
+            payload = stk_payload(receipt, 400, checkout_request_id=push.checkout_request_id)
+            self.assertEqual(self.post(payload, url=STK_URL).status_code, 200)
+        self.assertEqual(
+            list(push.callbacks.values_list("receipt_number", flat=True)), ["RKT3000001"]
+        )
+
+        process_batch(AccountIndex(), posting_user())
+        self.savings.refresh_from_db()
+        self.assertEqual(self.savings.balance, savings_balance + 400)
+
+    @mock.patch("mpesa.views.stk_push")
+    def test_stk_push_is_recorded_for_own_accounts_only(self, push):
+        push.return_value = {
+            "ResponseCode": "0",
+            "CheckoutRequestID": "ws_CO_PUSH1",
+            "MerchantRequestID": "29115-1",
+            "CustomerMessage": "Success. Request accepted for processing",
+        }
+        member = self.savings.member
+        self.client.force_authenticate(member)
+        url = "/api/v1/mpesa/stk/push/"
+        body = {"account_number": self.savings.account_number, "amount": 250, "phone_number": "254712345678"}
+        response = self.client.post(url, body, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["checkout_request_id"], "ws_CO_PUSH1")
+        push.assert_called_once_with("254712345678", 250, self.savings.account_number)
+        stk_request = MpesaSTKRequest.objects.get(checkout_request_id="ws_CO_PUSH1")
+        self.assertEqual((stk_request.account_number, stk_request.requested_by), (self.savings.account_number, member))
+
+        other = SavingsAccount.objects.exclude(member=member).first()
+        response = self.client.post(url, {**body, "account_number": other.account_number}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(push.call_count, 1)
+
+    def test_batch_posts_each_kind_of_account(self):
+        savings_balance = self.savings.balance
+        loan_balance = self.loan.outstanding_balance
+        fee_balance = self.fee.remaining_balance
+        self.post(c2b_payload("RKT1000001", 700, self.savings.account_number.lower()))
+        self.post(c2b_payload("RKT1000002", 1000, self.loan.account_number))
+        self.stk_request("RKT1000003", self.fee.account_number, 100)
+        self.post(stk_payload("RKT1000003", 100), url=STK_URL)
+        self.post(c2b_payload("RKT1000004", 50, "NO-SUCH-ACCOUNT"))
+
+        summary = process_batch(AccountIndex(), posting_user())
+        self.assertEqual(
+            (summary["posted"], summary["failed"], summary["unmatched"]), (3, 0, 1)
+        )
+        self.assertIsNone(process_batch(AccountIndex(), posting_user()))
+
+        deposit = SavingsDeposit.objects.get(receipt_number="RKT1000001")
+        self.assertEqual((deposit.amount, deposit.payment_method), (Decimal("700"), "Mpesa"))
+        repayment = LoanRepayment.objects.get(receipt_number="RKT1000002")
+        self.assertEqual(repayment.payment_method, "Mpesa")
+        self.assertTrue(FeePayment.objects.filter(receipt_number="RKT1000003").exists())
+
+        self.savings.refresh_from_db()
+        self.loan.refresh_from_db()
+        self.fee.refresh_from_db()
+        self.assertEqual(self.savings.balance, savings_balance + 700)
+        self.assertEqual(self.loan.outstanding_balance, loan_balance - 1000)
+        self.assertEqual(self.fee.remaining_balance, fee_balance - 100)
+
+        statuses = dict(MpesaCallback.objects.values_list("receipt_number", "status"))
+        self.assertEqual(statuses["RKT1000004"], "Unmatched")
+        self.assertEqual(
+            MpesaCallback.objects.filter(status="Posted", bulk_log__isnull=False).count(), 3
+        )
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from mpesa.views import (
+    C2BConfirmationView,
+    C2BValidationView,
+    MpesaCallbackListView,
+    STKCallbackView,
+    STKPushView,
+)
+
+app_name = "mpesa"
+
+urlpatterns = [
+    path("c2b/confirmation/", C2BConfirmationView.as_view(), name="c2b-confirmation"),
+    path("c2b/validation/", C2BValidationView.as_view(), name="c2b-validation"),
+    path("stk/push/", STKPushView.as_view(), name="stk-push"),
+    path("stk/callback/", STKCallbackView.as_view(), name="stk-callback"),
+    path("callbacks/", MpesaCallbackListView.as_view(), name="callbacks"),
+]
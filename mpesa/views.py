@@ -0,0 +1,171 @@
+import hmac
+import ipaddress
+import logging
+
+from django.conf import settings
+from rest_framework import generics, status
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.pagination import LargeTablePagination
+from accounts.permissions import IsSystemAdmin
+from mpesa.callbacks import InvalidCallback, parse_c2b, parse_stk, record
+from mpesa.daraja import DarajaError, stk_push
+from mpesa.models import MpesaCallback, MpesaSTKRequest
+from mpesa.serializers import MpesaCallbackSerializer, STKPushSerializer
+
+logger = logging.getLogger(__name__)
+
+ACCEPTED = {"ResultCode": 0, "ResultDesc": "Accepted"}
+FORBIDDEN = {"ResultCode": 1, "ResultDesc": "Forbidden"}
+
+
+def client_ip(request):
+    """
+    The address the request came from. Behind MPESA_CALLBACK_PROXIES trusted
+    proxies it is the entry that many hops from the right of
+    X-Forwarded-For; entries further left are whatever the client sent.
+    """
+    proxies = getattr(settings, "MPESA_CALLBACK_PROXIES", 0)
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(",")]
+        return hops[-min(proxies, len(hops))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def allowed_ip(address):
+    """Whether `address` is in MPESA_CALLBACK_IPS ("*" allows any)."""
+    allowed = getattr(settings, "MPESA_CALLBACK_IPS", [])
+    if "*" in allowed:
+        return True
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in allowed)
+
+
+class CallbackView(APIView):
+    """
+    Base for the Daraja callbacks: store the payload in the inbox and
+    acknowledge. Daraja doesn't sign callbacks, so none are accepted unless
+    MPESA_CALLBACK_TOKEN is set, the callback URL registered with Safaricom
+    carries it as ?token=, and the request comes from MPESA_CALLBACK_IPS.
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    parser_classes = (JSONParser,)
+
+    def parse(self, request):
+        raise NotImplementedError
+
+    def refused(self, request):
+        """Why the callback can't be from Safaricom, or None."""
+        token = getattr(settings, "MPESA_CALLBACK_TOKEN", "")
+        if not token:
+            return "MPESA_CALLBACK_TOKEN is not set"
+        if not hmac.compare_digest(request.query_params.get("token", ""), token):
+            return "Wrong or missing token"
+        address = client_ip(request)
+        if not allowed_ip(address):
+            return f"{address} is not in MPESA_CALLBACK_IPS"
+        return None
+
+    def forbidden(self, request):
+        reason = self.refused(request)
+        if reason is None:
+            return None
+        logger.warning(f"Refused M-Pesa callback to {request.path}: {reason}")
+        return Response(FORBIDDEN, status=status.HTTP_403_FORBIDDEN)
+
+    def post(self, request, *args, **kwargs):
+        forbidden = self.forbidden(request)
+        if forbidden is not None:
+            return forbidden
+        try:
+            fields = self.parse(request)
+        except InvalidCallback as e:
+            logger.warning(f"Rejected M-Pesa callback: {e}")
+            return Response(
+                {"ResultCode": 1, "ResultDesc": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        record(request.data, fields)
+        return Response(ACCEPTED, status=status.HTTP_200_OK)
+
+
+class C2BConfirmationView(CallbackView):
+    def parse(self, request):
+        return parse_c2b(request.data)
+
+
+class STKCallbackView(CallbackView):
+    def parse(self, request):
+        return parse_stk(request.data)
+
+
+class C2BValidationView(CallbackView):
+    """Every payment is accepted; unknown accounts are resolved after posting."""
+
+    def post(self, request, *args, **kwargs):
+        forbidden = self.forbidden(request)
+        if forbidden is not None:
+            return forbidden
+        return Response(ACCEPTED, status=status.HTTP_200_OK)
+
+
+class STKPushView(APIView):
+    """
+    Prompt a phone to pay into a savings account, loan or unpaid fee. Members
+    may pay only their own accounts. The push is recorded by its
+    CheckoutRequestID, which is how its callback finds the account.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = STKPushSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            reply = stk_push(data["phone_number"], data["amount"], data["account_number"])
+        except DarajaError as e:
+            logger.error(f"STK push to {data['phone_number']} failed: {e}")
+            return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
+        stk_request = MpesaSTKRequest.objects.create(
+            checkout_request_id=reply["CheckoutRequestID"],
+            merchant_request_id=reply.get("MerchantRequestID", ""),
+            account_number=data["account_number"],
+            amount=data["amount"],
+            phone_number=data["phone_number"],
+            requested_by=request.user,
+        )
+        return Response(
+            {
+                "checkout_request_id": stk_request.checkout_request_id,
+                "message": reply.get("CustomerMessage", ""),
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class MpesaCallbackListView(generics.ListAPIView):
+    """The inbox, newest first, optionally filtered by ?status=."""
+
+    serializer_class = MpesaCallbackSerializer
+    permission_classes = [IsSystemAdmin]
+    pagination_class = LargeTablePagination
+
+    def get_queryset(self):
+        queryset = MpesaCallback.objects.select_related("bulk_log").order_by(
+            "-created_at", "-id"
+        )
+        status_filter = self.request.query_params.get("status")
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
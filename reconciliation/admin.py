@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from reconciliation.models import ReconciliationRun
+
+
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "reference",
+        "source",
+        "file_name",
+        "line_count",
+        "matched_count",
+        "unmatched_count",
+        "duplicate_count",
+        "mismatch_count",
+        "created_at",
+    )
+    list_filter = ("source",)
+    ordering = ("-created_at",)
+
+admin.site.register(ReconciliationRun, ReconciliationRunAdmin)
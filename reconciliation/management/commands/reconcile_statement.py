@@ -0,0 +1,59 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from reconciliation.models import ReconciliationRun
+from reconciliation.serializers import PAYMENT_METHODS
+from reconciliation.utils import StatementError, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile a bank or M-Pesa statement (CSV) against the savings "
+        "deposits, loan repayments and fee payments, and store the run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str)
+        parser.add_argument(
+            "--source",
+            choices=[value for value, _ in ReconciliationRun.SOURCE_CHOICES],
+            required=True,
+        )
+        parser.add_argument(
+            "--date-window",
+            type=int,
+            default=None,
+            help="Days either side of a line's date searched for an amount-and-date "
+            "match (default: RECONCILIATION_DATE_WINDOW)",
+        )
+        parser.add_argument(
+            "--payment-method",
+            action="append",
+            default=[],
+            choices=PAYMENT_METHODS,
+            help="Only reconcile payments made this way; repeat for several",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], "rb") as fh:
+                run = reconcile(
+                    File(fh, name=options["path"].rsplit("/", 1)[-1]),
+                    options["source"],
+                    date_window=options["date_window"],
+                    payment_methods=options["payment_method"],
+                )
+        except (OSError, StatementError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{run.line_count} lines from {run.statement_from} to {run.statement_to}: "
+            f"{run.matched_count} matched, {run.unmatched_count} unmatched, "
+            f"{run.duplicate_count} duplicate, {run.mismatch_count} amount mismatch, "
+            f"{run.invalid_count} invalid ({run.skipped_count} skipped)"
+        )
+        self.stdout.write(
+            f"{run.unreconciled_count} payments ({run.unreconciled_total}) in the "
+            f"period are not on the statement"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Run {run.reference}"))
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:22
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reference', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('source', models.CharField(choices=[('Mpesa', 'M-Pesa'), ('Bank', 'Bank')], max_length=20)),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_hash', models.CharField(max_length=64)),
+                ('date_window', models.PositiveSmallIntegerField()),
+                ('payment_methods', models.JSONField(blank=True, default=list)),
+                ('statement_from', models.DateField(blank=True, null=True)),
+                ('statement_to', models.DateField(blank=True, null=True)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('matched_count', models.PositiveIntegerField(default=0)),
+                ('unmatched_count', models.PositiveIntegerField(default=0)),
+                ('duplicate_count', models.PositiveIntegerField(default=0)),
+                ('mismatch_count', models.PositiveIntegerField(default=0)),
+                ('invalid_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0)),
+                ('statement_total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('matched_total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('unreconciled_count', models.PositiveIntegerField(default=0)),
+                ('unreconciled_total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Reconciliation Run',
+                'verbose_name_plural': 'Reconciliation Runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReconciliationLine',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('row', models.PositiveIntegerField()),
+                ('receipt_number', models.CharField(blank=True, default='', max_length=100)),
+                ('transaction_date', models.DateField(blank=True, null=True)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('description', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(choices=[('Matched', 'Matched'), ('Unmatched', 'Unmatched'), ('Duplicate', 'Duplicate'), ('Amount Mismatch', 'Amount Mismatch'), ('Invalid', 'Invalid')], max_length=20)),
+                ('match_method', models.CharField(blank=True, choices=[('Receipt', 'Receipt number'), ('Amount and Date', 'Amount and date')], default='', max_length=20)),
+                ('transaction_kind', models.CharField(blank=True, choices=[('Savings Deposit', 'Savings Deposit'), ('Loan Repayment', 'Loan Repayment'), ('Fee Payment', 'Fee Payment')], default='', max_length=20)),
+                ('transaction_reference', models.CharField(blank=True, default='', max_length=255)),
+                ('account_number', models.CharField(blank=True, default='', max_length=20)),
+                ('transaction_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('note', models.CharField(blank=True, default='', max_length=255)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='reconciliation.reconciliationrun')),
+            ],
+            options={
+                'ordering': ['row'],
+                'indexes': [models.Index(fields=['run', 'status', 'row'], name='reconciliat_run_id_50b7c9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('run', 'row'), name='unique_reconciliation_row')],
+            },
+        ),
+    ]
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from accounts.abstracts import ReferenceModel, TimeStampedModel, UniversalIdModel
+
+User = get_user_model()
+
+
+class ReconciliationRun(UniversalIdModel, TimeStampedModel, ReferenceModel):
+    """
+    One bank or M-Pesa statement reconciled against the savings deposits,
+    loan repayments and fee payments recorded in the system. Amounts are in
+    KES.
+    """
+
+    SOURCE_CHOICES = [
+        ("Mpesa", "M-Pesa"),
+        ("Bank", "Bank"),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    file_name = models.CharField(max_length=255)
+    file_hash = models.CharField(max_length=64)
+    # Days either side of a line's date searched when it has no receipt match
+    date_window = models.PositiveSmallIntegerField()
+    # Only transactions paid by these methods are reconciled; empty means all
+    payment_methods = models.JSONField(default=list, blank=True)
+    statement_from = models.DateField(null=True, blank=True)
+    statement_to = models.DateField(null=True, blank=True)
+
+    line_count = models.PositiveIntegerField(default=0)
+    matched_count = models.PositiveIntegerField(default=0)
+    unmatched_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    mismatch_count = models.PositiveIntegerField(default=0)
+    invalid_count = models.PositiveIntegerField(default=0)
+    # Withdrawals and incomplete payments, not stored as lines
+    skipped_count = models.PositiveIntegerField(default=0)
+    statement_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    matched_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    # Transactions dated within the statement that no line matched
+    unreconciled_count = models.PositiveIntegerField(default=0)
+    unreconciled_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        verbose_name = "Reconciliation Run"
+        verbose_name_plural = "Reconciliation Runs"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.source} statement {self.file_name} - {self.reference}"
+
+
+class ReconciliationLine(UniversalIdModel):
+    """One statement line and the transaction it was matched to, if any."""
+
+    STATUS_CHOICES = [
+        ("Matched", "Matched"),
+        ("Unmatched", "Unmatched"),
+        ("Duplicate", "Duplicate"),
+        ("Amount Mismatch", "Amount Mismatch"),
+        ("Invalid", "Invalid"),
+    ]
+    MATCH_METHOD_CHOICES = [
+        ("Receipt", "Receipt number"),
+        ("Amount and Date", "Amount and date"),
+    ]
+    TRANSACTION_KIND_CHOICES = [
+        ("Savings Deposit", "Savings Deposit"),
+        ("Loan Repayment", "Loan Repayment"),
+        ("Fee Payment", "Fee Payment"),
+    ]
+
+    run = models.ForeignKey(
+        ReconciliationRun, on_delete=models.CASCADE, related_name="lines"
+    )
+    row = models.PositiveIntegerField()
+    receipt_number = models.CharField(max_length=100, blank=True, default="")
+    transaction_date = models.DateField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    description = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    match_method = models.CharField(
+        max_length=20, choices=MATCH_METHOD_CHOICES, blank=True, default=""
+    )
+    transaction_kind = models.CharField(
+        max_length=20, choices=TRANSACTION_KIND_CHOICES, blank=True, default=""
+    )
+    transaction_reference = models.CharField(max_length=255, blank=True, default="")
+    account_number = models.CharField(max_length=20, blank=True, default="")
+    transaction_amount = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True
+    )
+    note = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        ordering = ["row"]
+        indexes = [models.Index(fields=["run", "status", "row"])]
+        constraints = [
+            models.UniqueConstraint(fields=["run", "row"], name="unique_reconciliation_row")
+        ]
+
+    def __str__(self):
+        return f"Row {self.row}: {self.status}"
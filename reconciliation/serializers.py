@@ -0,0 +1,72 @@
+from rest_framework import serializers
+
+from feespayments.models import FeePayment
+from loanrepayments.models import LoanRepayment
+from reconciliation.models import ReconciliationLine, ReconciliationRun
+from savingsdeposits.models import SavingsDeposit
+
+PAYMENT_METHODS = sorted(
+    {
+        value
+        for model in (SavingsDeposit, LoanRepayment, FeePayment)
+        for value, _ in model.PAYMENT_METHOD_CHOICES
+    }
+)
+
+
+class ReconciliationRunSerializer(serializers.ModelSerializer):
+    created_by = serializers.CharField(source="created_by.member_no", read_only=True, default=None)
+
+    class Meta:
+        model = ReconciliationRun
+        fields = (
+            "reference",
+            "source",
+            "file_name",
+            "date_window",
+            "payment_methods",
+            "statement_from",
+            "statement_to",
+            "line_count",
+            "matched_count",
+            "unmatched_count",
+            "duplicate_count",
+            "mismatch_count",
+            "invalid_count",
+            "skipped_count",
+            "statement_total",
+            "matched_total",
+            "unreconciled_count",
+            "unreconciled_total",
+            "created_by",
+            "created_at",
+        )
+
+
+class ReconciliationRunCreateSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    source = serializers.ChoiceField(choices=ReconciliationRun.SOURCE_CHOICES)
+    # Days either side of a line's date searched for an amount-and-date match
+    date_window = serializers.IntegerField(min_value=0, max_value=31, required=False)
+    payment_methods = serializers.ListField(
+        child=serializers.ChoiceField(choices=PAYMENT_METHODS), required=False
+    )
+
+
+class ReconciliationLineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReconciliationLine
+        fields = (
+            "row",
+            "transaction_date",
+            "receipt_number",
+            "amount",
+            "description",
+            "status",
+            "match_method",
+            "transaction_kind",
+            "transaction_reference",
+            "account_number",
+            "transaction_amount",
+            "note",
+        )
@@ -0,0 +1,156 @@
+import csv
+import io
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from reconciliation.models import ReconciliationRun
+from reconciliation.utils import reconcile
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+from savingstypes.models import SavingsType
+
+User = get_user_model()
+
+URL = "/api/v1/reconciliation/"
+MPESA_HEADER = "Receipt No.,Completion Time,Details,Transaction Status,Paid In,Withdrawn,Balance"
+
+
+def statement(header, rows, name="statement.csv"):
+    content = "\n".join([header, *rows]) + "\n"
+    return SimpleUploadedFile(name, content.encode(), content_type="text/csv")
+
+
+class StatementReconciliationTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            member_no="ADM001", password="pass1234", is_system_admin=True
+        )
+        self.account = SavingsAccount.objects.create(
+            member=User.objects.create_user(
+                member_no="MEM001", password="pass1234", is_member=True
+            ),
+            account_type=SavingsType.objects.create(name="Regular"),
+            is_active=True,
+        )
+        self.account.refresh_from_db()
+        self.client.force_authenticate(self.admin)
+
+    def deposit(self, amount, day, receipt=None, payment_method="Mpesa"):
+        deposit = SavingsDeposit.objects.create(
+            savings_account=self.account,
+            amount=Decimal(amount),
+            receipt_number=receipt,
+            payment_method=payment_method,
+            transaction_status="Completed",
+        )
+        SavingsDeposit.objects.filter(pk=deposit.pk).update(
+            created_at=timezone.make_aware(datetime.combine(day, datetime.min.time()))
+            + timedelta(hours=10)
+        )
+        return deposit
+
+    def test_lines_are_classified_and_exported(self):
+        self.deposit("500", date(2025, 3, 3), "RC10000001")
+        self.deposit("350", date(2025, 3, 3), "RC10000002")
+        untagged = self.deposit("750", date(2025, 3, 4))
+        self.deposit("200", date(2025, 1, 2), "RC10000003")  # long before the statement
+        self.deposit("1200", date(2025, 3, 5), "RC10000009")  # not on the statement
+        rows = [
+            "RC10000001,2025-03-03 09:15:02,Paid in,Completed,500.00,,",
+            "RC10000002,2025-03-03 11:00:00,Paid in,Completed,300.00,,",
+            "rc10000001,2025-03-03 12:00:00,Paid in,Completed,500.00,,",
+            'RC10000004,2025-03-05 08:00:00,Paid in,Completed,"750.00",,',
+            "RC10000005,2025-03-06 08:00:00,Paid in,Completed,999.00,,",
+            "RC10000006,2025-03-06 09:00:00,Withdrawal,Completed,,100.00,",
+            "RC10000007,2025-03-06 10:00:00,Paid in,Failed,40.00,,",
+            "RC10000003,2025-03-06 10:30:00,Paid in,Completed,200.00,,",
+            "RC10000008,yesterday,Paid in,Completed,60.00,,",
+        ]
+        response = self.client.post(
+            URL,
+            {"file": statement(MPESA_HEADER, rows), "source": "Mpesa"},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        run = response.data
+        self.assertEqual(
+            (
+                run["line_count"],
+                run["matched_count"],
+                run["unmatched_count"],
+                run["duplicate_count"],
+                run["mismatch_count"],
+                run["invalid_count"],
+                run["skipped_count"],
+            ),
+            (7, 3, 1, 1, 1, 1, 2),
+        )
+        self.assertEqual((run["statement_from"], run["statement_to"]), ("2025-03-03", "2025-03-06"))
+        self.assertEqual(Decimal(run["matched_total"]), Decimal("1450.00"))
+        self.assertEqual(
+            (run["unreconciled_count"], Decimal(run["unreconciled_total"])), (1, Decimal("1200"))
+        )
+
+        lines = self.client.get(f"{URL}{run['reference']}/lines/").data["results"]
+        by_row = {line["row"]: line for line in lines}
+        self.assertEqual(by_row[1]["match_method"], "Receipt")
+        self.assertEqual(by_row[2]["status"], "Amount Mismatch")
+        self.assertEqual(by_row[3]["status"], "Duplicate")
+        self.assertEqual(
+            (by_row[4]["status"], by_row[4]["match_method"], by_row[4]["transaction_reference"]),
+            ("Matched", "Amount and Date", untagged.reference),
+        )
+        self.assertEqual(by_row[5]["status"], "Unmatched")
+        self.assertEqual(by_row[8]["status"], "Matched")
+        self.assertEqual(by_row[9]["status"], "Invalid")
+        mismatched = self.client.get(
+            f"{URL}{run['reference']}/lines/", {"status": "Amount Mismatch"}
+        ).data["results"]
+        self.assertEqual([line["row"] for line in mismatched], [2])
+
+        export = self.client.get(f"{URL}{run['reference']}/export/")
+        self.assertEqual(export.status_code, 200)
+        exported = list(csv.reader(io.StringIO(b"".join(export.streaming_content).decode())))
+        self.assertEqual(exported[0][:3], ["Row", "Date", "Receipt Number"])
+        self.assertEqual(len(exported), 8)
+        self.assertEqual(exported[2][5:7], ["Amount Mismatch", "Receipt"])
+
+    def test_queries_are_batched(self):
+        header = "Value Date,Reference,Narration,Debit,Credit"
+        for day in range(1, 21):
+            self.deposit("100", date(2025, 5, day), f"BK{day:06d}", "Bank Transfer")
+
+        def queries(count):
+            rows = [
+                f"{day % 20 + 1:02d}/05/2025,BK{n:06d},Transfer,,100.00"
+                for n, day in enumerate(range(count), start=1)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                run = reconcile(statement(header, rows), "Bank", self.admin, date_window=0)
+            return run, len(context.captured_queries)
+
+        small, small_queries = queries(10)
+        large, large_queries = queries(400)
+        # Lookups and inserts are batched, never one per line
+        self.assertLessEqual(small_queries, 10)
+        self.assertLessEqual(large_queries, 20)
+        self.assertEqual((small.matched_count, small.unmatched_count), (10, 0))
+        self.assertEqual((large.matched_count, large.unmatched_count), (20, 380))
+        self.assertEqual(large.line_count, 400)
+
+    def test_statement_without_an_amount_column(self):
+        response = self.client.post(
+            URL,
+            {"file": statement("Date,Reference", ["2025-01-01,X"]), "source": "Bank"},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("amount", response.data["error"])
+        self.assertFalse(ReconciliationRun.objects.exists())
@@ -0,0 +1,17 @@
+from django.urls import path
+
+from reconciliation.views import (
+    ReconciliationExportView,
+    ReconciliationLineListView,
+    ReconciliationRunListCreateView,
+    ReconciliationRunView,
+)
+
+app_name = "reconciliation"
+
+urlpatterns = [
+    path("", ReconciliationRunListCreateView.as_view(), name="list-create"),
+    path("<str:reference>/", ReconciliationRunView.as_view(), name="detail"),
+    path("<str:reference>/lines/", ReconciliationLineListView.as_view(), name="lines"),
+    path("<str:reference>/export/", ReconciliationExportView.as_view(), name="export"),
+]
@@ -0,0 +1,548 @@
+"""
+Reconciling bank and M-Pesa statements against the payments in the system.
+
+reconcile() reads each side once:
+
+1. The statement is streamed (iter_lines) and every credit line is parsed
+   into a receipt number, an amount and a date. Debits, and payments the
+   statement doesn't show as completed, are counted as skipped.
+2. The savings deposits, loan repayments and fee payments dated within the
+   statement's dates, widened by the date window, are read in one pass with
+   values_list() into two hash indexes: by receipt number and by (amount,
+   date). Receipts on the statement that were posted outside that range are
+   fetched with batched `__in` queries.
+3. Every line is classified from the indexes alone, with no query per line:
+   - a receipt posted once, for the same amount, is Matched;
+   - a receipt posted for a different amount is an Amount Mismatch;
+   - a receipt repeated on the statement, or posted more than once, is a
+     Duplicate;
+   - a line with no receipt match takes the nearest-dated transaction of the
+     same amount within the window that no other line has matched and whose
+     own receipt isn't on the statement (Matched by amount and date);
+   - anything else is Unmatched.
+   Receipt matches are made for all lines before any amount-and-date match,
+   so a looser match never takes a transaction a later line matches exactly.
+4. The run is saved and its lines are inserted in batches (insert_lines).
+"""
+
+import csv
+import hashlib
+import io
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from feespayments.models import FeePayment
+from loanrepayments.models import LoanRepayment
+from reconciliation.models import ReconciliationLine, ReconciliationRun
+from savingsdeposits.models import SavingsDeposit
+from transactions.utils.periods import date_bounds, in_range
+from transactions.utils.uploads import iter_lines
+
+DATE_WINDOW = 2
+BATCH_SIZE = 2000
+LOOKUP_BATCH_SIZE = 500
+
+# Accepted headers for each column, compared lowercased with punctuation
+# dropped, in order of preference
+COLUMNS = {
+    "Mpesa": {
+        "receipt": ("receipt no", "receipt number", "receipt", "transaction id"),
+        "amount": ("paid in", "amount"),
+        "date": ("completion time", "initiation time", "transaction date", "date"),
+        "description": ("details", "description"),
+        "status": ("transaction status", "status"),
+    },
+    "Bank": {
+        "receipt": (
+            "reference",
+            "reference number",
+            "transaction reference",
+            "bank reference",
+            "receipt number",
+            "cheque number",
+        ),
+        "amount": ("credit", "credit amount", "money in", "deposit", "amount"),
+        "date": ("value date", "transaction date", "posting date", "date"),
+        "description": ("narration", "description", "details", "particulars"),
+    },
+}
+
+# Tried after ISO 8601, which datetime.fromisoformat() handles
+DATE_FORMATS = (
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d-%m-%Y",
+    "%d-%m-%Y %H:%M:%S",
+    "%d.%m.%Y",
+    "%d %b %Y",
+    "%d-%b-%Y",
+    "%d-%b-%y",
+)
+
+EXPORT_HEADER = [
+    "Row",
+    "Date",
+    "Receipt Number",
+    "Amount",
+    "Description",
+    "Status",
+    "Match Method",
+    "Transaction Type",
+    "Transaction Reference",
+    "Account Number",
+    "Posted Amount",
+    "Note",
+]
+
+
+class StatementError(ValueError):
+    pass
+
+
+def _header_key(name):
+    return " ".join("".join(c for c in name.lower() if c.isalnum() or c.isspace()).split())
+
+
+def normalise_receipt(value):
+    return value.strip().upper()
+
+
+class Line:
+    """A statement line and, once classified, what it matched."""
+
+    __slots__ = (
+        "row", "receipt", "amount", "day", "description",
+        "status", "method", "match", "note",
+    )
+
+    def __init__(self, row, receipt, amount, day, description, status=None, note=""):
+        self.row = row
+        self.receipt = receipt
+        self.amount = amount
+        self.day = day
+        self.description = description
+        self.status = status
+        self.method = ""
+        self.match = None
+        self.note = note
+
+
+class Statement:
+    """
+    A CSV statement read one line at a time. Its header is checked up
+    front; lines() yields a Line per credit and counts what it skips.
+    """
+
+    def __init__(self, file, source):
+        if source not in COLUMNS:
+            raise StatementError(f"Unknown statement source: {source}")
+        self.file = file
+        self.reader = csv.reader(iter_lines(file))
+        header = next(self.reader, None)
+        if not header:
+            raise StatementError("The statement is empty")
+        keys = {}
+        for i, name in enumerate(header):
+            keys.setdefault(_header_key(name), i)
+        self.columns = {}
+        for column, names in COLUMNS[source].items():
+            self.columns[column] = next((keys[n] for n in names if n in keys), None)
+        for column in ("amount", "date"):
+            if self.columns[column] is None:
+                raise StatementError(
+                    f"The statement has no {column} column (one of: "
+                    f"{', '.join(COLUMNS[source][column])})"
+                )
+        self.skipped = 0
+        self._format = None
+
+    def cell(self, values, column):
+        i = self.columns.get(column)
+        if i is None or i >= len(values):
+            return ""
+        return values[i].strip()
+
+    def parse_day(self, text):
+        try:
+            return datetime.fromisoformat(text).date()
+        except ValueError:
+            pass
+        # Statements use one format throughout, so try the last one first
+        formats = DATE_FORMATS if self._format is None else (self._format, *DATE_FORMATS)
+        for fmt in formats:
+            try:
+                day = datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+            self._format = fmt
+            return day
+        return None
+
+    def lines(self):
+        for row, values in enumerate(self.reader, start=1):
+            if not any(value.strip() for value in values):
+                continue
+            status = self.cell(values, "status")
+            if status and status.lower() != "completed":
+                self.skipped += 1
+                continue
+            amount_text = self.cell(values, "amount").replace(",", "").replace("KES", "").strip()
+            if not amount_text:
+                self.skipped += 1
+                continue
+            receipt = normalise_receipt(self.cell(values, "receipt"))
+            description = self.cell(values, "description")[:255]
+            date_text = self.cell(values, "date")
+            try:
+                amount = Decimal(amount_text).quantize(Decimal("0.01"))
+            except InvalidOperation:
+                amount = None
+            if amount is None or not amount.is_finite():
+                yield Line(row, receipt, None, None, description, "Invalid", f"Invalid amount: {amount_text}")
+                continue
+            if amount <= 0:
+                self.skipped += 1
+                continue
+            day = self.parse_day(date_text)
+            if day is None:
+                yield Line(row, receipt, amount, None, description, "Invalid", f"Invalid date: {date_text}")
+                continue
+            yield Line(row, receipt, amount, day, description)
+
+
+class Posted:
+    """A payment recorded in the system, with its local date."""
+
+    __slots__ = ("kind", "pk", "reference", "account_number", "receipt", "amount", "day")
+
+    def __init__(self, kind, pk, reference, account_number, receipt, amount, day):
+        self.pk = pk
+        self.kind = kind
+        self.reference = reference or ""
+        self.account_number = account_number or ""
+        self.receipt = normalise_receipt(receipt or "")
+        self.amount = amount
+        self.day = day
+
+
+def posted_querysets(payment_methods=None):
+    """
+    (kind, queryset, account number field, status field) for every kind of
+    payment in. The status is checked in Python (see iter_posted): filtering
+    on it in SQL lets the planner pick the status index over the created_at
+    and receipt_number ones.
+    """
+    querysets = (
+        (
+            "Savings Deposit",
+            SavingsDeposit.objects.all(),
+            "savings_account__account_number",
+            "transaction_status",
+        ),
+        (
+            "Loan Repayment",
+            LoanRepayment.objects.all(),
+            "loan_account__account_number",
+            "transaction_status",
+        ),
+        ("Fee Payment", FeePayment.objects.all(), "member_fee__account_number", None),
+    )
+    if payment_methods:
+        querysets = tuple(
+            (kind, queryset.filter(payment_method__in=payment_methods), *fields)
+            for kind, queryset, *fields in querysets
+        )
+    return querysets
+
+
+def iter_posted(querysets, condition):
+    """The completed payments matching `condition`."""
+    tz = timezone.get_current_timezone()
+    for kind, queryset, account_field, status_field in querysets:
+        fields = ["pk", "reference", account_field, "receipt_number", "amount", "created_at"]
+        rows = (
+            queryset.filter(condition)
+            .order_by()
+            .values_list(*fields, *([status_field] if status_field else []))
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        for row in rows:
+            if status_field and row[6] != "Completed":
+                continue
+            pk, reference, account_number, receipt, amount, created_at = row[:6]
+            yield Posted(
+                kind, pk, reference, account_number, receipt, amount,
+                created_at.astimezone(tz).date(),
+            )
+
+
+class PostedIndex:
+    """The payments posted in a date range, by receipt and by (amount, date)."""
+
+    def __init__(self, start, end, payment_methods=None):
+        self.querysets = posted_querysets(payment_methods)
+        self.range = in_range(*date_bounds(start, end))
+        self.by_receipt = defaultdict(list)
+        self.by_amount_day = defaultdict(list)
+        self.posted = []
+        for posted in iter_posted(self.querysets, self.range):
+            self.posted.append(posted)
+            if posted.receipt:
+                self.by_receipt[posted.receipt].append(posted)
+            self.by_amount_day[posted.amount, posted.day].append(posted)
+
+    def add_receipts(self, receipts):
+        """Fetch the given receipts wherever they fall outside the range."""
+        missing = sorted(r for r in receipts if r not in self.by_receipt)
+        for i in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            condition = ~self.range & Q(receipt_number__in=missing[i : i + LOOKUP_BATCH_SIZE])
+            for posted in iter_posted(self.querysets, condition):
+                self.by_receipt[posted.receipt].append(posted)
+
+
+def classify(lines, index, window):
+    """Set each line's status, match and note. Returns the matched payment pks."""
+    claimed = set()
+    first_row = {}
+    pending = []
+    for line in lines:
+        if line.status == "Invalid":
+            continue
+        if not line.receipt:
+            pending.append(line)
+            continue
+        if line.receipt in first_row:
+            line.status = "Duplicate"
+            line.note = f"Receipt is also on row {first_row[line.receipt]}"
+            continue
+        first_row[line.receipt] = line.row
+        matches = index.by_receipt.get(line.receipt)
+        if not matches:
+            pending.append(line)
+            continue
+        line.match = matches[0]
+        line.method = "Receipt"
+        claimed.update(posted.pk for posted in matches)
+        if len(matches) > 1:
+            line.status = "Duplicate"
+            line.note = f"Receipt posted {len(matches)} times: " + ", ".join(
+                posted.reference for posted in matches
+            )[:200]
+        elif line.match.amount != line.amount:
+            line.status = "Amount Mismatch"
+            line.note = f"Posted as {line.match.amount:.2f}"
+        else:
+            line.status = "Matched"
+
+    # Nearest date first: 0, -1, +1, -2, +2, ...
+    offsets = [0]
+    for days in range(1, window + 1):
+        offsets += [-days, days]
+    offsets = [timedelta(days=days) for days in offsets]
+
+    on_statement = first_row.keys()
+    for line in pending:
+        for offset in offsets:
+            bucket = index.by_amount_day.get((line.amount, line.day + offset))
+            if not bucket:
+                continue
+            match = next(
+                (
+                    posted
+                    for posted in bucket
+                    if posted.pk not in claimed and posted.receipt not in on_statement
+                ),
+                None,
+            )
+            if match is not None:
+                break
+        else:
+            match = None
+        if match is None:
+            line.status = "Unmatched"
+            continue
+        claimed.add(match.pk)
+        line.status = "Matched"
+        line.method = "Amount and Date"
+        line.match = match
+        if line.receipt:
+            line.note = f"Posted with receipt {match.receipt or '(none)'}"
+    return claimed
+
+
+LINE_COLUMNS = (
+    "id",
+    "run_id",
+    "row",
+    "receipt_number",
+    "transaction_date",
+    "amount",
+    "description",
+    "status",
+    "match_method",
+    "transaction_kind",
+    "transaction_reference",
+    "account_number",
+    "transaction_amount",
+    "note",
+)
+
+
+def insert_lines(run, lines):
+    """
+    Write the run's lines with executemany(). bulk_create() spent most of a
+    100k-line run building model instances and preparing each value through
+    its field; these values are already plain str, Decimal, date and None.
+    """
+    meta = ReconciliationLine._meta
+    quote = connection.ops.quote_name
+    sql = (
+        f"INSERT INTO {quote(meta.db_table)} "
+        f"({', '.join(quote(meta.get_field(name.removesuffix('_id')).column) for name in LINE_COLUMNS)}) "
+        f"VALUES ({', '.join(['%s'] * len(LINE_COLUMNS))})"
+    )
+    prep_pk = partial(meta.pk.get_db_prep_value, connection=connection)
+    run_id = prep_pk(run.pk)
+    params = []
+    with connection.cursor() as cursor:
+        for line in lines:
+            match = line.match
+            params.append(
+                (
+                    prep_pk(uuid.uuid4()),
+                    run_id,
+                    line.row,
+                    line.receipt[:100],
+                    line.day,
+                    line.amount,
+                    line.description,
+                    line.status,
+                    line.method,
+                    match.kind if match else "",
+                    match.reference if match else "",
+                    match.account_number if match else "",
+                    match.amount if match else None,
+                    line.note[:255],
+                )
+            )
+            if len(params) == BATCH_SIZE:
+                cursor.executemany(sql, params)
+                params = []
+        if params:
+            cursor.executemany(sql, params)
+
+
+def file_hash(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def reconcile(file, source, user=None, date_window=None, payment_methods=None):
+    """Reconcile a statement file and store the run. Raises StatementError."""
+    if date_window is None:
+        date_window = getattr(settings, "RECONCILIATION_DATE_WINDOW", DATE_WINDOW)
+    payment_methods = list(payment_methods or [])
+    digest = file_hash(file)
+    statement = Statement(file, source)
+    lines = list(statement.lines())
+
+    days = [line.day for line in lines if line.day is not None]
+    statement_from, statement_to = (min(days), max(days)) if days else (None, None)
+    window = timedelta(days=date_window)
+    claimed = set()
+    index = None
+    if days:
+        index = PostedIndex(statement_from - window, statement_to + window, payment_methods)
+        index.add_receipts({line.receipt for line in lines if line.receipt})
+        claimed = classify(lines, index, date_window)
+    else:
+        for line in lines:
+            line.status = line.status or "Unmatched"
+
+    counts = defaultdict(int)
+    for line in lines:
+        counts[line.status] += 1
+    unreconciled = (
+        [
+            posted
+            for posted in index.posted
+            if statement_from <= posted.day <= statement_to and posted.pk not in claimed
+        ]
+        if index is not None
+        else []
+    )
+
+    with transaction.atomic():
+        run = ReconciliationRun.objects.create(
+            source=source,
+            file_name=getattr(file, "name", "") or "statement.csv",
+            file_hash=digest,
+            date_window=date_window,
+            payment_methods=payment_methods,
+            statement_from=statement_from,
+            statement_to=statement_to,
+            line_count=len(lines),
+            matched_count=counts["Matched"],
+            unmatched_count=counts["Unmatched"],
+            duplicate_count=counts["Duplicate"],
+            mismatch_count=counts["Amount Mismatch"],
+            invalid_count=counts["Invalid"],
+            skipped_count=statement.skipped,
+            statement_total=sum(line.amount for line in lines if line.amount is not None),
+            matched_total=sum(line.amount for line in lines if line.status == "Matched"),
+            unreconciled_count=len(unreconciled),
+            unreconciled_total=sum(posted.amount for posted in unreconciled),
+            created_by=user,
+        )
+        insert_lines(run, lines)
+    return run
+
+
+def write_csv(run, fh):
+    """Write a run's lines to a binary file."""
+    out = io.TextIOWrapper(fh, encoding="utf-8", newline="")
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(EXPORT_HEADER)
+    rows = (
+        run.lines.order_by("row")
+        .values_list(
+            "row",
+            "transaction_date",
+            "receipt_number",
+            "amount",
+            "description",
+            "status",
+            "match_method",
+            "transaction_kind",
+            "transaction_reference",
+            "account_number",
+            "transaction_amount",
+            "note",
+        )
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    for row in rows:
+        writer.writerow(
+            [
+                "" if value is None
+                else f"{value:.2f}" if isinstance(value, Decimal)
+                else value.isoformat() if hasattr(value, "isoformat")
+                else value
+                for value in row
+            ]
+        )
+    out.flush()
+    out.detach()
@@ -0,0 +1,88 @@
+import logging
+import tempfile
+
+from django.http import FileResponse
+from rest_framework import generics, status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.pagination import LargeTablePagination
+from accounts.permissions import IsSystemAdmin
+from reconciliation.models import ReconciliationLine, ReconciliationRun
+from reconciliation.serializers import (
+    ReconciliationLineSerializer,
+    ReconciliationRunCreateSerializer,
+    ReconciliationRunSerializer,
+)
+from reconciliation.utils import StatementError, reconcile, write_csv
+
+logger = logging.getLogger(__name__)
+
+
+class ReconciliationRunListCreateView(generics.ListCreateAPIView):
+    """
+    GET lists reconciliation runs. POST reconciles an uploaded bank or M-Pesa
+    statement (CSV) against the payments in the system and stores the run.
+    """
+    queryset = ReconciliationRun.objects.select_related("created_by")
+    serializer_class = ReconciliationRunSerializer
+    permission_classes = [IsSystemAdmin]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def create(self, request, *args, **kwargs):
+        serializer = ReconciliationRunCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            run = reconcile(user=request.user, **serializer.validated_data)
+        except (StatementError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(
+            f"Reconciled {run.source} statement {run.reference}: "
+            f"{run.matched_count}/{run.line_count} matched"
+        )
+        return Response(ReconciliationRunSerializer(run).data, status=status.HTTP_201_CREATED)
+
+
+class ReconciliationRunView(generics.RetrieveDestroyAPIView):
+    """A run's counts and totals."""
+    queryset = ReconciliationRun.objects.select_related("created_by")
+    serializer_class = ReconciliationRunSerializer
+    permission_classes = [IsSystemAdmin]
+    lookup_field = "reference"
+
+
+class ReconciliationLineListView(generics.ListAPIView):
+    """A run's statement lines, optionally filtered by ?status=."""
+    serializer_class = ReconciliationLineSerializer
+    permission_classes = [IsSystemAdmin]
+    pagination_class = LargeTablePagination
+
+    def get_queryset(self):
+        queryset = ReconciliationLine.objects.filter(run__reference=self.kwargs["reference"])
+        status_filter = self.request.query_params.get("status")
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
+
+
+class ReconciliationExportView(APIView):
+    """Every line of a run as CSV, for working through the exceptions."""
+    permission_classes = [IsSystemAdmin]
+
+    def get(self, request, reference):
+        try:
+            run = ReconciliationRun.objects.get(reference=reference)
+        except ReconciliationRun.DoesNotExist:
+            return Response(
+                {"error": "Reconciliation run not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        output = tempfile.TemporaryFile()
+        write_csv(run, output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"reconciliation_{run.reference}.csv",
+            content_type="text/csv",
+        )
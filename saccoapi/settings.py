@@ -63,11 +63,17 @@ INSTALLED_APPS = [
     "feetypes",
     "memberfees",
     "feespayments",
+    "dividends",
+    "mpesa",
+    "reconciliation",
+    "metrics",
+    "catalogs",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "metrics.middleware.RequestMetricsMiddleware",
+    "saccoapi.middleware.StaticFilesMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -173,7 +179,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_RENDERER_CLASSES": (
@@ -209,15 +215,116 @@ cloudinary.config(
 )
 
 # Safaricom Mpesa Daraja API
+# STK pushes (mpesa.daraja) report to MPESA_CALLBACK_URL, the full URL of this
+# app's api/v1/mpesa/stk/callback/ endpoint.
 MPESA_CONSUMER_KEY = config("MPESA_CONSUMER_KEY")
 MPESA_CONSUMER_SECRET = config("MPESA_CONSUMER_SECRET")
 MPESA_SHORTCODE = config("MPESA_SHORTCODE")
 MPESA_PASSKEY = config("MPESA_PASSKEY")
 MPESA_CALLBACK_URL = config("MPESA_CALLBACK_URL")
 MPESA_API_URL = config("MPESA_API_URL")
+# Callbacks (mpesa app) are refused unless MPESA_CALLBACK_TOKEN is set and the
+# registered callback URLs carry it as ?token=. They must also come from
+# MPESA_CALLBACK_IPS (comma-separated addresses or networks, "*" for any;
+# default: Safaricom's published callback IPs). MPESA_CALLBACK_PROXIES is the
+# number of trusted proxies in front of the app that append X-Forwarded-For.
+# The posting worker records payments as entered by MPESA_POSTING_USER (a
+# member number; default: the first superuser), MPESA_POSTING_BATCH_SIZE
+# callbacks at a time, and reloads its account index every MPESA_INDEX_TTL
+# seconds.
+MPESA_CALLBACK_TOKEN = config("MPESA_CALLBACK_TOKEN", default="")
+MPESA_CALLBACK_IPS = config(
+    "MPESA_CALLBACK_IPS",
+    default=(
+        "196.201.214.200,196.201.214.206,196.201.213.114,196.201.214.207,"
+        "196.201.214.208,196.201.213.44,196.201.212.127,196.201.212.138,"
+        "196.201.212.129,196.201.212.136,196.201.212.74,196.201.212.69"
+    ),
+).split(",")
+MPESA_CALLBACK_PROXIES = config("MPESA_CALLBACK_PROXIES", default=0, cast=int)
+MPESA_POSTING_USER = config("MPESA_POSTING_USER", default="")
+MPESA_POSTING_BATCH_SIZE = config("MPESA_POSTING_BATCH_SIZE", default=500, cast=int)
+MPESA_INDEX_TTL = config("MPESA_INDEX_TTL", default=300, cast=int)
 
 # Resend
 RESEND_API_KEY = config("RESEND_API_KEY")
 
+# Request metrics
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+# Adds X-SQL-Queries / X-SQL-Time / ... headers to every response
+METRICS_DEBUG_HEADERS = config("METRICS_DEBUG_HEADERS", default=DEBUG, cast=bool)
+
+# Cache
+# The catalog version stamp lives here. Point it at a cache shared by all
+# workers (e.g. Redis) so catalog edits reach every worker immediately;
+# otherwise each process refreshes after CATALOG_CACHE_TTL seconds.
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+CATALOG_CACHE_TTL = config("CATALOG_CACHE_TTL", default=300, cast=int)
+# Token -> user lookups (accounts.authentication) are cached in each process
+# for AUTH_TOKEN_CACHE_TTL seconds (0 turns the cache off) and, when
+# AUTH_TOKEN_SHARED_CACHE_TTL is above 0, in the cache above as well. Saving a
+# user or deleting their token drops the entries.
+AUTH_TOKEN_CACHE_TTL = config("AUTH_TOKEN_CACHE_TTL", default=30, cast=int)
+AUTH_TOKEN_CACHE_MAX_ENTRIES = config("AUTH_TOKEN_CACHE_MAX_ENTRIES", default=10000, cast=int)
+AUTH_TOKEN_SHARED_CACHE_TTL = config("AUTH_TOKEN_SHARED_CACHE_TTL", default=0, cast=int)
+
+# Bulk CSV imports commit and checkpoint every BULK_IMPORT_CHUNK_SIZE rows. An
+# import with no checkpoint for BULK_IMPORT_STALE_AFTER seconds is treated as
+# crashed, and re-uploading the file resumes it.
+BULK_IMPORT_CHUNK_SIZE = config("BULK_IMPORT_CHUNK_SIZE", default=500, cast=int)
+BULK_IMPORT_STALE_AFTER = config("BULK_IMPORT_STALE_AFTER", default=600, cast=int)
+# Combined imports with at least BULK_IMPORT_PARALLEL_MIN_ROWS valid rows are
+# split into member-disjoint shards and committed by BULK_IMPORT_WORKERS
+# processes (0 means one per CPU).
+BULK_IMPORT_WORKERS = config("BULK_IMPORT_WORKERS", default=0, cast=int)
+BULK_IMPORT_PARALLEL_MIN_ROWS = config(
+    "BULK_IMPORT_PARALLEL_MIN_ROWS", default=2000, cast=int
+)
+
+# The account list downloads (bulk upload template, interest export) read
+# members in chunks of this size
+ACCOUNT_EXPORT_CHUNK_SIZE = config("ACCOUNT_EXPORT_CHUNK_SIZE", default=500, cast=int)
+
+# PDF reports render with Chromium unless overridden, per report, as
+# comma-separated report=backend pairs, e.g. "sacco_summary=weasyprint".
+# Chromium is installed by build.sh / Procfile; WeasyPrint needs the Pango
+# system libraries, which the deploy image doesn't provision yet.
+PDF_BACKEND = config("PDF_BACKEND", default="chromium")
+PDF_REPORT_BACKENDS = dict(
+    pair.split("=", 1)
+    for pair in config("PDF_REPORT_BACKENDS", default="").split(",")
+    if pair
+)
+
+# Incremental Parquet / Arrow exports for analytics (export_analytics). Rows
+# newer than ANALYTICS_EXPORT_SETTLE seconds wait for the next export.
+ANALYTICS_EXPORT_DIR = config("ANALYTICS_EXPORT_DIR", default=str(BASE_DIR / "exports"))
+ANALYTICS_EXPORT_CHUNK_SIZE = config("ANALYTICS_EXPORT_CHUNK_SIZE", default=5000, cast=int)
+ANALYTICS_EXPORT_SETTLE = config("ANALYTICS_EXPORT_SETTLE", default=300, cast=int)
+
+# Dividends on savings (dividends app): withholding tax in percent, and the GL
+# accounts debited with the gross dividend and credited with the tax withheld
+DIVIDEND_WITHHOLDING_TAX_RATE = config("DIVIDEND_WITHHOLDING_TAX_RATE", default="5")
+DIVIDEND_GL_ACCOUNT = config("DIVIDEND_GL_ACCOUNT", default="3010")
+WITHHOLDING_TAX_GL_ACCOUNT = config("WITHHOLDING_TAX_GL_ACCOUNT", default="2040")
+
+# Statement reconciliation (reconciliation app): days either side of a
+# statement line's date searched for a payment of the same amount when its
+# receipt number doesn't match
+RECONCILIATION_DATE_WINDOW = config("RECONCILIATION_DATE_WINDOW", default=2, cast=int)
+
+# Loan book stress test (loans.stress): scenarios per run by default, worker
+# processes (0 means one per CPU), and seconds the admin report is cached
+STRESS_TEST_SCENARIOS = config("STRESS_TEST_SCENARIOS", default=10000, cast=int)
+STRESS_TEST_WORKERS = config("STRESS_TEST_WORKERS", default=0, cast=int)
+STRESS_TEST_CACHE_TTL = config("STRESS_TEST_CACHE_TTL", default=3600, cast=int)
+
 # Loan Application System
 FIRST_LOAN_MAX_SAVINGS_PERCENT = 80
@@ -26,4 +26,8 @@ urlpatterns = [
     path("api/v1/memberfees/", include("memberfees.urls")),
     path("api/v1/feespayments/", include("feespayments.urls")),
     path("api/v1/finances/", include("finances.urls")),
+    path("api/v1/dividends/", include("dividends.urls")),
+    path("api/v1/mpesa/", include("mpesa.urls")),
+    path("api/v1/reconciliation/", include("reconciliation.urls")),
+    path("api/v1/metrics/", include("metrics.urls")),
 ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings', '0002_rename_user_savingsaccount_member'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savingsaccount',
+            name='monthly_contribution',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Standing monthly payroll deduction (0: repeat the last one)', max_digits=12),
+        ),
+    ]
@@ -20,6 +20,12 @@ class SavingsAccount(TimeStampedModel, UniversalIdModel, ReferenceModel):
         max_length=20, unique=True, default=generate_account_number
     )
     balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    monthly_contribution = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="Standing monthly payroll deduction (0: repeat the last one)",
+    )
     is_active = models.BooleanField(default=True)
     identity = models.CharField(max_length=100, blank=True, null=True, unique=True)
 
@@ -20,6 +20,7 @@ class SavingsAccountSerializer(serializers.ModelSerializer):
             "account_type",
             "account_number",
             "balance",
+            "monthly_contribution",
             "is_active",
             "identity",
             "reference",
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings', '0002_rename_user_savingsaccount_member'),
+        ('savingsdeposits', '0005_alter_savingsdeposit_transaction_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savingsdeposit',
+            index=models.Index(fields=['created_at', 'id'], name='savingsdepo_created_8832e4_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings', '0003_savingsaccount_monthly_contribution'),
+        ('savingsdeposits', '0006_savingsdeposit_savingsdepo_created_8832e4_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savingsdeposit',
+            index=models.Index(fields=['receipt_number'], name='savingsdepo_receipt_9a110c_idx'),
+        ),
+    ]
@@ -70,9 +70,11 @@ class SavingsDeposit(TimeStampedModel, UniversalIdModel, ReferenceModel):
         verbose_name_plural = "Savings Deposits"
         ordering = ["-created_at"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["savings_account", "created_at"]),
             models.Index(fields=["deposited_by", "created_at"]),
             models.Index(fields=["reference"]),
+            models.Index(fields=["receipt_number"]),
         ]
 
     def __str__(self):
@@ -1,5 +1,6 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
+from accounts.pagination import LargeTablePagination
 from accounts.permissions import IsSystemAdminOrReadOnly
 from savingsdeposits.models import SavingsDeposit
 from savingsdeposits.serializers import (
@@ -9,19 +10,18 @@ from savingsdeposits.serializers import (
 from savingsdeposits.utils import send_deposit_made_email
 from datetime import date
 from transactions.models import BulkTransactionLog
+from catalogs.registry import get_catalog
+from savings.models import SavingsAccount
+from transactions.utils.uploads import CSVImport, CSVUploadMixin
 from django.db import transaction
-from savingstypes.models import SavingsType
-import csv
-import io
-import cloudinary.uploader
 import logging
-from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
 
 class SavingsDepositListCreateView(generics.ListCreateAPIView):
-    queryset = SavingsDeposit.objects.all()
+    queryset = SavingsDeposit.objects.select_related("savings_account", "deposited_by")
+    pagination_class = LargeTablePagination
     serializer_class = SavingsDepositSerializer
     permission_classes = [IsSystemAdminOrReadOnly]
 
@@ -122,173 +122,50 @@ class BulkSavingsDepositView(generics.CreateAPIView):
         )
 
 
-class BulkSavingsDepositUploadView(generics.CreateAPIView):
-    """Upload CSV file for bulk savings deposits."""
-
-    permission_classes = [IsSystemAdminOrReadOnly]
-    serializer_class = SavingsDepositSerializer  # Added for browsable API
-
-    def post(self, request, *args, **kwargs):
-        file = request.FILES.get("file")
-        if not file:
-            return Response(
-                {"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Read CSV
-        try:
-            csv_content = file.read().decode("utf-8")
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-        except Exception as e:
-            logger.error(f"Failed to read CSV: {str(e)}")
-            return Response(
-                {"error": f"Invalid CSV file: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Get savings types for validation
-        try:
-            savings_types = SavingsType.objects.all().values_list("name", flat=True)
-        except Exception as e:
-            logger.error(f"Failed to fetch savings types: {str(e)}")
-            return Response(
-                {"error": "Failed to fetch savings types"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+class SavingsDepositImport(CSVImport):
+    transaction_type = "Savings Deposits"
+    reference_prefix = "SAVINGS-BULK"
+    storage_folder = "bulk_savings"
+    references = {"savings": (SavingsAccount, "account_number")}
+
+    def check_header(self, fieldnames):
+        self.savings_types = [
+            st for st in get_catalog().savings_type_names if f"{st} Account" in fieldnames
+        ]
+        if not self.savings_types:
+            return "CSV must include at least one '{Savings Type} Account' column."
+
+    def plan_row(self, plan):
+        for stype in self.savings_types:
+            account = plan.value(f"{stype} Account")
+            if not account or not plan.value(f"{stype} Amount"):
+                continue
+            amount = plan.amount(f"{stype} Amount", account)
+            method = plan.choice(
+                "Payment Method",
+                SavingsDeposit.PAYMENT_METHOD_CHOICES,
+                "Cash",
+                account,
             )
+            if plan.reference("savings", account, "Savings account") and amount:
+                plan.add(self.deposit, account, amount, method)
+
+    def deposit(self, account, amount, method):
+        SavingsDeposit.objects.create(
+            savings_account=self.instance("savings", account),
+            amount=amount,
+            deposited_by=self.user,
+            payment_method=method,
+            deposit_type="Individual Deposit",
+            currency="KES",
+            transaction_status="Completed",
+            is_active=True,
+        )
 
-        admin = request.user
-        today = date.today()
-        date_str = today.strftime("%Y%m%d")
-        prefix = f"SAVINGS-BULK-{date_str}"
-
-        # Initialize log
-        try:
-            log = BulkTransactionLog.objects.create(
-                admin=admin,
-                transaction_type="Savings Deposits",
-                reference_prefix=prefix,
-                success_count=0,
-                error_count=0,
-                file_name=file.name,
-            )
-        except Exception as e:
-            logger.error(f"Failed to create BulkTransactionLog: {str(e)}")
-            return Response(
-                {"error": "Failed to initialize transaction log"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-        # Upload to Cloudinary
-        try:
-            buffer = io.StringIO(csv_content)
-            upload_result = cloudinary.uploader.upload(
-                buffer,
-                resource_type="raw",
-                public_id=f"bulk_savings/{prefix}_{file.name}",
-                format="csv",
-            )
-            log.cloudinary_url = upload_result["secure_url"]
-            log.save()
-        except Exception as e:
-            logger.error(f"Cloudinary upload failed: {str(e)}")
-            return Response(
-                {"error": "Failed to upload file to storage"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-        success_count = 0
-        error_count = 0
-        errors = []
-
-        with transaction.atomic():
-            for index, row in enumerate(reader, 1):
-                try:
-                    # Process each savings type
-                    deposits_data = []
-                    for stype in savings_types:
-                        amount_key = f"{stype} Amount"
-                        account_key = f"{stype} Account"
-                        if amount_key in row and row[amount_key] and row[account_key]:
-                            try:
-                                amount = float(row[amount_key])
-                                if amount < Decimal("0.01"):
-                                    raise ValueError("Amount must be greater than 0")
-                                deposit_data = {
-                                    "savings_account": row[account_key],
-                                    "amount": amount,
-                                    "payment_method": row.get("Payment Method", "Cash"),
-                                    "deposit_type": "Individual Deposit",
-                                    "currency": "KES",
-                                    "transaction_status": "Completed",
-                                    "is_active": True,
-                                }
-                                deposits_data.append(deposit_data)
-                            except ValueError as e:
-                                error_count += 1
-                                errors.append(
-                                    {
-                                        "row": index,
-                                        "account": row.get(account_key),
-                                        "error": str(e),
-                                    }
-                                )
-                                continue
-
-                    # Validate and save deposits
-                    for deposit_data in deposits_data:
-                        deposit_serializer = SavingsDepositSerializer(data=deposit_data)
-                        if deposit_serializer.is_valid():
-                            deposit = deposit_serializer.save(deposited_by=admin)
-                            success_count += 1
-                            account_owner = deposit.savings_account.member
-
-                        else:
-                            error_count += 1
-                            errors.append(
-                                {
-                                    "row": index,
-                                    "account": deposit_data["savings_account"],
-                                    "error": str(deposit_serializer.errors),
-                                }
-                            )
-
-                except Exception as e:
-                    error_count += 1
-                    errors.append({"row": index, "error": str(e)})
 
-            # Update log
-            try:
-                log.success_count = success_count
-                log.error_count = error_count
-                log.save()
-            except Exception as e:
-                logger.error(f"Failed to update BulkTransactionLog: {str(e)}")
-                return Response(
-                    {"error": "Failed to update transaction log"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+class BulkSavingsDepositUploadView(CSVUploadMixin, generics.CreateAPIView):
+    """Upload CSV file for bulk savings deposits."""
 
-        # Return response
-        response_data = {
-            "success_count": success_count,
-            "error_count": error_count,
-            "errors": errors,
-            "log_reference": log.reference_prefix,
-            "cloudinary_url": log.cloudinary_url,
-        }
-        try:
-            return Response(
-                response_data,
-                status=(
-                    status.HTTP_201_CREATED
-                    if success_count > 0
-                    else status.HTTP_400_BAD_REQUEST
-                ),
-            )
-        except Exception as e:
-            logger.error(f"Failed to return response: {str(e)}")
-            return Response(
-                {"error": "Internal server error"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+    permission_classes = [IsSystemAdminOrReadOnly]
+    serializer_class = SavingsDepositSerializer  # Added for browsable API
+    import_class = SavingsDepositImport
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from transactions.models import DownloadLog, BulkTransactionLog
+from transactions.models import AnalyticsExport, DownloadLog, BulkTransactionLog
 
 admin.site.register(DownloadLog)
 admin.site.register(BulkTransactionLog)
+admin.site.register(AnalyticsExport)
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.utils.analytics_export import (
+    EXPORT_TABLES,
+    EXTENSIONS,
+    ExportInProgress,
+    TableExport,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the transaction tables and journal entries created since the "
+        "last export to Parquet (or Arrow IPC) files partitioned by month"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables", nargs="*", default=list(EXPORT_TABLES), choices=list(EXPORT_TABLES)
+        )
+        parser.add_argument("--format", choices=list(EXTENSIONS), default="parquet")
+        parser.add_argument("--output-dir", type=str, default=settings.ANALYTICS_EXPORT_DIR)
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        failed = []
+        for table in options["tables"]:
+            export = TableExport(
+                table,
+                options["output_dir"],
+                options["format"],
+                chunk_size=options["chunk_size"],
+            )
+            try:
+                export.run()
+            except ExportInProgress:
+                self.stdout.write(self.style.WARNING(f"{table}: already being exported"))
+                continue
+            except Exception as e:
+                failed.append(table)
+                self.stdout.write(self.style.ERROR(f"{table}: {type(e).__name__}: {e}"))
+                continue
+            self.stdout.write(
+                f"{table}: {export.export.row_count} rows in {len(export.export.files)} files"
+            )
+
+        if failed:
+            raise CommandError(f"Export failed for {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS(f"Exported to {options['output_dir']}"))
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import cloudinary.uploader
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils.text import slugify
+
+from transactions.utils.member_summary import load_member_year_data, member_report
+from transactions.utils.pdf import render_pdf
+from transactions.utils.summary_report import MEMBER_REPORT, render_html
+
+User = get_user_model()
+
+UNASSIGNED = "Unassigned"
+
+
+def archive_name(employer, year):
+    """
+    Employers whose names slugify alike ("ABC Ltd", "ABC Ltd.") still get
+    their own archive: the slug is followed by a hash of the exact name.
+    """
+    digest = hashlib.sha1(employer.encode()).hexdigest()[:8]
+    return f"{slugify(employer) or 'employer'}_{digest}_{year}.zip"
+
+
+def render_statement(task):
+    """
+    Pool entry point: render one member's statement and store it. Returns the
+    member's manifest entry.
+    """
+    entry, html, path, storage, folder = task
+    try:
+        pdf_bytes = render_pdf(MEMBER_REPORT, html, landscape=True)
+        Path(path).write_bytes(pdf_bytes)
+        entry["bytes"] = len(pdf_bytes)
+        entry["sha256"] = hashlib.sha256(pdf_bytes).hexdigest()
+        if storage == "cloudinary":
+            upload_result = cloudinary.uploader.upload(
+                path,
+                resource_type="raw",
+                public_id=f"{folder}/{Path(path).stem}",
+                format="pdf",
+            )
+            entry["url"] = upload_result["secure_url"]
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    return entry
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate every member's yearly summary PDF, with a manifest and a zip "
+        "archive per employer. Re-running continues an interrupted run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, default=datetime.now().year - 1)
+        parser.add_argument("--output-dir", type=str, default=None)
+        parser.add_argument(
+            "--storage", choices=["local", "cloudinary"], default="local"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=200,
+            help="Members whose summaries are loaded together",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=0,
+            help="Render processes (default: one per CPU; 1 renders in-process)",
+        )
+
+    def handle(self, *args, **options):
+        year = options["year"]
+        self.storage = options["storage"]
+        self.folder = f"annual_statements/{year}"
+        self.output_dir = Path(options["output_dir"] or f"statements/{year}")
+        self.pdf_dir = self.output_dir / "pdfs"
+        self.pdf_dir.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_path = self.output_dir / "manifest.jsonl"
+
+        done = self.completed_members()
+        if done:
+            self.stdout.write(f"Resuming: {len(done)} statements already generated")
+        pending = list(
+            User.objects.filter(is_member=True)
+            .exclude(member_no__in=done)
+            .order_by("member_no")
+        )
+        self.stdout.write(f"Generating {len(pending)} statements for {year}...")
+
+        workers = options["workers"] or os.cpu_count() or 1
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            ) as pool:
+                for tasks in self.batches(pending, year, options["batch_size"]):
+                    futures = [pool.submit(render_statement, task) for task in tasks]
+                    for future in as_completed(futures):
+                        self.record(future.result())
+        else:
+            for tasks in self.batches(pending, year, options["batch_size"]):
+                for task in tasks:
+                    self.record(render_statement(task))
+
+        manifest = self.finish(year)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{manifest['statements']} statements in {len(manifest['archives'])} "
+                f"archives, {len(manifest['failures'])} failed. "
+                f"Manifest written to {self.output_dir / 'manifest.json'}"
+            )
+        )
+
+    def batches(self, members, year, batch_size):
+        """Render tasks, one batch of members at a time, built in this process."""
+        for start in range(0, len(members), batch_size):
+            batch = members[start:start + batch_size]
+            fetched = load_member_year_data(
+                [member.pk for member in batch], year, detail_months=()
+            )
+            tasks = []
+            for member in batch:
+                report = member_report(member, year, fetched[member.pk])
+                entry = {
+                    "member_no": member.member_no,
+                    "name": f"{member.first_name} {member.last_name}".strip(),
+                    "employer": member.employer or UNASSIGNED,
+                    "file": f"pdfs/{member.member_no}_Summary_{year}.pdf",
+                }
+                tasks.append((
+                    entry,
+                    render_html(report),
+                    str(self.output_dir / entry["file"]),
+                    self.storage,
+                    self.folder,
+                ))
+            yield tasks
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+    def entries(self):
+        if not self.checkpoint_path.exists():
+            return []
+        with self.checkpoint_path.open() as fh:
+            return [json.loads(line) for line in fh if line.strip()]
+
+    def completed_members(self):
+        """Members whose statement was generated by an earlier (partial) run."""
+        return {entry["member_no"] for entry in self.entries() if "error" not in entry}
+
+    def record(self, entry):
+        with self.checkpoint_path.open("a") as fh:
+            fh.write(json.dumps(entry) + "\n")
+        if "error" in entry:
+            self.stdout.write(self.style.ERROR(f"  {entry['member_no']}: {entry['error']}"))
+
+    # ------------------------------------------------------------------
+    # Manifest and archives
+    # ------------------------------------------------------------------
+    def finish(self, year):
+        statements = {}
+        failures = {}
+        for entry in self.entries():
+            if "error" in entry:
+                failures[entry["member_no"]] = entry
+            else:
+                statements[entry["member_no"]] = entry
+                failures.pop(entry["member_no"], None)
+
+        by_employer = defaultdict(list)
+        for entry in statements.values():
+            by_employer[entry["employer"]].append(entry)
+
+        archive_dir = self.output_dir / "archives"
+        archive_dir.mkdir(exist_ok=True)
+        archives = []
+        for employer, entries in sorted(by_employer.items()):
+            entries.sort(key=lambda entry: entry["member_no"])
+            path = archive_dir / archive_name(employer, year)
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for entry in entries:
+                    archive.write(self.output_dir / entry["file"], Path(entry["file"]).name)
+            archive_entry = {
+                "employer": employer,
+                "file": str(path.relative_to(self.output_dir)),
+                "members": [entry["member_no"] for entry in entries],
+            }
+            if self.storage == "cloudinary":
+                upload_result = cloudinary.uploader.upload(
+                    str(path),
+                    resource_type="raw",
+                    public_id=f"{self.folder}/{path.stem}",
+                    format="zip",
+                )
+                archive_entry["url"] = upload_result["secure_url"]
+            archives.append(archive_entry)
+
+        manifest = {
+            "year": year,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "storage": self.storage,
+            "statements": len(statements),
+            "members": sorted(statements.values(), key=lambda entry: entry["member_no"]),
+            "failures": sorted(failures.values(), key=lambda entry: entry["member_no"]),
+            "archives": archives,
+        }
+        (self.output_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        return manifest
@@ -0,0 +1,56 @@
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.utils.account_export import WRITERS
+from transactions.utils.payroll_deductions import PayrollDeductions
+
+
+class Command(BaseCommand):
+    help = (
+        "Write each employer's payroll deduction file for a month, in the "
+        "combined bulk upload layout"
+    )
+
+    def add_arguments(self, parser):
+        now = datetime.now()
+        parser.add_argument("--year", type=int, default=now.year)
+        parser.add_argument("--month", type=int, default=now.month)
+        parser.add_argument("--employer", type=str, default=None)
+        parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+        parser.add_argument(
+            "--output-dir", type=str, default=None,
+            help="Default: payroll_deductions/YYYY-MM",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            schedule = PayrollDeductions(
+                options["year"], options["month"], options["employer"]
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output_dir = Path(
+            options["output_dir"]
+            or f"payroll_deductions/{schedule.year}-{schedule.month:02d}"
+        )
+        output_dir.mkdir(parents=True, exist_ok=True)
+        files = schedule.files()
+        for remittance in files.values():
+            path = output_dir / f"{remittance.file_name}.{options['format']}"
+            with open(path, "wb") as fh:
+                WRITERS[options["format"]](remittance, fh)
+            summary = remittance.summary()
+            self.stdout.write(
+                f"{summary['employer']}: {summary['members']} members, loans "
+                f"{summary['loans']}, savings {summary['savings']}, fees "
+                f"{summary['fees']}, total {summary['total']} -> {path}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {len(files)} files for {schedule.year}-{schedule.month:02d} "
+                f"to {output_dir}"
+            )
+        )
@@ -0,0 +1,723 @@
+import io
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, time as dtime
+from decimal import Decimal, ROUND_HALF_UP
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from feespayments.models import FeePayment
+from feetypes.models import FeeType
+from finances.models import GLAccount, JournalEntry
+from guaranteerequests.models import GuaranteeRequest
+from guarantorprofile.models import GuarantorProfile
+from loanapplications.calculators import reducing_fixed_term
+from loanapplications.models import LoanApplication
+from loandisbursements.models import LoanDisbursement
+from loanintereststamarind.models import TamarindLoanInterest
+from loanrepayments.models import LoanRepayment
+from loans.models import LoanAccount
+from loantypes.models import LoanType
+from memberfees.models import MemberFee
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+from savingstypes.models import SavingsType
+from savingswithdrawals.models import SavingsWithdrawal
+from transactions.models import BulkTransactionLog, DownloadLog
+from ventures.models import VentureAccount
+from venturedeposits.models import VentureDeposit
+from venturepayments.models import VenturePayment
+from venturetypes.models import VentureType
+
+User = get_user_model()
+
+PREFIX = "SYN"
+ADMIN_MEMBER_NO = f"{PREFIX}ADMIN"
+CENT = Decimal("0.01")
+
+FIRST_NAMES = [
+    "Achieng", "Baraka", "Chebet", "Daudi", "Esther", "Faith", "Gitau", "Halima",
+    "Imani", "Juma", "Kamau", "Lilian", "Mwangi", "Njeri", "Otieno", "Wanjiru",
+]
+LAST_NAMES = [
+    "Kariuki", "Odhiambo", "Mutua", "Wambui", "Kiprop", "Omondi", "Njoroge",
+    "Achieng", "Mohamed", "Kilonzo", "Cheruiyot", "Muthoni",
+]
+EMPLOYERS = [
+    "Tamarind Group", "Nairobi County", "Kenya Power", "Safari Logistics",
+    "Coast Hospital",
+]
+
+# Used only when the catalog is empty, so a fresh database gets a usable SACCO
+DEFAULT_SAVINGS_TYPES = [("Member Deposits", True), ("Share Capital", False)]
+DEFAULT_VENTURE_TYPES = ["Investment Venture"]
+DEFAULT_LOAN_TYPES = [("Development Loan", Decimal("12")), ("Emergency Loan", Decimal("10"))]
+DEFAULT_FEE_TYPES = [
+    ("Registration Fee", Decimal("1000"), True),
+    ("Welfare Contribution", Decimal("500"), False),
+]
+
+TIMESTAMPED_MODELS = [
+    User, GuarantorProfile, SavingsAccount, VentureAccount, LoanAccount, MemberFee,
+    LoanApplication, GuaranteeRequest, SavingsDeposit, SavingsWithdrawal,
+    VentureDeposit, VenturePayment, LoanDisbursement, LoanRepayment,
+    TamarindLoanInterest, FeePayment, JournalEntry,
+]
+
+
+@contextmanager
+def manual_timestamps(models):
+    """
+    Let bulk_create keep the historical created_at/updated_at we assign instead
+    of stamping everything with now().
+    """
+    saved = []
+    for model in models:
+        for name in ("created_at", "updated_at"):
+            try:
+                field = model._meta.get_field(name)
+            except Exception:
+                continue
+            saved.append((field, field.auto_now, field.auto_now_add))
+            field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def money(value):
+    return Decimal(value).quantize(CENT, ROUND_HALF_UP)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic SACCO (members, accounts, years of "
+        "transactions, GL entries and guarantee graphs) for benchmarking"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=200)
+        parser.add_argument("--years", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--end",
+            type=str,
+            default=None,
+            help="Last transaction date (YYYY-MM-DD). Defaults to today.",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--chunk",
+            type=int,
+            default=100,
+            help="Members generated and written per chunk",
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete previously generated synthetic data first",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        if options["flush"]:
+            self.flush()
+        elif User.objects.filter(member_no__startswith=PREFIX).exists():
+            raise CommandError("Synthetic data already present. Re-run with --flush.")
+
+        if options["members"] < 1 or options["years"] < 1:
+            raise CommandError("--members and --years must be positive")
+
+        self.rng = random.Random(options["seed"])
+        self.counter = 0
+        self.end = (
+            datetime.strptime(options["end"], "%Y-%m-%d").date()
+            if options["end"]
+            else timezone.localdate()
+        )
+        first = self.end.replace(day=1) - relativedelta(months=options["years"] * 12 - 1)
+        self.months = [first + relativedelta(months=i) for i in range(options["years"] * 12)]
+
+        call_command("setup_coa", stdout=io.StringIO())
+        call_command("setup_gl", stdout=io.StringIO())
+        self.gl = {acc.code: acc for acc in GLAccount.objects.all()}
+        self.load_catalog()
+
+        with manual_timestamps(TIMESTAMPED_MODELS), transaction.atomic():
+            self.admin = self.create_admin()
+            members = self.create_members(options["members"])
+            self.profiles = self.create_profiles(members)
+            self.committed = {}
+            self.guaranteed_savings = {}
+
+            chunk = options["chunk"]
+            for start in range(0, len(members), chunk):
+                self.generate_chunk(members[start:start + chunk], members)
+                self.stdout.write(
+                    f"Generated members {start + 1}-{min(start + chunk, len(members))}"
+                )
+
+            for profile in self.profiles.values():
+                profile.committed_guarantee_amount = money(
+                    self.committed.get(profile.member_id, 0)
+                )
+                profile.max_guarantee_amount = money(
+                    self.guaranteed_savings.get(profile.member_id, 0)
+                )
+            GuarantorProfile.objects.bulk_update(
+                list(self.profiles.values()),
+                ["committed_guarantee_amount", "max_guarantee_amount"],
+                batch_size=self.batch_size,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Synthetic SACCO ready: {len(members)} members, "
+                f"{len(self.months)} months ending {self.end:%Y-%m-%d}, "
+                f"seed {options['seed']}"
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # Identity helpers (deterministic for a given seed)
+    # ------------------------------------------------------------------
+    def next_id(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def next_ref(self):
+        self.counter += 1
+        return f"{PREFIX}{self.counter:09d}"
+
+    def moment(self, month, earliest=None):
+        day = self.rng.randint(1, 28)
+        stamp = timezone.make_aware(
+            datetime.combine(
+                month.replace(day=day),
+                dtime(self.rng.randint(8, 16), self.rng.randint(0, 59)),
+            )
+        )
+        if earliest and stamp <= earliest:
+            stamp = earliest + relativedelta(minutes=1)
+        return stamp
+
+    def stamped(self, obj, created_at):
+        obj.id = self.next_id()
+        obj.reference = self.next_ref()
+        obj.created_at = obj.updated_at = created_at
+        return obj
+
+    # ------------------------------------------------------------------
+    # Catalog, admin and members
+    # ------------------------------------------------------------------
+    def load_catalog(self):
+        if not SavingsType.objects.exists():
+            for name, guaranteed in DEFAULT_SAVINGS_TYPES:
+                SavingsType.objects.create(name=name, is_guaranteed=guaranteed)
+        if not VentureType.objects.exists():
+            for name in DEFAULT_VENTURE_TYPES:
+                VentureType.objects.create(name=name)
+        if not LoanType.objects.exists():
+            for name, rate in DEFAULT_LOAN_TYPES:
+                LoanType.objects.create(name=name, description=name, interest_rate=rate)
+        if not FeeType.objects.exists():
+            for name, amount, is_income in DEFAULT_FEE_TYPES:
+                FeeType.objects.create(
+                    name=name, standard_amount=amount, is_income=is_income
+                )
+
+        # Ordered by name so the generated data does not depend on insert order
+        self.savings_types = list(SavingsType.objects.order_by("name"))
+        self.venture_types = list(VentureType.objects.order_by("name"))
+        self.loan_types = list(LoanType.objects.order_by("name"))
+        self.fee_types = list(FeeType.objects.filter(is_active=True).order_by("name"))
+
+    def create_admin(self):
+        created_at = timezone.make_aware(
+            datetime.combine(self.months[0] - relativedelta(days=30), dtime(9))
+        )
+        admin = self.stamped(
+            User(
+                member_no=ADMIN_MEMBER_NO,
+                first_name="Synthetic",
+                last_name="Admin",
+                email="synthetic.admin@example.com",
+                password=make_password(None),
+                is_member=False,
+                is_system_admin=True,
+                is_approved=True,
+            ),
+            created_at,
+        )
+        User.objects.bulk_create([admin])
+        return admin
+
+    def create_members(self, count):
+        password = make_password("synthetic")
+        members = []
+        for i in range(1, count + 1):
+            first = self.rng.choice(FIRST_NAMES)
+            last = self.rng.choice(LAST_NAMES)
+            joined = self.months[0] - relativedelta(days=self.rng.randint(1, 365))
+            members.append(
+                self.stamped(
+                    User(
+                        member_no=f"{PREFIX}{i:06d}",
+                        first_name=first,
+                        last_name=last,
+                        email=f"{first}.{last}.{i}@example.com".lower(),
+                        phone=f"07{self.rng.randint(10000000, 99999999)}",
+                        employer=self.rng.choice(EMPLOYERS),
+                        employment_type="Permanent",
+                        gender=self.rng.choice(["Male", "Female"]),
+                        password=password,
+                        is_member=True,
+                        is_approved=True,
+                    ),
+                    timezone.make_aware(datetime.combine(joined, dtime(9))),
+                )
+            )
+        User.objects.bulk_create(members, batch_size=self.batch_size)
+        return members
+
+    def create_profiles(self, members):
+        profiles = {
+            member.id: self.stamped(
+                GuarantorProfile(member=member, is_eligible=True), member.created_at
+            )
+            for member in members
+        }
+        GuarantorProfile.objects.bulk_create(
+            list(profiles.values()), batch_size=self.batch_size
+        )
+        return profiles
+
+    # ------------------------------------------------------------------
+    # Per-chunk generation
+    # ------------------------------------------------------------------
+    def generate_chunk(self, chunk, all_members):
+        rows = {
+            "savings_accounts": [], "venture_accounts": [], "loan_accounts": [],
+            "member_fees": [], "applications": [], "guarantees": [],
+            "savings_deposits": [], "savings_withdrawals": [], "venture_deposits": [],
+            "venture_payments": [], "disbursements": [], "repayments": [],
+            "interests": [], "fee_payments": [], "journal": [],
+        }
+        for member in chunk:
+            self.generate_member(member, rows, all_members)
+
+        # Parents first, then children, so FKs resolve
+        for key, model in [
+            ("savings_accounts", SavingsAccount),
+            ("venture_accounts", VentureAccount),
+            ("loan_accounts", LoanAccount),
+            ("member_fees", MemberFee),
+            ("applications", LoanApplication),
+            ("guarantees", GuaranteeRequest),
+            ("savings_deposits", SavingsDeposit),
+            ("savings_withdrawals", SavingsWithdrawal),
+            ("venture_deposits", VentureDeposit),
+            ("venture_payments", VenturePayment),
+            ("disbursements", LoanDisbursement),
+            ("repayments", LoanRepayment),
+            ("interests", TamarindLoanInterest),
+            ("fee_payments", FeePayment),
+            ("journal", JournalEntry),
+        ]:
+            model.objects.bulk_create(rows[key], batch_size=self.batch_size)
+
+    def post(self, rows, instance, transaction_type, dr, cr, posted_by=None):
+        """Mirror of finances.utils.post_to_gl for bulk-created rows."""
+        for code, debit, credit in ((dr, instance.amount, 0), (cr, 0, instance.amount)):
+            rows["journal"].append(
+                JournalEntry(
+                    id=self.next_id(),
+                    transaction_date=timezone.localtime(instance.created_at).date(),
+                    description=f"{transaction_type} {instance.reference}",
+                    gl_account=self.gl[code],
+                    debit=debit,
+                    credit=credit,
+                    reference_id=str(instance.id),
+                    source_model=instance.__class__.__name__,
+                    posted_by=posted_by,
+                    created_at=instance.created_at,
+                    updated_at=instance.created_at,
+                )
+            )
+
+    def generate_member(self, member, rows, all_members):
+        rng = self.rng
+        n = int(member.member_no[len(PREFIX):])
+        opened = member.created_at
+
+        # --- Accounts -------------------------------------------------
+        savings = []
+        for k, stype in enumerate(self.savings_types):
+            acc = self.stamped(
+                SavingsAccount(
+                    member=member,
+                    account_type=stype,
+                    account_number=f"{PREFIX}S{n:06d}{k:02d}",
+                    identity=f"{member.member_no}-{PREFIX}S{n:06d}{k:02d}".lower(),
+                    balance=Decimal("0"),
+                ),
+                opened,
+            )
+            # Typical monthly contribution for this member/account
+            acc._base = Decimal(rng.choice([500, 1000, 1500, 2000, 3000, 5000]))
+            savings.append(acc)
+        ventures = []
+        for k, vtype in enumerate(self.venture_types):
+            ventures.append(
+                self.stamped(
+                    VentureAccount(
+                        member=member,
+                        venture_type=vtype,
+                        account_number=f"{PREFIX}V{n:06d}{k:02d}",
+                        identity=f"{member.member_no}-{PREFIX}V{n:06d}{k:02d}".lower(),
+                        balance=Decimal("0"),
+                    ),
+                    opened,
+                )
+            )
+        loans = []
+        for k, ltype in enumerate(self.loan_types):
+            loans.append(
+                self.stamped(
+                    LoanAccount(
+                        member=member,
+                        loan_type=ltype,
+                        account_number=f"{PREFIX}L{n:06d}{k:02d}",
+                        identity=f"{member.member_no}-{PREFIX}L{n:06d}{k:02d}".lower(),
+                        outstanding_balance=Decimal("0"),
+                        interest_accrued=Decimal("0"),
+                    ),
+                    opened,
+                )
+            )
+        fees = []
+        for k, ftype in enumerate(self.fee_types):
+            fees.append(
+                self.stamped(
+                    MemberFee(
+                        member=member,
+                        fee_type=ftype,
+                        amount=ftype.standard_amount,
+                        remaining_balance=ftype.standard_amount,
+                        account_number=f"{PREFIX}F{n:06d}{k:02d}",
+                    ),
+                    opened,
+                )
+            )
+
+        # --- Loan plan ------------------------------------------------
+        loan = None
+        if loans and rng.random() < 0.5:
+            loan_acc = rng.choice(loans)
+            start_index = rng.randrange(0, max(1, len(self.months) * 2 // 3))
+            principal = Decimal(rng.randrange(20_000, 500_001, 5_000))
+            term = rng.choice([12, 18, 24, 36])
+            loan = {
+                "account": loan_acc,
+                "start": start_index,
+                "principal": principal,
+                "term": term,
+                "installment": money(principal / term),
+            }
+
+        # --- Monthly activity -----------------------------------------
+        for m_index, month in enumerate(self.months):
+            for acc in savings:
+                if rng.random() < 0.9:
+                    amount = money(acc._base * Decimal(rng.uniform(0.8, 1.2)))
+                    dep = self.stamped(
+                        SavingsDeposit(
+                            savings_account=acc,
+                            deposited_by=self.admin,
+                            amount=amount,
+                            payment_method=rng.choice(["Cash", "Mpesa", "Bank Transfer"]),
+                            deposit_type="Payroll Deduction" if rng.random() < 0.6 else "Individual Deposit",
+                            transaction_status="Completed",
+                            identity=f"{PREFIX}DEP{self.counter + 1:09d}",
+                        ),
+                        self.moment(month),
+                    )
+                    acc.balance += amount
+                    rows["savings_deposits"].append(dep)
+                    self.post(rows, dep, "savings_deposit", "1010", "2010")
+
+                if acc.balance > 10_000 and rng.random() < 0.02:
+                    amount = money(acc.balance * Decimal(rng.uniform(0.1, 0.3)))
+                    wd = self.stamped(
+                        SavingsWithdrawal(
+                            savings_account=acc,
+                            withdrawn_by=member,
+                            amount=amount,
+                            payment_method="Bank Transfer",
+                            transaction_status="Completed",
+                            identity=f"{PREFIX}WDR{self.counter + 1:09d}",
+                        ),
+                        self.moment(month),
+                    )
+                    acc.balance -= amount
+                    rows["savings_withdrawals"].append(wd)
+                    self.post(rows, wd, "savings_withdrawal", "2010", "1010")
+
+            for acc in ventures:
+                if rng.random() < 0.3:
+                    amount = money(rng.randrange(500, 5001, 100))
+                    vd = self.stamped(
+                        VentureDeposit(
+                            venture_account=acc,
+                            deposited_by=self.admin,
+                            amount=amount,
+                            identity=f"{PREFIX}VD{self.counter + 1:09d}",
+                        ),
+                        self.moment(month),
+                    )
+                    acc.balance += amount
+                    rows["venture_deposits"].append(vd)
+                    self.post(rows, vd, "venture_deposit", "1010", "2020")
+                if acc.balance > 2_000 and rng.random() < 0.1:
+                    amount = money(acc.balance * Decimal(rng.uniform(0.2, 0.5)))
+                    created_at = self.moment(month)
+                    vp = self.stamped(
+                        VenturePayment(
+                            venture_account=acc,
+                            paid_by=self.admin,
+                            amount=amount,
+                            transaction_status="Completed",
+                            payment_date=timezone.localtime(created_at).date(),
+                            identity=f"{PREFIX}VP{self.counter + 1:09d}",
+                        ),
+                        created_at,
+                    )
+                    acc.balance -= amount
+                    rows["venture_payments"].append(vp)
+                    self.post(rows, vp, "venture_payment", "2020", "1010", self.admin)
+
+            if loan:
+                self.loan_month(loan, m_index, month, rows, member, all_members)
+
+            for fee in fees:
+                if fee.remaining_balance > 0 and rng.random() < 0.25:
+                    amount = min(
+                        fee.remaining_balance,
+                        money(fee.amount / rng.choice([1, 2])),
+                    )
+                    fp = self.stamped(
+                        FeePayment(
+                            member_fee=fee,
+                            amount=amount,
+                            payment_method=rng.choice(["Cash", "Mpesa"]),
+                            receipt_number=f"{PREFIX}RCPT{self.counter + 1:09d}",
+                            paid_by=self.admin,
+                        ),
+                        self.moment(month),
+                    )
+                    fee.remaining_balance -= amount
+                    fee.is_paid = fee.remaining_balance <= 0
+                    rows["fee_payments"].append(fp)
+                    cr = "4020" if fee.fee_type.is_income else "2030"
+                    self.post(rows, fp, "fee_payment", "1010", cr, self.admin)
+
+        # Guarantee balances follow principal repaid
+        if loan and loan.get("guarantees"):
+            repaid_ratio = min(
+                Decimal("1"), loan["principal_repaid"] / loan["principal"]
+            )
+            for guarantee in loan["guarantees"]:
+                guarantee.current_balance = money(
+                    guarantee.guaranteed_amount * (1 - repaid_ratio)
+                )
+                profile_member = guarantee.guarantor.member_id
+                self.committed[profile_member] = (
+                    self.committed.get(profile_member, 0) + guarantee.current_balance
+                )
+
+        for acc in savings:
+            if acc.account_type.is_guaranteed:
+                self.guaranteed_savings[member.id] = (
+                    self.guaranteed_savings.get(member.id, 0) + acc.balance
+                )
+
+        rows["savings_accounts"].extend(savings)
+        rows["venture_accounts"].extend(ventures)
+        rows["loan_accounts"].extend(loans)
+        rows["member_fees"].extend(fees)
+
+    def loan_month(self, loan, m_index, month, rows, member, all_members):
+        rng = self.rng
+        acc = loan["account"]
+        rate = acc.loan_type.interest_rate
+
+        if m_index == loan["start"]:
+            created_at = self.moment(month)
+            disb = self.stamped(
+                LoanDisbursement(
+                    loan_account=acc,
+                    amount=loan["principal"],
+                    transaction_status="Completed",
+                    disbursed_by=self.admin,
+                    identity=f"{PREFIX}LD{self.counter + 1:09d}",
+                ),
+                created_at,
+            )
+            acc.outstanding_balance += loan["principal"]
+            rows["disbursements"].append(disb)
+            self.post(rows, disb, "loan_disbursement", "1020", "1010", self.admin)
+            loan["disbursed_at"] = created_at
+            loan["principal_repaid"] = Decimal("0")
+            self.loan_application(loan, member, all_members, rows)
+            return
+
+        if m_index < loan["start"] or acc.outstanding_balance <= 0:
+            return
+
+        interest = money(acc.outstanding_balance * rate / Decimal("1200"))
+        if interest > 0:
+            accrual = self.stamped(
+                TamarindLoanInterest(
+                    loan_account=acc, amount=interest, entered_by=self.admin
+                ),
+                self.moment(month),
+            )
+            acc.interest_accrued += interest
+            rows["interests"].append(accrual)
+            self.post(rows, accrual, "loan_interest_accrual", "1030", "4010", self.admin)
+
+        # Roughly one in twenty installments is missed, which gives arrears to report on
+        if rng.random() < 0.05:
+            return
+
+        if acc.interest_accrued > 0:
+            paid = self.stamped(
+                LoanRepayment(
+                    loan_account=acc,
+                    paid_by=self.admin,
+                    amount=acc.interest_accrued,
+                    payment_method="Bank Transfer",
+                    repayment_type="Interest Payment",
+                    transaction_status="Completed",
+                    identity=f"{PREFIX}LRI{self.counter + 1:09d}",
+                ),
+                self.moment(month),
+            )
+            acc.interest_accrued = Decimal("0")
+            rows["repayments"].append(paid)
+            self.post(rows, paid, "loan_repayment_interest", "1010", "1030", self.admin)
+
+        amount = min(loan["installment"], acc.outstanding_balance)
+        paid = self.stamped(
+            LoanRepayment(
+                loan_account=acc,
+                paid_by=self.admin,
+                amount=amount,
+                payment_method="Bank Transfer",
+                repayment_type="Regular Repayment",
+                transaction_status="Completed",
+                identity=f"{PREFIX}LR{self.counter + 1:09d}",
+            ),
+            self.moment(month),
+        )
+        acc.outstanding_balance -= amount
+        loan["principal_repaid"] += amount
+        if acc.outstanding_balance <= 0:
+            acc.outstanding_balance = Decimal("0")
+            acc.is_active = False
+        rows["repayments"].append(paid)
+        self.post(rows, paid, "loan_repayment_principal", "1010", "1020", self.admin)
+
+    def loan_application(self, loan, member, all_members, rows):
+        rng = self.rng
+        acc = loan["account"]
+        start_date = timezone.localtime(loan["disbursed_at"]).date()
+        projection = reducing_fixed_term(
+            principal=loan["principal"],
+            annual_rate=acc.loan_type.interest_rate,
+            term_months=loan["term"],
+            start_date=start_date,
+        )
+        self_guaranteed = money(loan["principal"] * Decimal(rng.uniform(0.2, 0.6)))
+        application = self.stamped(
+            LoanApplication(
+                member=member,
+                product=acc.loan_type,
+                requested_amount=loan["principal"],
+                repayment_amount=Decimal(projection["total_repayment"]),
+                total_interest=Decimal(projection["total_interest"]),
+                calculation_mode="fixed_term",
+                term_months=loan["term"],
+                monthly_payment=Decimal(projection["monthly_payment"]),
+                start_date=start_date,
+                projection_snapshot=projection,
+                self_guaranteed_amount=self_guaranteed,
+                status="Disbursed",
+                loan_account=acc,
+            ),
+            loan["disbursed_at"] - relativedelta(days=7),
+        )
+        rows["applications"].append(application)
+
+        # The remainder is covered by one to three other members
+        others = [m for m in rng.sample(all_members, min(4, len(all_members))) if m.id != member.id]
+        guarantors = others[: rng.randint(1, 3)]
+        remainder = loan["principal"] - self_guaranteed
+        loan["guarantees"] = []
+        for guarantor in guarantors:
+            guaranteed = money(remainder / len(guarantors))
+            request = self.stamped(
+                GuaranteeRequest(
+                    member=member,
+                    loan_application=application,
+                    guarantor=self.profiles[guarantor.id],
+                    guaranteed_amount=guaranteed,
+                    current_balance=guaranteed,
+                    status="Accepted",
+                ),
+                loan["disbursed_at"] - relativedelta(days=3),
+            )
+            rows["guarantees"].append(request)
+            loan["guarantees"].append(request)
+
+    # ------------------------------------------------------------------
+    # Cleanup
+    # ------------------------------------------------------------------
+    def flush(self):
+        members = User.objects.filter(member_no__startswith=PREFIX)
+        with transaction.atomic():
+            transaction_models = [
+                (SavingsDeposit, "savings_account__member__in"),
+                (SavingsWithdrawal, "savings_account__member__in"),
+                (VentureDeposit, "venture_account__member__in"),
+                (VenturePayment, "venture_account__member__in"),
+                (LoanDisbursement, "loan_account__member__in"),
+                (LoanRepayment, "loan_account__member__in"),
+                (TamarindLoanInterest, "loan_account__member__in"),
+                (FeePayment, "member_fee__member__in"),
+            ]
+            for model, lookup in transaction_models:
+                qs = model.objects.filter(**{lookup: members})
+                ids = [str(pk) for pk in qs.values_list("id", flat=True)]
+                for start in range(0, len(ids), self.batch_size):
+                    JournalEntry.objects.filter(
+                        source_model=model.__name__,
+                        reference_id__in=ids[start:start + self.batch_size],
+                    ).delete()
+                qs.delete()
+            GuaranteeRequest.objects.filter(member__in=members).delete()
+            LoanApplication.objects.filter(member__in=members).delete()
+            BulkTransactionLog.objects.filter(admin__in=members).delete()
+            DownloadLog.objects.filter(admin__in=members).delete()
+            deleted = members.count()
+            members.delete()
+        self.stdout.write(f"Flushed {deleted} synthetic users and their records")
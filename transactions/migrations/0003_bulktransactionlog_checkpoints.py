@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_bulktransactionlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulktransactionlog',
+            name='errors',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='bulktransactionlog',
+            name='file_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='bulktransactionlog',
+            name='last_row',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bulktransactionlog',
+            name='status',
+            field=models.CharField(choices=[('Processing', 'Processing'), ('Completed', 'Completed'), ('Failed', 'Failed')], default='Completed', max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='bulktransactionlog',
+            constraint=models.UniqueConstraint(condition=models.Q(('file_hash__isnull', False)), fields=('transaction_type', 'file_hash'), name='unique_bulk_import_file'),
+        ),
+    ]
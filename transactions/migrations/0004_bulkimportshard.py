@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:39
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_bulktransactionlog_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkImportShard',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('number', models.PositiveIntegerField()),
+                ('rows', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('Processing', 'Processing'), ('Completed', 'Completed'), ('Failed', 'Failed')], default='Processing', max_length=20)),
+                ('last_row', models.PositiveIntegerField(default=0)),
+                ('success_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='transactions.bulktransactionlog')),
+            ],
+            options={
+                'ordering': ['number'],
+                'constraints': [models.UniqueConstraint(fields=('log', 'number'), name='unique_bulk_import_shard')],
+            },
+        ),
+    ]
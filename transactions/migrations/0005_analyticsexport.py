@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:09
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_bulkimportshard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsExport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('table', models.CharField(max_length=50)),
+                ('file_format', models.CharField(choices=[('parquet', 'Parquet'), ('arrow', 'Arrow IPC')], default='parquet', max_length=10)),
+                ('status', models.CharField(choices=[('Processing', 'Processing'), ('Completed', 'Completed'), ('Failed', 'Failed')], default='Processing', max_length=20)),
+                ('watermark_from', models.DateTimeField(blank=True, null=True)),
+                ('watermark_to', models.DateTimeField()),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('files', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('admin', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'Processing')), fields=('table',), name='unique_running_analytics_export')],
+            },
+        ),
+    ]
@@ -17,6 +17,12 @@ class DownloadLog(UniversalIdModel, TimeStampedModel, ReferenceModel):
 
 
 class BulkTransactionLog(UniversalIdModel, TimeStampedModel, ReferenceModel):
+    STATUS_CHOICES = [
+        ("Processing", "Processing"),
+        ("Completed", "Completed"),
+        ("Failed", "Failed"),
+    ]
+
     admin = models.ForeignKey(User, on_delete=models.PROTECT)
     timestamp = models.DateTimeField(auto_now_add=True)
     file_name = models.CharField(max_length=100, blank=True, null=True)
@@ -25,6 +31,91 @@ class BulkTransactionLog(UniversalIdModel, TimeStampedModel, ReferenceModel):
     success_count = models.PositiveIntegerField(default=0)
     error_count = models.PositiveIntegerField(default=0)
     reference_prefix = models.CharField(max_length=50)
+    # SHA-256 of the uploaded file; the same file is only ever imported once
+    file_hash = models.CharField(max_length=64, blank=True, null=True)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="Completed"
+    )
+    # Checkpoint: every row up to and including last_row has been committed
+    last_row = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["transaction_type", "file_hash"],
+                condition=models.Q(file_hash__isnull=False),
+                name="unique_bulk_import_file",
+            )
+        ]
 
     def __str__(self):
         return f"{self.transaction_type} - {self.reference_prefix} - {self.timestamp}"
+
+
+class BulkImportShard(UniversalIdModel, TimeStampedModel):
+    """
+    One partition of a sharded bulk import. Its rows touch no account (or
+    member) that another shard touches, so shards can commit concurrently.
+    """
+
+    log = models.ForeignKey(
+        BulkTransactionLog, on_delete=models.CASCADE, related_name="shards"
+    )
+    number = models.PositiveIntegerField()
+    rows = models.JSONField(default=list)  # row indices, ascending
+    status = models.CharField(
+        max_length=20, choices=BulkTransactionLog.STATUS_CHOICES, default="Processing"
+    )
+    last_row = models.PositiveIntegerField(default=0)
+    success_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ["number"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["log", "number"], name="unique_bulk_import_shard"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.log.reference_prefix} - shard {self.number}"
+
+
+class AnalyticsExport(UniversalIdModel, TimeStampedModel):
+    """
+    One incremental export of a table to columnar files. The table's next
+    export starts at the watermark_to of its last completed one.
+    """
+
+    FORMAT_CHOICES = [
+        ("parquet", "Parquet"),
+        ("arrow", "Arrow IPC"),
+    ]
+
+    admin = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    table = models.CharField(max_length=50)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="parquet")
+    status = models.CharField(
+        max_length=20, choices=BulkTransactionLog.STATUS_CHOICES, default="Processing"
+    )
+    # Rows created in [watermark_from, watermark_to); no lower bound on the first run
+    watermark_from = models.DateTimeField(blank=True, null=True)
+    watermark_to = models.DateTimeField()
+    row_count = models.PositiveIntegerField(default=0)
+    files = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["table"],
+                condition=models.Q(status="Processing"),
+                name="unique_running_analytics_export",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.table} export to {self.watermark_to} ({self.status})"
@@ -13,6 +13,8 @@ from savingsdeposits.models import SavingsDeposit
 from loandisbursements.models import LoanDisbursement
 from memberfees.models import MemberFee
 from loanrepayments.models import LoanRepayment
+from transactions.models import AnalyticsExport
+from transactions.utils.analytics_export import EXPORT_TABLES, EXTENSIONS
 
 User = get_user_model()
 
@@ -223,3 +225,32 @@ class MonthlySummarySerializer(serializers.Serializer):
     total_loans = serializers.DecimalField(
         max_digits=12, decimal_places=2, read_only=True
     )
+
+
+class AnalyticsExportSerializer(serializers.ModelSerializer):
+    admin = serializers.CharField(source="admin.member_no", read_only=True, default=None)
+
+    class Meta:
+        model = AnalyticsExport
+        fields = (
+            "id",
+            "table",
+            "file_format",
+            "status",
+            "watermark_from",
+            "watermark_to",
+            "row_count",
+            "files",
+            "error",
+            "admin",
+            "created_at",
+        )
+
+
+class AnalyticsExportRequestSerializer(serializers.Serializer):
+    tables = serializers.MultipleChoiceField(
+        choices=list(EXPORT_TABLES), required=False
+    )
+    file_format = serializers.ChoiceField(
+        choices=list(EXTENSIONS), default="parquet"
+    )
@@ -1,3 +1,1045 @@
-from django.test import TestCase
+import calendar
+import csv
+import io
+import json
+import shutil
+import tempfile
+import uuid
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from catalogs.registry import get_catalog
+from feespayments.models import FeePayment
+from finances.models import JournalEntry
+from loandisbursements.models import LoanDisbursement
+from memberfees.models import MemberFee
+from loanapplications.models import LoanApplication
+from loanintereststamarind.models import TamarindLoanInterest
+from loanrepayments.models import LoanRepayment
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+from savingstypes.models import SavingsType
+from transactions.models import AnalyticsExport, BulkImportShard, BulkTransactionLog, DownloadLog
+from transactions.utils.account_export import AccountExport, write_csv
+from transactions.utils.analytics_export import TableExport
+from transactions.utils.fee_billing import FeeBilling
+from transactions.utils.member_summary import load_member_year_data, member_report
+from transactions.utils.parallel import partition
+from transactions.utils.payroll_deductions import PayrollDeductions, employer_slug
+from transactions.utils.pdf import ChromiumBackend, WeasyPrintBackend, get_backend
+from transactions.utils.periods import between_dates, in_year, year_bounds
+from transactions.utils.sacco_summary import sacco_report
+from transactions.utils.summary_report import FORMATS, render, render_html, render_json
+from transactions.utils.uploads import CSVImport, iter_lines
+from venturedeposits.models import VentureDeposit
+from venturepayments.models import VenturePayment
+
+User = get_user_model()
+
+
+class SyntheticSaccoTests(TestCase):
+    def generate(self, *extra):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "6", "--years", "1", "--end", "2025-12-31",
+            *extra,
+            stdout=io.StringIO(),
+        )
+        return list(
+            JournalEntry.objects.order_by("id").values_list("id", "debit", "credit")
+        )
+
+    def test_generation_is_deterministic_and_balanced(self):
+        first = self.generate()
+        self.assertTrue(SavingsDeposit.objects.exists())
+        totals = JournalEntry.objects.aggregate(d=Sum("debit"), c=Sum("credit"))
+        self.assertEqual(totals["d"], totals["c"])
+
+        self.assertEqual(self.generate("--flush"), first)
+
+
+class PeriodFilterTests(TestCase):
+    def test_year_bounds_are_local_half_open(self):
+        start, end = year_bounds(2025)
+        self.assertEqual(timezone.localtime(start).date(), date(2025, 1, 1))
+        self.assertEqual(timezone.localtime(end).date(), date(2026, 1, 1))
+        self.assertEqual(timezone.localtime(start).hour, 0)
+
+    def test_between_dates_includes_the_whole_end_day(self):
+        q = between_dates(date(2025, 3, 1), date(2025, 3, 31))
+        bounds = dict(q.children)
+        self.assertEqual(
+            timezone.localtime(bounds["created_at__lt"]).date(), date(2025, 4, 1)
+        )
+
+    def plan(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Empty test tables would otherwise always be seq-scanned
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def test_range_filters_use_composite_indexes(self):
+        cases = [
+            (VentureDeposit, "venture_account_id"),
+            (VenturePayment, "venture_account_id"),
+            (FeePayment, "member_fee_id"),
+            (TamarindLoanInterest, "loan_account_id"),
+            (LoanDisbursement, "loan_account_id"),
+        ]
+        for model, column in cases:
+            index = next(
+                i.name
+                for i in model._meta.indexes
+                if i.fields[1:] == ["created_at"]
+                and model._meta.get_field(i.fields[0]).column == column
+            )
+            plan = self.plan(model.objects.filter(in_year(2025), **{column: uuid.uuid4()}))
+            with self.subTest(model=model.__name__):
+                self.assertIn(index, plan)
+                if connection.vendor == "sqlite":
+                    # Range on the raw column is part of the index search
+                    self.assertIn("created_at>", plan)
+
+        index = next(
+            i.name
+            for i in JournalEntry._meta.indexes
+            if i.fields == ["gl_account", "transaction_date"]
+        )
+        plan = self.plan(
+            JournalEntry.objects.filter(
+                gl_account_id=uuid.uuid4(), transaction_date__gte=date(2025, 1, 1)
+            )
+        )
+        self.assertIn(index, plan)
+
+
+class ChunkedFile:
+    def __init__(self, data, size):
+        self.data = data
+        self.size = size
+
+    def seek(self, offset):
+        pass
+
+    def chunks(self):
+        for i in range(0, len(self.data), self.size):
+            yield self.data[i : i + self.size]
+
+
+class CombinedBulkUploadTests(APITestCase):
+    url = "/api/v1/transactions/bulk/upload/"
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            member_no="ADM001", password="pass1234", is_system_admin=True
+        )
+        member = User.objects.create_user(
+            member_no="MEM001", password="pass1234", is_member=True
+        )
+        self.account = SavingsAccount.objects.create(
+            member=member,
+            account_type=SavingsType.objects.create(name="Regular"),
+            is_active=True,
+        )
+        self.client.force_authenticate(self.admin)
+
+    def content(self, rows):
+        lines = ["Regular Account,Regular Amount,Payment Method", *rows]
+        return ("\n".join(lines) + "\n").encode()
+
+    def upload(self, rows, **params):
+        file = SimpleUploadedFile(
+            "upload.csv", self.content(rows), content_type="text/csv"
+        )
+        url = self.url + ("?dry_run=true" if params.get("dry_run") else "")
+        return self.client.post(url, {"file": file}, format="multipart")
+
+    def rows(self):
+        number = self.account.account_number
+        return [
+            f'{number},"1,500.00",mpesa',
+            f"{number},abc,Cash",
+            "SA-MISSING,200,Cash",
+            f"{number},100,Barter",
+        ]
+
+    def test_iter_lines_across_chunk_boundaries(self):
+        text = "name,amount\r\n\"Wanjiků\nNjoroge\",100\nÉric,5"
+        data = ("\ufeff" + text).encode("utf-8")
+        for size in (1, 2, 3, 7, len(data)):
+            with self.subTest(size=size):
+                self.assertEqual(
+                    "".join(iter_lines(ChunkedFile(data, size))), text
+                )
+
+    def test_dry_run_reports_every_error_without_writing(self):
+        response = self.upload(self.rows(), dry_run=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["row_count"], 4)
+        self.assertEqual(response.data["valid_rows"], 1)
+        self.assertEqual([e["row"] for e in response.data["errors"]], [2, 3, 4])
+        self.assertFalse(SavingsDeposit.objects.exists())
+        self.assertFalse(BulkTransactionLog.objects.exists())
+
+    @mock.patch(
+        "cloudinary.uploader.upload", return_value={"secure_url": "https://files/x.csv"}
+    )
+    def test_upload_writes_valid_rows_once(self, upload):
+        response = self.upload(self.rows())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["success_count"], 1)
+        self.assertEqual(response.data["error_count"], 3)
+        self.assertEqual(response.data["cloudinary_url"], "https://files/x.csv")
+
+        deposit = SavingsDeposit.objects.get()
+        self.assertEqual(deposit.payment_method, "Mpesa")
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1500.00"))
+
+        log = BulkTransactionLog.objects.get()
+        self.assertEqual((log.success_count, log.error_count), (1, 3))
+
+    @mock.patch("cloudinary.uploader.upload", return_value={"secure_url": "x"})
+    def test_same_file_is_imported_once(self, upload):
+        self.assertEqual(self.upload(self.rows()).status_code, 201)
+        response = self.upload(self.rows())
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["already_imported"])
+        self.assertEqual(response.data["success_count"], 1)
+        self.assertEqual(response.data["error_count"], 3)
+        self.assertEqual(SavingsDeposit.objects.count(), 1)
+        self.assertEqual(upload.call_count, 1)
+
+    @override_settings(BULK_IMPORT_CHUNK_SIZE=2)
+    @mock.patch("cloudinary.uploader.upload", return_value={"secure_url": "x"})
+    def test_crashed_import_resumes_after_last_checkpoint(self, upload):
+        number = self.account.account_number
+        rows = [f"{number},{amount},Cash" for amount in (100, 200, 300, 400, 500)]
+        checkpoint = CSVImport.checkpoint
+
+        def crash_on_second_chunk(upload, index):
+            if index > 2:
+                raise RuntimeError("worker died")
+            checkpoint(upload, index)
+
+        with mock.patch.object(CSVImport, "checkpoint", crash_on_second_chunk):
+            self.assertEqual(self.upload(rows).status_code, 500)
+        log = BulkTransactionLog.objects.get()
+        self.assertEqual((log.status, log.last_row, log.success_count), ("Failed", 2, 2))
+        self.assertEqual(SavingsDeposit.objects.count(), 2)
+
+        response = self.upload(rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["success_count"], 5)
+        self.assertEqual(response.data["log_reference"], log.reference_prefix)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1500"))
+        log.refresh_from_db()
+        self.assertEqual((log.status, log.last_row), ("Completed", 5))
+
+    def test_file_being_imported_is_refused(self):
+        file = SimpleUploadedFile("upload.csv", self.content(self.rows()))
+        BulkTransactionLog.objects.create(
+            admin=self.admin,
+            transaction_type="Combined Bulk",
+            reference_prefix="COMBINED-BULK-20250101",
+            file_hash=CSVImport(file, self.admin).file_hash(),
+            status="Processing",
+        )
+        response = self.upload(self.rows())
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(SavingsDeposit.objects.exists())
+
+    def test_partition_keeps_groups_whole_and_balanced(self):
+        groups = [[1, 2, 3], [4], [5], [6, 7]]
+        self.assertEqual(partition(groups, 2), [[1, 2, 3, 5], [4, 6, 7]])
+        self.assertEqual(partition([[1]], 4), [[1]])
+
+    @override_settings(BULK_IMPORT_WORKERS=2, BULK_IMPORT_PARALLEL_MIN_ROWS=1)
+    @mock.patch("cloudinary.uploader.upload", return_value={"secure_url": "x"})
+    def test_sharded_import_keeps_each_member_in_one_shard(self, upload):
+        other = SavingsAccount.objects.create(
+            member=User.objects.create_user(
+                member_no="MEM002", password="pass1234", is_member=True
+            ),
+            account_type=self.account.account_type,
+            is_active=True,
+        )
+        number = self.account.account_number
+        rows = [
+            f"{number},100,Cash",
+            f"{other.account_number},50,Cash",
+            f"{number},200,Cash",
+            f"{number},oops,Cash",
+            f"{number},300,Cash",
+        ]
+        response = self.upload(rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["success_count"], 4)
+        self.assertEqual([e["row"] for e in response.data["errors"]], [4])
+
+        shards = [shard.rows for shard in BulkImportShard.objects.all()]
+        self.assertEqual(sorted(shards), [[1, 3, 5], [2]])
+        self.account.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("600"))
+        self.assertEqual(other.balance, Decimal("50"))
+        log = BulkTransactionLog.objects.get()
+        self.assertEqual((log.status, log.success_count, log.error_count), ("Completed", 4, 1))
+
+    def test_missing_account_columns(self):
+        file = SimpleUploadedFile("upload.csv", b"Member,Amount\nMEM001,10\n")
+        response = self.client.post(self.url, {"file": file}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Account", response.data["error"])
+
+
+class PDFBackendTests(APITestCase):
+    def test_backend_is_selected_per_report(self):
+        with override_settings(
+            PDF_BACKEND="weasyprint", PDF_REPORT_BACKENDS={"sacco_summary": "chromium"}
+        ):
+            self.assertIsInstance(get_backend("sacco_summary"), ChromiumBackend)
+            self.assertIsInstance(get_backend("member_yearly_summary"), WeasyPrintBackend)
+
+    @override_settings(PDF_BACKEND="wkhtmltopdf")
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend("sacco_summary")
+
+    @override_settings(PDF_BACKEND="weasyprint", PDF_REPORT_BACKENDS={})
+    @mock.patch.object(WeasyPrintBackend, "render", return_value=b"%PDF-1.7")
+    def test_member_summary_download_uses_the_backend(self, render):
+        member = User.objects.create_user(
+            member_no="MEM001", password="pass1234", is_member=True
+        )
+        self.client.force_authenticate(member)
+        response = self.client.get(
+            "/api/v1/transactions/MEM001/summary/download/", {"year": 2025}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response.content, b"%PDF-1.7")
+        html = render.call_args.args[0]
+        self.assertIn("MEM001", html)
+
+
+class PDFRenderTests(TestCase):
+    """
+    Real renders, one per backend. They skip where the backend's system
+    libraries or browser aren't installed, so run them on the deploy image
+    before switching PDF_BACKEND.
+    """
+
+    def render(self, backend):
+        try:
+            return backend.render(render_html(sacco_report(2025)))
+        except (ImportError, OSError) as e:
+            self.skipTest(f"{backend.name} is not installed: {e}")
+        except Exception as e:
+            if "Executable doesn't exist" in str(e) or "missing dependencies" in str(e):
+                self.skipTest(f"{backend.name} is not installed: {e}")
+            raise
+
+    def test_weasyprint_renders_a_pdf(self):
+        self.assertTrue(self.render(WeasyPrintBackend()).startswith(b"%PDF"))
+
+    def test_chromium_renders_a_pdf(self):
+        self.assertTrue(self.render(ChromiumBackend()).startswith(b"%PDF"))
+
+
+class AnnualStatementTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "6", "--years", "2", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        self.members = list(User.objects.filter(is_member=True).order_by("member_no"))
+        self.client.force_authenticate(User.objects.get(member_no="SYNADMIN"))
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def generate(self):
+        call_command(
+            "generate_annual_statements",
+            "--year", "2025", "--workers", "1", "--batch-size", "4",
+            "--output-dir", self.output_dir,
+            stdout=io.StringIO(),
+        )
+        with open(f"{self.output_dir}/manifest.json") as fh:
+            return json.load(fh)
+
+    def test_batch_summaries_match_the_member_view(self):
+        fetched = load_member_year_data([member.pk for member in self.members], 2025)
+        for member in self.members:
+            response = self.client.get(
+                f"/api/v1/transactions/{member.member_no}/summary/", {"year": 2025}
+            )
+            self.assertEqual(
+                response.json(),
+                json.loads(json.dumps(render_json(member_report(member, 2025, fetched[member.pk])))),
+            )
+
+    @override_settings(PDF_BACKEND="weasyprint", PDF_REPORT_BACKENDS={})
+    @mock.patch.object(WeasyPrintBackend, "render", return_value=b"%PDF-1.7")
+    def test_statements_are_archived_per_employer(self, render):
+        manifest = self.generate()
+        self.assertEqual(render.call_count, len(self.members))
+        self.assertEqual(manifest["statements"], len(self.members))
+        self.assertEqual(manifest["failures"], [])
+
+        archived = []
+        for archive in manifest["archives"]:
+            with zipfile.ZipFile(f"{self.output_dir}/{archive['file']}") as fh:
+                self.assertEqual(
+                    fh.namelist(),
+                    [f"{member_no}_Summary_2025.pdf" for member_no in archive["members"]],
+                )
+            for member_no in archive["members"]:
+                employer = User.objects.get(member_no=member_no).employer
+                self.assertEqual(archive["employer"], employer or "Unassigned")
+            archived.extend(archive["members"])
+        self.assertEqual(sorted(archived), [member.member_no for member in self.members])
+
+    @override_settings(PDF_BACKEND="weasyprint", PDF_REPORT_BACKENDS={})
+    @mock.patch.object(WeasyPrintBackend, "render", return_value=b"%PDF-1.7")
+    def test_employers_that_slugify_alike_get_their_own_archive(self, render):
+        User.objects.filter(pk__in=[member.pk for member in self.members[:3]]).update(
+            employer="ABC Ltd"
+        )
+        User.objects.filter(pk__in=[member.pk for member in self.members[3:]]).update(
+            employer="ABC Ltd."
+        )
+        archives = {archive["employer"]: archive for archive in self.generate()["archives"]}
+        self.assertEqual(set(archives), {"ABC Ltd", "ABC Ltd."})
+        self.assertNotEqual(archives["ABC Ltd"]["file"], archives["ABC Ltd."]["file"])
+        for archive in archives.values():
+            with zipfile.ZipFile(f"{self.output_dir}/{archive['file']}") as fh:
+                self.assertEqual(len(fh.namelist()), len(archive["members"]))
+
+    @override_settings(PDF_BACKEND="weasyprint", PDF_REPORT_BACKENDS={})
+    def test_interrupted_run_continues_with_the_remaining_members(self):
+        failing = self.members[2].member_no
+
+        def render(html, landscape=True):
+            if failing in html:
+                raise OSError("disk full")
+            return b"%PDF-1.7"
+
+        with mock.patch.object(WeasyPrintBackend, "render", side_effect=render):
+            manifest = self.generate()
+        self.assertEqual([entry["member_no"] for entry in manifest["failures"]], [failing])
+        self.assertEqual(manifest["statements"], len(self.members) - 1)
+
+        with mock.patch.object(WeasyPrintBackend, "render", return_value=b"%PDF-1.7") as retry:
+            manifest = self.generate()
+        self.assertEqual(retry.call_count, 1)
+        self.assertIn(failing, retry.call_args.args[0])
+        self.assertEqual(manifest["failures"], [])
+        self.assertEqual(manifest["statements"], len(self.members))
+
+
+class MemberSummaryDetailTests(APITestCase):
+    LISTS = {
+        "deposits", "payments", "transactions",
+        "venture_deposits_transactions", "venture_payments_transactions",
+        "total_amount_disbursed_transactions", "total_amount_repaid_transactions",
+        "total_interest_charged_transactions",
+    }
+
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "4", "--years", "2", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        self.member_no = User.objects.filter(is_member=True).order_by("member_no")[0].member_no
+        self.client.force_authenticate(User.objects.get(member_no="SYNADMIN"))
+
+    def summary(self, **params):
+        response = self.client.get(
+            f"/api/v1/transactions/{self.member_no}/summary/", {"year": 2025, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def lists(self, value):
+        """Every transaction list in `value`, by path."""
+        found = {}
+
+        def walk(node, path):
+            if isinstance(node, dict):
+                for key, child in node.items():
+                    if key in self.LISTS:
+                        found[path + (key,)] = child
+                    else:
+                        walk(child, path + (key,))
+            elif isinstance(node, list):
+                for index, child in enumerate(node):
+                    walk(child, path + (index,))
+
+        walk(value, ())
+        return found
+
+    def without_lists(self, value):
+        if isinstance(value, dict):
+            return {k: self.without_lists(v) for k, v in value.items() if k not in self.LISTS}
+        if isinstance(value, list):
+            return [self.without_lists(v) for v in value]
+        return value
+
+    def test_totals_do_not_depend_on_the_listed_months(self):
+        full = self.summary()
+        self.assertTrue(any(self.lists(full).values()))
+        for details in ("none", "3", "1,12"):
+            self.assertEqual(
+                self.without_lists(self.summary(details=details)),
+                self.without_lists(full),
+            )
+
+    def test_transactions_are_listed_for_the_requested_months_only(self):
+        full = self.lists(self.summary())
+        march = self.lists(self.summary(details="3"))
+        self.assertEqual(full.keys(), march.keys())
+        self.assertTrue(any(march.values()))
+        for path, listed in march.items():
+            month = path[1]
+            self.assertEqual(listed, full[path] if month == 2 else [])
+        self.assertFalse(any(self.lists(self.summary(details="none")).values()))
+
+    def test_invalid_details(self):
+        for details in ("13", "march", "1,,2"):
+            response = self.client.get(
+                f"/api/v1/transactions/{self.member_no}/summary/", {"details": details}
+            )
+            self.assertEqual(response.status_code, 400)
+
+class FeeBillingTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "6", "--years", "2", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        # Billed just after midnight on New Year's Day, still 2024 in UTC
+        fee = MemberFee.objects.order_by("id").first()
+        MemberFee.objects.filter(pk=fee.pk).update(
+            created_at=timezone.make_aware(datetime(2025, 1, 1, 0, 30))
+        )
+        self.fee_types = get_catalog().fee_types
+        self.client.force_authenticate(User.objects.get(member_no="SYNADMIN"))
+
+    def expected(self, year):
+        """Per-row billing, bucketed by local month as the payments are."""
+        def local(row):
+            created = timezone.localtime(row.created_at)
+            return created.year, created.month
+
+        fees = list(MemberFee.objects.select_related("fee_type"))
+        payments = list(FeePayment.objects.select_related("member_fee__fee_type"))
+        expected = {}
+        for name in self.fee_types:
+            balance = max(
+                sum(f.amount for f in fees if f.fee_type.name == name and local(f)[0] < year)
+                - sum(p.amount for p in payments if p.member_fee.fee_type.name == name and local(p)[0] < year),
+                Decimal("0"),
+            )
+            months = []
+            for month in range(1, 13):
+                billed = sum(f.amount for f in fees if f.fee_type.name == name and local(f) == (year, month))
+                paid = sum(p.amount for p in payments if p.member_fee.fee_type.name == name and local(p) == (year, month))
+                balance += billed
+                brought = balance - (billed - paid)
+                balance = max(balance - paid, Decimal("0"))
+                months.append({
+                    "total_expected": float(sum(f.amount for f in fees if f.fee_type.name == name)),
+                    "total_amount_paid": float(paid),
+                    "balance_brought_forward": float(brought),
+                    "balance_carried_forward": float(balance),
+                })
+            expected[name] = months
+        return expected
+
+    def test_one_query_per_measure(self):
+        with self.assertNumQueries(6):
+            FeeBilling(2025, self.fee_types)
+
+    def test_sacco_summary_fees_match_per_row_billing(self):
+        for year in (2024, 2025):
+            response = self.client.get("/api/v1/transactions/sacco/reports/", {"year": year})
+            self.assertEqual(response.status_code, 200)
+            expected = self.expected(year)
+            for index, month in enumerate(response.json()["monthly_summary"]):
+                for row in month["fees"]["by_type"]:
+                    self.assertEqual(
+                        {key: row[key] for key in expected[row["fee_type"]][index]},
+                        expected[row["fee_type"]][index],
+                    )
+            self.assertEqual(
+                response.json()["summary"]["total_fees_outstanding"],
+                float(sum(f.remaining_balance for f in MemberFee.objects.all())),
+            )
+
+
+class SummaryReportTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "3", "--years", "1", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        self.member = User.objects.filter(is_member=True).order_by("member_no").first()
+        self.client.force_authenticate(User.objects.get(member_no="SYNADMIN"))
+
+    def test_every_format_renders_from_one_computation(self):
+        fetched = load_member_year_data([self.member.pk], 2025, detail_months=())
+        reports = [member_report(self.member, 2025, fetched[self.member.pk]), sacco_report(2025)]
+        for report in reports:
+            with self.assertNumQueries(0):
+                for file_format in FORMATS:
+                    render(report, file_format)
+
+    def test_csv_export_matches_the_json_summary(self):
+        data = self.client.get("/api/v1/transactions/sacco/reports/", {"year": 2025}).json()
+        response = self.client.get("/api/v1/transactions/sacco/reports/csv/", {"year": 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="SACCO_Summary_2025.csv"', response["Content-Disposition"])
+
+        rows = list(csv.DictReader(io.StringIO(response.content.decode())))
+        self.assertEqual(len(rows), 12)
+        for row, month in zip(rows, data["monthly_summary"]):
+            for savings in month["savings"]["by_type"]:
+                column = f"Savings: {savings['type']} Deposits"
+                self.assertEqual(Decimal(row[column]), Decimal(str(savings["total_deposits"])))
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(
+            f"/api/v1/transactions/{self.member.member_no}/summary/xlsx/", {"year": 2025}
+        )
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(io.BytesIO(response.content)).active
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][0], "Month")
+        self.assertEqual([row[0] for row in rows[1:]], list(calendar.month_name)[1:])
+
+    def test_exports_are_limited_to_admins_and_the_member(self):
+        member_csv = f"/api/v1/transactions/{self.member.member_no}/summary/csv/"
+        sacco_csv = "/api/v1/transactions/sacco/reports/csv/"
+        other = User.objects.filter(is_member=True).exclude(pk=self.member.pk).first()
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(member_csv).status_code, 401)
+        self.assertEqual(self.client.get(sacco_csv).status_code, 401)
+
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get(member_csv, {"year": 2025}).status_code, 200)
+        self.assertEqual(self.client.get(sacco_csv).status_code, 403)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(member_csv).status_code, 403)
+
+    def test_sacco_pdf_summary_cards_are_filled(self):
+        html = render_html(sacco_report(2025))
+        self.assertNotIn('<div class="card-value"></div>', html)
+
+
+class AsyncReadViewTests(APITestCase):
+    """The async read views, through the sync test client and over ASGI."""
+
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "3", "--years", "1", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        self.member = User.objects.filter(is_member=True).order_by("member_no").first()
+        self.statement_url = f"/api/v1/transactions/{self.member.member_no}/statement/"
+        self.urls = [
+            self.statement_url,
+            "/api/v1/transactions/sacco/cashbook/",
+            "/api/v1/transactions/sacco/reports/?year=2025",
+            f"/api/v1/transactions/{self.member.member_no}/summary/?year=2025",
+        ]
+
+    def test_statement_queries_do_not_grow_per_transaction(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.statement_url)
+        self.assertEqual(response.status_code, 200)
+        deposits = SavingsDeposit.objects.filter(
+            savings_account__member=self.member, transaction_status="Completed"
+        ).count()
+        self.assertGreater(deposits, 10)
+        self.assertGreaterEqual(len(response.json()), deposits)
+        # The member and one query per transaction table, however many rows
+        self.assertLessEqual(len(queries), 10)
+
+    async def test_asgi_responses_match_wsgi(self):
+        for url in self.urls:
+            sync_response = await sync_to_async(self.client.get)(url)
+            async_response = await self.async_client.get(url)
+            self.assertEqual(async_response.status_code, 200, url)
+            self.assertEqual(async_response.json(), sync_response.json(), url)
+
+        response = await self.async_client.get("/api/v1/transactions/NOSUCH/statement/")
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PDF_BACKEND="chromium", PDF_REPORT_BACKENDS={})
+    @mock.patch("transactions.utils.pdf.asyncio.run")
+    @mock.patch("transactions.utils.pdf.generate_pdf_async", new_callable=mock.AsyncMock)
+    async def test_chromium_pdf_is_awaited_on_the_event_loop(self, generate, run):
+        generate.return_value = b"%PDF-1.7"
+        response = await self.async_client.get(
+            "/api/v1/transactions/sacco/reports/download/", {"year": 2025}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"%PDF-1.7")
+        generate.assert_awaited_once()
+        run.assert_not_called()
+
+
+@override_settings(ANALYTICS_EXPORT_SETTLE=0)
+class AnalyticsExportTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "3", "--years", "1", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def read(self, table):
+        import pyarrow.dataset as ds
+
+        return ds.dataset(
+            f"{self.output_dir}/{table}", format="parquet", partitioning="hive"
+        ).to_table()
+
+    def test_decimals_are_exported_as_fixed_point_by_month(self):
+        import pyarrow as pa
+
+        export = TableExport("savings_deposits", self.output_dir).run()
+        table = self.read("savings_deposits")
+        self.assertEqual(export.row_count, SavingsDeposit.objects.count())
+        self.assertEqual(table.num_rows, export.row_count)
+        self.assertEqual(table.schema.field("amount").type, pa.decimal128(12, 2))
+        self.assertEqual(
+            sum(table.column("amount").to_pylist()),
+            SavingsDeposit.objects.aggregate(total=Sum("amount"))["total"],
+        )
+        for file in export.files:
+            self.assertRegex(file, r"^savings_deposits/month=\d{4}-\d{2}/part-\w+\.parquet$")
+        months = {
+            f"{timezone.localtime(created).year}-{timezone.localtime(created).month:02d}"
+            for created in SavingsDeposit.objects.values_list("created_at", flat=True)
+        }
+        self.assertEqual(set(table.column("month").to_pylist()), months)
+
+    def test_exports_only_rows_after_the_watermark(self):
+        first = TableExport("savings_deposits", self.output_dir).run()
+        deposit = SavingsDeposit.objects.order_by("created_at").first()
+        new = SavingsDeposit.objects.create(
+            savings_account=deposit.savings_account, amount=Decimal("1234.56")
+        )
+
+        second = TableExport("savings_deposits", self.output_dir).run()
+        self.assertEqual(second.watermark_from, first.watermark_to)
+        self.assertEqual(second.row_count, 1)
+        table = self.read("savings_deposits")
+        self.assertEqual(table.num_rows, first.row_count + 1)
+        self.assertIn(str(new.pk), table.column("id").to_pylist())
+
+    def test_failed_export_keeps_no_files_and_the_watermark(self):
+        with mock.patch.object(TableExport, "flush", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                TableExport("journal_entries", self.output_dir, "arrow").run()
+        self.assertEqual(
+            AnalyticsExport.objects.get(table="journal_entries").status, "Failed"
+        )
+        self.assertFalse(any(Path(self.output_dir).rglob("*.arrow*")))
+
+        export = TableExport("journal_entries", self.output_dir, "arrow").run()
+        self.assertIsNone(export.watermark_from)
+        self.assertEqual(export.row_count, JournalEntry.objects.count())
+
+    def test_admin_triggers_an_export(self):
+        self.client.force_authenticate(User.objects.filter(is_member=True).first())
+        response = self.client.post("/api/v1/transactions/sacco/exports/", {}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(User.objects.get(member_no="SYNADMIN"))
+        with override_settings(ANALYTICS_EXPORT_DIR=self.output_dir):
+            response = self.client.post(
+                "/api/v1/transactions/sacco/exports/",
+                {"tables": ["savings_deposits", "fee_payments"]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(export["table"] for export in response.data),
+            ["fee_payments", "savings_deposits"],
+        )
+        self.assertEqual(
+            self.read("fee_payments").num_rows, FeePayment.objects.count()
+        )
+
+
+@mock.patch("cloudinary.uploader.upload", return_value={"secure_url": "https://example.com/f"})
+class AccountListDownloadTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "4", "--years", "1", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        # Excel turns this into 12345 unless the cell is text
+        self.account = SavingsAccount.objects.order_by("created_at").first()
+        self.account.account_number = "0012345"
+        self.account.save()
+        self.client.force_authenticate(User.objects.get(member_no="SYNADMIN"))
+
+    def download(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv_template_has_every_member_account(self, upload):
+        content = self.download("/api/v1/transactions/list/download/").decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), User.objects.filter(is_member=True).count())
+        row = next(
+            row for row in rows if row["Member Number"] == self.account.member.member_no
+        )
+        self.assertEqual(row[f"{self.account.account_type.name} Account"], "0012345")
+        self.assertEqual(row["Payment Method"], "Cash")
+        upload.assert_called_once()
+        self.assertTrue(
+            DownloadLog.objects.filter(file_name__startswith="bulk_upload_template_").exists()
+        )
+
+    def test_xlsx_template_keeps_account_numbers_as_text(self, upload):
+        from openpyxl import load_workbook
+
+        content = self.download("/api/v1/transactions/list/download/xlsx/")
+        rows = list(load_workbook(io.BytesIO(content)).active.iter_rows(values_only=False))
+        header = [cell.value for cell in rows[0]]
+        column = header.index(f"{self.account.account_type.name} Account")
+        cell = next(
+            row[column] for row in rows[1:] if row[0].value == self.account.member.member_no
+        )
+        self.assertEqual(cell.value, "0012345")
+        self.assertEqual(cell.data_type, "s")
+        self.assertEqual(cell.number_format, "@")
+
+    def test_xlsx_interest_amounts_are_numbers(self, upload):
+        from openpyxl import load_workbook
+
+        content = self.download("/api/v1/transactions/list/download/xlsx/", interest_only="true")
+        rows = list(load_workbook(io.BytesIO(content)).active.values)
+        self.assertEqual(len(rows) - 1, TamarindLoanInterest.objects.count())
+        self.assertEqual(
+            Decimal(str(sum(row[4] for row in rows[1:]))).quantize(Decimal("0.01")),
+            TamarindLoanInterest.objects.aggregate(total=Sum("amount"))["total"],
+        )
+
+    @override_settings(ACCOUNT_EXPORT_CHUNK_SIZE=2)
+    def test_queries_do_not_grow_per_member(self, upload):
+        export = AccountExport()
+        chunks = -(-User.objects.filter(is_member=True).count() // 2)
+        # The member iterator, then one query per account kind per chunk
+        with self.assertNumQueries(1 + 4 * chunks):
+            write_csv(export, io.BytesIO())
+
+
+class PayrollDeductionTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "generate_synthetic_sacco",
+            "--members", "8", "--years", "1", "--end", "2025-12-31",
+            stdout=io.StringIO(),
+        )
+        self.client.force_authenticate(User.objects.get(member_no="SYNADMIN"))
+
+    def deductions(self, schedule):
+        """{(account number, amount column): amount} over every employer's file."""
+        amounts = {}
+        for remittance in schedule.files().values():
+            for row in remittance.rows():
+                for i, name in enumerate(schedule.header):
+                    if name.endswith(" Account") and row[i]:
+                        type_name = name[: -len(" Account")]
+                        for column in (f"{type_name} Amount", f"{type_name} Repayment Amount"):
+                            if column in schedule.index and row[schedule.index[column]]:
+                                amounts[row[i]] = row[schedule.index[column]]
+        return amounts
+
+    def test_deductions_follow_schedules_commitments_and_fees(self):
+        standing = SavingsAccount.objects.order_by("created_at").first()
+        standing.monthly_contribution = Decimal("750.00")
+        standing.save()
+
+        deductions = self.deductions(PayrollDeductions(2026, 1))
+
+        expected = {}
+        for application in LoanApplication.objects.filter(
+            status="Disbursed", loan_account__is_active=True,
+            loan_account__outstanding_balance__gt=0,
+        ).select_related("loan_account"):
+            due = sum(
+                Decimal(str(row["total_due"]))
+                for row in application.projection_snapshot.get("schedule", [])
+                if row["due_date"].startswith("2026-01")
+            )
+            if due:
+                account = application.loan_account
+                expected[account.account_number] = min(
+                    expected.get(account.account_number, 0) + due,
+                    account.outstanding_balance,
+                )
+        for account in SavingsAccount.objects.filter(is_active=True):
+            last = (
+                account.deposits.filter(
+                    deposit_type="Payroll Deduction", transaction_status="Completed"
+                )
+                .order_by("-created_at")
+                .first()
+            )
+            amount = account.monthly_contribution or (last and last.amount)
+            if amount:
+                expected[account.account_number] = amount
+        for fee in MemberFee.objects.filter(is_paid=False, remaining_balance__gt=0):
+            expected[fee.account_number] = fee.remaining_balance
+
+        self.assertEqual(deductions, expected)
+        self.assertEqual(deductions[standing.account_number], Decimal("750.00"))
+
+    @mock.patch("cloudinary.uploader.upload", return_value={"secure_url": "x"})
+    def test_remittance_files_post_back_unchanged(self, upload):
+        summary = self.client.get(
+            "/api/v1/transactions/sacco/payroll-deductions/", {"year": 2026, "month": 1}
+        ).data
+        response = self.client.get(
+            "/api/v1/transactions/sacco/payroll-deductions/download/",
+            {"year": 2026, "month": 1},
+        )
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), len(summary["employers"]))
+
+        employer = max(summary["employers"], key=lambda employer: employer["loans"])
+        self.assertGreater(employer["loans"], 0)
+        content = archive.read(
+            f"payroll_deductions_{employer_slug(employer['employer'])}_2026_01.csv"
+        )
+        def totals():
+            """Everything repaid and deposited, and how much of it by payroll."""
+            repayments = LoanRepayment.objects.all()
+            deposits = SavingsDeposit.objects.all()
+            return [
+                queryset.aggregate(total=Sum("amount"))["total"] or 0
+                for queryset in (
+                    repayments,
+                    repayments.filter(repayment_type="Payroll Deduction"),
+                    deposits,
+                    deposits.filter(deposit_type="Payroll Deduction"),
+                )
+            ]
+
+        before = totals()
+        uploaded = self.client.post(
+            "/api/v1/transactions/bulk/upload/",
+            {"file": SimpleUploadedFile("payroll.csv", content, content_type="text/csv")},
+            format="multipart",
+        )
+        self.assertEqual(uploaded.status_code, 201, uploaded.data)
+        self.assertEqual(uploaded.data["error_count"], 0)
+        self.assertEqual(
+            [after - prior for after, prior in zip(totals(), before)],
+            [employer["loans"], employer["loans"], employer["savings"], employer["savings"]],
+        )
+
+        single = self.client.get(
+            "/api/v1/transactions/sacco/payroll-deductions/download/xlsx/",
+            {"year": 2026, "month": 1, "employer": employer["employer"]},
+        )
+        self.assertEqual(single.status_code, 200)
+        self.assertEqual(
+            self.client.get(
+                "/api/v1/transactions/sacco/payroll-deductions/", {"month": 13}
+            ).status_code,
+            400,
+        )
+
+    @mock.patch("cloudinary.uploader.upload", return_value={"secure_url": "x"})
+    def test_employers_that_slugify_alike_get_their_own_file(self, upload):
+        members = list(User.objects.filter(is_member=True).order_by("member_no"))
+        User.objects.filter(pk__in=[member.pk for member in members[:4]]).update(
+            employer="ABC Ltd"
+        )
+        User.objects.filter(pk__in=[member.pk for member in members[4:]]).update(
+            employer="ABC Ltd."
+        )
+        summary = self.client.get(
+            "/api/v1/transactions/sacco/payroll-deductions/", {"year": 2026, "month": 1}
+        ).data
+        self.assertEqual(
+            {employer["employer"] for employer in summary["employers"]}, {"ABC Ltd", "ABC Ltd."}
+        )
+        response = self.client.get(
+            "/api/v1/transactions/sacco/payroll-deductions/download/",
+            {"year": 2026, "month": 1},
+        )
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(len(set(archive.namelist())), 2)
+
+    @mock.patch("cloudinary.uploader.upload", return_value={"secure_url": "x"})
+    def test_consecutive_identical_months_are_both_credited(self, upload):
+        member = User.objects.create_user(
+            member_no="MEM901", password="pass1234", is_member=True, employer="Standing Ltd"
+        )
+        account = SavingsAccount.objects.create(
+            member=member,
+            account_type=SavingsType.objects.order_by("name").first(),
+            monthly_contribution=Decimal("500.00"),
+            is_active=True,
+        )
+        # Only the standing contribution, so both months' rows are the same
+        MemberFee.objects.filter(member=member).delete()
+        for month in (1, 2):
+            content = b"".join(
+                self.client.get(
+                    "/api/v1/transactions/sacco/payroll-deductions/download/",
+                    {"year": 2026, "month": month, "employer": "Standing Ltd"},
+                ).streaming_content
+            )
+            self.assertIn(f"2026-{month:02d}".encode(), content)
+            uploaded = self.client.post(
+                "/api/v1/transactions/bulk/upload/",
+                {"file": SimpleUploadedFile("payroll.csv", content, content_type="text/csv")},
+                format="multipart",
+            )
+            self.assertEqual(uploaded.status_code, 201, uploaded.data)
+            self.assertNotIn("already_imported", uploaded.data)
+        self.assertEqual(
+            account.deposits.aggregate(total=Sum("amount"))["total"], Decimal("1000.00")
+        )
@@ -2,14 +2,19 @@ from django.urls import path
 
 from transactions.views import (
     AccountListView,
+    AnalyticsExportView,
     AccountListDownloadView,
     AccountDetailView,
     CombinedBulkUploadView,
+    PayrollDeductionView,
+    PayrollDeductionDownloadView,
     MemberYearlySummaryView,
     MemberYearlySummaryPDFView,
+    MemberYearlySummaryExportView,
     SACCOSummaryView,
     CashbookView,
     SACCOSummaryPDFView,
+    SACCOSummaryExportView,
     MemberStatementView
 )
 
@@ -23,6 +28,11 @@ urlpatterns = [
         AccountListDownloadView.as_view(),
         name="transaction-list-download",
     ),
+    path(
+        "list/download/xlsx/",
+        AccountListDownloadView.as_view(export_format="xlsx"),
+        name="transaction-list-download-xlsx",
+    ),
     path(
         "bulk/upload/",
         CombinedBulkUploadView.as_view(),
@@ -30,10 +40,26 @@ urlpatterns = [
     ),
     path("<str:member_no>/summary/", MemberYearlySummaryView.as_view(), name="summary"),
     path("<str:member_no>/summary/download/", MemberYearlySummaryPDFView.as_view(), name="summary-pdf"),
+    path("<str:member_no>/summary/csv/", MemberYearlySummaryExportView.as_view(export_format="csv"), name="summary-csv"),
+    path("<str:member_no>/summary/xlsx/", MemberYearlySummaryExportView.as_view(export_format="xlsx"), name="summary-xlsx"),
     
     # SACCO Level Reports
     path("sacco/reports/", SACCOSummaryView.as_view(), name="sacco-summary"),
     path("sacco/reports/download/", SACCOSummaryPDFView.as_view(), name="sacco-summary-pdf"),
+    path("sacco/reports/csv/", SACCOSummaryExportView.as_view(export_format="csv"), name="sacco-summary-csv"),
+    path("sacco/reports/xlsx/", SACCOSummaryExportView.as_view(export_format="xlsx"), name="sacco-summary-xlsx"),
     path("sacco/cashbook/", CashbookView.as_view(), name="sacco-cashbook"),
+    path("sacco/exports/", AnalyticsExportView.as_view(), name="analytics-exports"),
+    path("sacco/payroll-deductions/", PayrollDeductionView.as_view(), name="payroll-deductions"),
+    path(
+        "sacco/payroll-deductions/download/",
+        PayrollDeductionDownloadView.as_view(),
+        name="payroll-deductions-download",
+    ),
+    path(
+        "sacco/payroll-deductions/download/xlsx/",
+        PayrollDeductionDownloadView.as_view(export_format="xlsx"),
+        name="payroll-deductions-download-xlsx",
+    ),
     path("<str:member_no>/statement/", MemberStatementView.as_view(), name="member-statement"),
 ]
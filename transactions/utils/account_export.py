@@ -0,0 +1,272 @@
+"""
+The account list downloads: the bulk upload template (one row per member with
+an Account column per catalog type) and the interest-only export.
+
+Members are read in chunks of ACCOUNT_EXPORT_CHUNK_SIZE, and each chunk's
+accounts are fetched with one `__in` query per account kind, so memory stays
+flat however many members there are. The same typed rows feed both writers:
+
+- write_csv() renders them exactly as the CSV downloads always have;
+- write_xlsx() streams them into a write-only workbook, with account numbers
+  stored as text (Excel would otherwise drop leading zeros or switch to
+  scientific notation), amounts as numbers and dates as dates.
+"""
+
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from catalogs.registry import get_catalog
+from loanintereststamarind.models import TamarindLoanInterest
+from loans.models import LoanAccount
+from memberfees.models import MemberFee
+from savings.models import SavingsAccount
+from ventures.models import VentureAccount
+
+User = get_user_model()
+
+CHUNK_SIZE = 500
+
+TEXT = "text"
+AMOUNT = "amount"
+DATE = "date"
+
+XLSX_FORMATS = {TEXT: "@", AMOUNT: "#,##0.00", DATE: "yyyy-mm-dd"}
+
+
+def member_chunks(chunk_size):
+    """Lists of (pk, member_no, member name), in the order the list view uses."""
+    members = (
+        User.objects.filter(is_member=True)
+        .order_by("-created_at")
+        .values_list("pk", "member_no", "first_name", "last_name")
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for pk, member_no, first_name, last_name in members:
+        chunk.append((pk, member_no, f"{first_name} {last_name}".strip()))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def by_member(queryset, member_field, *fields):
+    """{member pk: [row, ...]} in the queryset's order."""
+    rows = {}
+    for member_id, *values in queryset.values_list(member_field, *fields):
+        rows.setdefault(member_id, []).append(values)
+    return rows
+
+
+def upload_columns(catalog):
+    """
+    Header and column kinds of the combined bulk upload file, with an
+    Account column and its amount columns per catalog type.
+    """
+    header = ["Member Number", "Member Name"]
+    columns = [TEXT, TEXT]
+
+    def add(*names):
+        for name in names:
+            header.append(name)
+            columns.append(TEXT if name.endswith(" Account") else AMOUNT)
+
+    # Savings: Account + Amount
+    for st in catalog.savings_type_names:
+        add(f"{st} Account", f"{st} Amount")
+    # Ventures: Account + Amount + Payment Amount
+    for vt in catalog.venture_type_names:
+        add(f"{vt} Account", f"{vt} Amount", f"{vt} Payment Amount")
+    # Loans: Account + Disbursement + Repayment + Interest
+    for lt in catalog.loan_type_names:
+        add(
+            f"{lt} Account",
+            f"{lt} Disbursement Amount",
+            f"{lt} Repayment Amount",
+            f"{lt} Interest Amount",
+        )
+    # Fees
+    for ft in catalog.fee_type_names:
+        add(f"{ft} Account", f"{ft} Amount")
+
+    header.append("Payment Method")
+    columns.append(TEXT)
+    return header, columns
+
+
+class AccountExport:
+    """
+    Header, column kinds and rows of one download. `columns` gives each
+    column's kind (TEXT, AMOUNT or DATE) for typed writers.
+    """
+
+    def __init__(self, interest_only=False, chunk_size=None):
+        self.interest_only = interest_only
+        self.chunk_size = chunk_size or getattr(
+            settings, "ACCOUNT_EXPORT_CHUNK_SIZE", CHUNK_SIZE
+        )
+        self.catalog = get_catalog()
+        if interest_only:
+            self.header = [
+                "Member Number",
+                "Member Name",
+                "Loan Account",
+                "Loan Type",
+                "Interest Amount",
+                "Outstanding Balance",
+                "Date",
+            ]
+            self.columns = [TEXT, TEXT, TEXT, TEXT, AMOUNT, AMOUNT, DATE]
+        else:
+            self.header, self.columns = upload_columns(self.catalog)
+
+    @property
+    def file_name(self):
+        stem = "interest_transactions" if self.interest_only else "bulk_upload_template"
+        return f"{stem}_{datetime.now():%Y%m%d}"
+
+    @property
+    def cloudinary_folder(self):
+        return "interest_transactions" if self.interest_only else "bulk_templates"
+
+    @property
+    def sheet_title(self):
+        return "Interest" if self.interest_only else "Bulk Upload"
+
+    def rows(self):
+        """Rows of typed values (str, Decimal, date or None for blank)."""
+        for chunk in member_chunks(self.chunk_size):
+            ids = [pk for pk, _, _ in chunk]
+            if self.interest_only:
+                yield from self.interest_rows(chunk, ids)
+            else:
+                yield from self.template_rows(chunk, ids)
+
+    def template_rows(self, chunk, ids):
+        index = {name: i for i, name in enumerate(self.header)}
+        savings = by_member(
+            SavingsAccount.objects.filter(member_id__in=ids).order_by("-created_at"),
+            "member_id", "account_number", "account_type__name",
+        )
+        ventures = by_member(
+            VentureAccount.objects.filter(member_id__in=ids).order_by("-created_at"),
+            "member_id", "account_number", "venture_type__name",
+        )
+        loans = by_member(
+            LoanAccount.objects.filter(member_id__in=ids).order_by("-created_at"),
+            "member_id", "account_number", "loan_type__name",
+        )
+        fees = by_member(
+            MemberFee.objects.filter(member_id__in=ids).order_by("-created_at"),
+            "member_id", "account_number", "fee_type__name",
+        )
+
+        for pk, member_no, name in chunk:
+            row = [None] * len(self.header)
+            row[0], row[1], row[-1] = member_no, name, "Cash"
+            # Amount columns stay blank for the admin to fill in. With several
+            # accounts of a type, the oldest one's number is the one kept.
+            for accounts in (savings, ventures, loans, fees):
+                for account_number, type_name in accounts.get(pk, ()):
+                    column = index.get(f"{type_name} Account")
+                    if column is not None:
+                        row[column] = account_number
+            yield row
+
+    def interest_rows(self, chunk, ids):
+        balances = by_member(
+            LoanAccount.objects.filter(member_id__in=ids).order_by("-created_at"),
+            "member_id", "account_number", "outstanding_balance",
+        )
+        interest = by_member(
+            TamarindLoanInterest.objects.filter(loan_account__member_id__in=ids)
+            .order_by("-created_at"),
+            "loan_account__member_id",
+            "amount",
+            "loan_account__account_number",
+            "loan_account__loan_type__name",
+            "created_at",
+        )
+
+        for pk, member_no, name in chunk:
+            outstanding = {}
+            for account_number, balance in balances.get(pk, ()):
+                outstanding.setdefault(account_number, balance)
+            for amount, account_number, loan_type, created_at in interest.get(pk, ()):
+                yield [
+                    member_no,
+                    name,
+                    account_number,
+                    loan_type,
+                    amount,
+                    outstanding.get(account_number, Decimal("0")),
+                    created_at.date() if created_at else None,
+                ]
+
+
+def csv_value(value, kind):
+    if value is None:
+        return ""
+    if kind == AMOUNT:
+        return f"{value:.2f}"
+    if kind == DATE:
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def write_csv(export, fh):
+    """Write the export to a binary file."""
+    out = io.TextIOWrapper(fh, encoding="utf-8", newline="")
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(export.header)
+    for row in export.rows():
+        writer.writerow(
+            [csv_value(value, kind) for value, kind in zip(row, export.columns)]
+        )
+    out.flush()
+    out.detach()
+
+
+def write_xlsx(export, fh):
+    """Stream the export into a write-only workbook saved to a binary file."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=export.sheet_title)
+    number_formats = [XLSX_FORMATS[kind] for kind in export.columns]
+    # Column formats cover the blank cells, so account numbers typed into the
+    # template stay text and amounts are numbers
+    for i, number_format in enumerate(number_formats, start=1):
+        sheet.column_dimensions[get_column_letter(i)].number_format = number_format
+
+    bold = Font(bold=True)
+    header = []
+    for name in export.header:
+        cell = WriteOnlyCell(sheet, value=name)
+        cell.font = bold
+        header.append(cell)
+    sheet.append(header)
+
+    for row in export.rows():
+        cells = []
+        for value, number_format in zip(row, number_formats):
+            if value is None:
+                cells.append(None)
+                continue
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.number_format = number_format
+            cells.append(cell)
+        sheet.append(cells)
+    workbook.save(fh)
+
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx}
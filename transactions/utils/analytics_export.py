@@ -0,0 +1,309 @@
+"""
+Incremental columnar exports of the transaction tables and the GL for
+analytics.
+
+Each table in EXPORT_TABLES is streamed from the database in chunks and
+written as Parquet (or Arrow IPC) files partitioned by month:
+
+    <output dir>/<table>/month=2025-03/part-20251019T101500.parquet
+
+Decimal columns keep their precision and scale (decimal128), timestamps are
+UTC and foreign keys are exported as their ids, alongside a few joined
+columns (member number, product type) so the files can be analysed on their
+own.
+
+Exports are incremental. Every run is recorded as an AnalyticsExport and
+covers the rows created in [watermark_from, watermark_to): from where the
+table's last completed export stopped up to ANALYTICS_EXPORT_SETTLE seconds
+ago, so rows still being written by an open transaction are left for the
+next run. A run's files are written under a temporary name and only renamed
+into place once the whole table has been read; a failed run leaves no files
+and does not move the watermark.
+"""
+
+import json
+import logging
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from feespayments.models import FeePayment
+from finances.models import JournalEntry
+from loandisbursements.models import LoanDisbursement
+from loanintereststamarind.models import TamarindLoanInterest
+from loanrepayments.models import LoanRepayment
+from memberfees.models import MemberFee
+from savingsdeposits.models import SavingsDeposit
+from savingswithdrawals.models import SavingsWithdrawal
+from transactions.models import AnalyticsExport
+from venturedeposits.models import VentureDeposit
+from venturepayments.models import VenturePayment
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+SETTLE = 300
+STALE_AFTER = 3600
+
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrow"}
+
+# table: (model, {column: joined field path}, field the files are partitioned by)
+EXPORT_TABLES = {
+    "savings_deposits": (SavingsDeposit, {
+        "member_no": "savings_account__member__member_no",
+        "account_type": "savings_account__account_type__name",
+    }, "created_at"),
+    "savings_withdrawals": (SavingsWithdrawal, {
+        "member_no": "savings_account__member__member_no",
+        "account_type": "savings_account__account_type__name",
+    }, "created_at"),
+    "venture_deposits": (VentureDeposit, {
+        "member_no": "venture_account__member__member_no",
+        "venture_type": "venture_account__venture_type__name",
+    }, "created_at"),
+    "venture_payments": (VenturePayment, {
+        "member_no": "venture_account__member__member_no",
+        "venture_type": "venture_account__venture_type__name",
+    }, "created_at"),
+    "loan_disbursements": (LoanDisbursement, {
+        "member_no": "loan_account__member__member_no",
+        "loan_type": "loan_account__loan_type__name",
+    }, "created_at"),
+    "loan_repayments": (LoanRepayment, {
+        "member_no": "loan_account__member__member_no",
+        "loan_type": "loan_account__loan_type__name",
+    }, "created_at"),
+    "loan_interest": (TamarindLoanInterest, {
+        "member_no": "loan_account__member__member_no",
+        "loan_type": "loan_account__loan_type__name",
+    }, "created_at"),
+    "member_fees": (MemberFee, {
+        "member_no": "member__member_no",
+        "fee_type": "fee_type__name",
+    }, "created_at"),
+    "fee_payments": (FeePayment, {
+        "member_no": "member_fee__member__member_no",
+        "fee_type": "member_fee__fee_type__name",
+    }, "created_at"),
+    "journal_entries": (JournalEntry, {
+        "gl_code": "gl_account__code",
+        "gl_account": "gl_account__name",
+    }, "transaction_date"),
+}
+
+
+class ExportInProgress(Exception):
+    """The table is being exported by another process."""
+
+
+def arrow_type(field):
+    import pyarrow as pa
+
+    if field.is_relation:
+        field = field.target_field
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return pa.int64()
+    return pa.string()
+
+
+def arrow_value(value):
+    """Values pyarrow can't take as they come from the database."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def month_key(value):
+    if hasattr(value, "hour"):
+        value = timezone.localtime(value)
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+class TableExport:
+    """
+    Exports one table's new rows. run() returns the AnalyticsExport record.
+    """
+
+    def __init__(self, table, output_dir, file_format="parquet", user=None, chunk_size=None):
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        if file_format not in EXTENSIONS:
+            raise ValueError(f"Unknown format '{file_format}'")
+        self.table = table
+        self.model, self.joined, self.partition_field = EXPORT_TABLES[table]
+        self.output_dir = Path(output_dir)
+        self.file_format = file_format
+        self.user = user
+        self.chunk_size = chunk_size or getattr(
+            settings, "ANALYTICS_EXPORT_CHUNK_SIZE", CHUNK_SIZE
+        )
+        self.export = None
+        self.writers = {}
+
+    # ------------------------------------------------------------------
+    # Columns
+    # ------------------------------------------------------------------
+    def schema(self):
+        import pyarrow as pa
+
+        fields = [
+            pa.field(field.attname, arrow_type(field))
+            for field in self.model._meta.concrete_fields
+        ]
+        fields += [pa.field(name, pa.string()) for name in self.joined]
+        return pa.schema(fields)
+
+    def columns(self):
+        return [field.attname for field in self.model._meta.concrete_fields] + list(
+            self.joined.values()
+        )
+
+    # ------------------------------------------------------------------
+    # Watermark
+    # ------------------------------------------------------------------
+    def last_watermark(self):
+        last = (
+            AnalyticsExport.objects.filter(table=self.table, status="Completed")
+            .order_by("-watermark_to")
+            .first()
+        )
+        return last.watermark_to if last else None
+
+    def start(self):
+        # An export that stopped without recording its outcome (killed process)
+        stale_after = getattr(settings, "ANALYTICS_EXPORT_STALE_AFTER", STALE_AFTER)
+        AnalyticsExport.objects.filter(
+            table=self.table,
+            status="Processing",
+            updated_at__lt=timezone.now() - timedelta(seconds=stale_after),
+        ).update(status="Failed", error="Abandoned")
+
+        settle = getattr(settings, "ANALYTICS_EXPORT_SETTLE", SETTLE)
+        try:
+            with transaction.atomic():
+                self.export = AnalyticsExport.objects.create(
+                    admin=self.user,
+                    table=self.table,
+                    file_format=self.file_format,
+                    watermark_from=self.last_watermark(),
+                    watermark_to=timezone.now() - timedelta(seconds=settle),
+                )
+        except IntegrityError:
+            raise ExportInProgress(self.table)
+
+    def queryset(self):
+        rows = self.model.objects.filter(created_at__lt=self.export.watermark_to)
+        if self.export.watermark_from:
+            rows = rows.filter(created_at__gte=self.export.watermark_from)
+        return rows.order_by("created_at", "pk")
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+    def part_name(self):
+        stamp = timezone.localtime(self.export.watermark_to).strftime("%Y%m%dT%H%M%S")
+        return f"part-{stamp}.{EXTENSIONS[self.file_format]}"
+
+    def writer(self, month, schema):
+        if month not in self.writers:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            path = self.output_dir / self.table / f"month={month}" / self.part_name()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            if self.file_format == "parquet":
+                writer = pq.ParquetWriter(tmp_path, schema)
+            else:
+                writer = pa.ipc.new_file(pa.OSFile(str(tmp_path), "wb"), schema)
+            self.writers[month] = (writer, tmp_path, path)
+        return self.writers[month][0]
+
+    def flush(self, month, rows, schema):
+        import pyarrow as pa
+
+        batch = pa.RecordBatch.from_arrays(
+            [
+                pa.array([row[i] for row in rows], type=field.type)
+                for i, field in enumerate(schema)
+            ],
+            schema=schema,
+        )
+        self.writer(month, schema).write_batch(batch)
+        # Heartbeat, so a long export isn't taken for an abandoned one
+        AnalyticsExport.objects.filter(pk=self.export.pk).update(updated_at=timezone.now())
+
+    def close(self, keep):
+        files = []
+        for writer, tmp_path, path in self.writers.values():
+            writer.close()
+            if keep:
+                tmp_path.replace(path)
+                files.append(str(path.relative_to(self.output_dir)))
+            else:
+                tmp_path.unlink(missing_ok=True)
+        self.writers = {}
+        return sorted(files)
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def run(self):
+        self.start()
+        schema = self.schema()
+        columns = self.columns()
+        partition_index = columns.index(self.partition_field)
+
+        row_count = 0
+        buffers = {}
+        try:
+            rows = self.queryset().values_list(*columns).iterator(
+                chunk_size=self.chunk_size
+            )
+            for row in rows:
+                month = month_key(row[partition_index])
+                buffer = buffers.setdefault(month, [])
+                buffer.append([arrow_value(value) for value in row])
+                row_count += 1
+                if len(buffer) >= self.chunk_size:
+                    self.flush(month, buffer, schema)
+                    buffers[month] = []
+            for month, buffer in buffers.items():
+                if buffer:
+                    self.flush(month, buffer, schema)
+        except Exception as e:
+            self.close(keep=False)
+            self.export.status = "Failed"
+            self.export.error = f"{type(e).__name__}: {e}"
+            self.export.save(update_fields=["status", "error", "updated_at"])
+            raise
+
+        self.export.files = self.close(keep=True)
+        self.export.row_count = row_count
+        self.export.status = "Completed"
+        self.export.save(update_fields=["files", "row_count", "status", "updated_at"])
+        logger.info(f"Exported {row_count} {self.table} rows")
+        return self.export
+
+
+def export_tables(tables=None, output_dir=None, file_format="parquet", user=None):
+    """Export each table's new rows. Returns the AnalyticsExport records."""
+    output_dir = output_dir or getattr(settings, "ANALYTICS_EXPORT_DIR", "exports")
+    return [
+        TableExport(table, output_dir, file_format, user).run()
+        for table in (tables or EXPORT_TABLES)
+    ]
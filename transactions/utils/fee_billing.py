@@ -0,0 +1,97 @@
+"""
+SACCO-wide fee billing for a year, aggregated in the database.
+
+A member fee is billed in the month its MemberFee row is created and paid down
+by FeePayments. FeeBilling answers, per fee type and month of a year, how much
+was billed, paid and left outstanding, with one grouped query per measure
+instead of loading every member's fee rows.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from feespayments.models import FeePayment
+from memberfees.models import MemberFee
+from transactions.utils.periods import before_year, in_year
+
+ZERO = Decimal("0")
+
+
+def totals_by_type(queryset, type_field, amount_field="amount"):
+    """{fee type name: total}"""
+    return {
+        item[type_field]: item["total"] or ZERO
+        for item in queryset.values(type_field).annotate(total=Sum(amount_field))
+    }
+
+
+def monthly_totals_by_type(queryset, type_field, amount_field="amount"):
+    """{fee type name: {month number: total}}"""
+    totals = defaultdict(dict)
+    rows = (
+        queryset.annotate(month=TruncMonth("created_at"))
+        .values("month", type_field)
+        .annotate(total=Sum(amount_field))
+    )
+    for item in rows:
+        totals[item[type_field]][item["month"].month] = item["total"] or ZERO
+    return totals
+
+
+class FeeBilling:
+    """
+    Billed, paid and outstanding fee amounts per (fee type, month) of `year`.
+
+    The outstanding balance starts from what was billed but unpaid before the
+    year (from 2021 on, as the other summary balances do), adds each month's
+    billing and subtracts its payments, never going below zero.
+    """
+
+    def __init__(self, year, fee_types):
+        self.year = year
+        self.fee_types = fee_types
+
+        self.billed = monthly_totals_by_type(
+            MemberFee.objects.filter(in_year(year)), "fee_type__name"
+        )
+        self.paid = monthly_totals_by_type(
+            FeePayment.objects.filter(in_year(year)), "member_fee__fee_type__name"
+        )
+        self.expected = totals_by_type(MemberFee.objects.all(), "fee_type__name")
+        self.total_outstanding = (
+            MemberFee.objects.aggregate(total=Sum("remaining_balance"))["total"] or ZERO
+        )
+
+        self.opening = {name: ZERO for name in fee_types}
+        if year - 1 >= 2020:
+            billed_before = totals_by_type(
+                MemberFee.objects.filter(before_year(year)), "fee_type__name"
+            )
+            paid_before = totals_by_type(
+                FeePayment.objects.filter(before_year(year)), "member_fee__fee_type__name"
+            )
+            for name in fee_types:
+                self.opening[name] = max(
+                    billed_before.get(name, ZERO) - paid_before.get(name, ZERO), ZERO
+                )
+
+        self.brought_forward = defaultdict(dict)
+        self.outstanding = defaultdict(dict)
+        for name in fee_types:
+            balance = self.opening[name]
+            for month in range(1, 13):
+                billed = self.billed_in(name, month)
+                paid = self.paid_in(name, month)
+                balance += billed
+                self.brought_forward[name][month] = balance - (billed - paid)
+                balance = max(balance - paid, ZERO)
+                self.outstanding[name][month] = balance
+
+    def billed_in(self, name, month):
+        return self.billed.get(name, {}).get(month, ZERO)
+
+    def paid_in(self, name, month):
+        return self.paid.get(name, {}).get(month, ZERO)
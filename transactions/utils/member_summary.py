@@ -0,0 +1,333 @@
+"""
+The member yearly summary, computed for many members at once.
+
+MemberYearlySummaryView and the annual statement batch run share this code.
+load_member_year_data() fetches, for a whole batch of members, per-(month,
+product type) totals from grouped queries, prior-year totals, fees and
+guarantor commitments, plus, for the months asked for, the individual
+transactions listed under each month. member_report() then runs the
+balances forward in a single pass over the months, in integer cents, into a
+SummaryReport (see summary_report). The view simply loads a batch of one.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+from catalogs.registry import get_catalog
+from feespayments.models import FeePayment
+from guaranteerequests.models import GuaranteeRequest
+from guarantorprofile.models import GuarantorProfile
+from loandisbursements.models import LoanDisbursement
+from loanintereststamarind.models import TamarindLoanInterest
+from loanrepayments.models import LoanRepayment
+from memberfees.models import MemberFee
+from savingsdeposits.models import SavingsDeposit
+from transactions.utils.periods import before_year, in_month, in_year
+from transactions.utils.summary_report import (
+    FEE_MEASURES,
+    LOAN_MEASURES,
+    MEMBER_REPORT,
+    SAVINGS_MEASURES,
+    VENTURE_MEASURES,
+    Section,
+    SummaryReport,
+    to_cents,
+)
+from venturedeposits.models import VentureDeposit
+from venturepayments.models import VenturePayment
+
+MONTHS = frozenset(range(1, 13))
+
+PRINCIPAL_REPAYMENT_TYPES = [
+    "Regular Repayment", "Early Settlement", "Partial Payment", "Individual Settlement"
+]
+
+# kind, model, path to the member, path to the type name, filter
+PRIOR_TOTALS = (
+    ("savings", SavingsDeposit, "savings_account__member_id",
+     "savings_account__account_type__name", Q()),
+    ("vent_dep", VentureDeposit, "venture_account__member_id",
+     "venture_account__venture_type__name", Q()),
+    ("vent_pay", VenturePayment, "venture_account__member_id",
+     "venture_account__venture_type__name", Q()),
+    ("loan_disb", LoanDisbursement, "loan_account__member_id",
+     "loan_account__loan_type__name", Q(transaction_status="Completed")),
+    ("loan_rep", LoanRepayment, "loan_account__member_id",
+     "loan_account__loan_type__name",
+     Q(transaction_status="Completed", repayment_type__in=PRINCIPAL_REPAYMENT_TYPES)),
+    ("fee_pay", FeePayment, "member_fee__member_id", "member_fee__fee_type__name", Q()),
+)
+
+# kind, model, path to the member, path to the type name, filter, the label
+# each listed transaction carries its type under
+MONTHLY_TOTALS = (
+    ("savings", SavingsDeposit, "savings_account__member_id",
+     "savings_account__account_type__name", Q(), "type"),
+    ("vent_dep", VentureDeposit, "venture_account__member_id",
+     "venture_account__venture_type__name", Q(), "venture_type"),
+    ("vent_pay", VenturePayment, "venture_account__member_id",
+     "venture_account__venture_type__name", Q(), "venture_type"),
+    ("loan_disb", LoanDisbursement, "loan_account__member_id",
+     "loan_account__loan_type__name", Q(transaction_status="Completed"), "loan_type"),
+    ("loan_rep", LoanRepayment, "loan_account__member_id",
+     "loan_account__loan_type__name",
+     Q(transaction_status="Completed") & ~Q(repayment_type="Interest Payment"), "loan_type"),
+    ("loan_int", TamarindLoanInterest, "loan_account__member_id",
+     "loan_account__loan_type__name", Q(), "loan_type"),
+    ("fees", FeePayment, "member_fee__member_id", "member_fee__fee_type__name", Q(), "type"),
+)
+
+NEW_GUARANTEES = Q(status="Accepted")
+
+
+def parse_detail_months(value):
+    """
+    The `details` query parameter: "all" (the default), "none", or a
+    comma-separated list of month numbers. Raises ValueError with a
+    client-facing message when malformed.
+    """
+    if value in (None, "", "all"):
+        return MONTHS
+    if value == "none":
+        return frozenset()
+    try:
+        months = frozenset(int(month) for month in value.split(","))
+    except ValueError:
+        months = None
+    if not months or not months <= MONTHS:
+        raise ValueError('details must be "all", "none" or month numbers 1-12, e.g. "1,2"')
+    return months
+
+
+class MemberYearData:
+    """One member's share of a load_member_year_data() batch. Amounts in cents."""
+
+    def __init__(self):
+        self.member_fees = []
+        self.committed_guarantees = 0
+        # kind -> type name -> total before the year
+        self.prior = defaultdict(dict)
+        # kind -> month -> type name -> total; new guarantees under "new"
+        self.totals = defaultdict(lambda: defaultdict(dict))
+        # kind -> month -> type name -> listed transactions
+        self.details = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+
+
+def load_member_year_data(member_ids, year, detail_months=MONTHS):
+    """
+    {member id: MemberYearData} for `year`, with a fixed number of queries
+    however many members are asked for. Transactions are listed for
+    `detail_months` only.
+    """
+    member_ids = list(member_ids)
+    fetched = {pk: MemberYearData() for pk in member_ids}
+
+    for fee in MemberFee.objects.filter(member_id__in=member_ids).select_related("fee_type"):
+        fetched[fee.member_id].member_fees.append(fee)
+
+    for member_id, committed in GuarantorProfile.objects.filter(
+        member_id__in=member_ids
+    ).values_list("member_id", "committed_guarantee_amount"):
+        fetched[member_id].committed_guarantees = to_cents(committed)
+
+    if year - 1 >= 2020:
+        for kind, model, member_path, type_path, q in PRIOR_TOTALS:
+            totals = (
+                model.objects.filter(q, before_year(year), **{f"{member_path}__in": member_ids})
+                .values(member_path, type_path)
+                .annotate(total=Sum("amount"))
+            )
+            for item in totals:
+                fetched[item[member_path]].prior[kind][item[type_path]] = to_cents(item["total"])
+
+    # When every month's transactions are listed anyway, they are totalled
+    # from the listed rows instead of by a second, grouped, query
+    list_all = detail_months == MONTHS
+    detail_periods = Q()
+    if not list_all:
+        for month in sorted(detail_months):
+            detail_periods |= in_month(year, month)
+
+    for kind, model, member_path, type_path, q, label in MONTHLY_TOTALS:
+        year_qs = model.objects.filter(q, in_year(year), **{f"{member_path}__in": member_ids})
+        if not list_all:
+            totals = (
+                year_qs.annotate(month=TruncMonth("created_at"))
+                .values(member_path, "month", type_path)
+                .annotate(total=Sum("amount"))
+                .order_by()
+            )
+            for item in totals:
+                month_totals = fetched[item[member_path]].totals[kind][item["month"].month]
+                month_totals[item[type_path]] = to_cents(item["total"])
+
+        if not detail_months:
+            continue
+        rows = (
+            year_qs.filter(detail_periods)
+            .annotate(month=TruncMonth("created_at"))
+            .order_by("month")
+            .values_list(member_path, "month", type_path, "amount")
+        )
+        for member_id, month, name, amount in rows:
+            data = fetched[member_id]
+            data.details[kind][month.month][name].append({label: name, "amount": float(amount)})
+            if list_all:
+                month_totals = data.totals[kind][month.month]
+                month_totals[name] = month_totals.get(name, 0) + to_cents(amount)
+
+    guarantees = GuaranteeRequest.objects.filter(
+        NEW_GUARANTEES, in_year(year), guarantor__member_id__in=member_ids
+    )
+    if not list_all:
+        totals = (
+            guarantees.annotate(month=TruncMonth("created_at"))
+            .values("guarantor__member_id", "month")
+            .annotate(total=Sum("guaranteed_amount"))
+            .order_by()
+        )
+        for item in totals:
+            month_totals = fetched[item["guarantor__member_id"]].totals["guarantees"]
+            month_totals[item["month"].month]["new"] = to_cents(item["total"] or 0)
+
+    if detail_months:
+        rows = (
+            guarantees.filter(detail_periods)
+            .annotate(month=TruncMonth("created_at"))
+            .order_by("month")
+            .values_list(
+                "guarantor__member_id", "month", "member__first_name",
+                "member__last_name", "member__member_no", "guaranteed_amount",
+                "current_balance", "created_at",
+            )
+        )
+        for member_id, month, first_name, last_name, member_no, amount, current, created_at in rows:
+            data = fetched[member_id]
+            data.details["guarantees"][month.month]["new"].append({
+                "borrower_name": f"{first_name} {last_name}",
+                "borrower_no": member_no,
+                "amount": float(amount),
+                "current_balance": float(current if current is not None else amount),
+                "date": created_at.strftime("%Y-%m-%d"),
+            })
+            if list_all:
+                month_totals = data.totals["guarantees"][month.month]
+                month_totals["new"] = month_totals.get("new", 0) + to_cents(amount)
+
+    return fetched
+
+
+def member_report(member, year, fetched):
+    """
+    The member yearly summary of `member`, computed from the MemberYearData
+    loaded for them. Render it with summary_report.render().
+    """
+    catalog = get_catalog()
+    all_fee_types = catalog.fee_types
+    savings = Section.empty("Savings", catalog.savings_types, SAVINGS_MEASURES)
+    ventures = Section.empty("Ventures", catalog.venture_types, VENTURE_MEASURES)
+    loans = Section.empty("Loans", catalog.loan_types, LOAN_MEASURES)
+    fees = Section.empty("Fees", all_fee_types, FEE_MEASURES)
+
+    # === MEMBER FEES: amount billed and the month it was billed in ===
+    member_fees_map = {f.fee_type.name: f for f in fetched.member_fees}
+    fee_billing = {}
+    total_fees_outstanding = 0
+    for name, ftype in all_fee_types.items():
+        mfee = member_fees_map.get(name)
+        if mfee:
+            fee_billing[name] = (to_cents(mfee.amount), (mfee.created_at.year, mfee.created_at.month))
+            total_fees_outstanding += to_cents(mfee.remaining_balance)
+        else:
+            fee_billing[name] = (to_cents(ftype.standard_amount), (1900, 1))
+            total_fees_outstanding += to_cents(ftype.standard_amount)
+
+    # === RUNNING BALANCES, FROM THE PRIOR YEAR'S CLOSING ONES ===
+    running = {
+        "savings": dict.fromkeys(savings.types, 0),
+        "venture_net": dict.fromkeys(ventures.types, 0),
+        "loan_out": dict.fromkeys(loans.types, 0),
+        "fee_out": dict.fromkeys(fees.types, 0),
+    }
+    if year - 1 >= 2020:
+        prior = fetched.prior
+        for name in savings.types:
+            running["savings"][name] = prior["savings"].get(name, 0)
+        for name in ventures.types:
+            running["venture_net"][name] = prior["vent_dep"].get(name, 0) - prior["vent_pay"].get(name, 0)
+        for name in loans.types:
+            running["loan_out"][name] = max(prior["loan_disb"].get(name, 0) - prior["loan_rep"].get(name, 0), 0)
+        for name, (billed, (billed_year, _)) in fee_billing.items():
+            billed_prior = billed if billed_year < year else 0
+            running["fee_out"][name] = max(billed_prior - prior["fee_pay"].get(name, 0), 0)
+
+    totals = fetched.totals
+    new_guarantees = []
+    for month in range(1, 13):
+        savings_month = totals["savings"].get(month, {})
+        vent_dep = totals["vent_dep"].get(month, {})
+        vent_pay = totals["vent_pay"].get(month, {})
+        loan_disb = totals["loan_disb"].get(month, {})
+        loan_rep = totals["loan_rep"].get(month, {})
+        loan_int = totals["loan_int"].get(month, {})
+        fees_month = totals["fees"].get(month, {})
+        new_guarantees.append(totals["guarantees"].get(month, {}).get("new", 0))
+
+        for name in savings.types:
+            deposited = savings_month.get(name, 0)
+            brought = running["savings"][name]
+            running["savings"][name] = brought + deposited
+            savings.set("deposits", name, month, deposited)
+            savings.set("brought_forward", name, month, brought)
+            savings.set("carried_forward", name, month, brought + deposited)
+
+        for name in ventures.types:
+            deposited = vent_dep.get(name, 0)
+            paid = vent_pay.get(name, 0)
+            brought = running["venture_net"][name]
+            running["venture_net"][name] = brought + deposited - paid
+            ventures.set("deposits", name, month, deposited)
+            ventures.set("payments", name, month, paid)
+            ventures.set("brought_forward", name, month, brought)
+            ventures.set("carried_forward", name, month, running["venture_net"][name])
+
+        for name in loans.types:
+            disbursed = loan_disb.get(name, 0)
+            repaid = loan_rep.get(name, 0)
+            brought = running["loan_out"][name]
+            running["loan_out"][name] = brought + disbursed - repaid
+            loans.set("disbursed", name, month, disbursed)
+            loans.set("repaid", name, month, repaid)
+            loans.set("interest", name, month, loan_int.get(name, 0))
+            loans.set("brought_forward", name, month, brought)
+            loans.set("carried_forward", name, month, running["loan_out"][name])
+
+        for name, (billed, billed_in) in fee_billing.items():
+            # A fee billed this month is added before the month's payments
+            billed_month = billed if billed_in == (year, month) else 0
+            paid = fees_month.get(name, 0)
+            balance = running["fee_out"][name] + billed_month
+            if name in fees_month:
+                balance = max(balance - paid, 0)
+            running["fee_out"][name] = balance
+            fees.set("expected", name, month, billed)
+            fees.set("paid", name, month, paid)
+            fees.set("brought_forward", name, month, balance - (billed_month - paid))
+            fees.set("carried_forward", name, month, balance)
+
+    return SummaryReport(
+        name=MEMBER_REPORT,
+        year=year,
+        savings=savings,
+        ventures=ventures,
+        loans=loans,
+        fees=fees,
+        income_fee_types=frozenset(name for name, ftype in all_fee_types.items() if ftype.is_income),
+        new_guarantees=new_guarantees,
+        guaranteed_active=fetched.committed_guarantees,
+        fees_outstanding=total_fees_outstanding,
+        member=member,
+        details=fetched.details,
+    )
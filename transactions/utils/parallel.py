@@ -0,0 +1,256 @@
+"""
+Sharded execution of large bulk imports across a process pool.
+
+Every row of a combined remittance file updates a few account balances under
+row locks. ShardedImport splits the rows that passed validation into shards
+that never touch the same member: rows are joined through the members who
+own the accounts they reference, and the resulting groups are dealt out,
+largest first, to the least loaded shard. Shards therefore never wait on, or
+deadlock against, each other's locks (including the guarantor profile each
+savings balance change updates).
+
+Each shard is a BulkImportShard with its own chunked checkpoints, and the
+shard results are merged into the import's one BulkTransactionLog. Shards run
+in a pool of BULK_IMPORT_WORKERS spawned processes, or one after another in
+the request's process when the database is SQLite (a single writer) or the
+import runs inside an outer transaction, whose rows other processes cannot
+see. Files with fewer than BULK_IMPORT_PARALLEL_MIN_ROWS valid rows are not
+sharded at all.
+"""
+
+import multiprocessing
+import os
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from transactions.models import BulkImportShard, BulkTransactionLog
+from transactions.utils.uploads import CSVImport
+
+PARALLEL_MIN_ROWS = 2000
+
+
+def partition(groups, shard_count):
+    """
+    Deal `groups` (lists of row indices that must stay together) into at most
+    `shard_count` shards, largest group first onto the lightest shard.
+    """
+    shards = [[] for _ in range(shard_count)]
+    for group in sorted(groups, key=lambda group: (-len(group), group[0])):
+        min(shards, key=len).extend(group)
+    return [sorted(shard) for shard in shards if shard]
+
+
+def run_shard(task):
+    """Process pool entry point: run one shard in a fresh import."""
+    import_path, path, name, user_pk, shard_pk = task
+    user = get_user_model().objects.get(pk=user_pk)
+    shard = BulkImportShard.objects.select_related("log").get(pk=shard_pk)
+    with open(path, "rb") as fh:
+        upload = import_string(import_path)(File(fh, name=name), user)
+        upload.log = shard.log
+        upload.process_shard(shard)
+    return shard.number
+
+
+class ShardedImport(CSVImport):
+    """
+    CSVImport whose commit pass is split into member-disjoint shards.
+    Requires `transaction_type`, since shards hang off the import's log.
+    """
+
+    owner_field = "member_id"  # on every referenced model
+
+    def __init__(self, file, user):
+        super().__init__(file, user)
+        self.shard = None
+        self.only_rows = None
+
+    def worker_count(self):
+        return getattr(settings, "BULK_IMPORT_WORKERS", 0) or os.cpu_count() or 1
+
+    def runs_in_pool(self):
+        return connection.vendor != "sqlite" and not connection.in_atomic_block
+
+    def batches(self, reader):
+        if self.only_rows is None:
+            yield from super().batches(reader)
+            return
+        for batch in super().batches(reader):
+            batch = [(index, row) for index, row in batch if index in self.only_rows]
+            if batch:
+                yield batch
+
+    # ------------------------------------------------------------------
+    # Partitioning
+    # ------------------------------------------------------------------
+    def owners(self, wanted):
+        """(kind, key) -> owning member id, for every resolvable reference."""
+        owners = {}
+        for kind, keys in wanted.items():
+            model, field = self.references[kind]
+            for key, owner in model.objects.filter(
+                **{f"{field}__in": keys}
+            ).values_list(field, self.owner_field):
+                owners[(kind, str(key))] = owner
+        return owners
+
+    def group_rows(self):
+        """Rows that passed validation, grouped so no member spans two groups."""
+        parent = {}
+
+        def find(node):
+            parent.setdefault(node, node)
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        reader = self.open()
+        self.start_pass()
+        for batch in self.batches(reader):
+            row_keys = {}
+            wanted = defaultdict(set)
+            for index, row in batch:
+                if index in self.rejected:
+                    continue
+                keys = self.collect([(index, row)])
+                row_keys[index] = [(kind, key) for kind in keys for key in keys[kind]]
+                for kind, key in row_keys[index]:
+                    wanted[kind].add(key)
+            owners = self.owners(wanted)
+            for index, keys in row_keys.items():
+                root = find(("row", index))
+                for ref in keys:
+                    owner = owners.get(ref)
+                    node = ("member", owner) if owner is not None else ref
+                    parent[find(node)] = root
+
+        groups = defaultdict(list)
+        for node in list(parent):
+            if node[0] == "row":
+                groups[find(node)].append(node[1])
+        return list(groups.values())
+
+    def create_shards(self, shard_count):
+        return BulkImportShard.objects.bulk_create(
+            BulkImportShard(log=self.log, number=number, rows=rows)
+            for number, rows in enumerate(partition(self.group_rows(), shard_count))
+        )
+
+    # ------------------------------------------------------------------
+    # Passes
+    # ------------------------------------------------------------------
+    def commit(self):
+        shards = list(self.log.shards.all())
+        if not shards:
+            min_rows = getattr(
+                settings, "BULK_IMPORT_PARALLEL_MIN_ROWS", PARALLEL_MIN_ROWS
+            )
+            workers = self.worker_count()
+            if self.resume_after or workers < 2 or self.valid_rows < min_rows:
+                return super().commit()
+            shards = self.create_shards(workers)
+
+        pending = [shard for shard in shards if shard.status != "Completed"]
+        if len(pending) > 1 and self.runs_in_pool():
+            self.run_pool(pending)
+        else:
+            for shard in pending:
+                upload = self.__class__(self.file, self.user)
+                upload.log = self.log
+                upload.resolved = self.resolved
+                upload.process_shard(shard)
+        self.merge()
+
+    def process_shard(self, shard):
+        self.shard = shard
+        self.only_rows = set(shard.rows)
+        self.resume_after = shard.last_row
+        self.success_count = shard.success_count
+        self.errors = list(shard.errors)
+
+        reader = self.open()
+        self.check_header(reader.fieldnames or [])
+        self.start_pass()
+        for batch in self.batches(reader):
+            self.resolve(batch)
+            with transaction.atomic():
+                self.lock(batch)
+                for index, row in batch:
+                    self.write(self.plan(index, row))
+                self.checkpoint(batch[-1][0])
+            # Keeps the import from looking stale, outside the chunk's
+            # transaction so shards do not queue on the log row
+            BulkTransactionLog.objects.filter(pk=self.log.pk).update(
+                updated_at=timezone.now()
+            )
+
+        shard.status = "Completed"
+        shard.save(update_fields=["status", "updated_at"])
+
+    def checkpoint(self, index):
+        if self.shard is None:
+            return super().checkpoint(index)
+        self.shard.last_row = index
+        self.shard.success_count = self.success_count
+        self.shard.errors = self.errors
+        self.shard.save(
+            update_fields=["last_row", "success_count", "errors", "updated_at"]
+        )
+
+    def run_pool(self, shards):
+        import_path = f"{self.__class__.__module__}.{self.__class__.__qualname__}"
+        with self.spooled_file() as path:
+            tasks = [
+                (import_path, path, self.file.name, self.user.pk, shard.pk)
+                for shard in shards
+            ]
+            with ProcessPoolExecutor(
+                max_workers=min(self.worker_count(), len(shards)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            ) as pool:
+                list(pool.map(run_shard, tasks))
+
+    @contextmanager
+    def spooled_file(self):
+        """A path to the upload that worker processes can open."""
+        if hasattr(self.file, "temporary_file_path"):
+            yield self.file.temporary_file_path()
+            return
+        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as fh:
+            for chunk in self.file.chunks():
+                fh.write(chunk)
+        try:
+            yield fh.name
+        finally:
+            os.unlink(fh.name)
+
+    def merge(self):
+        shards = list(self.log.shards.all())
+        errors = [error for errors in self.rejected.values() for error in errors]
+        for shard in shards:
+            errors.extend(shard.errors)
+        errors.sort(key=lambda error: error[self.row_key])
+
+        self.errors = errors
+        self.success_count = sum(shard.success_count for shard in shards)
+        self.log.last_row = max(shard.last_row for shard in shards)
+        self.log.success_count = self.success_count
+        self.log.error_count = len(errors)
+        self.log.errors = errors
+        self.log.save(
+            update_fields=[
+                "last_row", "success_count", "error_count", "errors", "updated_at"
+            ]
+        )
@@ -0,0 +1,229 @@
+"""
+Monthly payroll deduction schedules, per employer.
+
+PayrollDeductions works out what each member's employer should deduct in a
+month, with one query (or one schedule scan) per kind of account:
+
+- loans: the instalments of the disbursed applications' schedules
+  (projection_snapshot) falling due in the month, per active loan account,
+  capped at its outstanding balance;
+- savings: each active account's monthly_contribution or, when none is set,
+  the amount of its most recent Payroll Deduction deposit;
+- fees: the remaining balance of every unpaid member fee.
+
+The rows are in the combined bulk upload layout (upload_columns) with
+PAYMENT_METHOD as the payment method and DEDUCTION_TYPE as the deposit and
+repayment type, so an employer's remittance file can be posted back to
+CombinedBulkUploadView as it is. A member with two accounts of one type to
+deduct for gets a second row for the second one.
+
+Every row also carries the month as PERIOD_COLUMN (YYYY-MM), which the
+import ignores. Standing savings and fixed instalments repeat month after
+month, and without it two months' files would be byte-identical and the
+second would be taken for a re-upload of the first.
+"""
+
+import calendar
+import hashlib
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Q, Subquery
+from django.utils.text import slugify
+
+from catalogs.registry import get_catalog
+from loans.arrears import from_cents, load_schedules
+from loans.models import LoanAccount
+from memberfees.models import MemberFee
+from savings.models import SavingsAccount
+from savingsdeposits.models import SavingsDeposit
+from transactions.utils.account_export import TEXT, upload_columns
+
+User = get_user_model()
+
+UNASSIGNED = "Unassigned"
+PAYMENT_METHOD = "Bank Transfer"  # valid for both savings deposits and fee payments
+DEDUCTION_TYPE = "Payroll Deduction"  # a savings deposit type and a loan repayment type
+TYPE_COLUMNS = ("Deposit Type", "Repayment Type")
+PERIOD_COLUMN = "Deduction Month"
+
+KINDS = ("loans", "savings", "fees")
+CENT = Decimal("0.01")
+
+
+def employer_slug(employer):
+    """
+    The employer's part of a file name. A hash of the exact name follows the
+    slug, so "ABC Ltd" and "ABC Ltd." don't share a file in the zip.
+    """
+    digest = hashlib.sha1(employer.encode()).hexdigest()[:8]
+    return f"{slugify(employer) or 'employer'}_{digest}"
+
+
+class RemittanceFile:
+    """One employer's deductions, for the account_export writers."""
+
+    sheet_title = "Payroll Deductions"
+
+    def __init__(self, schedule, employer, rows, totals):
+        self.schedule = schedule
+        self.employer = employer
+        self._rows = rows
+        self.totals = totals
+        self.header = schedule.header
+        self.columns = schedule.columns
+
+    @property
+    def file_name(self):
+        return (
+            f"payroll_deductions_{employer_slug(self.employer)}_"
+            f"{self.schedule.year}_{self.schedule.month:02d}"
+        )
+
+    def rows(self):
+        return iter(self._rows)
+
+    def summary(self):
+        return {
+            "employer": self.employer,
+            "members": len({row[0] for row in self._rows}),
+            "rows": len(self._rows),
+            **{kind: self.totals[kind] for kind in KINDS},
+            "total": sum(self.totals.values(), Decimal("0.00")),
+        }
+
+
+class PayrollDeductions:
+    """
+    The deductions for `year`/`month`, for every employer or just
+    `employer` (UNASSIGNED for members with none on record).
+    """
+
+    def __init__(self, year, month, employer=None):
+        if not 1 <= month <= 12:
+            raise ValueError("month must be between 1 and 12")
+        self.year = year
+        self.month = month
+        self.employer = employer
+        self.start = date(year, month, 1)
+        self.end = date(year, month, calendar.monthrange(year, month)[1])
+        self.header, self.columns = upload_columns(get_catalog())
+        for name in (*TYPE_COLUMNS, PERIOD_COLUMN):
+            self.header.append(name)
+            self.columns.append(TEXT)
+        self.index = {name: i for i, name in enumerate(self.header)}
+
+    def members(self):
+        members = User.objects.filter(is_member=True)
+        if self.employer == UNASSIGNED:
+            members = members.filter(Q(employer__isnull=True) | Q(employer=""))
+        elif self.employer:
+            members = members.filter(employer=self.employer)
+        return members.order_by().values_list(
+            "pk", "member_no", "first_name", "last_name", "employer"
+        )
+
+    def loan_deductions(self):
+        """(member pk, account number, loan type, amount) per loan with an instalment due."""
+        loan_ids, loan_index, due_dates, amounts = load_schedules()
+        due = (due_dates >= np.datetime64(self.start)) & (
+            due_dates <= np.datetime64(self.end)
+        )
+        totals = np.bincount(
+            loan_index[due], weights=amounts[due], minlength=len(loan_ids)
+        )
+        due_by_loan = {
+            loan_ids[i]: from_cents(round(totals[i])) for i in np.flatnonzero(totals)
+        }
+        for pk, member_id, account_number, loan_type, outstanding in (
+            LoanAccount.objects.filter(is_active=True, outstanding_balance__gt=0)
+            .order_by()
+            .values_list(
+                "pk", "member_id", "account_number", "loan_type__name", "outstanding_balance"
+            )
+        ):
+            if pk in due_by_loan:
+                yield member_id, account_number, loan_type, min(due_by_loan[pk], outstanding)
+
+    def savings_deductions(self):
+        last_payroll = (
+            SavingsDeposit.objects.filter(
+                savings_account=OuterRef("pk"),
+                deposit_type="Payroll Deduction",
+                transaction_status="Completed",
+            )
+            .order_by("-created_at")
+            .values("amount")[:1]
+        )
+        for member_id, account_number, savings_type, standing, last in (
+            SavingsAccount.objects.filter(is_active=True)
+            .order_by("created_at")
+            .annotate(last_payroll=Subquery(last_payroll))
+            .values_list(
+                "member_id",
+                "account_number",
+                "account_type__name",
+                "monthly_contribution",
+                "last_payroll",
+            )
+        ):
+            amount = standing or last
+            if amount and amount > 0:
+                yield member_id, account_number, savings_type, amount.quantize(CENT)
+
+    def fee_deductions(self):
+        yield from (
+            MemberFee.objects.filter(is_paid=False, remaining_balance__gt=0)
+            .order_by("created_at")
+            .values_list("member_id", "account_number", "fee_type__name", "remaining_balance")
+        )
+
+    def files(self):
+        """A RemittanceFile per employer with anything to deduct, by employer name."""
+        members = {
+            pk: (member_no, f"{first_name} {last_name}".strip(), employer or UNASSIGNED)
+            for pk, member_no, first_name, last_name, employer in self.members()
+        }
+        deductions = {}
+        for kind, amount_column, rows in (
+            ("loans", "{} Repayment Amount", self.loan_deductions()),
+            ("savings", "{} Amount", self.savings_deductions()),
+            ("fees", "{} Amount", self.fee_deductions()),
+        ):
+            for member_id, account_number, type_name, amount in rows:
+                account = self.index.get(f"{type_name} Account")
+                if member_id in members and account is not None:
+                    deductions.setdefault(member_id, []).append(
+                        (kind, account, self.index[amount_column.format(type_name)],
+                         account_number, amount)
+                    )
+
+        period = f"{self.year}-{self.month:02d}"
+        by_employer = {}
+        for pk in sorted(deductions, key=lambda pk: (members[pk][2], members[pk][0])):
+            member_no, name, employer = members[pk]
+            rows, totals = by_employer.setdefault(
+                employer, ([], {kind: Decimal("0.00") for kind in KINDS})
+            )
+            member_rows = []
+            for kind, account, amount_column, account_number, amount in deductions[pk]:
+                row = next((row for row in member_rows if row[account] is None), None)
+                if row is None:
+                    row = [None] * len(self.header)
+                    row[0], row[1] = member_no, name
+                    row[self.index["Payment Method"]] = PAYMENT_METHOD
+                    for column in TYPE_COLUMNS:
+                        row[self.index[column]] = DEDUCTION_TYPE
+                    row[self.index[PERIOD_COLUMN]] = period
+                    member_rows.append(row)
+                row[account] = account_number
+                row[amount_column] = amount
+                totals[kind] += amount
+            rows.extend(member_rows)
+
+        return {
+            employer: RemittanceFile(self, employer, rows, totals)
+            for employer, (rows, totals) in sorted(by_employer.items())
+        }
@@ -0,0 +1,145 @@
+"""
+PDF backends for the report downloads.
+
+Reports are rendered from HTML templates (see transactions/templates/reports)
+by a backend chosen per report:
+
+- "weasyprint" lays the page out natively in-process. The templates are
+  written for it: `@page` margin boxes carry the page numbers and footer.
+- "chromium" prints the page through a headless Chromium via Playwright.
+  It needs the browser installed (`playwright install chromium`) and starts
+  a new browser for every render.
+
+PDF_BACKEND picks the default and PDF_REPORT_BACKENDS overrides it per report
+name, e.g. `PDF_REPORT_BACKENDS=sacco_summary=weasyprint`. The default stays
+"chromium", which the deploy installs (build.sh, Procfile); WeasyPrint needs
+Pango on the image (libpango-1.0-0, libpangoft2-1.0-0) and should be switched
+on only once a real render passes there (PDFRenderTests).
+
+The async views await arender_pdf(). Chromium is driven by Playwright's
+async API on the running event loop; WeasyPrint renders in a worker thread.
+"""
+
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from metrics.utils import timed_external
+
+DEFAULT_BACKEND = "chromium"
+MARGIN = "1cm"
+
+
+class PDFBackend:
+    name = None
+
+    def render(self, html: str, landscape: bool = True) -> bytes:
+        raise NotImplementedError
+
+    async def arender(self, html: str, landscape: bool = True) -> bytes:
+        return await sync_to_async(self.render, thread_sensitive=False)(
+            html, landscape=landscape
+        )
+
+
+@timed_external("playwright")
+async def generate_pdf_async(html_content: str, landscape: bool = True):
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(html_content, wait_until="networkidle")
+        pdf_bytes = await page.pdf(
+            format="A4",
+            landscape=landscape,
+            print_background=True,
+            margin={"top": MARGIN, "bottom": MARGIN, "left": MARGIN, "right": MARGIN},
+        )
+        await browser.close()
+        return pdf_bytes
+
+
+class ChromiumBackend(PDFBackend):
+    name = "chromium"
+
+    def render(self, html, landscape=True):
+        return asyncio.run(generate_pdf_async(html, landscape=landscape))
+
+    async def arender(self, html, landscape=True):
+        return await generate_pdf_async(html, landscape=landscape)
+
+
+@functools.lru_cache(maxsize=None)
+def caching_url_fetcher_class():
+    """
+    A WeasyPrint URL fetcher that keeps remote images (the logo) in memory,
+    so they are downloaded once per process rather than once per render.
+    """
+    from weasyprint.urls import URLFetcher, URLFetcherResponse
+
+    class CachingURLFetcher(URLFetcher):
+        cache = {}
+        max_entries = 32
+
+        def fetch(self, url, headers=None):
+            if not url.startswith(("http://", "https://")):
+                return super().fetch(url, headers)
+            if url not in self.cache:
+                response = super().fetch(url, headers)
+                try:
+                    body = response.read()
+                finally:
+                    response.close()
+                if response.status != 200 or len(self.cache) >= self.max_entries:
+                    return URLFetcherResponse(
+                        response.url, body, response.headers, response.status
+                    )
+                self.cache[url] = (response.url, body, dict(response.headers.items()))
+            final_url, body, response_headers = self.cache[url]
+            return URLFetcherResponse(final_url, body, response_headers)
+
+    return CachingURLFetcher
+
+
+class WeasyPrintBackend(PDFBackend):
+    name = "weasyprint"
+
+    @timed_external("weasyprint")
+    def render(self, html, landscape=True):
+        from weasyprint import CSS, HTML
+
+        orientation = "landscape" if landscape else "portrait"
+        page = CSS(string=f"@page {{ size: A4 {orientation}; margin: {MARGIN} }}")
+        fetcher = caching_url_fetcher_class()()
+        return HTML(
+            string=html, base_url=str(settings.BASE_DIR), url_fetcher=fetcher
+        ).write_pdf(stylesheets=[page])
+
+
+BACKENDS = {
+    backend.name: backend for backend in (WeasyPrintBackend, ChromiumBackend)
+}
+
+
+def get_backend(report=None) -> PDFBackend:
+    """The backend configured for `report`, or the default one."""
+    overrides = getattr(settings, "PDF_REPORT_BACKENDS", {})
+    name = overrides.get(report) or getattr(settings, "PDF_BACKEND", DEFAULT_BACKEND)
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown PDF backend {name!r}; choose from {', '.join(BACKENDS)}"
+        )
+
+
+def render_pdf(report, html, landscape=True) -> bytes:
+    return get_backend(report).render(html, landscape=landscape)
+
+
+async def arender_pdf(report, html, landscape=True) -> bytes:
+    return await get_backend(report).arender(html, landscape=landscape)
@@ -0,0 +1,80 @@
+"""
+Period filters for reports.
+
+Filtering with `created_at__year=...` or `created_at__date__gte=...` wraps the
+column in a function, so `(account, created_at)` indexes cannot serve the
+range. These helpers turn years, months and dates into timezone-aware
+half-open ranges ([start, end)) on the raw column instead.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def start_of_day(day):
+    """Midnight at the start of `day` in the current timezone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def year_bounds(year):
+    return start_of_day(date(year, 1, 1)), start_of_day(date(year + 1, 1, 1))
+
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start_of_day(start), start_of_day(end)
+
+
+def date_bounds(start_date=None, end_date=None):
+    """
+    Inclusive calendar dates -> half-open datetime range. Either side may be
+    None for an open-ended range.
+    """
+    start = start_of_day(start_date) if start_date else None
+    end = start_of_day(end_date + timedelta(days=1)) if end_date else None
+    return start, end
+
+
+def in_range(start=None, end=None, field="created_at"):
+    q = Q()
+    if start is not None:
+        q &= Q(**{f"{field}__gte": start})
+    if end is not None:
+        q &= Q(**{f"{field}__lt": end})
+    return q
+
+
+def in_year(year, field="created_at"):
+    return in_range(*year_bounds(year), field=field)
+
+
+def in_month(year, month, field="created_at"):
+    return in_range(*month_bounds(year, month), field=field)
+
+
+def before_year(year, field="created_at"):
+    return in_range(end=year_bounds(year)[0], field=field)
+
+
+def between_dates(start_date=None, end_date=None, field="created_at"):
+    return in_range(*date_bounds(start_date, end_date), field=field)
+
+
+def parse_date_param(value, name="date"):
+    """
+    Parse a YYYY-MM-DD query parameter. Returns None when absent and raises
+    ValueError with a client-facing message when malformed.
+    """
+    if value in (None, ""):
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"{name} must be a valid date in YYYY-MM-DD format")
+    return parsed
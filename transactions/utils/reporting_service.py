@@ -1,7 +1,8 @@
 from decimal import Decimal
 from django.db import transaction
 from django.utils import timezone
-from finances.models import GLAccount, JournalEntry
+from finances.models import JournalEntry
+from catalogs.registry import get_catalog
 from django.db.models import Sum
 
 class ReportingService:
@@ -13,7 +14,7 @@ class ReportingService:
         with transaction.atomic():
             entries = []
             for post in postings:
-                gl_account = GLAccount.objects.get(code=post['account_code'])
+                gl_account = get_catalog().gl_account(post['account_code'])
                 entry = JournalEntry(
                     transaction_date=transaction_date,
                     description=description,
@@ -0,0 +1,156 @@
+"""
+The SACCO-wide yearly summary: every product type's monthly flows and
+balances across all members, from one grouped query per model.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+from catalogs.registry import get_catalog
+from guaranteerequests.models import GuaranteeRequest
+from guarantorprofile.models import GuarantorProfile
+from loandisbursements.models import LoanDisbursement
+from loanintereststamarind.models import TamarindLoanInterest
+from loanrepayments.models import LoanRepayment
+from savingsdeposits.models import SavingsDeposit
+from transactions.utils.fee_billing import FeeBilling
+from transactions.utils.member_summary import PRINCIPAL_REPAYMENT_TYPES
+from transactions.utils.periods import before_year, in_year
+from transactions.utils.summary_report import (
+    FEE_MEASURES,
+    LOAN_MEASURES,
+    SACCO_REPORT,
+    SAVINGS_MEASURES,
+    VENTURE_MEASURES,
+    Section,
+    SummaryReport,
+    to_cents,
+)
+from venturedeposits.models import VentureDeposit
+from venturepayments.models import VenturePayment
+
+# kind, model, path to the type name, filter
+PRIOR_TOTALS = (
+    ("savings", SavingsDeposit, "savings_account__account_type__name", Q()),
+    ("vent_dep", VentureDeposit, "venture_account__venture_type__name", Q()),
+    ("vent_pay", VenturePayment, "venture_account__venture_type__name", Q()),
+    ("loan_disb", LoanDisbursement, "loan_account__loan_type__name",
+     Q(transaction_status="Completed")),
+    ("loan_rep", LoanRepayment, "loan_account__loan_type__name",
+     Q(transaction_status="Completed", repayment_type__in=PRINCIPAL_REPAYMENT_TYPES)),
+)
+
+MONTHLY_TOTALS = (
+    ("savings", SavingsDeposit, "savings_account__account_type__name",
+     Q(transaction_status="Completed")),
+    ("vent_dep", VentureDeposit, "venture_account__venture_type__name", Q()),
+    ("vent_pay", VenturePayment, "venture_account__venture_type__name",
+     Q(transaction_status="Completed")),
+    ("loan_disb", LoanDisbursement, "loan_account__loan_type__name",
+     Q(transaction_status="Completed")),
+    ("loan_rep", LoanRepayment, "loan_account__loan_type__name",
+     Q(transaction_status="Completed")),
+    ("loan_int", TamarindLoanInterest, "loan_account__loan_type__name", Q()),
+)
+
+
+def sacco_report(year):
+    """The SACCO yearly summary for `year`. Render it with summary_report.render()."""
+    catalog = get_catalog()
+    all_fee_types = catalog.fee_types
+    savings = Section.empty("Savings", catalog.savings_types, SAVINGS_MEASURES)
+    ventures = Section.empty("Ventures", catalog.venture_types, VENTURE_MEASURES)
+    loans = Section.empty("Loans", catalog.loan_types, LOAN_MEASURES)
+    fees = Section.empty("Fees", all_fee_types, FEE_MEASURES)
+
+    # === PRIOR YEAR ENDING BALANCES (for B/F in January) ===
+    prior = defaultdict(dict)
+    if year - 1 >= 2020:
+        for kind, model, type_path, q in PRIOR_TOTALS:
+            for item in (
+                model.objects.filter(q, before_year(year))
+                .values(type_path)
+                .annotate(total=Sum("amount"))
+            ):
+                prior[kind][item[type_path]] = to_cents(item["total"])
+
+    # === THE YEAR, PER (MONTH, TYPE) ===
+    totals = defaultdict(lambda: defaultdict(dict))
+    for kind, model, type_path, q in MONTHLY_TOTALS:
+        for item in (
+            model.objects.filter(q, in_year(year))
+            .annotate(month=TruncMonth("created_at"))
+            .values("month", type_path)
+            .annotate(total=Sum("amount"))
+        ):
+            totals[kind][item["month"].month][item[type_path]] = to_cents(item["total"])
+
+    new_guarantees = [0] * 12
+    for item in (
+        GuaranteeRequest.objects.filter(in_year(year), status="Accepted")
+        .annotate(month=TruncMonth("created_at"))
+        .values("month")
+        .annotate(total=Sum("guaranteed_amount"))
+    ):
+        new_guarantees[item["month"].month - 1] = to_cents(item["total"] or 0)
+
+    fee_billing = FeeBilling(year, all_fee_types)
+    guaranteed_active = GuarantorProfile.objects.aggregate(
+        total=Sum("committed_guarantee_amount")
+    )["total"] or 0
+
+    # === RUN THE BALANCES FORWARD ===
+    for name in savings.types:
+        balance = prior["savings"].get(name, 0)
+        for month in range(1, 13):
+            deposited = totals["savings"].get(month, {}).get(name, 0)
+            savings.set("deposits", name, month, deposited)
+            savings.set("brought_forward", name, month, balance)
+            balance += deposited
+            savings.set("carried_forward", name, month, balance)
+
+    for name in ventures.types:
+        balance = prior["vent_dep"].get(name, 0) - prior["vent_pay"].get(name, 0)
+        for month in range(1, 13):
+            deposited = totals["vent_dep"].get(month, {}).get(name, 0)
+            paid = totals["vent_pay"].get(month, {}).get(name, 0)
+            ventures.set("deposits", name, month, deposited)
+            ventures.set("payments", name, month, paid)
+            ventures.set("brought_forward", name, month, balance)
+            balance += deposited - paid
+            ventures.set("carried_forward", name, month, balance)
+
+    for name in loans.types:
+        balance = max(prior["loan_disb"].get(name, 0) - prior["loan_rep"].get(name, 0), 0)
+        for month in range(1, 13):
+            disbursed = totals["loan_disb"].get(month, {}).get(name, 0)
+            repaid = totals["loan_rep"].get(month, {}).get(name, 0)
+            loans.set("disbursed", name, month, disbursed)
+            loans.set("repaid", name, month, repaid)
+            loans.set("interest", name, month, totals["loan_int"].get(month, {}).get(name, 0))
+            loans.set("brought_forward", name, month, balance)
+            balance += disbursed - repaid
+            loans.set("carried_forward", name, month, balance)
+
+    for name in fees.types:
+        expected = to_cents(fee_billing.expected.get(name, 0))
+        for month in range(1, 13):
+            fees.set("expected", name, month, expected)
+            fees.set("paid", name, month, to_cents(fee_billing.paid_in(name, month)))
+            fees.set("brought_forward", name, month, to_cents(fee_billing.brought_forward[name][month]))
+            fees.set("carried_forward", name, month, to_cents(fee_billing.outstanding[name][month]))
+
+    return SummaryReport(
+        name=SACCO_REPORT,
+        year=year,
+        savings=savings,
+        ventures=ventures,
+        loans=loans,
+        fees=fees,
+        income_fee_types=frozenset(name for name, ftype in all_fee_types.items() if ftype.is_income),
+        new_guarantees=new_guarantees,
+        guaranteed_active=to_cents(guaranteed_active),
+        fees_outstanding=to_cents(fee_billing.total_outstanding),
+    )
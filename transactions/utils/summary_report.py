@@ -0,0 +1,557 @@
+"""
+The yearly summary reports and their renderers.
+
+A summary is computed once into a SummaryReport: for each product section
+(savings, ventures, loans, fees), each measure and each product type, twelve
+monthly amounts in integer cents. The JSON responses, the PDF templates, and
+the CSV and XLSX downloads are all rendered from that one result, so
+producing several formats of the same report never recomputes it.
+
+member_summary.member_report() and sacco_summary.sacco_report() compute the
+two reports; render() turns either into any of FORMATS.
+"""
+
+import calendar
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+
+from django.template.loader import render_to_string
+
+LOGO_URL = "https://res.cloudinary.com/dhw8kulj3/image/upload/v1762838274/logoNoBg_umwk2o.png"
+
+MEMBER_REPORT = "member_yearly_summary"
+SACCO_REPORT = "sacco_summary"
+
+MONTH_NUMBERS = range(1, 13)
+
+SAVINGS_MEASURES = ("deposits", "brought_forward", "carried_forward")
+VENTURE_MEASURES = ("deposits", "payments", "brought_forward", "carried_forward")
+LOAN_MEASURES = ("disbursed", "repaid", "interest", "brought_forward", "carried_forward")
+FEE_MEASURES = ("expected", "paid", "brought_forward", "carried_forward")
+
+MEASURE_LABELS = {
+    "deposits": "Deposits",
+    "payments": "Payments",
+    "disbursed": "Disbursed",
+    "repaid": "Repaid",
+    "interest": "Interest",
+    "expected": "Expected",
+    "paid": "Paid",
+    "brought_forward": "B/F",
+    "carried_forward": "C/F",
+}
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def money(cents):
+    """Cents -> the float amounts the JSON responses carry."""
+    return cents / 100
+
+
+def decimal(cents):
+    """Cents -> an exact two-place Decimal, for CSV and XLSX cells."""
+    return Decimal(cents).scaleb(-2)
+
+
+@dataclass(slots=True)
+class Section:
+    """
+    One product section: columns[measure][type name] is that type's twelve
+    monthly amounts, January first, in cents.
+    """
+
+    title: str
+    types: list
+    columns: dict
+
+    @classmethod
+    def empty(cls, title, types, measures):
+        return cls(
+            title,
+            list(types),
+            {measure: {name: [0] * 12 for name in types} for measure in measures},
+        )
+
+    def set(self, measure, name, month, cents):
+        self.columns[measure][name][month - 1] = cents
+
+    def get(self, measure, name, month):
+        return self.columns[measure][name][month - 1]
+
+    def month_total(self, measure, month, types=None):
+        return sum(self.columns[measure][name][month - 1] for name in types or self.types)
+
+    def year_total(self, measure, name):
+        return sum(self.columns[measure][name])
+
+    def closing(self, name):
+        return self.columns["carried_forward"][name][-1]
+
+
+@dataclass(slots=True)
+class SummaryReport:
+    name: str
+    year: int
+    savings: Section
+    ventures: Section
+    loans: Section
+    fees: Section
+    income_fee_types: frozenset
+    new_guarantees: list
+    guaranteed_active: int
+    fees_outstanding: int
+    member: object = None
+    # kind -> month -> type name -> listed transactions (member report only)
+    details: dict = field(default_factory=dict)
+
+    def listed(self, kind, month, name):
+        return self.details.get(kind, {}).get(month, {}).get(name, [])
+
+    def sections(self):
+        return (self.savings, self.ventures, self.loans, self.fees)
+
+    def fee_types(self, income):
+        return [
+            name for name in self.fees.types
+            if (name in self.income_fee_types) == income
+        ]
+
+    def year_totals(self):
+        """The yearly totals both summaries and their PDFs report, in cents."""
+        savings, ventures, loans, fees = self.sections()
+        income_types = self.fee_types(income=True)
+        contribution_types = self.fee_types(income=False)
+        return {
+            "savings_deposits": sum(savings.year_total("deposits", n) for n in savings.types),
+            "savings_balance": sum(savings.closing(n) for n in savings.types),
+            "venture_deposits": sum(ventures.year_total("deposits", n) for n in ventures.types),
+            "venture_payments": sum(ventures.year_total("payments", n) for n in ventures.types),
+            "venture_balance": sum(ventures.closing(n) for n in ventures.types),
+            "loans_disbursed": sum(loans.year_total("disbursed", n) for n in loans.types),
+            "loans_repaid": sum(loans.year_total("repaid", n) for n in loans.types),
+            "loan_interest": sum(loans.year_total("interest", n) for n in loans.types),
+            "loans_outstanding": sum(loans.closing(n) for n in loans.types),
+            "fee_income": sum(fees.year_total("paid", n) for n in income_types),
+            "member_contributions": sum(fees.year_total("paid", n) for n in contribution_types),
+            "new_guarantees": sum(self.new_guarantees),
+        }
+
+
+# ----------------------------------------------------------------------
+# JSON
+# ----------------------------------------------------------------------
+def month_sections(report, month):
+    """The per-type monthly entries the two JSON layouts share."""
+    savings, ventures, loans, fees = report.sections()
+    member = report.name == MEMBER_REPORT
+
+    enhanced_savings = []
+    for name in savings.types:
+        deposited = savings.get("deposits", name, month)
+        entry = {
+            "type": name,
+            "amount": money(deposited),
+            "total_deposits": money(deposited),
+        }
+        if member:
+            entry["deposits"] = report.listed("savings", month, name)
+        entry["balance_brought_forward"] = money(savings.get("brought_forward", name, month))
+        entry["balance_carried_forward"] = money(savings.get("carried_forward", name, month))
+        enhanced_savings.append(entry)
+
+    enhanced_ventures = []
+    for name in ventures.types:
+        entry = {
+            "venture_type": name,
+            "total_venture_deposits": money(ventures.get("deposits", name, month)),
+            "total_venture_payments": money(ventures.get("payments", name, month)),
+        }
+        if member:
+            entry["venture_deposits_transactions"] = report.listed("vent_dep", month, name)
+            entry["venture_payments_transactions"] = report.listed("vent_pay", month, name)
+        entry["balance_brought_forward"] = money(ventures.get("brought_forward", name, month))
+        entry["balance_carried_forward"] = money(ventures.get("carried_forward", name, month))
+        enhanced_ventures.append(entry)
+
+    enhanced_loans = []
+    for name in loans.types:
+        entry = {
+            "loan_type": name,
+            "total_amount_disbursed": money(loans.get("disbursed", name, month)),
+            "total_amount_repaid": money(loans.get("repaid", name, month)),
+            "total_interest_charged": money(loans.get("interest", name, month)),
+            "total_amount_outstanding": money(loans.get("carried_forward", name, month)),
+        }
+        if member:
+            entry["total_amount_disbursed_transactions"] = report.listed("loan_disb", month, name)
+            entry["total_amount_repaid_transactions"] = report.listed("loan_rep", month, name)
+            entry["total_interest_charged_transactions"] = report.listed("loan_int", month, name)
+        entry["balance_brought_forward"] = money(loans.get("brought_forward", name, month))
+        entry["balance_carried_forward"] = money(loans.get("carried_forward", name, month))
+        enhanced_loans.append(entry)
+
+    enhanced_fees = []
+    for name in fees.types:
+        entry = {
+            "fee_type": name,
+            "total_expected": money(fees.get("expected", name, month)),
+            "total_amount_paid": money(fees.get("paid", name, month)),
+            "total_amount_outstanding": money(fees.get("carried_forward", name, month)),
+        }
+        if member:
+            entry["payments"] = report.listed("fees", month, name)
+        entry["balance_brought_forward"] = money(fees.get("brought_forward", name, month))
+        entry["balance_carried_forward"] = money(fees.get("carried_forward", name, month))
+        if not member:
+            entry["is_income"] = name in report.income_fee_types
+        enhanced_fees.append(entry)
+
+    return enhanced_savings, enhanced_ventures, enhanced_loans, enhanced_fees
+
+
+def member_json(report):
+    savings, ventures, loans, fees = report.sections()
+    year = report.year
+
+    monthly_summary = []
+    for month in MONTH_NUMBERS:
+        enhanced_savings, enhanced_ventures, enhanced_loans, enhanced_fees = month_sections(
+            report, month
+        )
+        total_savings_month = savings.month_total("deposits", month)
+        total_vent_dep_month = ventures.month_total("deposits", month)
+        total_vent_pay_month = ventures.month_total("payments", month)
+        total_loan_out_month = loans.month_total("carried_forward", month)
+        monthly_summary.append({
+            "month": f"{calendar.month_name[month]} {year}",
+            "savings": {
+                "total_savings": money(total_savings_month),
+                "total_savings_deposits": money(total_savings_month),
+                "total_balance": money(savings.month_total("carried_forward", month)),
+                "by_type": enhanced_savings,
+            },
+            "ventures": {
+                "venture_deposits": money(total_vent_dep_month),
+                "venture_payments": money(total_vent_pay_month),
+                "venture_balance": money(total_vent_dep_month - total_vent_pay_month),
+                "total_balance": money(ventures.month_total("carried_forward", month)),
+                "by_type": enhanced_ventures,
+            },
+            "loans": {
+                "total_loans_disbursed": money(loans.month_total("disbursed", month)),
+                "total_loans_repaid": money(loans.month_total("repaid", month)),
+                "total_interest_charged": money(loans.month_total("interest", month)),
+                "total_loans_outstanding": money(total_loan_out_month),
+                "total_balance": money(total_loan_out_month),
+                "by_type": enhanced_loans,
+            },
+            "guarantees": {
+                "new_guarantees": money(report.new_guarantees[month - 1]),
+                "transactions": report.listed("guarantees", month, "new"),
+            },
+            "fees": {
+                "fee_income": money(fees.month_total("paid", month, report.fee_types(income=True))),
+                "member_contributions": money(
+                    fees.month_total("paid", month, report.fee_types(income=False))
+                ),
+                "by_type": enhanced_fees,
+            },
+        })
+
+    totals = report.year_totals()
+    ventures_net = totals["venture_deposits"] - totals["venture_payments"]
+    year_end_balances = {
+        "savings": {name: money(savings.closing(name)) for name in savings.types},
+        "ventures": {name: money(ventures.closing(name)) for name in ventures.types},
+        "loans": {name: money(loans.closing(name)) for name in loans.types},
+    }
+    chart_of_accounts = {
+        "total_savings": money(totals["savings_deposits"]),
+        "total_ventures": money(ventures_net),
+        "total_loans": money(totals["loans_outstanding"]),
+        "total_savings_deposits": money(totals["savings_deposits"]),
+        "total_ventures_deposits": money(totals["venture_deposits"]),
+        "total_ventures_payments": money(totals["venture_payments"]),
+        "total_loans_disbursed": money(totals["loans_disbursed"]),
+        "total_loans_repaid": money(totals["loans_repaid"]),
+        "total_fee_income": money(totals["fee_income"]),
+        "total_member_contributions": money(totals["member_contributions"]),
+        "total_savings_by_type": [
+            {"type": name, "amount": money(savings.year_total("deposits", name))}
+            for name in savings.types
+        ],
+        "total_ventures_by_type": [
+            {
+                "venture_type": name,
+                "net_amount": money(
+                    ventures.year_total("deposits", name) - ventures.year_total("payments", name)
+                ),
+            }
+            for name in ventures.types
+        ],
+        "total_loans_by_type": [
+            {"loan_type": name, "total_outstanding_amount": money(loans.closing(name))}
+            for name in loans.types
+        ],
+    }
+
+    return {
+        "year": year,
+        "summary": {
+            "total_savings": money(totals["savings_deposits"]),
+            "total_venture_deposits": money(totals["venture_deposits"]),
+            "total_venture_payments": money(totals["venture_payments"]),
+            "total_ventures_net": money(ventures_net),
+            "total_loans_disbursed": money(totals["loans_disbursed"]),
+            "total_loans_repaid": money(totals["loans_repaid"]),
+            "total_interest_charged": money(totals["loan_interest"]),
+            "total_loans_outstanding": money(totals["loans_outstanding"]),
+            "total_fee_income": money(totals["fee_income"]),
+            "total_member_contributions": money(totals["member_contributions"]),
+            "total_guaranteed_active": money(report.guaranteed_active),
+            "total_new_guarantees": money(totals["new_guarantees"]),
+            "total_fees_outstanding": money(report.fees_outstanding),
+            "year_end_balances": year_end_balances,
+        },
+        "monthly_summary": monthly_summary,
+        "chart_of_accounts": chart_of_accounts,
+    }
+
+
+def sacco_json(report):
+    savings, ventures, loans, fees = report.sections()
+    income_types = report.fee_types(income=True)
+    contribution_types = report.fee_types(income=False)
+
+    monthly_summary = []
+    for month in MONTH_NUMBERS:
+        enhanced_savings, enhanced_ventures, enhanced_loans, enhanced_fees = month_sections(
+            report, month
+        )
+        total_vent_dep_m = ventures.month_total("deposits", month)
+        total_vent_pay_m = ventures.month_total("payments", month)
+        total_loan_out_m = loans.month_total("carried_forward", month)
+        monthly_summary.append({
+            "month": calendar.month_name[month],
+            "savings": {
+                "total_deposits": money(savings.month_total("deposits", month)),
+                "total_balance": money(savings.month_total("carried_forward", month)),
+                "by_type": enhanced_savings,
+            },
+            "ventures": {
+                "venture_deposits": money(total_vent_dep_m),
+                "venture_payments": money(total_vent_pay_m),
+                "venture_balance": money(total_vent_dep_m - total_vent_pay_m),
+                "total_balance": money(ventures.month_total("carried_forward", month)),
+                "by_type": enhanced_ventures,
+            },
+            "loans": {
+                "total_loans_disbursed": money(loans.month_total("disbursed", month)),
+                "total_loans_repaid": money(loans.month_total("repaid", month)),
+                "total_interest_charged": money(loans.month_total("interest", month)),
+                "total_loans_outstanding": money(total_loan_out_m),
+                "total_balance": money(total_loan_out_m),
+                "by_type": enhanced_loans,
+            },
+            "guarantees": {
+                "new_guarantees": money(report.new_guarantees[month - 1]),
+                "transactions": [],
+            },
+            "fees": {
+                "fee_income": money(fees.month_total("paid", month, income_types)),
+                "member_contributions": money(fees.month_total("paid", month, contribution_types)),
+                "by_type": enhanced_fees,
+            },
+        })
+
+    totals = report.year_totals()
+
+    def yearly(section, measure, types=None):
+        return {name: money(section.year_total(measure, name)) for name in types or section.types}
+
+    return {
+        "summary": {
+            "total_savings": money(totals["savings_balance"]),
+            "total_venture_balance": money(totals["venture_balance"]),
+            "total_loan_outstanding": money(totals["loans_outstanding"]),
+            "total_fee_income": money(totals["fee_income"]),
+            "total_member_contributions": money(totals["member_contributions"]),
+            "total_fees_outstanding": money(report.fees_outstanding),
+            "total_guaranteed_active": money(report.guaranteed_active),
+        },
+        "yearly_accumulators": {
+            "savings": yearly(savings, "deposits"),
+            "venture_deposits": yearly(ventures, "deposits"),
+            "venture_payments": yearly(ventures, "payments"),
+            "loan_disbursements": yearly(loans, "disbursed"),
+            "loan_repayments": yearly(loans, "repaid"),
+            "loan_interest": yearly(loans, "interest"),
+            "fee_income": {name: money(fees.year_total("paid", name)) for name in income_types},
+            "member_contributions": {
+                name: money(fees.year_total("paid", name)) for name in contribution_types
+            },
+            "guarantees": {"new": money(totals["new_guarantees"])},
+        },
+        "monthly_summary": monthly_summary,
+    }
+
+
+def render_json(report):
+    return member_json(report) if report.name == MEMBER_REPORT else sacco_json(report)
+
+
+# ----------------------------------------------------------------------
+# PDF (HTML)
+# ----------------------------------------------------------------------
+def table_rows(report):
+    """One row per month for the PDF tables, types in alphabetical order."""
+    savings, ventures, loans, fees = report.sections()
+    month_label = (
+        (lambda month: f"{calendar.month_name[month]} {report.year}")
+        if report.name == MEMBER_REPORT
+        else (lambda month: calendar.month_name[month])
+    )
+    rows = []
+    for month in MONTH_NUMBERS:
+        rows.append({
+            "month": month_label(month),
+            "savings": [
+                {
+                    "dep": money(savings.get("deposits", name, month)),
+                    "bal": money(savings.get("carried_forward", name, month)),
+                }
+                for name in sorted(savings.types)
+            ],
+            "ventures": [
+                {
+                    "dep": money(ventures.get("deposits", name, month)),
+                    "pay": money(ventures.get("payments", name, month)),
+                    "bal": money(ventures.get("carried_forward", name, month)),
+                }
+                for name in sorted(ventures.types)
+            ],
+            "loans": [
+                {
+                    "disb": money(loans.get("disbursed", name, month)),
+                    "rep": money(loans.get("repaid", name, month)),
+                    "int": money(loans.get("interest", name, month)),
+                    "out": money(loans.get("carried_forward", name, month)),
+                }
+                for name in sorted(loans.types)
+            ],
+            "fees": [
+                {
+                    "amt": money(fees.get("paid", name, month)),
+                    "bal": money(fees.get("carried_forward", name, month)),
+                }
+                for name in sorted(fees.types)
+            ],
+            "total_guarantees": money(report.new_guarantees[month - 1]),
+        })
+    return rows
+
+
+def render_html(report, data=None):
+    """
+    The HTML the report's PDF is rendered from. `data` is the report's JSON
+    rendering, when the caller already has it.
+    """
+    data = data or render_json(report)
+    context = {
+        "year": report.year,
+        "logo_url": LOGO_URL,
+        "generated_at": datetime.now().strftime("%d %B %Y, %I:%M %p"),
+        "savings_types": sorted(report.savings.types),
+        "venture_types": sorted(report.ventures.types),
+        "loan_types": sorted(report.loans.types),
+        "fee_types": sorted(report.fees.types),
+        "table_rows": table_rows(report),
+        "total_active_guarantees": money(report.guaranteed_active),
+    }
+    if report.name == MEMBER_REPORT:
+        template = "reports/yearly_summary_pdf.html"
+        context.update(
+            data=data, member=report.member, chart_of_accounts=data["chart_of_accounts"]
+        )
+    else:
+        template = "reports/sacco_summary_pdf.html"
+        totals = report.year_totals()
+        # The summary cards also show yearly flows the JSON summary leaves out
+        summary = dict(data["summary"])
+        summary.update({
+            "total_loans_disbursed": money(totals["loans_disbursed"]),
+            "total_loans_repaid": money(totals["loans_repaid"]),
+            "total_interest_charged": money(totals["loan_interest"]),
+            "total_ventures_net": money(totals["venture_deposits"] - totals["venture_payments"]),
+            "total_new_guarantees": money(totals["new_guarantees"]),
+        })
+        context["data"] = {**data, "summary": summary}
+    return render_to_string(template, context)
+
+
+# ----------------------------------------------------------------------
+# CSV and XLSX
+# ----------------------------------------------------------------------
+def table(report):
+    """The monthly table as a header and rows of Decimals, for spreadsheets."""
+    header = ["Month"]
+    columns = []
+    for section in report.sections():
+        for name in section.types:
+            for measure in section.columns:
+                header.append(f"{section.title}: {name} {MEASURE_LABELS[measure]}")
+                columns.append(section.columns[measure][name])
+    header.append("New Guarantees")
+    columns.append(report.new_guarantees)
+
+    rows = [
+        [calendar.month_name[month]] + [decimal(column[month - 1]) for column in columns]
+        for month in MONTH_NUMBERS
+    ]
+    return header, rows
+
+
+def render_csv(report):
+    header, rows = table(report)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def render_xlsx(report):
+    from openpyxl import Workbook
+
+    header, rows = table(report)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=f"Summary {report.year}")
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    out = io.BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+
+FORMATS = {
+    "json": render_json,
+    "html": render_html,
+    "csv": render_csv,
+    "xlsx": render_xlsx,
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def render(report, file_format):
+    return FORMATS[file_format](report)
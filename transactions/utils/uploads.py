@@ -0,0 +1,534 @@
+"""
+Streaming CSV imports for the bulk upload endpoints.
+
+The upload views used to `file.read().decode()` the whole file and copy it
+into StringIO buffers before looking at a single row. CSVImport streams the
+upload through an incremental decoder and csv reader instead, in two passes:
+
+1. validate() checks the header, plans every row and resolves every account
+   reference with batched `__in` queries, without writing anything. For a
+   dry run (`?dry_run=true`) that is the whole request and the response is
+   the full error report.
+2. commit() streams the file again and writes the rows that validated. It
+   reuses the references resolved in the first pass and re-reads only those
+   rows, by primary key and with a row lock, so balances are never updated
+   from a stale copy.
+
+A row is all-or-nothing: any error in it rejects the whole row, and every
+row is written in its own savepoint.
+
+Rows are committed in chunks of BULK_IMPORT_CHUNK_SIZE, so account locks are
+held for one chunk rather than the whole file. Imports that keep a
+BulkTransactionLog record a checkpoint (the last committed row, the counts
+and the errors so far) in the same transaction as each chunk, and the log
+holds the file's SHA-256:
+
+- uploading a file that was already imported returns the original result
+  and writes nothing;
+- uploading a file whose import crashed resumes after the last checkpoint;
+- uploading a file that is still being imported is refused with 409 until
+  its log has gone BULK_IMPORT_STALE_AFTER seconds without a checkpoint.
+"""
+
+import codecs
+import csv
+import hashlib
+import logging
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+import cloudinary.uploader
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from transactions.models import BulkTransactionLog
+
+logger = logging.getLogger(__name__)
+
+ENCODING = "utf-8-sig"
+CHUNK_SIZE = 500
+STALE_AFTER = 600
+
+
+class ImportInProgress(Exception):
+    """The same file is being imported by another request."""
+
+
+def iter_lines(file, encoding=ENCODING):
+    """
+    Yield the lines of an uploaded file as text, decoding one chunk at a
+    time. Line endings are kept so csv can handle quoted newlines.
+    """
+    file.seek(0)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for chunk in file.chunks():
+        pending += decoder.decode(chunk)
+        end = pending.rfind("\n") + 1
+        if end:
+            lines = pending[:end].split("\n")
+            pending = pending[end:]
+            for line in lines[:-1]:
+                yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _normalise_choice(value):
+    return value.strip().lower().replace("_", " ")
+
+
+class RowPlan:
+    """
+    What one CSV row will write, plus anything wrong with it. CSVImport
+    subclasses fill it in from `plan_row`.
+    """
+
+    def __init__(self, upload, index, row, collecting=False):
+        self.upload = upload
+        self.index = index
+        self.row = row
+        self.collecting = collecting
+        self.actions = []
+        self.errors = []
+
+    def error(self, message, account=None):
+        entry = {self.upload.row_key: self.index}
+        if account is not None:
+            entry["account"] = account
+        entry["error"] = message
+        self.errors.append(entry)
+
+    def value(self, column):
+        return (self.row.get(column) or "").strip()
+
+    def amount(self, column, account=None, allow_zero=False):
+        text = self.value(column)
+        try:
+            amount = Decimal(text.replace(",", ""))
+        except InvalidOperation:
+            self.error(f"Invalid amount in {column}: {text}", account)
+            return None
+        if not amount.is_finite() or amount < 0 or (amount == 0 and not allow_zero):
+            requirement = "cannot be negative" if allow_zero else "must be greater than 0"
+            self.error(f"{column} {requirement}", account)
+            return None
+        if amount.as_tuple().exponent < -2:
+            self.error(f"{column} must have at most 2 decimal places", account)
+            return None
+        return amount
+
+    def choice(self, column, choices, default, account=None):
+        text = self.value(column) or default
+        options = {_normalise_choice(value): value for value, _ in choices}
+        match = options.get(_normalise_choice(text))
+        if match is None:
+            self.error(f"Invalid {column}: {text}", account)
+        return match
+
+    def lookup(self, kind, key):
+        """Primary key for `key`, or None when it does not exist."""
+        if self.collecting:
+            self.upload.wanted[kind].add(key)
+            return None
+        return self.upload.resolved[kind].get(key)
+
+    def reference(self, kind, key, label):
+        """Like lookup(), but a missing reference is an error on the row."""
+        if self.collecting:
+            self.upload.wanted[kind].add(key)
+            return key
+        if self.upload.resolved[kind].get(key) is None:
+            self.error(f"{label} {key} not found", key)
+            return None
+        return key
+
+    def add(self, action, *args, **kwargs):
+        """Queue one write. Each action should create exactly one record."""
+        if not self.collecting:
+            self.actions.append((action, args, kwargs))
+
+
+class CSVImport:
+    """
+    Base class for a bulk CSV upload. Subclasses set the class attributes
+    and implement `plan_row`, and may override `check_header`.
+    """
+
+    transaction_type = None  # BulkTransactionLog type; None skips the log and checkpoints
+    reference_prefix = None  # e.g. "SAVINGS-BULK"
+    storage_folder = None  # Cloudinary folder for the original file
+    references = {}  # kind -> (model, lookup field)
+    lock_references = None  # kinds to lock in commit(); None means all
+    row_key = "row"
+    first_row = 1
+    batch_size = None  # rows per chunk; defaults to BULK_IMPORT_CHUNK_SIZE
+
+    def __init__(self, file, user):
+        self.file = file
+        self.user = user
+        self.batch_size = self.batch_size or getattr(
+            settings, "BULK_IMPORT_CHUNK_SIZE", CHUNK_SIZE
+        )
+        self.today = date.today()
+        self.prefix = f"{self.reference_prefix}-{self.today:%Y%m%d}"
+        self.resolved = defaultdict(dict)
+        self.instances = defaultdict(dict)
+        self.wanted = defaultdict(set)
+        self.errors = []  # errors of the rows processed so far
+        self.rejected = {}  # row index -> errors found by validate()
+        self.header_error = None
+        self.row_count = 0
+        self.valid_rows = 0
+        self.success_count = 0
+        self.resume_after = 0
+        self.already_imported = False
+        self.log = None
+        self._file_hash = None
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+    def check_header(self, fieldnames):
+        """Return an error message when the columns are unusable."""
+        return None
+
+    def start_pass(self):
+        """Reset any per-pass state (e.g. duplicate tracking)."""
+
+    def plan_row(self, plan):
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def open(self):
+        reader = csv.DictReader(iter_lines(self.file))
+        reader.fieldnames  # read the header now
+        return reader
+
+    def file_hash(self):
+        if self._file_hash is None:
+            digest = hashlib.sha256()
+            self.file.seek(0)
+            for chunk in self.file.chunks():
+                digest.update(chunk)
+            self._file_hash = digest.hexdigest()
+        return self._file_hash
+
+    def batches(self, reader):
+        batch = []
+        for index, row in enumerate(reader, self.first_row):
+            if index <= self.resume_after:
+                continue
+            batch.append((index, row))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def plan(self, index, row, collecting=False):
+        plan = RowPlan(self, index, row, collecting=collecting)
+        self.plan_row(plan)
+        return plan
+
+    def collect(self, batch):
+        self.wanted = defaultdict(set)
+        for index, row in batch:
+            self.plan(index, row, collecting=True)
+        return self.wanted
+
+    def resolve(self, batch):
+        for kind, keys in self.collect(batch).items():
+            keys = keys - self.resolved[kind].keys()
+            if not keys:
+                continue
+            model, field = self.references[kind]
+            found = {
+                str(key): pk
+                for key, pk in model.objects.filter(
+                    **{f"{field}__in": keys}
+                ).values_list(field, "pk")
+            }
+            for key in keys:
+                self.resolved[kind][key] = found.get(key)
+
+    def lock(self, batch):
+        self.instances = defaultdict(dict)
+        for kind, keys in self.collect(batch).items():
+            if self.lock_references is not None and kind not in self.lock_references:
+                continue
+            pks = {
+                self.resolved[kind][key]: key
+                for key in keys
+                if self.resolved[kind].get(key) is not None
+            }
+            if not pks:
+                continue
+            model, _ = self.references[kind]
+            for pk, obj in model.objects.select_for_update().in_bulk(list(pks)).items():
+                self.instances[kind][pks[pk]] = obj
+
+    def instance(self, kind, key):
+        try:
+            return self.instances[kind][key]
+        except KeyError:
+            raise ValueError(f"{key} no longer exists")
+
+    # ------------------------------------------------------------------
+    # Passes
+    # ------------------------------------------------------------------
+    def prepare(self):
+        """
+        Pick up an earlier import of the same file, if there is one. Sets
+        `already_imported`, or loads the checkpoint to resume from.
+        """
+        if not self.transaction_type:
+            return
+        log = BulkTransactionLog.objects.filter(
+            transaction_type=self.transaction_type, file_hash=self.file_hash()
+        ).first()
+        if log is None:
+            return
+        if log.status == "Processing" and not self.is_stale(log):
+            raise ImportInProgress(log.reference_prefix)
+
+        self.log = log
+        self.prefix = log.reference_prefix
+        self.success_count = log.success_count
+        self.errors = list(log.errors)
+        self.resume_after = log.last_row
+        self.already_imported = log.status == "Completed"
+
+    def is_stale(self, log):
+        stale_after = getattr(settings, "BULK_IMPORT_STALE_AFTER", STALE_AFTER)
+        return log.updated_at < timezone.now() - timedelta(seconds=stale_after)
+
+    def validate(self):
+        """Dry run. Returns False when the file itself is unusable."""
+        try:
+            reader = self.open()
+            self.header_error = self.check_header(reader.fieldnames or [])
+            if self.header_error:
+                return False
+            self.start_pass()
+            for batch in self.batches(reader):
+                self.resolve(batch)
+                for index, row in batch:
+                    self.row_count += 1
+                    plan = self.plan(index, row)
+                    if plan.errors:
+                        self.rejected[index] = plan.errors
+                    elif plan.actions:
+                        self.valid_rows += 1
+        except (UnicodeDecodeError, csv.Error) as e:
+            self.header_error = f"Invalid CSV file: {e}"
+            return False
+        return True
+
+    def commit(self):
+        """Write every row that passed validate(), one chunk at a time."""
+        reader = self.open()
+        self.start_pass()
+        for batch in self.batches(reader):
+            with transaction.atomic():
+                self.lock([(i, row) for i, row in batch if i not in self.rejected])
+                for index, row in batch:
+                    if index in self.rejected:
+                        self.errors.extend(self.rejected[index])
+                    else:
+                        self.write(self.plan(index, row))
+                self.checkpoint(batch[-1][0])
+
+    def checkpoint(self, index):
+        if not self.log:
+            return
+        self.log.last_row = index
+        self.log.success_count = self.success_count
+        self.log.error_count = len(self.errors)
+        self.log.errors = self.errors
+        self.log.save(
+            update_fields=[
+                "last_row", "success_count", "error_count", "errors", "updated_at"
+            ]
+        )
+
+    def write(self, plan):
+        if plan.errors:
+            self.errors.extend(plan.errors)
+            return
+        try:
+            with transaction.atomic():
+                for action, args, kwargs in plan.actions:
+                    action(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Bulk upload row {plan.index} failed: {str(e)}")
+            plan.error(str(e))
+            self.errors.extend(plan.errors)
+            return
+        self.success_count += len(plan.actions)
+
+    def start_log(self):
+        if self.log:
+            # Resuming: claim the log, unless another request just did
+            claimed = BulkTransactionLog.objects.filter(
+                pk=self.log.pk, updated_at=self.log.updated_at
+            ).update(status="Processing", updated_at=timezone.now())
+            if not claimed:
+                raise ImportInProgress(self.prefix)
+            self.log.refresh_from_db()
+            return
+        try:
+            with transaction.atomic():
+                self.log = BulkTransactionLog.objects.create(
+                    admin=self.user,
+                    transaction_type=self.transaction_type,
+                    reference_prefix=self.prefix,
+                    success_count=0,
+                    error_count=0,
+                    file_name=self.file.name,
+                    file_hash=self.file_hash(),
+                    status="Processing",
+                )
+        except IntegrityError:
+            raise ImportInProgress(self.prefix)
+
+    def save(self):
+        """Log, archive the original file and commit."""
+        if self.transaction_type:
+            self.start_log()
+        if self.storage_folder and not self.log.cloudinary_url:
+            self.file.seek(0)
+            upload_result = cloudinary.uploader.upload(
+                self.file,
+                resource_type="raw",
+                public_id=f"{self.storage_folder}/{self.prefix}_{self.file.name}",
+                format="csv",
+            )
+            self.log.cloudinary_url = upload_result["secure_url"]
+            self.log.save()
+
+        try:
+            self.commit()
+        except Exception:
+            if self.log:
+                BulkTransactionLog.objects.filter(pk=self.log.pk).update(
+                    status="Failed"
+                )
+            raise
+
+        if self.log:
+            self.log.status = "Completed"
+            self.log.save(update_fields=["status", "updated_at"])
+        return self.log
+
+    def report(self):
+        errors = self.errors + [
+            error for row_errors in self.rejected.values() for error in row_errors
+        ]
+        return {
+            "dry_run": True,
+            "resume_after_row": self.resume_after,
+            "row_count": self.row_count,
+            "valid_rows": self.valid_rows,
+            "error_count": len(errors),
+            "errors": errors,
+        }
+
+
+class CSVUploadMixin:
+    """
+    POST handler shared by the bulk upload views. Send `dry_run=true` (query
+    string or form field) to validate the file without writing anything.
+    Re-sending a file that was already imported returns the original result
+    with `already_imported` set.
+    """
+
+    import_class = None
+
+    def get_upload_file(self, request):
+        return request.FILES.get("file")
+
+    def is_dry_run(self, request):
+        value = request.query_params.get("dry_run") or request.data.get("dry_run")
+        return str(value).lower() in ("1", "true", "yes")
+
+    def get_import(self, file):
+        return self.import_class(file, self.request.user)
+
+    def post(self, request, *args, **kwargs):
+        file = self.get_upload_file(request)
+        if not file:
+            return Response(
+                {"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        upload = self.get_import(file)
+        try:
+            upload.prepare()
+        except ImportInProgress as e:
+            return self.in_progress_response(e)
+        if upload.already_imported:
+            response = self.upload_response(upload)
+            response.data["already_imported"] = True
+            response.status_code = status.HTTP_200_OK
+            return response
+
+        if not upload.validate():
+            return Response(
+                {"error": upload.header_error}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if self.is_dry_run(request):
+            return Response(upload.report(), status=status.HTTP_200_OK)
+
+        try:
+            upload.save()
+        except ImportInProgress as e:
+            return self.in_progress_response(e)
+        except Exception as e:
+            logger.error(f"Bulk upload failed: {str(e)}")
+            return Response(
+                {"error": f"Bulk upload failed: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return self.upload_response(upload)
+
+    def in_progress_response(self, error):
+        return Response(
+            {
+                "error": "This file is already being imported",
+                "log_reference": str(error),
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    def upload_response(self, upload):
+        return Response(
+            {
+                "success_count": upload.success_count,
+                "error_count": len(upload.errors),
+                "errors": upload.errors,
+                "log_reference": upload.prefix,
+                "cloudinary_url": upload.log.cloudinary_url if upload.log else None,
+            },
+            status=(
+                status.HTTP_201_CREATED
+                if upload.success_count
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+
+def is_uuid(value):
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError):
+        return False
+    return True
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venturedeposits', '0003_alter_venturedeposit_identity'),
+        ('ventures', '0002_alter_ventureaccount_venture_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venturedeposit',
+            index=models.Index(fields=['deposited_by', 'created_at'], name='venturedepo_deposit_8a55cb_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venturedeposits', '0004_venturedeposit_venturedepo_deposit_8a55cb_idx'),
+        ('ventures', '0002_alter_ventureaccount_venture_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venturedeposit',
+            index=models.Index(fields=['created_at', 'id'], name='venturedepo_created_c40c4e_idx'),
+        ),
+    ]
@@ -33,7 +33,9 @@ class VentureDeposit(TimeStampedModel, UniversalIdModel, ReferenceModel):
         verbose_name_plural = "Venture Deposits"
         ordering = ["-created_at"]
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["venture_account", "created_at"]),
+            models.Index(fields=["deposited_by", "created_at"]),
             models.Index(fields=["reference"]),
         ]
 
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venturepayments', '0001_initial'),
+        ('ventures', '0002_alter_ventureaccount_venture_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venturepayment',
+            index=models.Index(fields=['venture_account', 'created_at'], name='venturepaym_venture_09a21e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venturepayment',
+            index=models.Index(fields=['paid_by', 'created_at'], name='venturepaym_paid_by_20cc6a_idx'),
+        ),
+    ]
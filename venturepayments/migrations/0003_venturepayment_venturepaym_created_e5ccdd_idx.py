@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venturepayments', '0002_venturepayment_venturepaym_venture_09a21e_idx_and_more'),
+        ('ventures', '0002_alter_ventureaccount_venture_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venturepayment',
+            index=models.Index(fields=['created_at', 'id'], name='venturepaym_created_e5ccdd_idx'),
+        ),
+    ]
@@ -69,6 +69,11 @@ class VenturePayment(TimeStampedModel, UniversalIdModel, ReferenceModel):
         verbose_name = "Venture Payment"
         verbose_name_plural = "Venture Payments"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["venture_account", "created_at"]),
+            models.Index(fields=["paid_by", "created_at"]),
+        ]
 
     def __str__(self):
         return f"Payment {self.reference} for Venture {self.venture_account.account_number} - Amount: {self.amount}"